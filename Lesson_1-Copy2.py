@@ -35,6 +35,14 @@ from haystack.components.embedders import OpenAIDocumentEmbedder
 embedder = OpenAIDocumentEmbedder(model="text-embedding-3-small")
 
 
+# > Note: To run without an OpenAI key, use the offline CPU embedders from `local_embedders.py` instead. Use `LocalDocumentEmbedder` for documents and `LocalTextEmbedder` for queries:
+# 
+# ```
+# from local_embedders import LocalDocumentEmbedder
+# 
+# embedder = LocalDocumentEmbedder(model="sentence-transformers/all-MiniLM-L6-v2")
+# ```
+
 # In[4]:
 
 
@@ -56,17 +64,25 @@ embedder.run(documents=documents)
 # ## Pipelines
 # ### Initialize a Document Store
 # 
-# Check out other available [Document Stores](https://docs.haystack.deepset.ai/docs/document-store?utm_campaign=developer-relations&utm_source=dlai). In this example, we will use the simplest document store that has no setup requirements, the [`InMemoryDocumentStore`](https://docs.haystack.deepset.ai/docs/inmemorydocumentstore?utm_campaign=developer-relations&utm_source=dlai).
+# Check out other available [Document Stores](https://docs.haystack.deepset.ai/docs/document-store?utm_campaign=developer-relations&utm_source=dlai). In this example, we will use the simplest document store that has no setup requirements, the [`InMemoryDocumentStore`](https://docs.haystack.deepset.ai/docs/inmemorydocumentstore?utm_campaign=developer-relations&utm_source=dlai), with secondary indexes on the metadata fields we filter on. `CompactDocumentStore` keeps the chunks in columns (one text arena, one float32 embedding matrix) rather than as a `Document` each, and builds `Document`s only for the results, which takes a fraction of the memory once there are many chunks.
 # 
 
 # In[7]:
 
 
-from haystack.document_stores.in_memory import InMemoryDocumentStore
+from compact_store import CompactDocumentStore
 
-document_store = InMemoryDocumentStore()
+document_store = CompactDocumentStore(indexed_fields=["file_path", "title"])
 
 
+# > Note: For a corpus much larger than `davinci.txt`, `ShardedDocumentStore` (from `sharded_store.py`) splits the documents across worker processes and queries them all at once, so retrieval uses every core. Use it with the retrievers of the same module:
+# > ```python
+# > from sharded_store import ShardedDocumentStore, ShardedEmbeddingRetriever
+# > document_store = ShardedDocumentStore(num_shards=4)
+# > retriever = ShardedEmbeddingRetriever(document_store=document_store)
+# > ```
+# > The workers are forked where the platform allows it. On Windows they're spawned instead, and each re-runs the script that started it, so a script there must create the store under `if __name__ == "__main__":`.
+
 # ### Writing documents with embeddings into a document store
 # 
 
@@ -76,12 +92,14 @@ document_store = InMemoryDocumentStore()
 from haystack import Pipeline
 
 from haystack.components.converters.txt import TextFileToDocument
-from haystack.components.preprocessors.document_splitter import DocumentSplitter
 from haystack.components.embedders import OpenAIDocumentEmbedder
 from haystack.components.writers import DocumentWriter
+from chunking import SegmentationCache, SentenceChunker
+from dedup import NearDuplicateFilter, NearDuplicateIndex
 
 converter = TextFileToDocument()
-splitter = DocumentSplitter()
+splitter = SentenceChunker(max_words=200, min_words=40, cache=SegmentationCache(path="segments.sqlite"))
+dedup = NearDuplicateFilter(NearDuplicateIndex(threshold=0.8, path="signatures.sqlite"), document_store=document_store)
 embedder = OpenAIDocumentEmbedder()
 writer = DocumentWriter(document_store=document_store)
 
@@ -89,17 +107,23 @@ indexing_pipeline = Pipeline()
 
 indexing_pipeline.add_component("converter", converter)
 indexing_pipeline.add_component("splitter", splitter)
+indexing_pipeline.add_component("dedup", dedup)
 indexing_pipeline.add_component("embedder", embedder)
 indexing_pipeline.add_component("writer", writer)
 
 
 # #### Connecting Components
+# 
+# `splitter` (from `chunking.py`) cuts chunks between sentences and at paragraph breaks instead of every 200 words, so no chunk ends in the middle of a sentence. Its segmentations are kept in `segments.sqlite` by a fingerprint of the file's text, so an unchanged file isn't segmented again. Pass `embedder=OpenAIDocumentEmbedder()` to also end chunks where the topic changes.
+# 
+# `dedup` (from `dedup.py`) sits between the splitter and the embedder and drops chunks that are near-duplicates (80% of their 3-word shingles in common) of a chunk already in the store or earlier in the batch, so they cost no embedding call. Its signatures are kept in `signatures.sqlite`, so running the indexing again embeds nothing new.
 
 # In[9]:
 
 
 indexing_pipeline.connect("converter", "splitter")
-indexing_pipeline.connect("splitter", "embedder")
+indexing_pipeline.connect("splitter", "dedup")
+indexing_pipeline.connect("dedup.documents", "embedder")
 indexing_pipeline.connect("embedder", "writer")
 
 
@@ -118,16 +142,28 @@ indexing_pipeline.run({"converter": {"sources": ['data/davinci.txt']}})
 document_store.filter_documents()[5].content
 
 
+# Metadata filters are answered from the `file_path` index instead of a scan over every document.
+
+# In[ ]:
+
+
+len(document_store.filter_documents(filters={"field": "meta.file_path", "operator": "==", "value": "data/davinci.txt"}))
+
+
 # ### Creating a document search pipeline
 
 # In[13]:
 
 
 from haystack.components.embedders import OpenAITextEmbedder
-from haystack.components.retrievers.in_memory import InMemoryEmbeddingRetriever
+from embedding_cache import CachedTextEmbedder
+from retrieval_cache import CachedEmbeddingRetriever
+from compiled_pipeline import compile_pipeline
 
-query_embedder = OpenAITextEmbedder()
-retriever = InMemoryEmbeddingRetriever(document_store=document_store)
+# Repeated questions are answered from the cache instead of calling the embedding API again
+query_embedder = CachedTextEmbedder(OpenAITextEmbedder())
+# ... and their top_k from the retriever's cache, until a write or delete changes the store's version
+retriever = CachedEmbeddingRetriever(document_store=document_store)
 
 document_search = Pipeline()
 
@@ -136,6 +172,9 @@ document_search.add_component("retriever", retriever)
 
 document_search.connect("query_embedder.embedding", "retriever.query_embedding")
 
+# The pipeline runs once per question: compile it so each run skips re-validating and re-scheduling the graph
+document_search = compile_pipeline(document_search)
+
 
 # In[14]:
 
@@ -244,6 +283,39 @@ for i, document in enumerate(results["retriever"]["documents"]):
     print(document.content)
 
 
+# ### Expanding the query
+# 
+# Short or odd questions like "Sensei Davinci" or "Did davinci die in the year 1200" make poor embeddings on their own. `QueryExpander` (from `query_expansion.py`) asks the LLM for a few reformulations of the question (`mode="hyde"` asks for a passage that would answer it instead). `MultiQueryEmbeddingRetriever` embeds the question and its variants concurrently, as queries, retrieves them all at once and merges the rankings with reciprocal rank fusion. Expansions are cached by question. If the LLM takes longer than `latency_budget` seconds, the question is retrieved alone, and the expansion lands in the cache for the next time.
+
+# In[ ]:
+
+
+from haystack.components.generators import OpenAIGenerator
+from query_expansion import MultiQueryEmbeddingRetriever, QueryExpander
+
+expanded_search = Pipeline()
+
+expanded_search.add_component("expander", QueryExpander(OpenAIGenerator(), num_queries=3, latency_budget=2.0))
+# A second embedder, sharing the cache of `query_embedder`: a component can only be in one pipeline
+expanded_search.add_component("retriever", MultiQueryEmbeddingRetriever(document_store=document_store, embedder=CachedTextEmbedder(OpenAITextEmbedder(), cache=query_embedder.cache)))
+
+expanded_search.connect("expander.queries", "retriever.queries")
+
+
+# In[ ]:
+
+
+question = "Sensei Davinci"
+
+results = expanded_search.run({"expander": {"query": question},
+                               "retriever": {"top_k": 1}})
+
+for i, document in enumerate(results["retriever"]["documents"]):
+    print("\n--------------\n")
+    print(f"DOCUMENT {i}")
+    print(document.content)
+
+
 # In[ ]:
 
 
@@ -21,16 +21,20 @@ load_env()
 
 from haystack import Pipeline
 from haystack.utils.auth import Secret
-from haystack.components.builders import PromptBuilder
-from haystack.components.converters import HTMLToDocument
-from haystack.components.fetchers import LinkContentFetcher
 from haystack.components.generators import OpenAIGenerator
-from haystack.components.retrievers.in_memory import InMemoryEmbeddingRetriever
 from haystack.components.writers import DocumentWriter
-from haystack.document_stores.in_memory import InMemoryDocumentStore
-
 from haystack_integrations.components.embedders.cohere import CohereDocumentEmbedder, CohereTextEmbedder
 
+from embedding_cache import CachedTextEmbedder, QueryEmbeddingCache
+from indexed_store import IndexedInMemoryDocumentStore
+from retrieval_cache import CachedEmbeddingRetriever
+from compiled_pipeline import compile_pipeline
+from prompt_cache import CachedPromptBuilder
+from streaming import stream_pipeline
+from warm_start import load_pipeline, save_pipeline
+from async_fetcher import AsyncLinkContentFetcher, ParallelHTMLToDocument
+from dedup import NearDuplicateFilter, NearDuplicateIndex
+
 
 # <p style="background-color:#fff6ff; padding:15px; border-width:3px; border-color:#efe6ef; border-style:solid; border-radius:6px"> 💻 &nbsp; <b>Access <code>requirements.txt</code> and <code>helper.py</code> files:</b> 1) click on the <em>"File"</em> option on the top menu of the notebook and then 2) click on <em>"Open"</em>. For more help, please see the <em>"Appendix - Tips and Help"</em> Lesson.</p>
 
@@ -40,28 +44,45 @@ from haystack_integrations.components.embedders.cohere import CohereDocumentEmbe
 # - Write them to an [`InMemoryDocumentStore`](https://docs.haystack.deepset.ai/docs/inmemorydocumentstore?utm_campaign=developer-relations&utm_source=dlai)
 # 
 # > ℹ️ Model providers may have outages. If you encounter issues creating embeddings or generating responses, feel free to consider any of the other [Embedder](https://docs.haystack.deepset.ai/docs/embedders?utm_campaign=developer-relations&utm_source=dlai) or [Generator](https://docs.haystack.deepset.ai/docs/generators?utm_campaign=developer-relations&utm_source=dlai) options. For this lesson, we recomment Cohere embedders, or small [Sentence Transformers](https://docs.haystack.deepset.ai/docs/sentencetransformersdocumentembedder?utm_campaign=developer-relations&utm_source=dlai) embedders.
+# 
+# > Note: To embed offline on CPU, swap both Cohere embedders for the local ones in `local_embedders.py`. Use the same model for documents and queries:
+# 
+# ```
+# from local_embedders import LocalDocumentEmbedder, LocalTextEmbedder
+# 
+# embedder = LocalDocumentEmbedder(backend="onnx", quantize=True)
+# query_embedder = LocalTextEmbedder(backend="onnx", quantize=True)
+# ```
 
 # ## Indexing Documents
 # 
+# `AsyncLinkContentFetcher` and `ParallelHTMLToDocument` (from `async_fetcher.py`) are drop-in replacements for `LinkContentFetcher` and `HTMLToDocument`: pages are fetched concurrently, at most 4 at a time from the same site, and pages that haven't changed since the last run are answered by the server with a `304` and read from `http_cache.sqlite`. The text of many pages is extracted in parallel processes.
+# 
+# Pages that are near-copies of one already indexed, like mirrors or the same page under another URL, are dropped by `NearDuplicateFilter` (from `dedup.py`) before they are embedded. Pages that only share the site's navigation and footer are kept.
+# 
+# > For crawls of thousands of pages, `index_urls(urls, fetcher, converter, embedder, document_store)` runs the same steps with each page converted as soon as it arrives and the embedder called as soon as a batch of documents is ready.
 
 # In[3]:
 
 
-document_store = InMemoryDocumentStore()
+document_store = IndexedInMemoryDocumentStore(indexed_fields=["url", "title"])
 
-fetcher = LinkContentFetcher()
-converter = HTMLToDocument()
+fetcher = AsyncLinkContentFetcher(max_per_host=4, cache_path="http_cache.sqlite")
+converter = ParallelHTMLToDocument()
+dedup = NearDuplicateFilter(NearDuplicateIndex(threshold=0.8, path="signatures.sqlite"), document_store=document_store)
 embedder = CohereDocumentEmbedder(model="embed-english-v3.0", api_base_url=os.getenv("CO_API_URL"))
 writer = DocumentWriter(document_store=document_store)
 
 indexing = Pipeline()
 indexing.add_component("fetcher", fetcher)
 indexing.add_component("converter", converter)
+indexing.add_component("dedup", dedup)
 indexing.add_component("embedder", embedder)
 indexing.add_component("writer", writer)
 
 indexing.connect("fetcher.streams", "converter.sources")
-indexing.connect("converter", "embedder")
+indexing.connect("converter", "dedup")
+indexing.connect("dedup.documents", "embedder")
 indexing.connect("embedder", "writer")
 
 
@@ -112,13 +133,21 @@ Question: {{ query }}
 
 
 # ### 2. Build the Pipeline
+# `compile_pipeline` (from `compiled_pipeline.py`) freezes the finished pipeline into a fixed execution plan, so the orchestration work `Pipeline.run` redoes on every question happens only once.
+# 
+# `CachedEmbeddingRetriever` (from `retrieval_cache.py`) keeps the top_k of recent question embeddings. A repeated question skips the scoring until the next write or delete changes the document store's `version`.
 
 # In[8]:
 
 
-query_embedder = CohereTextEmbedder(model="embed-english-v3.0", api_base_url=os.getenv("CO_API_URL"))
-retriever = InMemoryEmbeddingRetriever(document_store=document_store)
-prompt_builder = PromptBuilder(template=prompt)
+# Both RAG pipelines below share one query-embedding cache
+embedding_cache = QueryEmbeddingCache()
+
+query_embedder = CachedTextEmbedder(
+    CohereTextEmbedder(model="embed-english-v3.0", api_base_url=os.getenv("CO_API_URL")), cache=embedding_cache
+)
+retriever = CachedEmbeddingRetriever(document_store=document_store)
+prompt_builder = CachedPromptBuilder(template=prompt)
 generator = OpenAIGenerator()
 
 rag = Pipeline()
@@ -131,6 +160,8 @@ rag.connect("query_embedder.embedding", "retriever.query_embedding")
 rag.connect("retriever.documents", "prompt.documents")
 rag.connect("prompt", "generator")
 
+rag = compile_pipeline(rag)
+
 
 # > Note: It is possible to use a different model for the generator. For example, if you'd like to use Llama-3, update the code above to:
 # 
@@ -184,9 +215,11 @@ Answer:
 # In[ ]:
 
 
-query_embedder = CohereTextEmbedder(model="embed-english-v3.0", api_base_url=os.getenv("CO_API_URL"))
-retriever = InMemoryEmbeddingRetriever(document_store=document_store)
-prompt_builder = PromptBuilder(template=prompt)
+query_embedder = CachedTextEmbedder(
+    CohereTextEmbedder(model="embed-english-v3.0", api_base_url=os.getenv("CO_API_URL")), cache=embedding_cache
+)
+retriever = CachedEmbeddingRetriever(document_store=document_store)
+prompt_builder = CachedPromptBuilder(template=prompt)
 generator = OpenAIGenerator(model="gpt-3.5-turbo")
 
 rag = Pipeline()
@@ -199,6 +232,8 @@ rag.connect("query_embedder.embedding", "retriever.query_embedding")
 rag.connect("retriever.documents", "prompt.documents")
 rag.connect("prompt", "generator")
 
+rag = compile_pipeline(rag)
+
 
 # In[ ]:
 
@@ -216,6 +251,95 @@ result = rag.run(
 print(result["generator"]["replies"][0])
 
 
+# Filtering on `meta['url']` narrows the candidates through the `url` index before any embedding is scored.
+
+# In[ ]:
+
+
+result = rag.run(
+    {
+        "query_embedder": {"text": question},
+        "retriever": {
+            "top_k": 1,
+            "filters": {"field": "meta.url", "operator": "==", "value": "https://haystack.deepset.ai/integrations/cohere"},
+        },
+        "prompt": {"query": question, "language": "French"},
+    }
+)
+
+print(result["generator"]["replies"][0])
+
+
+# ### 4. Rerank a Larger Candidate Set
+# Retrieve 20 candidates and let a local cross-encoder pick the best 2 for the prompt. With `score_gap`, easy queries stop scoring once the remaining candidates are clearly worse.
+
+# In[ ]:
+
+
+from rerankers import CrossEncoderReranker
+
+rag = Pipeline()
+rag.add_component(
+    "query_embedder",
+    CachedTextEmbedder(
+        CohereTextEmbedder(model="embed-english-v3.0", api_base_url=os.getenv("CO_API_URL")), cache=embedding_cache
+    ),
+)
+rag.add_component("retriever", CachedEmbeddingRetriever(document_store=document_store, top_k=20))
+rag.add_component("reranker", CrossEncoderReranker(top_k=2, score_gap=4.0))
+rag.add_component("prompt", CachedPromptBuilder(template=prompt))
+rag.add_component("generator", OpenAIGenerator(model="gpt-3.5-turbo"))
+
+rag.connect("query_embedder.embedding", "retriever.query_embedding")
+rag.connect("retriever.documents", "reranker.documents")
+rag.connect("reranker.documents", "prompt.documents")
+rag.connect("prompt", "generator")
+
+
+# In[ ]:
+
+
+result = rag.run(
+    {
+        "query_embedder": {"text": question},
+        "reranker": {"query": question},
+        "prompt": {"query": question, "language": "French"},
+    }
+)
+
+print(result["generator"]["replies"][0])
+
+
+# Building this pipeline took fetching and embedding every page. `save_pipeline` (from `warm_start.py`) writes the finished pipeline, with a snapshot of the document store, to one file; a worker that loads it skips the indexing, and the reranker's model is only loaded when the first question reaches it.
+
+# In[ ]:
+
+
+save_pipeline(rag, "rag_rerank.pipeline")
+
+rag = load_pipeline("rag_rerank.pipeline")
+
+
+# ### 5. Stream the Answer
+# `stream_pipeline` (from `streaming.py`) runs the pipeline in the background and hands over the generator's tokens as they arrive, so the answer starts printing long before it is complete.
+
+# In[ ]:
+
+
+stream = stream_pipeline(
+    rag,
+    {
+        "query_embedder": {"text": question},
+        "reranker": {"query": question},
+        "prompt": {"query": question, "language": "French"},
+    },
+    streaming_components=["generator"],
+)
+for token in stream:
+    print(token, end="", flush=True)
+print(f"\n\nFirst token after {stream.time_to_first_token:.2f}s")
+
+
 # In[ ]:
 
 
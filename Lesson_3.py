@@ -23,11 +23,16 @@ import requests
 from typing import List
 
 from haystack import Document, Pipeline, component
-from haystack.components.builders import PromptBuilder
 from haystack.components.generators.openai import OpenAIGenerator
-from haystack.components.fetchers import LinkContentFetcher
 from haystack.components.converters import HTMLToDocument
 
+from async_fetcher import AsyncLinkContentFetcher
+from async_generators import AsyncOpenAIGenerator
+from batch_api import OpenAIBatchGenerator
+from http_cache import HTTPCache
+from prompt_cache import CachedPromptBuilder
+from streaming import stream_pipeline
+
 
 # <p style="background-color:#fff6ff; padding:15px; border-width:3px; border-color:#efe6ef; border-style:solid; border-radius:6px"> 💻 &nbsp; <b>Access <code>requirements.txt</code> and <code>helper.py</code> files:</b> 1) click on the <em>"File"</em> option on the top menu of the notebook and then 2) click on <em>"Open"</em>. For more help, please see the <em>"Appendix - Tips and Help"</em> Lesson.</p>
 
@@ -67,7 +72,7 @@ Create a short play script using this as the start of the play.
 Start of dialogue: {{ dialogue }}
 Full script: 
 """
-prompt = PromptBuilder(template=template)
+prompt = CachedPromptBuilder(template=template)
 llm = OpenAIGenerator()
 
 dialogue_builder = Pipeline()
@@ -124,10 +129,13 @@ class HackernewsNewestFetcher:
 # In[10]:
 
 
+http_cache = HTTPCache("http_cache.sqlite", default_ttl=600)
+
+
 @component
 class HackernewsNewestFetcher:
     def __init__(self):
-        fetcher = LinkContentFetcher()
+        fetcher = AsyncLinkContentFetcher(cache=http_cache)
         converter = HTMLToDocument()
 
         html_conversion_pipeline = Pipeline()
@@ -140,29 +148,31 @@ class HackernewsNewestFetcher:
     @component.output_types(articles=List[Document])
     def run(self, top_k: int):
         articles = []
-        trending_list = requests.get(
+        trending_list = http_cache.fetch(
             url="https://hacker-news.firebaseio.com/v0/topstories.json?print=pretty"
         )
         for id in trending_list.json()[0:top_k]:
-            post = requests.get(
+            post = http_cache.fetch(
                 url=f"https://hacker-news.firebaseio.com/v0/item/{id}.json?print=pretty"
-            )
-            if "url" in post.json():
+            ).json()
+            if "url" in post:
                 try:
                     article = self.html_pipeline.run(
-                        {"fetcher": {"urls": [post.json()["url"]]}}
+                        {"fetcher": {"urls": [post["url"]]}}
                     )
                     articles.append(article["converter"]["documents"][0])
                 except:
                     print(f"Can't download {post}, skipped")
-            elif "text" in post.json():
+            elif "text" in post:
                 try:
-                    articles.append(Document(content=post.json()["text"], meta= {"title": post.json()["title"]}))
+                    articles.append(Document(content=post["text"], meta= {"title": post["title"]}))
                 except:
                     print(f"Can't download {post}, skipped")
         return {"articles": articles}
 
 
+# The story list and the posts go through `http_cache.sqlite` (see `http_cache.py`): the list is fetched at most every 2 minutes, each post at most once an hour and each linked article at most every 10 minutes, and after that an article is only downloaded again if its server says it changed. Running the summarizer again right away makes almost no requests.
+
 # In[11]:
 
 
@@ -187,12 +197,14 @@ Posts:
 """
 
 
+# > The summarizer's `llm` is an `AsyncOpenAIGenerator` (from `async_generators.py`). Its calls go through a scheduler shared by every pipeline in the process, which keeps them within the account's rate limits (`OPENAI_REQUESTS_PER_MINUTE` and `OPENAI_TOKENS_PER_MINUTE`) instead of retrying into `429`s. `priority="batch"` lets interactive requests, like a chat turn, go first, and identical prompts in flight at the same time share one call.
+
 # In[13]:
 
 
-prompt_builder = PromptBuilder(template=prompt_template)
+prompt_builder = CachedPromptBuilder(template=prompt_template)
 fetcher = HackernewsNewestFetcher()
-llm = OpenAIGenerator()
+llm = AsyncOpenAIGenerator(priority="batch")
 
 summarizer_pipeline = Pipeline()
 summarizer_pipeline.add_component("fetcher", fetcher)
@@ -231,9 +243,9 @@ Posts:
 {% endfor %}  
 """
 
-prompt_builder = PromptBuilder(template=prompt_template)
+prompt_builder = CachedPromptBuilder(template=prompt_template)
 fetcher = HackernewsNewestFetcher()
-llm = OpenAIGenerator()
+llm = AsyncOpenAIGenerator(priority="batch")
 
 summarizer_pipeline = Pipeline()
 summarizer_pipeline.add_component("fetcher", fetcher)
@@ -252,6 +264,40 @@ summaries = summarizer_pipeline.run({"fetcher": {"top_k": 2}})
 print(summaries["llm"]["replies"][0])
 
 
+# Summaries of several posts take a while to generate. `stream_pipeline` (from `streaming.py`) runs the pipeline in the background and prints the summary as the LLM writes it; the full outputs are in `stream.result` once it's done.
+
+# In[ ]:
+
+
+stream = stream_pipeline(summarizer_pipeline, {"fetcher": {"top_k": 2}}, streaming_components=["llm"])
+for token in stream:
+    print(token, end="", flush=True)
+print(f"\n\nFirst token after {stream.time_to_first_token:.2f}s")
+
+
+# ### Summarize many posts as an offline job
+# 
+# > When the summaries can wait, `OpenAIBatchGenerator` (from `batch_api.py`) sends all the prompts as one batch through OpenAI's Batch API. It costs half as much and doesn't count against the rate limits, but the replies can take up to 24 hours. The prompts are rendered one per post, and the replies come back in the same order. Replies are saved in `batches/`: if the notebook dies while it waits, running the cell again picks up the same batch instead of paying for a new one.
+
+# In[ ]:
+
+
+articles = HackernewsNewestFetcher().run(top_k=20)["articles"]
+prompts = [prompt_builder.run(articles=[article])["prompt"] for article in articles]
+
+batch_llm = OpenAIBatchGenerator(work_dir="batches", poll_interval=60)
+batch_summaries = batch_llm.run(prompts=prompts)
+
+for article, summary in zip(articles, batch_summaries["replies"]):
+    print(article.meta.get("url", article.meta.get("title")), "\n", summary, "\n")
+
+
+# In[ ]:
+
+
+print(f"HTTP cache hit rate: {http_cache.hit_rate():.0%} {http_cache.stats}")
+
+
 # ### Extra resources! 
 # 
 # Learn more about the Haystack integrations:
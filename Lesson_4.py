@@ -20,12 +20,14 @@ load_env()
 
 from haystack import Pipeline, Document
 from haystack.components.routers import ConditionalRouter
-from haystack.components.builders.prompt_builder import PromptBuilder
 from haystack.components.generators import OpenAIGenerator
 from haystack.components.retrievers.in_memory import InMemoryBM25Retriever
 from haystack.components.websearch.serper_dev import SerperDevWebSearch
 from haystack.document_stores.in_memory import InMemoryDocumentStore
 
+from http_cache import CachedWebSearch, HTTPCache
+from prompt_cache import CachedPromptBuilder
+
 
 # <p style="background-color:#fff6ff; padding:15px; border-width:3px; border-color:#efe6ef; border-style:solid; border-radius:6px"> 💻 &nbsp; <b>Access <code>requirements.txt</code> and <code>helper.py</code> files:</b> 1) click on the <em>"File"</em> option on the top menu of the notebook and then 2) click on <em>"Open"</em>. For more help, please see the <em>"Appendix - Tips and Help"</em> Lesson.</p>
 
@@ -64,7 +66,7 @@ Documents:
 
 rag = Pipeline()
 rag.add_component("retriever", InMemoryBM25Retriever(document_store=document_store))
-rag.add_component("prompt_builder", PromptBuilder(template=rag_prompt_template))
+rag.add_component("prompt_builder", CachedPromptBuilder(template=rag_prompt_template))
 rag.add_component("llm", OpenAIGenerator())
 
 rag.connect("retriever.documents", "prompt_builder.documents")
@@ -171,17 +173,21 @@ Documents:
 
 
 # ### Build a Pipeline with Conditional Routes
+# 
+# Each web search is a paid Serper API call. `CachedWebSearch` (from `http_cache.py`) keeps the results in `http_cache.sqlite` for a day, keyed on the normalized query, so asking the same question again, even with different case or spacing, doesn't call the API.
 
 # In[15]:
 
 
+http_cache = HTTPCache("http_cache.sqlite")
+
 rag_or_websearch = Pipeline()
 rag_or_websearch.add_component("retriever", InMemoryBM25Retriever(document_store=document_store))
-rag_or_websearch.add_component("prompt_builder", PromptBuilder(template=rag_prompt_template))
+rag_or_websearch.add_component("prompt_builder", CachedPromptBuilder(template=rag_prompt_template))
 rag_or_websearch.add_component("llm", OpenAIGenerator())
 rag_or_websearch.add_component("router", ConditionalRouter(routes))
-rag_or_websearch.add_component("websearch", SerperDevWebSearch())
-rag_or_websearch.add_component("prompt_builder_for_websearch", PromptBuilder(template=prompt_for_websearch))
+rag_or_websearch.add_component("websearch", CachedWebSearch(SerperDevWebSearch(), cache=http_cache))
+rag_or_websearch.add_component("prompt_builder_for_websearch", CachedPromptBuilder(template=prompt_for_websearch))
 rag_or_websearch.add_component("llm_for_websearch",  OpenAIGenerator())
 
 rag_or_websearch.connect("retriever", "prompt_builder.documents")
@@ -215,6 +221,12 @@ rag_or_websearch.run({"prompt_builder":{"query": query},
                       "router": {"query": query}})
 
 
+# In[ ]:
+
+
+print(f"Web search cache hit rate: {http_cache.hit_rate():.0%} {http_cache.stats}")
+
+
 # **Next:** Try out the following questions:
 # 
 # - "Who is the president of the USA?"
@@ -22,8 +22,11 @@ load_env()
 from typing import List
 from colorama import Fore
 from haystack import Pipeline, component
-from haystack.components.builders.prompt_builder import PromptBuilder
-from haystack.components.generators.openai import OpenAIGenerator
+
+from async_generators import AsyncOpenAIGenerator
+from batch_api import OpenAIBatchGenerator
+from loop_budget import LoopBudget, run_with_budget
+from prompt_cache import CachedPromptBuilder
 
 
 # <p style="background-color:#fff6ff; padding:15px; border-width:3px; border-color:#efe6ef; border-style:solid; border-radius:6px"> 💻 &nbsp; <b>Access <code>requirements.txt</code> and <code>helper.py</code> files:</b> 1) click on the <em>"File"</em> option on the top menu of the notebook and then 2) click on <em>"Open"</em>. For more help, please see the <em>"Appendix - Tips and Help"</em> Lesson.</p>
@@ -99,11 +102,13 @@ template = """"
 
 # ### Create A Self-Reflecting Agent
 
+# > `llm` is an `AsyncOpenAIGenerator` (from `async_generators.py`) with `priority="batch"`: extracting entities from many texts at once, its calls queue behind interactive ones and stay within the account's rate limits instead of failing with `429`s.
+
 # In[7]:
 
 
-prompt_template = PromptBuilder(template=template)
-llm = OpenAIGenerator()
+prompt_template = CachedPromptBuilder(template=template)
+llm = AsyncOpenAIGenerator(priority="batch")
 entities_validator = EntitiesValidator()
 
 self_reflecting_agent = Pipeline(max_loops_allowed=10)
@@ -123,24 +128,35 @@ self_reflecting_agent.connect("entities_validator.entities_to_validate", "prompt
 self_reflecting_agent.show()
 
 
+# `Pipeline(max_loops_allowed=10)` only stops a loop that never says DONE after ten LLM calls, and then raises. `run_with_budget` (from `loop_budget.py`) gives each run its own budget: a number of passes through the loop, a deadline in seconds and a number of LLM tokens. When the budget runs out, the run stops before the next LLM call and returns the last entities the LLM came up with. `run.iterations` has the timing and tokens of each pass.
+
+# In[ ]:
+
+
+budget = LoopBudget(max_iterations=3, deadline=30, max_tokens=4000)
+
+
 # In[9]:
 
 
-text = """
+istanbul_text = """
 Istanbul is the largest city in Turkey, straddling the Bosporus Strait, 
 the boundary between Europe and Asia. It is considered the country's economic, 
 cultural and historic capital. The city has a population of over 15 million residents, 
 comprising 19% of the population of Turkey,[4] and is the most populous city in Europe 
 and the world's fifteenth-largest city."""
 
-result = self_reflecting_agent.run({"prompt_builder": {"text": text}})
-print(Fore.GREEN + result['entities_validator']['entities'])
+run = run_with_budget(self_reflecting_agent, {"prompt_builder": {"text": istanbul_text}}, budget, partial_output="llm.replies")
+if run.completed:
+    print(Fore.GREEN + run.outputs['entities_validator']['entities'])
+else:
+    print(Fore.YELLOW + f"Stopped by {run.stopped_by}, best entities so far:\n" + run.partial[0])
 
 
 # In[10]:
 
 
-text = """
+all_hands_text = """
 Stefano: Hey all, let's start the all hands for June 6th 2024
 Geoff: Thanks, I'll kick it off with a request. Could we please add persistent memory to the Chroma document store.
 Stefano: Easy enough, I can add that to the feature requests. What else?
@@ -149,8 +165,40 @@ Instead, we should probably check which algorithm is being used and keep results
 Esmail: Before we end this call, we should add a new Generator component for LlamaCpp in the next release.
 Tuana: Thanks all, I think we're done here, we can create some issues in GitHub about these."""
 
-result = self_reflecting_agent.run({"prompt_builder": {"text": text}})
-print(Fore.GREEN + result['entities_validator']['entities'])
+run = run_with_budget(self_reflecting_agent, {"prompt_builder": {"text": all_hands_text}}, budget, partial_output="llm.replies")
+if run.completed:
+    print(Fore.GREEN + run.outputs['entities_validator']['entities'])
+else:
+    print(Fore.YELLOW + f"Stopped by {run.stopped_by}, best entities so far:\n" + run.partial[0])
+
+
+# ### Extract entities from many texts as an offline job
+# 
+# > When there are many texts and no one is waiting for the answers, each pass of the loop can go out as one batch through OpenAI's Batch API with `OpenAIBatchGenerator` (from `batch_api.py`), at half the price. The first batch extracts the entities of every text, and the `EntitiesValidator` checks each reply. The texts without `DONE` go into the next batch with their reflection prompt. The replies are saved in `batches/`, so a run interrupted while it waits picks up the same batches when run again.
+
+# In[ ]:
+
+
+texts = [istanbul_text, all_hands_text]
+batch_llm = OpenAIBatchGenerator(work_dir="batches", poll_interval=60)
+
+entities, to_validate = {}, {i: None for i in range(len(texts))}
+for _ in range(budget.max_iterations):
+    if not to_validate:
+        break
+    prompts = [prompt_template.run(text=texts[i], entities_to_validate=previous)["prompt"]
+               for i, previous in to_validate.items()]
+    replies = batch_llm.run(prompts=prompts)["replies"]
+    for i, reply in zip(list(to_validate), replies):
+        result = entities_validator.run(replies=[reply])
+        if "entities" in result:
+            entities[i] = result["entities"]
+            del to_validate[i]
+        else:
+            to_validate[i] = result["entities_to_validate"]
+
+for i, text in enumerate(texts):
+    print(Fore.GREEN + entities[i] if i in entities else Fore.YELLOW + "Not DONE after the last pass")
 
 
 # In[ ]:
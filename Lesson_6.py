@@ -19,20 +19,32 @@ load_env()
 
 
 import pprint
-import gradio as gr
+import threading
 from typing import List
 from haystack import component, Pipeline, Document
-from haystack.components.builders import PromptBuilder
 from haystack.components.generators import OpenAIGenerator
 from haystack.components.generators.chat.openai import OpenAIChatGenerator
 from haystack.dataclasses import ChatMessage
 from haystack.components.joiners import BranchJoiner
 from haystack_experimental.components.tools import OpenAIFunctionCaller
 
+from async_generators import AsyncOpenAIChatGenerator, AsyncOpenAIGenerator
+from chat_service import ChatService
+from conversation_memory import ConversationMemory, SummaryStore
+from parallel_tools import ParallelFunctionCaller
+from prompt_cache import CachedPromptBuilder
+from startup import lazy_import
+from tool_rag import BM25Index, BM25IndexRetriever, cache_tool_results
+
+# gradio takes seconds to import and is only used by the UI at the end, so it's imported there
+gr = lazy_import("gradio", "Run 'pip install gradio'")
+
 
 # <p style="background-color:#fff6ff; padding:15px; border-width:3px; border-color:#efe6ef; border-style:solid; border-radius:6px"> 💻 &nbsp; <b>Access <code>requirements.txt</code> and <code>helper.py</code> files:</b> 1) click on the <em>"File"</em> option on the top menu of the notebook and then 2) click on <em>"Open"</em>. For more help, please see the <em>"Appendix - Tips and Help"</em> Lesson.</p>
 
 # ### Create RAG Pipeline as a Function
+# 
+# > The facts are indexed once, here, into a `BM25Index` (from `tool_rag.py`), and the pipeline only puts the `top_k` most relevant ones in the prompt. Looking a query up only touches the index entries of its words, so the tool stays as fast, and its prompt as short, with a hundred thousand facts as with five. `rag_pipeline_func` also caches its answers: the same query is only run once.
 
 # In[3]:
 
@@ -47,26 +59,42 @@ Context:
 Question: {{ question }}
 Answer:
 """
-rag_pipe = Pipeline()
-rag_pipe.add_component("prompt_builder", PromptBuilder(template=template))
-rag_pipe.add_component("llm", OpenAIGenerator())
+documents = [
+    Document(content="My name is Jean and I live in Paris."),
+    Document(content="My name is Mark and I live in Berlin."),
+    Document(content="My name is Giorgio and I live in Rome."),
+    Document(content="My name is Marta and I live in Madrid."),
+    Document(content="My name is Harry and I live in London."),
+]
+knowledge_base = BM25Index()
+knowledge_base.write_documents(documents)
+
+def build_rag_pipe():
+    rag_pipe = Pipeline()
+    rag_pipe.add_component("retriever", BM25IndexRetriever(index=knowledge_base, top_k=3))
+    rag_pipe.add_component("prompt_builder", CachedPromptBuilder(template=template))
+    rag_pipe.add_component("llm", OpenAIGenerator())
 
-rag_pipe.connect("prompt_builder", "llm")
+    rag_pipe.connect("retriever", "prompt_builder.documents")
+    rag_pipe.connect("prompt_builder", "llm")
+    return rag_pipe
+
+rag_pipe = build_rag_pipe()
 
 
 # In[4]:
 
 
+# The function caller below runs tool calls in parallel threads, and a Pipeline can't run twice at the same
+# time, so each thread gets its own copy of the RAG pipeline.
+rag_pipes = threading.local()
+
+@cache_tool_results(max_entries=1024, ttl=3600)
 def rag_pipeline_func(query: str):
-    documents = [
-        Document(content="My name is Jean and I live in Paris."),
-        Document(content="My name is Mark and I live in Berlin."),
-        Document(content="My name is Giorgio and I live in Rome."),
-        Document(content="My name is Marta and I live in Madrid."),
-        Document(content="My name is Harry and I live in London."),
-    ]
-    result = rag_pipe.run({"prompt_builder": {"question": query, 
-                                              "documents": documents}})
+    if not hasattr(rag_pipes, "pipe"):
+        rag_pipes.pipe = build_rag_pipe()
+    result = rag_pipes.pipe.run({"retriever": {"query": query},
+                                 "prompt_builder": {"question": query}})
     return {"reply": result["llm"]["replies"][0]}
 
 
@@ -172,23 +200,40 @@ pprint.pprint(results["function_replies"])
 
 # ### Create a Chat Agent with Tools
 # 
+# > The history goes through a `ConversationMemory` (from `conversation_memory.py`) before `message_collector`. It keeps the prompt within `max_tokens`: once the conversation outgrows it, older turns are folded into a running summary, and long function replies from earlier turns are shortened. Prompt size stays flat however long the chat gets.
+# 
+# > The generators are the `async_generators.py` drop-ins. All sessions share one scheduler that keeps the app within the account's rate limits. The memory writes its summaries inline, in the turn that outgrows `max_tokens`, so its summarizer goes out as `"interactive"` like the chat turns: as `"batch"` it would wait behind the other sessions' turns while its own user waits for it.
+# 
+# > The agent uses `ParallelFunctionCaller` from `parallel_tools.py` instead of `OpenAIFunctionCaller`: when the model asks for several tools in one turn (say, the weather in three cities), they run at the same time, each with a timeout, and the replies come back in the order of the tool calls.
 
 # In[11]:
 
 
-message_collector = BranchJoiner(List[ChatMessage])
-chat_generator = OpenAIChatGenerator(model="gpt-3.5-turbo", generation_kwargs={'tools': tools})
-function_caller = OpenAIFunctionCaller(available_functions={"rag_pipeline_func": rag_pipeline_func, 
-                                                            "get_current_weather": get_current_weather})
+summary_store = SummaryStore()
+
+def build_chat_agent():
+    memory = ConversationMemory(max_tokens=1500, summarizer=AsyncOpenAIGenerator(model="gpt-3.5-turbo", priority="interactive"),
+                                store=summary_store)
+    message_collector = BranchJoiner(List[ChatMessage])
+    chat_generator = AsyncOpenAIChatGenerator(model="gpt-3.5-turbo", generation_kwargs={'tools': tools},
+                                              priority="interactive")
+    function_caller = ParallelFunctionCaller(available_functions={"rag_pipeline_func": rag_pipeline_func, 
+                                                                  "get_current_weather": get_current_weather},
+                                             timeout=30.0)
+
+    chat_agent = Pipeline()
+    chat_agent.add_component("memory", memory)
+    chat_agent.add_component("message_collector", message_collector)
+    chat_agent.add_component("generator", chat_generator)
+    chat_agent.add_component("function_caller", function_caller)
 
-chat_agent = Pipeline()
-chat_agent.add_component("message_collector", message_collector)
-chat_agent.add_component("generator", chat_generator)
-chat_agent.add_component("function_caller", function_caller)
+    chat_agent.connect("memory.messages", "message_collector")
+    chat_agent.connect("message_collector", "generator.messages")
+    chat_agent.connect("generator", "function_caller")
+    chat_agent.connect("function_caller.function_replies", "message_collector")
+    return chat_agent
 
-chat_agent.connect("message_collector", "generator.messages")
-chat_agent.connect("generator", "function_caller")
-chat_agent.connect("function_caller.function_replies", "message_collector")
+chat_agent = build_chat_agent()
 
 
 # In[12]:
@@ -211,7 +256,7 @@ while True:
     if user_input.lower() == "exit" or user_input.lower() == "quit":
         break
     messages.append(ChatMessage.from_user(user_input))
-    response = chat_agent.run({"message_collector": {"value": messages}})
+    response = chat_agent.run({"memory": {"messages": messages}})
     messages.extend(response['function_caller']['assistant_replies'])
     print(response['function_caller']['assistant_replies'][0].content)
 
@@ -219,21 +264,23 @@ while True:
 # ### Gradio Chat App
 
 # Find out more information about **Gradio** [here](https://huggingface.co/gradio).
+# 
+# > Several people can use the app at once, so the history can't be a single `messages` list. `ChatService` (from `chat_service.py`) keeps one history per browser session, dropping sessions that have been idle for 30 minutes, and answers different sessions in parallel on a pool of workers, each with its own copy of the agent. Messages of one session are still answered in order. `chat()` streams: it yields the answer as the model writes it, so the first words show up right away.
 
 # In[14]:
 
 
-messages = [
-        ChatMessage.from_system(
-            """If needed, break down the user's question to simpler questions and follow-up questions that you can use with your tools.
-            Don't make assumptions about what values to plug into functions. Ask for clarification if a user request is ambiguous."""
-        )
-    ]
-def chat(message, history): 
-    messages.append(ChatMessage.from_user(message))
-    response = chat_agent.run({"message_collector": {"value": messages}})
-    messages.extend(response['function_caller']['assistant_replies'])
-    return response['function_caller']['assistant_replies'][0].content
+chat_service = ChatService(
+    build_chat_agent,
+    system_prompt="""If needed, break down the user's question to simpler questions and follow-up questions that you can use with your tools.
+    Don't make assumptions about what values to plug into functions. Ask for clarification if a user request is ambiguous.""",
+    max_workers=8,
+)
+def chat(message, history, request: gr.Request): 
+    answer = ""
+    for token in chat_service.stream(request.session_hash, message):
+        answer += token
+        yield answer
 
 
 # In[15]:
@@ -249,6 +296,7 @@ demo = gr.ChatInterface(
     ],
     title="Ask me about weather or where people live!",
 )
+demo.queue(default_concurrency_limit=8)
 demo.launch(share=True)
 
 
@@ -0,0 +1,508 @@
+# Concurrent crawling for indexing: an asyncio LinkContentFetcher, HTML conversion in a process pool, and
+# an indexing loop that embeds documents while the rest are still being fetched.
+
+import asyncio
+import multiprocessing
+import queue
+import random
+import ssl
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Literal, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import httpx
+from haystack import Document, component, default_to_dict, logging
+from haystack.components.converters.utils import get_bytestream_from_source, normalize_metadata
+from haystack.components.fetchers.link_content import DEFAULT_USER_AGENT, REQUEST_HEADERS
+from haystack.dataclasses import ByteStream
+
+from http_cache import CachedResponse, HTTPCache
+
+logger = logging.getLogger(__name__)
+
+_BINARY_TYPES = {"application/pdf", "application/octet-stream"}
+_DONE = object()
+
+
+def run_coroutine(coroutine: Any) -> Any:
+    """
+    Runs `coroutine` to completion from synchronous code, also where an event loop is already running
+    (Jupyter), by giving it its own loop in a helper thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+@component
+class AsyncLinkContentFetcher:
+    """
+    A drop-in `LinkContentFetcher` that fetches all URLs concurrently on one asyncio event loop.
+
+    At most `max_connections` requests are in flight, and at most `max_per_host` to any one host, so a crawl of
+    thousands of pages from a few sites doesn't hammer them. With `cache_path`, responses are kept in an
+    `HTTPCache`: within the TTL of their endpoint they are served without a request (`meta["cache"] == "hit"`),
+    after it the next fetch is a conditional request, and a `304 Not Modified` reuses the cached page
+    (`meta["cache"] == "revalidated"`).
+
+    `run()` returns the streams in URL order; `stream()` yields each one as soon as it arrives, to start
+    converting and embedding before the crawl is over.
+
+    Usage example:
+    ```python
+    fetcher = AsyncLinkContentFetcher(max_per_host=4, cache_path="http_cache.sqlite")
+    streams = fetcher.run(urls=["https://haystack.deepset.ai/integrations/cohere"])["streams"]
+    ```
+    """
+
+    def __init__(
+        self,
+        raise_on_failure: bool = True,
+        user_agents: Optional[List[str]] = None,
+        retry_attempts: int = 2,
+        timeout: float = 10.0,
+        max_connections: int = 64,
+        max_per_host: int = 4,
+        cache_path: Optional[str] = None,
+        cache: Optional[HTTPCache] = None,
+    ):
+        """
+        :param raise_on_failure: If `True`, raises an exception if it fails to fetch a single URL.
+            For multiple URLs, failures are logged and skipped.
+        :param user_agents: User agents to rotate through on retries. If `None`, a default user agent is used.
+        :param retry_attempts: Attempts per URL, including the first one.
+        :param timeout: Timeout in seconds for each request.
+        :param max_connections: Requests in flight at once, over all hosts.
+        :param max_per_host: Requests in flight at once to the same host.
+        :param cache_path: Path of an `HTTPCache` SQLite file for conditional requests, or `None` for no cache.
+        :param cache: An `HTTPCache` to share with other components instead of opening `cache_path`.
+        """
+        self.raise_on_failure = raise_on_failure
+        self.user_agents = user_agents or [DEFAULT_USER_AGENT]
+        self.retry_attempts = retry_attempts
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        if cache is None and cache_path:
+            cache = HTTPCache(cache_path)
+        self.cache = cache
+        self.cache_path = self.cache.path if self.cache is not None else None
+        self.stats = {"fetched": 0, "cached": 0, "revalidated": 0, "failed": 0, "bytes_downloaded": 0}
+        self._stats_lock = threading.Lock()
+        # Building an SSL context takes 20-40 ms; one per fetcher instead of one per run().
+        self._ssl_context: Optional[ssl.SSLContext] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            raise_on_failure=self.raise_on_failure,
+            user_agents=self.user_agents,
+            retry_attempts=self.retry_attempts,
+            timeout=self.timeout,
+            max_connections=self.max_connections,
+            max_per_host=self.max_per_host,
+            cache_path=self.cache_path,
+        )
+
+    @component.output_types(streams=List[ByteStream])
+    def run(self, urls: List[str]):
+        """
+        Fetches the URLs concurrently.
+
+        :param urls: URLs to fetch.
+        :returns: `streams`, one `ByteStream` per URL that could be fetched, in URL order, with the URL and
+            content type in its meta.
+        :raises Exception: If a single URL was given, it couldn't be fetched and `raise_on_failure` is set.
+        """
+        results: List[Optional[ByteStream]] = [None] * len(urls)
+
+        async def collect():
+            async for index, stream in self._fetch_all(urls, raise_on_failure=self.raise_on_failure and len(urls) == 1):
+                results[index] = stream
+
+        if urls:
+            run_coroutine(collect())
+        return {"streams": [stream for stream in results if stream is not None]}
+
+    def stream(self, urls: Iterable[str]) -> Iterator[ByteStream]:
+        """
+        Yields a `ByteStream` for each URL as soon as it has been fetched, in completion order. Failures are
+        logged and skipped. The fetching runs in a background thread.
+        """
+        urls = list(urls)
+        results: "queue.Queue[Any]" = queue.Queue()
+
+        async def produce():
+            async for _, stream in self._fetch_all(urls, raise_on_failure=False):
+                results.put(stream)
+
+        def worker():
+            try:
+                asyncio.run(produce())
+                results.put(_DONE)
+            except BaseException as error:
+                results.put(error)
+
+        threading.Thread(target=worker, name="async-fetcher", daemon=True).start()
+        while True:
+            item = results.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    async def astream(self, urls: Iterable[str]) -> AsyncIterator[ByteStream]:
+        """
+        `stream()` for asyncio code: yields each `ByteStream` as soon as it has been fetched.
+        """
+        async for _, stream in self._fetch_all(list(urls), raise_on_failure=False):
+            yield stream
+
+    async def _fetch_all(self, urls: List[str], raise_on_failure: bool) -> AsyncIterator[Tuple[int, ByteStream]]:
+        per_host: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.max_per_host))
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        if self._ssl_context is None:
+            self._ssl_context = httpx.create_ssl_context()
+        async with httpx.AsyncClient(
+            timeout=self.timeout, limits=limits, follow_redirects=True, verify=self._ssl_context
+        ) as client:
+
+            async def fetch(index: int, url: str) -> Tuple[int, Optional[ByteStream]]:
+                async with per_host[urlsplit(url).netloc]:
+                    try:
+                        return index, await self._fetch(client, url)
+                    except Exception as error:
+                        with self._stats_lock:
+                            self.stats["failed"] += 1
+                        if raise_on_failure:
+                            raise
+                        logger.warning("Error fetching {url}: {error}", url=url, error=str(error))
+                        return index, None
+
+            for done in asyncio.as_completed([fetch(i, url) for i, url in enumerate(urls)]):
+                index, stream = await done
+                if stream is not None:
+                    yield index, stream
+
+    async def _fetch(self, client: httpx.AsyncClient, url: str) -> ByteStream:
+        cached = self.cache.get(url) if self.cache is not None else None
+        if cached is not None and cached.fresh:
+            self.cache.record("hits")  # type: ignore[union-attr]
+            with self._stats_lock:
+                self.stats["cached"] += 1
+            return self._to_stream(url, cached.body, cached.content_type, "hit")
+        for attempt in range(self.retry_attempts):
+            headers = {**REQUEST_HEADERS, "User-Agent": self.user_agents[attempt % len(self.user_agents)]}
+            if cached is not None:
+                headers.update(cached.validators())
+            try:
+                response = await client.get(url, headers=headers)
+                if response.status_code == 304 and cached is not None:
+                    self.cache.touch(url)  # type: ignore[union-attr]
+                    self.cache.record("revalidated")  # type: ignore[union-attr]
+                    with self._stats_lock:
+                        self.stats["revalidated"] += 1
+                    return self._to_stream(url, cached.body, cached.content_type, "revalidated")
+                response.raise_for_status()
+                break
+            except httpx.HTTPError:
+                if attempt + 1 == self.retry_attempts:
+                    raise
+                await asyncio.sleep(min(10.0, 0.5 * 2**attempt) * (0.5 + random.random()))
+
+        content_type = response.headers.get("Content-Type", "text/html").split(";")[0]
+        # Text is re-encoded as UTF-8, as LinkContentFetcher does, so converters can decode it as such.
+        body = response.content if content_type in _BINARY_TYPES else response.text.encode()
+        with self._stats_lock:
+            self.stats["fetched"] += 1
+            self.stats["bytes_downloaded"] += len(response.content)
+        if self.cache is not None:
+            self.cache.record("misses")
+            self.cache.put(
+                CachedResponse(
+                    url=url,
+                    body=body,
+                    content_type=content_type,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    stored_at=time.time(),
+                )
+            )
+        return self._to_stream(url, body, content_type, "miss" if self.cache is not None else None)
+
+    @staticmethod
+    def _to_stream(url: str, body: bytes, content_type: str, cache: Optional[str]) -> ByteStream:
+        meta = {"content_type": content_type, "url": url}
+        if cache is not None:
+            meta["cache"] = cache
+        return ByteStream(data=body, meta=meta, mime_type=content_type)
+
+
+class _TextExtractor(HTMLParser):
+    # Visible text of a page, one line per block element; a fallback for when trafilatura isn't installed.
+    _SKIP = {"script", "style", "noscript", "head", "template", "svg", "nav", "footer"}
+    _BLOCKS = {"p", "div", "section", "article", "li", "br", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "pre"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines: List[str] = []
+        self._current: List[str] = []
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skipping += 1
+        elif tag in self._BLOCKS:
+            self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag in self._BLOCKS:
+            self._flush()
+
+    def handle_data(self, data):
+        if not self._skipping:
+            self._current.append(data)
+
+    def _flush(self):
+        line = " ".join("".join(self._current).split())
+        if line:
+            self.lines.append(line)
+        self._current = []
+
+    def text(self) -> str:
+        self._flush()
+        return "\n".join(self.lines)
+
+
+def _extract(data: bytes, backend: str, extraction_kwargs: Dict[str, Any]) -> Optional[str]:
+    # Runs in the worker processes, so it must stay a module-level function. Decoding here too means a page that
+    # isn't UTF-8 fails on its own, like one that can't be parsed, instead of failing the whole batch.
+    html = data.decode("utf-8")
+    if backend == "trafilatura":
+        from trafilatura import extract
+
+        return extract(html, **extraction_kwargs)
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+@component
+class ParallelHTMLToDocument:
+    """
+    A drop-in `HTMLToDocument` that extracts the text of many pages in parallel, in a pool of processes.
+
+    Text extraction is pure-Python CPU work, so threads don't help; `max_workers` processes do. Batches smaller
+    than `min_pool_batch` are converted in this process, where starting the pool would cost more than it saves.
+    `iter_documents()` converts a stream of pages (such as `AsyncLinkContentFetcher.stream()`) as they arrive.
+
+    `backend="trafilatura"` extracts like `HTMLToDocument`; `backend="html.parser"` keeps the visible text of
+    the page using only the standard library.
+
+    Usage example:
+    ```python
+    converter = ParallelHTMLToDocument(max_workers=4)
+    documents = converter.run(sources=streams)["documents"]
+    ```
+    """
+
+    def __init__(
+        self,
+        extraction_kwargs: Optional[Dict[str, Any]] = None,
+        max_workers: Optional[int] = None,
+        backend: Literal["trafilatura", "html.parser"] = "trafilatura",
+        min_pool_batch: int = 8,
+    ):
+        """
+        :param extraction_kwargs: Keyword arguments for trafilatura's `extract`.
+        :param max_workers: Worker processes; defaults to the number of CPUs.
+        :param backend: `"trafilatura"` or `"html.parser"`.
+        :param min_pool_batch: Smallest batch converted in the process pool.
+        """
+        if backend not in ("trafilatura", "html.parser"):
+            raise ValueError(f"Unknown backend '{backend}'. Use 'trafilatura' or 'html.parser'.")
+        self.extraction_kwargs = extraction_kwargs or {}
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.backend = backend
+        self.min_pool_batch = min_pool_batch
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            extraction_kwargs=self.extraction_kwargs,
+            max_workers=self.max_workers,
+            backend=self.backend,
+            min_pool_batch=self.min_pool_batch,
+        )
+
+    def warm_up(self):
+        """
+        Starts the worker processes.
+        """
+        self._get_pool()
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # Forked workers don't re-run the lesson script that created them, as spawned ones would.
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("fork" if "fork" in methods else None)
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            return self._pool
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        sources: List[Union[str, Path, ByteStream]],
+        meta: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None,
+        extraction_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Converts HTML files or streams to Documents, in the order of `sources`.
+
+        :param sources: HTML file paths or `ByteStream`s.
+        :param meta: Metadata for all Documents (a dictionary) or for each of them (a list as long as `sources`).
+            The meta of `ByteStream` sources is added too.
+        :param extraction_kwargs: Overrides for `extraction_kwargs`.
+        :returns: `documents`; sources that can't be read or converted are logged and skipped.
+        """
+        kwargs = {**self.extraction_kwargs, **(extraction_kwargs or {})}
+        pending = []
+        for source, metadata in zip(sources, normalize_metadata(meta=meta, sources_count=len(sources))):
+            try:
+                bytestream = get_bytestream_from_source(source=source)
+            except Exception as error:
+                logger.warning("Could not read {source}. Skipping it. Error: {error}", source=source, error=error)
+                continue
+            pending.append((bytestream, metadata))
+
+        if len(pending) < self.min_pool_batch:
+            texts: Iterable[Any] = (self._convert_here(bytestream, kwargs) for bytestream, _ in pending)
+        else:
+            pool = self._get_pool()
+            futures = [pool.submit(_extract, b.data, self.backend, kwargs) for b, _ in pending]
+            texts = (self._result(future) for future in futures)
+
+        documents = []
+        for (bytestream, metadata), text in zip(pending, texts):
+            if isinstance(text, Exception):
+                logger.warning("Failed to extract text from {source}. Error: {error}", source=bytestream.meta, error=text)
+                continue
+            documents.append(Document(content=text, meta={**bytestream.meta, **metadata}))
+        return {"documents": documents}
+
+    def iter_documents(self, streams: Iterable[ByteStream], max_pending: Optional[int] = None) -> Iterator[Document]:
+        """
+        Converts `streams` as they arrive and yields each Document as soon as it's ready, in completion order.
+
+        :param streams: Pages to convert, e.g. `AsyncLinkContentFetcher.stream(urls)`.
+        :param max_pending: Pages queued in the pool at most, to bound memory; defaults to 4 per worker.
+        """
+        pool = self._get_pool()
+        max_pending = max_pending or 4 * self.max_workers
+        in_flight: Dict[Future, ByteStream] = {}
+
+        def finished(block: bool) -> Iterator[Document]:
+            done, _ = wait(list(in_flight), timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in done:
+                bytestream = in_flight.pop(future)
+                text = self._result(future)
+                if isinstance(text, Exception):
+                    logger.warning("Failed to extract text from {source}. Error: {error}", source=bytestream.meta, error=text)
+                    continue
+                yield Document(content=text, meta=dict(bytestream.meta))
+
+        for bytestream in streams:
+            future = pool.submit(_extract, bytestream.data, self.backend, self.extraction_kwargs)
+            in_flight[future] = bytestream
+            yield from finished(block=len(in_flight) >= max_pending)
+        while in_flight:
+            yield from finished(block=True)
+
+    def _convert_here(self, bytestream: ByteStream, kwargs: Dict[str, Any]) -> Any:
+        try:
+            return _extract(bytestream.data, self.backend, kwargs)
+        except Exception as error:
+            return error
+
+    @staticmethod
+    def _result(future: Future) -> Any:
+        try:
+            return future.result()
+        except Exception as error:
+            return error
+
+
+def index_urls(
+    urls: Iterable[str],
+    fetcher: AsyncLinkContentFetcher,
+    converter: ParallelHTMLToDocument,
+    embedder: Any,
+    document_store: Any,
+    batch_size: int = 32,
+    embed_workers: int = 2,
+) -> Dict[str, Any]:
+    """
+    Fetches, converts, embeds and writes `urls` with the stages overlapping, like the Lesson 2 `indexing`
+    pipeline but without waiting for the whole crawl before converting, or for every page before embedding.
+
+    Pages are converted as they arrive and documents go to the embedder in batches of `batch_size` as soon as
+    a batch is full, while fetching and converting go on; up to `embed_workers` batches are embedded at once.
+
+    :param urls: URLs to index.
+    :param fetcher: Fetches the pages.
+    :param converter: Extracts the text.
+    :param embedder: A document embedder, such as `CohereDocumentEmbedder`.
+    :param document_store: Where the embedded documents are written.
+    :param batch_size: Documents per embedder call.
+    :param embed_workers: Embedder calls in flight at once.
+    :returns: Counts of `documents` converted, `written` and embedder `batches`, and the `seconds` it took.
+    """
+    started = time.perf_counter()
+    batches: List[Future] = []
+    counts = {"documents": 0, "written": 0, "batches": 0}
+
+    def embed_and_write(documents: List[Document]) -> int:
+        embedded = embedder.run(documents=documents)["documents"]
+        return document_store.write_documents(embedded)
+
+    with ThreadPoolExecutor(max_workers=embed_workers, thread_name_prefix="index-embed") as embed_pool:
+        batch: List[Document] = []
+        for document in converter.iter_documents(fetcher.stream(urls)):
+            counts["documents"] += 1
+            batch.append(document)
+            if len(batch) == batch_size:
+                batches.append(embed_pool.submit(embed_and_write, batch))
+                batch = []
+        if batch:
+            batches.append(embed_pool.submit(embed_and_write, batch))
+        for future in batches:
+            counts["written"] += future.result()
+    counts["batches"] = len(batches)
+    return {**counts, "seconds": time.perf_counter() - started}
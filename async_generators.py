@@ -0,0 +1,647 @@
+# Async-native OpenAI generators sharing one scheduler per process: token buckets for the provider's
+# requests-per-minute and tokens-per-minute limits, priorities by request class, and coalescing of identical
+# in-flight requests.
+
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from haystack import component, default_from_dict, default_to_dict
+from haystack.dataclasses import ChatMessage, StreamingChunk
+from haystack.utils import deserialize_callable, deserialize_secrets_inplace, serialize_callable
+from haystack.utils.auth import Secret
+from openai import AsyncOpenAI, RateLimitError
+
+PRIORITIES = {"interactive": 0, "batch": 1}
+
+# The buckets run a little under the limits: requests reach the provider a few milliseconds off from when they
+# left, and a bucket paced at exactly the limit gets a `429` whenever two of them arrive closer than they left.
+HEADROOM = 0.95
+
+StreamingCallback = Callable[[StreamingChunk], None]
+
+
+def estimate_tokens(text: str) -> int:
+    # About 4 characters per token for English; only used to reserve tokens before the real usage is known.
+    return max(1, len(text) // 4)
+
+
+@dataclass(frozen=True)
+class RateLimits:
+    """
+    A provider's limits. None means no limit.
+
+    :param requests_per_minute: Requests that may start per minute.
+    :param tokens_per_minute: Prompt plus completion tokens per minute.
+    :param max_concurrency: Requests in flight at once.
+    :param burst_seconds: Seconds of the per-minute rates that may be spent at once after an idle period.
+    """
+
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    max_concurrency: int = 16
+    burst_seconds: float = 1.0
+
+    @classmethod
+    def from_env(cls) -> "RateLimits":
+        """
+        Limits from `OPENAI_REQUESTS_PER_MINUTE` and `OPENAI_TOKENS_PER_MINUTE`, if set.
+        """
+        rpm, tpm = os.getenv("OPENAI_REQUESTS_PER_MINUTE"), os.getenv("OPENAI_TOKENS_PER_MINUTE")
+        return cls(requests_per_minute=float(rpm) if rpm else None, tokens_per_minute=float(tpm) if tpm else None)
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute / 60` per second up to `per_minute * burst_seconds / 60`.
+
+    The level may go below zero when actual usage turns out higher than what was taken, which delays the
+    next requests until the debt is paid back.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 1.0):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` can be taken; amounts above the capacity wait for a full bucket.
+        """
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+@dataclass(order=True)
+class _Pending:
+    priority: int
+    seq: int
+    tokens: int = field(compare=False)
+    call: Callable[[], Awaitable[Tuple[Any, int]]] = field(compare=False)
+    future: "asyncio.Future[Any]" = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class LLMScheduler:
+    """
+    Admits LLM requests so they stay within `RateLimits`, on its own event loop in a background thread.
+
+    Requests wait in a queue ordered by priority, then arrival. The head of the queue starts as soon as both
+    token buckets can pay for it (one request, and its estimated tokens); nothing behind it overtakes it, so a
+    large batch prompt isn't starved by a stream of small ones, and an interactive request never waits behind
+    a batch one that hasn't started. Once a request finishes, the tokens it actually used replace the estimate.
+    A `429` pauses every admission for the `Retry-After` the provider sent, and the request goes back to the
+    head of the queue, instead of each caller retrying on its own random schedule. Requests with the same
+    `key` that overlap in time share one call.
+
+    The scheduler is thread-safe: `submit()` can be called from any thread, `run()` awaited from any loop.
+    """
+
+    def __init__(self, limits: Optional[RateLimits] = None, max_retries: int = 5):
+        """
+        :param limits: The provider's limits. Defaults to `RateLimits.from_env()`.
+        :param max_retries: Times a request is retried after a rate-limit error before it fails.
+        """
+        self.limits = limits or RateLimits.from_env()
+        self.max_retries = max_retries
+        self.stats = {"requests": 0, "coalesced": 0, "rate_limited": 0, "tokens": 0}
+        self._requests = (
+            TokenBucket(self.limits.requests_per_minute * HEADROOM, self.limits.burst_seconds)
+            if self.limits.requests_per_minute
+            else None
+        )
+        self._tokens = (
+            TokenBucket(self.limits.tokens_per_minute * HEADROOM, self.limits.burst_seconds)
+            if self.limits.tokens_per_minute
+            else None
+        )
+        self._queue: List[_Pending] = []
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._seq = itertools.count()
+        self._running = 0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """
+        The scheduler's event loop, started on first use. Clients bound to a loop, like `AsyncOpenAI`, must be
+        created and used on it.
+        """
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-scheduler", daemon=True).start()
+                self._loop = loop
+        return self._loop
+
+    def submit(
+        self,
+        call: Callable[[], Awaitable[Tuple[Any, int]]],
+        tokens: int,
+        priority: str = "interactive",
+        key: Optional[str] = None,
+    ) -> "Future[Any]":
+        """
+        Queues `call` and returns a future with its result.
+
+        :param call: A coroutine function returning `(result, tokens used)`. It runs on the scheduler's loop.
+        :param tokens: Tokens the call is expected to use, reserved until it reports the real number.
+        :param priority: `"interactive"` or `"batch"`.
+        :param key: Requests with the same key that overlap in time share one call.
+        """
+        return asyncio.run_coroutine_threadsafe(self._schedule(call, tokens, priority, key), self.loop)
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Tuple[Any, int]]],
+        tokens: int,
+        priority: str = "interactive",
+        key: Optional[str] = None,
+    ) -> Any:
+        """
+        Like `submit()`, for async code on any event loop.
+        """
+        return await asyncio.wrap_future(self.submit(call, tokens, priority, key))
+
+    async def _schedule(self, call, tokens: int, priority: str, key: Optional[str]) -> Any:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {list(PRIORITIES)}")
+        if key is not None and key in self._inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._inflight[key])
+        future = asyncio.get_running_loop().create_future()
+        if key is not None:
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        heapq.heappush(self._queue, _Pending(PRIORITIES[priority], next(self._seq), tokens, call, future))
+        self._dispatch()
+        return await asyncio.shield(future)
+
+    def _dispatch(self):
+        # Starts queued requests while the limits allow; otherwise sets a timer for when the head could start.
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue and self._running < self.limits.max_concurrency:
+            head = self._queue[0]
+            wait = self._paused_until - time.monotonic()
+            if self._requests is not None:
+                wait = max(wait, self._requests.wait_time(1))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.wait_time(head.tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._queue)
+            if self._requests is not None:
+                self._requests.take(1)
+            if self._tokens is not None:
+                self._tokens.take(head.tokens)
+            self._running += 1
+            asyncio.get_running_loop().create_task(self._execute(head))
+
+    async def _execute(self, pending: _Pending):
+        try:
+            result, used = await pending.call()
+        except RateLimitError as error:
+            self.stats["rate_limited"] += 1
+            self._refund(pending.tokens)
+            pending.attempts += 1
+            if pending.attempts > self.max_retries:
+                pending.future.set_exception(error)
+            else:
+                # Everyone waits out the provider's Retry-After, then this request goes first.
+                pause = _retry_after(error, pending.attempts)
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+                heapq.heappush(self._queue, pending)
+        except Exception as error:
+            pending.future.set_exception(error)
+        else:
+            self.stats["requests"] += 1
+            self.stats["tokens"] += used
+            self._refund(pending.tokens - used)
+            pending.future.set_result(result)
+        finally:
+            self._running -= 1
+            self._dispatch()
+
+    def _refund(self, tokens: int):
+        if self._tokens is not None:
+            self._tokens.take(-tokens)
+
+
+def _retry_after(error: RateLimitError, attempts: int) -> float:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return min(30.0, 0.5 * 2 ** (attempts - 1)) * (1 + random.random() / 4)
+
+
+_schedulers: Dict[RateLimits, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def shared_scheduler(limits: Optional[RateLimits] = None) -> LLMScheduler:
+    """
+    The process-wide scheduler for `limits` (default: `RateLimits.from_env()`), so every generator calling
+    the same provider counts against the same buckets.
+    """
+    limits = limits or RateLimits.from_env()
+    with _schedulers_lock:
+        if limits not in _schedulers:
+            _schedulers[limits] = LLMScheduler(limits)
+        return _schedulers[limits]
+
+
+class _AsyncOpenAIBase:
+    # What AsyncOpenAIGenerator and AsyncOpenAIChatGenerator share: the client, request keys and the call.
+
+    def __init__(
+        self,
+        api_key: Secret,
+        model: str,
+        streaming_callback: Optional[StreamingCallback],
+        api_base_url: Optional[str],
+        organization: Optional[str],
+        generation_kwargs: Optional[Dict[str, Any]],
+        priority: str,
+        coalesce: bool,
+        expected_completion_tokens: int,
+        scheduler: Optional[LLMScheduler],
+    ):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority '{priority}', expected one of {list(PRIORITIES)}")
+        self.api_key = api_key
+        self.model = model
+        self.streaming_callback = streaming_callback
+        self.api_base_url = api_base_url
+        self.organization = organization
+        self.generation_kwargs = generation_kwargs or {}
+        self.priority = priority
+        self.coalesce = coalesce
+        self.expected_completion_tokens = expected_completion_tokens
+        self.scheduler = scheduler or shared_scheduler()
+        self._client: Optional[AsyncOpenAI] = None
+
+    def _init_parameters(self) -> Dict[str, Any]:
+        limits = self.scheduler.limits
+        return {
+            "api_key": self.api_key.to_dict(),
+            "model": self.model,
+            "streaming_callback": serialize_callable(self.streaming_callback) if self.streaming_callback else None,
+            "api_base_url": self.api_base_url,
+            "organization": self.organization,
+            "generation_kwargs": self.generation_kwargs,
+            "priority": self.priority,
+            "coalesce": self.coalesce,
+            "expected_completion_tokens": self.expected_completion_tokens,
+            "rate_limits": {
+                "requests_per_minute": limits.requests_per_minute,
+                "tokens_per_minute": limits.tokens_per_minute,
+                "max_concurrency": limits.max_concurrency,
+                "burst_seconds": limits.burst_seconds,
+            },
+        }
+
+    @staticmethod
+    def _init_parameters_from_dict(data: Dict[str, Any]) -> Dict[str, Any]:
+        params = data["init_parameters"]
+        deserialize_secrets_inplace(params, keys=["api_key"])
+        if params.get("streaming_callback"):
+            params["streaming_callback"] = deserialize_callable(params["streaming_callback"])
+        rate_limits = params.pop("rate_limits", None)
+        if rate_limits is not None:
+            params["scheduler"] = shared_scheduler(RateLimits(**rate_limits))
+        return data
+
+    def _complete(
+        self,
+        messages: List[Dict[str, Any]],
+        streaming_callback: Optional[StreamingCallback],
+        generation_kwargs: Optional[Dict[str, Any]],
+    ) -> "Future[List[ChatMessage]]":
+        kwargs = {**self.generation_kwargs, **(generation_kwargs or {})}
+        streaming_callback = streaming_callback or self.streaming_callback
+        prompt_tokens = sum(estimate_tokens(message.get("content") or "") for message in messages)
+        completion_tokens = kwargs.get("max_tokens") or self.expected_completion_tokens
+        key = None
+        # A streamed request has a callback of its own, so it can't share another caller's call.
+        if self.coalesce and streaming_callback is None:
+            request = {"base_url": self.api_base_url, "model": self.model, "messages": messages, "kwargs": kwargs}
+            key = hashlib.sha256(json.dumps(request, sort_keys=True, default=str).encode()).hexdigest()
+
+        async def call() -> Tuple[List[ChatMessage], int]:
+            if streaming_callback is not None:
+                return await self._stream(messages, kwargs, streaming_callback, prompt_tokens)
+            completion = await self._get_client().chat.completions.create(model=self.model, messages=messages, **kwargs)
+            usage = dict(completion.usage or {})
+            replies = [
+                _to_chat_message(choice.message, completion.model, choice.index, choice.finish_reason, usage)
+                for choice in completion.choices
+            ]
+            return replies, usage.get("total_tokens") or prompt_tokens + completion_tokens
+
+        return self.scheduler.submit(call, prompt_tokens + completion_tokens, self.priority, key)
+
+    async def _stream(
+        self, messages: List[Dict[str, Any]], kwargs: Dict[str, Any], callback: StreamingCallback, prompt_tokens: int
+    ) -> Tuple[List[ChatMessage], int]:
+        chunks = await self._get_client().chat.completions.create(
+            model=self.model, messages=messages, stream=True, **kwargs
+        )
+        content: List[str] = []
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        model, finish_reason = self.model, None
+        async for chunk in chunks:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            model, finish_reason = chunk.model, choice.finish_reason or finish_reason
+            for delta in choice.delta.tool_calls or []:
+                call = tool_calls.setdefault(
+                    delta.index, {"id": None, "type": "function", "function": {"name": "", "arguments": ""}}
+                )
+                call["id"] = delta.id or call["id"]
+                if delta.function is not None:
+                    call["function"]["name"] += delta.function.name or ""
+                    call["function"]["arguments"] += delta.function.arguments or ""
+            text = choice.delta.content or ""
+            content.append(text)
+            # The callback may block (e.g. writing to a socket); keep it off the scheduler's loop.
+            await asyncio.to_thread(
+                callback,
+                StreamingChunk(
+                    text, meta={"model": model, "index": choice.index, "finish_reason": choice.finish_reason}
+                ),
+            )
+        text = json.dumps([tool_calls[i] for i in sorted(tool_calls)]) if tool_calls else "".join(content)
+        completion_tokens = estimate_tokens(text)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        reply = ChatMessage.from_assistant(
+            text, meta={"model": model, "index": 0, "finish_reason": finish_reason, "usage": usage}
+        )
+        return [reply], usage["total_tokens"]
+
+    def _get_client(self) -> AsyncOpenAI:
+        # Created on the scheduler's loop, where all its calls run. The scheduler does the retrying.
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=self.api_key.resolve_value(),
+                organization=self.organization,
+                base_url=self.api_base_url,
+                max_retries=0,
+            )
+        return self._client
+
+
+def _to_chat_message(
+    message: Any, model: str, index: int, finish_reason: Optional[str], usage: Dict[str, Any]
+) -> ChatMessage:
+    # Tool calls are returned as the JSON list of the calls, like OpenAIChatGenerator does.
+    if message.tool_calls:
+        content = json.dumps([call.model_dump() for call in message.tool_calls])
+    else:
+        content = message.content or ""
+    return ChatMessage.from_assistant(
+        content, meta={"model": model, "index": index, "finish_reason": finish_reason, "usage": usage}
+    )
+
+
+@component
+class AsyncOpenAIGenerator(_AsyncOpenAIBase):
+    """
+    A drop-in `OpenAIGenerator` whose calls go through a shared `LLMScheduler`.
+
+    Many pipelines running at once (in threads, or awaiting `run_async`) stay within the provider's rate
+    limits instead of retrying into them. `priority="batch"` lets interactive requests go first. With
+    `coalesce`, identical prompts in flight at the same time share one call, so they get the same reply even
+    with a temperature above zero.
+
+    Usage example:
+    ```python
+    llm = AsyncOpenAIGenerator(priority="batch", scheduler=shared_scheduler(RateLimits(500, 200_000)))
+    summarizer_pipeline.add_component("llm", llm)
+    ```
+    """
+
+    def __init__(
+        self,
+        api_key: Secret = Secret.from_env_var("OPENAI_API_KEY"),
+        model: str = "gpt-3.5-turbo",
+        streaming_callback: Optional[StreamingCallback] = None,
+        api_base_url: Optional[str] = None,
+        organization: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        generation_kwargs: Optional[Dict[str, Any]] = None,
+        priority: str = "interactive",
+        coalesce: bool = True,
+        expected_completion_tokens: int = 256,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        """
+        :param api_key: The OpenAI API key.
+        :param model: The name of the model to use.
+        :param streaming_callback: A callback called with each new `StreamingChunk`.
+        :param api_base_url: An optional base URL.
+        :param organization: The Organization ID.
+        :param system_prompt: The system prompt to use for text generation.
+        :param generation_kwargs: Other parameters for the OpenAI endpoint, e.g. `max_tokens`, `temperature`.
+        :param priority: `"interactive"` or `"batch"`.
+        :param coalesce: Share one call between identical requests in flight at the same time.
+        :param expected_completion_tokens: Tokens reserved for the reply when `max_tokens` isn't set.
+        :param scheduler: The scheduler to use. Defaults to `shared_scheduler()`.
+        """
+        _AsyncOpenAIBase.__init__(
+            self,
+            api_key=api_key,
+            model=model,
+            streaming_callback=streaming_callback,
+            api_base_url=api_base_url,
+            organization=organization,
+            generation_kwargs=generation_kwargs,
+            priority=priority,
+            coalesce=coalesce,
+            expected_completion_tokens=expected_completion_tokens,
+            scheduler=scheduler,
+        )
+        self.system_prompt = system_prompt
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(self, system_prompt=self.system_prompt, **self._init_parameters())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AsyncOpenAIGenerator":
+        """
+        Deserializes the component from a dictionary.
+        """
+        return default_from_dict(cls, cls._init_parameters_from_dict(data))
+
+    @component.output_types(replies=List[str], meta=List[Dict[str, Any]])
+    def run(
+        self,
+        prompt: str,
+        streaming_callback: Optional[StreamingCallback] = None,
+        generation_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Generates replies for `prompt`, waiting for the scheduler to admit the request.
+
+        :param prompt: The string prompt to use for text generation.
+        :param streaming_callback: A callback called with each new `StreamingChunk`; overrides the one set at init.
+        :param generation_kwargs: Overrides for the `generation_kwargs` set at init.
+        :returns: `replies`, the generated texts, and `meta`, their metadata.
+        """
+        return self._output(self._submit(prompt, streaming_callback, generation_kwargs).result())
+
+    async def run_async(
+        self,
+        prompt: str,
+        streaming_callback: Optional[StreamingCallback] = None,
+        generation_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Like `run()`, without blocking the caller's event loop.
+        """
+        return self._output(await asyncio.wrap_future(self._submit(prompt, streaming_callback, generation_kwargs)))
+
+    def _submit(self, prompt, streaming_callback, generation_kwargs) -> "Future[List[ChatMessage]]":
+        messages = [{"role": "user", "content": prompt}]
+        if self.system_prompt:
+            messages.insert(0, {"role": "system", "content": self.system_prompt})
+        return self._complete(messages, streaming_callback, generation_kwargs)
+
+    @staticmethod
+    def _output(replies: List[ChatMessage]) -> Dict[str, Any]:
+        return {"replies": [reply.content for reply in replies], "meta": [reply.meta for reply in replies]}
+
+
+@component
+class AsyncOpenAIChatGenerator(_AsyncOpenAIBase):
+    """
+    A drop-in `OpenAIChatGenerator` whose calls go through a shared `LLMScheduler`.
+
+    See `AsyncOpenAIGenerator` for what the scheduler does. Tool calls come back as in `OpenAIChatGenerator`:
+    a reply whose content is the JSON list of the calls and whose `finish_reason` is `"tool_calls"`.
+
+    Usage example:
+    ```python
+    chat_generator = AsyncOpenAIChatGenerator(model="gpt-3.5-turbo", generation_kwargs={"tools": tools})
+    replies = chat_generator.run(messages=[ChatMessage.from_user("Where does Mark live?")])["replies"]
+    ```
+    """
+
+    def __init__(
+        self,
+        api_key: Secret = Secret.from_env_var("OPENAI_API_KEY"),
+        model: str = "gpt-3.5-turbo",
+        streaming_callback: Optional[StreamingCallback] = None,
+        api_base_url: Optional[str] = None,
+        organization: Optional[str] = None,
+        generation_kwargs: Optional[Dict[str, Any]] = None,
+        priority: str = "interactive",
+        coalesce: bool = True,
+        expected_completion_tokens: int = 256,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        """
+        :param api_key: The OpenAI API key.
+        :param model: The name of the model to use.
+        :param streaming_callback: A callback called with each new `StreamingChunk`.
+        :param api_base_url: An optional base URL.
+        :param organization: The Organization ID.
+        :param generation_kwargs: Other parameters for the OpenAI endpoint, e.g. `tools`, `temperature`.
+        :param priority: `"interactive"` or `"batch"`.
+        :param coalesce: Share one call between identical requests in flight at the same time.
+        :param expected_completion_tokens: Tokens reserved for the reply when `max_tokens` isn't set.
+        :param scheduler: The scheduler to use. Defaults to `shared_scheduler()`.
+        """
+        _AsyncOpenAIBase.__init__(
+            self,
+            api_key=api_key,
+            model=model,
+            streaming_callback=streaming_callback,
+            api_base_url=api_base_url,
+            organization=organization,
+            generation_kwargs=generation_kwargs,
+            priority=priority,
+            coalesce=coalesce,
+            expected_completion_tokens=expected_completion_tokens,
+            scheduler=scheduler,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(self, **self._init_parameters())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AsyncOpenAIChatGenerator":
+        """
+        Deserializes the component from a dictionary.
+        """
+        return default_from_dict(cls, cls._init_parameters_from_dict(data))
+
+    @component.output_types(replies=List[ChatMessage])
+    def run(
+        self,
+        messages: List[ChatMessage],
+        streaming_callback: Optional[StreamingCallback] = None,
+        generation_kwargs: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Generates replies to `messages`, waiting for the scheduler to admit the request.
+
+        :param messages: The conversation so far.
+        :param streaming_callback: A callback called with each new `StreamingChunk`; overrides the one set at init.
+        :param generation_kwargs: Overrides for the `generation_kwargs` set at init.
+        :returns: `replies`, the generated `ChatMessage`s.
+        """
+        openai_messages = [message.to_openai_format() for message in messages]
+        return {"replies": self._complete(openai_messages, streaming_callback, generation_kwargs).result()}
+
+    async def run_async(
+        self,
+        messages: List[ChatMessage],
+        streaming_callback: Optional[StreamingCallback] = None,
+        generation_kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Like `run()`, without blocking the caller's event loop.
+        """
+        openai_messages = [message.to_openai_format() for message in messages]
+        future = self._complete(openai_messages, streaming_callback, generation_kwargs)
+        return {"replies": await asyncio.wrap_future(future)}
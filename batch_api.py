@@ -0,0 +1,301 @@
+# Offline generation through the provider's Batch API: the rendered prompts go out as one JSONL file and the
+# replies come back within the completion window, at half the price and outside the interactive rate limits.
+# Jobs are journaled on disk, so a run that crashes or times out picks up its batches instead of paying twice.
+
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from haystack import component, default_from_dict, default_to_dict, logging
+from haystack.utils import deserialize_secrets_inplace
+from haystack.utils.auth import Secret
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def request_id(body: Dict[str, Any]) -> str:
+    """
+    The `custom_id` of a request: the same body always gets the same id, across runs and jobs.
+    """
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+
+def _chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+@component
+class OpenAIBatchGenerator:
+    """
+    Generates replies for a list of prompts with one or more OpenAI batches, for jobs that can wait.
+
+    `run()` writes the requests to JSONL, uploads it, creates the batch, polls it every `poll_interval` seconds
+    and returns the replies in the order of the prompts. Replies are kept in `work_dir/results.jsonl`, by
+    request: prompts answered before, in this job or another, aren't sent again. The batches of a job are kept
+    in a journal until it's done, so running the same prompts again after a crash or a `TimeoutError` waits
+    for the batches already submitted instead of creating new ones.
+
+    Usage example:
+    ```python
+    articles = HackernewsNewestFetcher().run(top_k=50)["articles"]
+    prompts = [prompt_builder.run(articles=[article])["prompt"] for article in articles]
+    summaries = OpenAIBatchGenerator(work_dir="batches").run(prompts=prompts)["replies"]
+    ```
+    """
+
+    def __init__(
+        self,
+        api_key: Secret = Secret.from_env_var("OPENAI_API_KEY"),
+        model: str = "gpt-3.5-turbo",
+        api_base_url: Optional[str] = None,
+        organization: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        generation_kwargs: Optional[Dict[str, Any]] = None,
+        work_dir: str = "batches",
+        poll_interval: float = 60.0,
+        timeout: Optional[float] = None,
+        max_requests_per_batch: int = 50_000,
+    ):
+        """
+        :param api_key: The OpenAI API key.
+        :param model: The name of the model to use.
+        :param api_base_url: An optional base URL.
+        :param organization: The Organization ID.
+        :param system_prompt: The system prompt sent with every prompt.
+        :param generation_kwargs: Other parameters for the OpenAI endpoint, e.g. `max_tokens`, `temperature`.
+        :param work_dir: Where the results and the journals of unfinished jobs are kept.
+        :param poll_interval: Seconds between checks of a batch's status.
+        :param timeout: Seconds `run()` waits before raising `TimeoutError`; None waits until the batches end.
+            The batches keep running, and the next run with the same prompts picks them up.
+        :param max_requests_per_batch: Requests per batch file; larger jobs are split into several batches.
+        """
+        self.api_key = api_key
+        self.model = model
+        self.api_base_url = api_base_url
+        self.organization = organization
+        self.system_prompt = system_prompt
+        self.generation_kwargs = generation_kwargs or {}
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.max_requests_per_batch = max_requests_per_batch
+        self._client: Optional[OpenAI] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            api_key=self.api_key.to_dict(),
+            model=self.model,
+            api_base_url=self.api_base_url,
+            organization=self.organization,
+            system_prompt=self.system_prompt,
+            generation_kwargs=self.generation_kwargs,
+            work_dir=self.work_dir,
+            poll_interval=self.poll_interval,
+            timeout=self.timeout,
+            max_requests_per_batch=self.max_requests_per_batch,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OpenAIBatchGenerator":
+        """
+        Deserializes the component from a dictionary.
+        """
+        deserialize_secrets_inplace(data["init_parameters"], keys=["api_key"])
+        return default_from_dict(cls, data)
+
+    @component.output_types(replies=List[str], meta=List[Dict[str, Any]])
+    def run(self, prompts: List[str], generation_kwargs: Optional[Dict[str, Any]] = None):
+        """
+        Generates a reply for each prompt, waiting for the batches to end.
+
+        :param prompts: The prompts, rendered.
+        :param generation_kwargs: Overrides for the `generation_kwargs` set at init.
+        :returns: `replies`, one per prompt ("" for a request that failed), and `meta`, with the `custom_id`,
+            `batch_id`, `model`, `finish_reason` and `usage` of each reply, or its `error`.
+        :raises TimeoutError: If the batches haven't ended after `timeout` seconds.
+        """
+        kwargs = {**self.generation_kwargs, **(generation_kwargs or {})}
+        bodies = [self._body(prompt, kwargs) for prompt in prompts]
+        ids = [request_id(body) for body in bodies]
+        results = self._load_results()
+        # A dict, so a prompt appearing several times is sent once.
+        requests = dict(zip(ids, bodies))
+        errors: Dict[str, str] = {}
+        if any(custom_id not in results for custom_id in requests):
+            errors = self._run_job(requests, results)
+
+        replies, meta = [], []
+        for custom_id in ids:
+            if custom_id in results:
+                record = results[custom_id]
+                replies.append(record["content"])
+                meta.append(
+                    {"custom_id": custom_id, **{key: value for key, value in record.items() if key != "content"}}
+                )
+            else:
+                replies.append("")
+                meta.append({"custom_id": custom_id, "error": errors.get(custom_id, "No result in the batch output")})
+        return {"replies": replies, "meta": meta}
+
+    def _body(self, prompt: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        messages = [{"role": "user", "content": prompt}]
+        if self.system_prompt:
+            messages.insert(0, {"role": "system", "content": self.system_prompt})
+        return {"model": self.model, "messages": messages, **kwargs}
+
+    def _run_job(self, requests: Dict[str, Dict[str, Any]], results: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        # Submits the requests without a result (or finds the batches a previous run submitted for them), waits
+        # for the batches to end and adds their replies to `results`. Returns the errors of the failed requests.
+        # The job and its parts are keyed on all the requests, not only the ones still pending: the results of
+        # a part collected before a crash must not change the job a rerun looks for.
+        job = hashlib.sha256("\n".join(sorted(requests)).encode()).hexdigest()[:16]
+        journal_path = os.path.join(self.work_dir, f"job-{job}.json")
+        journal: Dict[str, Any] = {"parts": []}
+        resumed = os.path.exists(journal_path)
+        if resumed:
+            with open(journal_path, encoding="utf-8") as file:
+                journal = json.load(file)
+            logger.info("Resuming batch job {job}", job=job)
+
+        client = self._get_client()
+        for i, custom_ids in enumerate(_chunks(sorted(requests), self.max_requests_per_batch)):
+            if i == len(journal["parts"]):
+                journal["parts"].append({})
+            part = journal["parts"][i]
+            if part.get("batch_id") or part.get("status"):
+                continue
+            custom_ids = [custom_id for custom_id in custom_ids if custom_id not in results]
+            if not custom_ids:
+                # Answered by an earlier job: nothing to send.
+                part["status"] = "completed"
+                self._save_journal(journal_path, journal)
+                continue
+            if not part.get("input_file_id"):
+                lines = [
+                    {
+                        "custom_id": custom_id,
+                        "method": "POST",
+                        "url": "/v1/chat/completions",
+                        "body": requests[custom_id],
+                    }
+                    for custom_id in custom_ids
+                ]
+                data = "".join(json.dumps(line) + "\n" for line in lines).encode()
+                part["input_file_id"] = client.files.create(file=(f"{job}-{i}.jsonl", data), purpose="batch").id
+                self._save_journal(journal_path, journal)
+            # A crash between creating the batch and saving its id leaves a batch for this file already running.
+            batch_id = None
+            if resumed:
+                batch_id = next((b.id for b in client.batches.list() if b.input_file_id == part["input_file_id"]), None)
+            if batch_id is None:
+                batch_id = client.batches.create(
+                    input_file_id=part["input_file_id"],
+                    endpoint="/v1/chat/completions",
+                    completion_window="24h",
+                    metadata={"job": job, "part": str(i)},
+                ).id
+            part["batch_id"] = batch_id
+            self._save_journal(journal_path, journal)
+
+        errors: Dict[str, str] = {}
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            for part in journal["parts"]:
+                if part.get("status") in TERMINAL_STATUSES:
+                    continue
+                batch = client.batches.retrieve(part["batch_id"])
+                if batch.status not in TERMINAL_STATUSES:
+                    continue
+                if batch.status != "completed":
+                    logger.warning("Batch {batch_id} {status}", batch_id=batch.id, status=batch.status)
+                # Expired and cancelled batches still return the requests they got to.
+                errors.update(self._collect(batch, results))
+                part["status"] = batch.status
+                self._save_journal(journal_path, journal)
+            if all(part.get("status") in TERMINAL_STATUSES for part in journal["parts"]):
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Batch job {job} still running after {self.timeout}s; run again with the same prompts to resume"
+                )
+            time.sleep(self.poll_interval)
+        # Done: everything that succeeded is in the results, and a new run should retry what failed.
+        os.remove(journal_path)
+        return errors
+
+    def _collect(self, batch: Any, results: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        client = self._get_client()
+        errors: Dict[str, str] = {}
+        records = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                response = row.get("response") or {}
+                body = response.get("body") or {}
+                if response.get("status_code") != 200 or not body.get("choices"):
+                    error = row.get("error") or body.get("error") or {}
+                    errors[row["custom_id"]] = error.get("message", f"Status {response.get('status_code')}")
+                    continue
+                choice = body["choices"][0]
+                records.append(
+                    {
+                        "custom_id": row["custom_id"],
+                        "content": choice["message"].get("content") or "",
+                        "batch_id": batch.id,
+                        "model": body.get("model"),
+                        "finish_reason": choice.get("finish_reason"),
+                        "usage": body.get("usage") or {},
+                    }
+                )
+        with open(os.path.join(self.work_dir, "results.jsonl"), "a", encoding="utf-8") as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+        for record in records:
+            results[record.pop("custom_id")] = record
+        if batch.status == "failed" and batch.errors:
+            message = "; ".join(error.message or "" for error in batch.errors.data or [])
+            logger.warning("Batch {batch_id} failed: {message}", batch_id=batch.id, message=message)
+        return errors
+
+    def _load_results(self) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        path = os.path.join(self.work_dir, "results.jsonl")
+        if not os.path.exists(path):
+            return results
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line of a run that crashed while writing it.
+                    continue
+                results[record.pop("custom_id")] = record
+        return results
+
+    def _save_journal(self, path: str, journal: Dict[str, Any]):
+        os.makedirs(self.work_dir, exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(journal, file)
+        os.replace(tmp, path)
+
+    def _get_client(self) -> OpenAI:
+        if self._client is None:
+            self._client = OpenAI(
+                api_key=self.api_key.resolve_value(), organization=self.organization, base_url=self.api_base_url
+            )
+        return self._client
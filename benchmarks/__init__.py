@@ -0,0 +1,2 @@
+# Benchmarks for the lesson pipelines. Run them from the repository root, e.g.
+#   python -m benchmarks.bench_local_embedder
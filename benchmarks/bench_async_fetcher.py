@@ -0,0 +1,230 @@
+# Crawling saved pages from a local HTTP server: LinkContentFetcher + in-process conversion vs the async
+# fetcher + process-pool conversion, a re-crawl answered with 304s from the HTTP cache, and indexing with
+# the embedder fed as pages arrive vs after the whole crawl.
+#
+#   python -m benchmarks.bench_async_fetcher --pages 400 --latency 0.05 --max-per-host 8
+#
+# The pages are written to a temporary directory and served from two host names (127.0.0.1 and localhost)
+# with ETag and Last-Modified headers. The server checks that no host gets more than --max-per-host requests
+# at once from the async fetcher.
+
+import argparse
+import hashlib
+import os
+import random
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from haystack.components.embedders import OpenAIDocumentEmbedder
+from haystack.components.fetchers import LinkContentFetcher
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.utils.auth import Secret
+
+from async_fetcher import AsyncLinkContentFetcher, ParallelHTMLToDocument, index_urls
+from benchmarks.common import Timer, print_table
+from benchmarks.fake_openai import FakeOpenAIServer
+
+WORDS = "haystack pipeline retriever embedder document store prompt generator agent router cohere ranking".split()
+
+
+def write_pages(directory: str, count: int, paragraphs: int = 60) -> List[str]:
+    rng = random.Random(0)
+    names = []
+    for i in range(count):
+        body = "".join(
+            f"<p>{' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 60)))}.</p>\n" for _ in range(paragraphs)
+        )
+        html = (
+            f"<html><head><title>Page {i}</title><script>var x = {i};</script><style>p {{margin: 0}}</style></head>"
+            f"<body><nav><a href='/'>Home</a></nav><article><h1>Integration {i}</h1>\n{body}</article>"
+            "<footer>Footer</footer></body></html>"
+        )
+        name = f"page-{i}.html"
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(html)
+        names.append(name)
+    return names
+
+
+class PageServer:
+    """
+    Serves the files of a directory with validators, after `latency` seconds, counting requests per host.
+    """
+
+    def __init__(self, directory: str, latency: float):
+        self.directory = directory
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self.in_flight: Dict[str, int] = {}
+        self.max_in_flight: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.request_queue_size = 1024
+        self.httpd.pages = self  # type: ignore[attr-defined]
+
+    def urls(self, names: List[str]) -> List[str]:
+        port = self.httpd.server_address[1]
+        return [f"http://{('127.0.0.1', 'localhost')[i % 2]}:{port}/{name}" for i, name in enumerate(names)]
+
+    def __enter__(self) -> "PageServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        pages: PageServer = self.server.pages  # type: ignore[attr-defined]
+        host = self.headers.get("Host", "").split(":")[0]
+        with pages.lock:
+            pages.requests += 1
+            pages.in_flight[host] = pages.in_flight.get(host, 0) + 1
+            pages.max_in_flight[host] = max(pages.max_in_flight.get(host, 0), pages.in_flight[host])
+        try:
+            time.sleep(pages.latency)
+            path = os.path.join(pages.directory, os.path.basename(self.path))
+            if not os.path.exists(path):
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            with open(path, "rb") as f:
+                data = f.read()
+            etag = f'"{hashlib.sha1(data).hexdigest()}"'
+            last_modified = formatdate(os.path.getmtime(path), usegmt=True)
+            if self.headers.get("If-None-Match") == etag:
+                with pages.lock:
+                    pages.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            self.wfile.write(data)
+        finally:
+            with pages.lock:
+                pages.in_flight[host] -= 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial vs async crawling, conversion and indexing.")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--max-per-host", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--embed-latency", type=float, default=0.2)
+    args = parser.parse_args()
+    try:
+        import trafilatura
+
+        backend = "trafilatura"
+    except ImportError:
+        backend = "html.parser"
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        pages_dir = os.path.join(tmp, "pages")
+        os.makedirs(pages_dir)
+        names = write_pages(pages_dir, args.pages)
+        with PageServer(pages_dir, args.latency) as server:
+            urls = server.urls(names)
+
+            serial_converter = ParallelHTMLToDocument(backend=backend, min_pool_batch=len(urls) + 1)
+            with Timer() as fetch_time:
+                streams = LinkContentFetcher(raise_on_failure=False).run(urls=urls)["streams"]
+            with Timer() as convert_time:
+                expected = serial_converter.run(sources=streams)["documents"]
+            rows.append(
+                {
+                    "crawl": "LinkContentFetcher + in-process",
+                    "pages": len(expected),
+                    "fetch s": fetch_time.elapsed,
+                    "convert s": convert_time.elapsed,
+                    "total s": fetch_time.elapsed + convert_time.elapsed,
+                }
+            )
+
+            fetcher = AsyncLinkContentFetcher(
+                max_per_host=args.max_per_host, cache_path=os.path.join(tmp, "http_cache.sqlite")
+            )
+            converter = ParallelHTMLToDocument(backend=backend, max_workers=args.workers)
+            converter.warm_up()
+            server.max_in_flight.clear()
+            with Timer() as fetch_time:
+                streams = fetcher.run(urls=urls)["streams"]
+            with Timer() as convert_time:
+                documents = converter.run(sources=streams)["documents"]
+            if max(server.max_in_flight.values()) > args.max_per_host:
+                raise AssertionError(f"Per-host limit exceeded: {server.max_in_flight}")
+            by_url = {doc.meta["url"]: doc.content for doc in expected}
+            if len(documents) != len(expected) or any(by_url[d.meta["url"]] != d.content for d in documents):
+                raise AssertionError("Async crawl converted different documents")
+            rows.append(
+                {
+                    "crawl": f"async (max {args.max_per_host}/host) + {args.workers} processes",
+                    "pages": len(documents),
+                    "fetch s": fetch_time.elapsed,
+                    "convert s": convert_time.elapsed,
+                    "total s": fetch_time.elapsed + convert_time.elapsed,
+                    "max per host": max(server.max_in_flight.values()),
+                }
+            )
+
+            downloaded = fetcher.stats["bytes_downloaded"]
+            with Timer() as fetch_time:
+                streams = fetcher.run(urls=urls)["streams"]
+            if fetcher.stats["revalidated"] != len(urls) or fetcher.stats["bytes_downloaded"] != downloaded:
+                raise AssertionError(f"Re-crawl wasn't served from the cache: {fetcher.stats}")
+            rows.append(
+                {
+                    "crawl": "async re-crawl, 304 from cache",
+                    "pages": len(streams),
+                    "fetch s": fetch_time.elapsed,
+                    "bytes downloaded": 0,
+                    "first crawl bytes": downloaded,
+                }
+            )
+            print_table(rows)
+
+            print(f"\nIndexing {len(urls)} pages, embedder latency {args.embed_latency}s per batch of 32:")
+            rows = []
+            with FakeOpenAIServer(latency=args.embed_latency) as openai:
+                embedder = OpenAIDocumentEmbedder(
+                    api_key=Secret.from_token("fake"), api_base_url=openai.base_url, batch_size=32, progress_bar=False
+                )
+                uncached = AsyncLinkContentFetcher(max_per_host=args.max_per_host)
+                store = InMemoryDocumentStore()
+                with Timer() as staged:
+                    streams = uncached.run(urls=urls)["streams"]
+                    embedded = embedder.run(documents=converter.run(sources=streams)["documents"])["documents"]
+                    store.write_documents(embedded)
+                rows.append({"indexing": "fetch, then convert, then embed", "written": store.count_documents(), "s": staged.elapsed})
+                store = InMemoryDocumentStore()
+                report = index_urls(urls, uncached, converter, embedder, store, batch_size=32)
+                rows.append({"indexing": "index_urls (streamed)", "written": report["written"], "s": report["seconds"]})
+            print_table(rows)
+            converter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# Offline Lesson 3 summaries and Lesson 5 entity extraction: interactive calls through the rate-limit scheduler
+# against OpenAIBatchGenerator, by documents per second and dollars per thousand documents.
+#
+#   python -m benchmarks.bench_batch_api --docs 500 --rpm 500 --tpm 200000 --batch-delay 2
+#
+# The local fake server enforces the limits on interactive calls and runs batches `--batch-concurrency` requests
+# at a time after `--batch-delay` seconds in the queue. Real batches take minutes to hours to start: the queue
+# wait dominates small jobs, the rate limits large ones. Costs use gpt-3.5-turbo prices, with the Batch API's
+# 50% discount. "resumed" stops waiting halfway through the batch, as a crashed job would, and runs again.
+# "crashed" splits the job into two batches and dies right after collecting the first one, then runs again: the
+# rerun must wait for the second batch, not submit a new one.
+
+import argparse
+import random
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from haystack import Pipeline
+from haystack.utils.auth import Secret
+
+from async_generators import AsyncOpenAIGenerator, LLMScheduler, RateLimits
+from batch_api import OpenAIBatchGenerator
+from benchmarks.bench_lessons import lesson_responder
+from benchmarks.bench_loop_budget import EntitiesValidator
+from benchmarks.common import Timer, print_table
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.lesson_templates import LESSON_3_SUMMARIZER, LESSON_5_ENTITIES
+from prompt_cache import CachedPromptBuilder
+
+# Dollars per million tokens.
+PRICES = {"input": 0.50, "output": 1.50}
+BATCH_DISCOUNT = 0.5
+
+VOCABULARY = [f"w{i}" for i in range(2000)]
+
+
+def documents(count: int, words: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(VOCABULARY, k=words)) for _ in range(count)]
+
+
+def summary_prompts(texts: List[str]) -> List[str]:
+    builder = CachedPromptBuilder(template=LESSON_3_SUMMARIZER)
+    return [builder.run(articles=[{"content": text}])["prompt"] for text in texts]
+
+
+def interactive_summaries(server: FakeOpenAIServer, limits: RateLimits, texts: List[str], threads: int):
+    llm = AsyncOpenAIGenerator(
+        api_key=Secret.from_token("fake"),
+        api_base_url=server.base_url,
+        priority="batch",
+        scheduler=LLMScheduler(limits),
+    )
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda prompt: llm.run(prompt=prompt), summary_prompts(texts)))
+
+
+def interactive_entities(server: FakeOpenAIServer, limits: RateLimits, texts: List[str], threads: int):
+    scheduler = LLMScheduler(limits)
+
+    def one(text: str):
+        # A pipeline per thread: a Pipeline isn't thread-safe.
+        agent = Pipeline(max_loops_allowed=10)
+        agent.add_component("prompt_builder", CachedPromptBuilder(template=LESSON_5_ENTITIES))
+        agent.add_component("entities_validator", EntitiesValidator())
+        agent.add_component(
+            "llm",
+            AsyncOpenAIGenerator(
+                api_key=Secret.from_token("fake"), api_base_url=server.base_url, priority="batch", scheduler=scheduler
+            ),
+        )
+        agent.connect("prompt_builder.prompt", "llm.prompt")
+        agent.connect("llm.replies", "entities_validator.replies")
+        agent.connect("entities_validator.entities_to_validate", "prompt_builder.entities_to_validate")
+        agent.run({"prompt_builder": {"text": text}})
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, texts))
+
+
+def batch_generator(
+    server: FakeOpenAIServer, work_dir: str, timeout: Optional[float] = None, max_requests_per_batch: int = 50_000
+) -> OpenAIBatchGenerator:
+    return OpenAIBatchGenerator(
+        api_key=Secret.from_token("fake"),
+        api_base_url=server.base_url,
+        work_dir=work_dir,
+        poll_interval=0.1,
+        timeout=timeout,
+        max_requests_per_batch=max_requests_per_batch,
+    )
+
+
+def crash_after_first_batch(llm: OpenAIBatchGenerator) -> OpenAIBatchGenerator:
+    # As a process killed right after saving the replies of its job's first batch.
+    collect = llm._collect
+
+    def collect_and_crash(batch, results):
+        collect(batch, results)
+        raise RuntimeError("crashed")
+
+    llm._collect = collect_and_crash  # type: ignore[method-assign]
+    return llm
+
+
+def batch_summaries(llm: OpenAIBatchGenerator, texts: List[str]):
+    llm.run(prompts=summary_prompts(texts))
+
+
+def batch_entities(llm: OpenAIBatchGenerator, texts: List[str], rounds: int = 3):
+    # The Lesson 5 loop, one batch per pass over all the texts that aren't DONE yet.
+    builder = CachedPromptBuilder(template=LESSON_5_ENTITIES)
+    validator = EntitiesValidator()
+    pending: Dict[int, object] = {i: None for i in range(len(texts))}
+    for _ in range(rounds):
+        if not pending:
+            return
+        prompts = [
+            builder.run(text=texts[i], entities_to_validate=previous)["prompt"] for i, previous in pending.items()
+        ]
+        for i, reply in zip(list(pending), llm.run(prompts=prompts)["replies"]):
+            result = validator.run(replies=[reply])
+            if "entities" in result:
+                del pending[i]
+            else:
+                pending[i] = result["entities_to_validate"]
+
+
+def cost(server: FakeOpenAIServer, discount: float = 1.0) -> float:
+    return discount * (server.prompt_tokens * PRICES["input"] + server.completion_tokens * PRICES["output"]) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interactive calls vs the Batch API for offline jobs.")
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--words", type=int, default=400, help="Words per document.")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--rpm", type=float, default=500)
+    parser.add_argument("--tpm", type=float, default=200_000)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--batch-delay", type=float, default=2.0, help="Seconds a batch waits in the queue.")
+    parser.add_argument("--batch-concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    texts = documents(args.docs, args.words)
+    limits = RateLimits(requests_per_minute=args.rpm, tokens_per_minute=args.tpm, max_concurrency=args.threads)
+    tasks: Dict[str, Dict[str, Callable]] = {
+        "lesson_3.summarize": {
+            "interactive": lambda server: interactive_summaries(server, limits, texts, args.threads),
+            "batch": lambda llm: batch_summaries(llm, texts),
+        },
+        "lesson_5.entities": {
+            "interactive": lambda server: interactive_entities(server, limits, texts, args.threads),
+            "batch": lambda llm: batch_entities(llm, texts),
+        },
+    }
+
+    rows = []
+    for task, paths in tasks.items():
+        for path in ("interactive", "batch", "resumed", "crashed"):
+            work_dir = tempfile.mkdtemp(prefix="bench-batch-")
+            server = FakeOpenAIServer(
+                latency=args.latency,
+                responder=lesson_responder(reply_words=60),
+                requests_per_minute=args.rpm,
+                tokens_per_minute=args.tpm,
+                batch_delay=args.batch_delay,
+                batch_concurrency=args.batch_concurrency,
+            )
+            with server, Timer() as t:
+                if path == "interactive":
+                    paths["interactive"](server)
+                elif path == "crashed":
+                    half = (args.docs + 1) // 2
+                    try:
+                        paths["batch"](crash_after_first_batch(batch_generator(server, work_dir, None, half)))
+                    except RuntimeError:
+                        paths["batch"](batch_generator(server, work_dir, None, half))
+                else:
+                    timeout = args.batch_delay / 2 if path == "resumed" else None
+                    try:
+                        paths["batch"](batch_generator(server, work_dir, timeout))
+                    except TimeoutError:
+                        # As a new process would: a new generator, which finds the job's journal.
+                        paths["batch"](batch_generator(server, work_dir))
+            shutil.rmtree(work_dir)
+            rows.append(
+                {
+                    "task": task,
+                    "path": path,
+                    "docs/s": args.docs / t.elapsed,
+                    "wall s": t.elapsed,
+                    "requests": server.requests + server.batch_requests,
+                    "batches": len(server.batches),
+                    "429s": server.rate_limited,
+                    "$/1k docs": 1000 * cost(server, 1.0 if path == "interactive" else BATCH_DISCOUNT) / args.docs,
+                }
+            )
+    print(f"{args.docs} documents of {args.words} words, limits {args.rpm:.0f} RPM / {args.tpm:.0f} TPM")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Load test for ChatService: simulated concurrent users chatting with the Lesson 6 agent against a fake LLM.
+#
+#   python -m benchmarks.bench_chat_service --users 32 --turns 5 --llm-latency 0.2
+#
+# Each user sends its turns back to back (plus `--think-time`) in its own session. With one worker this is
+# how the original Gradio app behaved, one turn at a time for everyone. Every reply and every session
+# history is checked, so crossed histories or out-of-order turns fail the run.
+
+import argparse
+import threading
+import time
+from typing import List
+
+from haystack import Pipeline
+from haystack.components.generators.chat.openai import OpenAIChatGenerator
+from haystack.components.joiners import BranchJoiner
+from haystack.dataclasses import ChatMessage
+from haystack.utils.auth import Secret
+
+from benchmarks.common import Timer, latency_summary, print_table
+from benchmarks.fake_openai import FakeOpenAIServer
+from chat_service import ChatService
+from conversation_memory import ConversationMemory, SummaryStore
+from parallel_tools import ParallelFunctionCaller
+
+
+def agent_factory(base_url: str, summary_store: SummaryStore):
+    def build_chat_agent() -> Pipeline:
+        agent = Pipeline()
+        agent.add_component("memory", ConversationMemory(max_tokens=1500, store=summary_store))
+        agent.add_component("message_collector", BranchJoiner(List[ChatMessage]))
+        agent.add_component("generator", OpenAIChatGenerator(api_key=Secret.from_token("fake"), api_base_url=base_url))
+        agent.add_component("function_caller", ParallelFunctionCaller(available_functions={}))
+        agent.connect("memory.messages", "message_collector")
+        agent.connect("message_collector", "generator.messages")
+        agent.connect("generator", "function_caller")
+        agent.connect("function_caller.function_replies", "message_collector")
+        return agent
+
+    return build_chat_agent
+
+
+def run_load(service: ChatService, users: int, turns: int, think_time: float):
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def user(u: int):
+        for t in range(turns):
+            message = f"user {u} turn {t}"
+            with Timer() as timer:
+                reply = service.chat(f"session-{u}", message)
+            if message not in reply:
+                raise AssertionError(f"{message!r} got someone else's reply: {reply!r}")
+            with lock:
+                latencies.append(timer.elapsed)
+            time.sleep(think_time)
+
+    threads = [threading.Thread(target=user, args=(u,)) for u in range(users)]
+    with Timer() as wall:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    for u in range(users):
+        asked = [m.content for m in service.history(f"session-{u}") if m.role.value == "user"]
+        if asked != [f"user {u} turn {t}" for t in range(turns)]:
+            raise AssertionError(f"session-{u} history is wrong: {asked}")
+    return latencies, wall.elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent users against ChatService and a fake LLM.")
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    rows = []
+    with FakeOpenAIServer(latency=args.llm_latency) as server:
+        for workers in args.workers:
+            service = ChatService(
+                agent_factory(server.base_url, SummaryStore()), system_prompt="You are helpful.", max_workers=workers
+            )
+            latencies, elapsed = run_load(service, args.users, args.turns, args.think_time)
+            service.close()
+            completed = len(latencies)
+            rows.append({"workers": workers, "turns": completed, "turns/s": completed / elapsed, **latency_summary(latencies)})
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
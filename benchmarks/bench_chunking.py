@@ -0,0 +1,127 @@
+# Splitting throughput and retrieval hit rate of Lesson 1's DocumentSplitter against SentenceChunker.
+#
+#   python -m benchmarks.bench_chunking --paragraphs 2000 --runs 5
+#   python -m benchmarks.bench_chunking --file path/to/leonardo.txt
+#
+# The corpus is `davinci.txt` (or `--file`) plus a synthetic text of paragraphs in which one sentence in each
+# states a fact, "Person17 was born in City3 in 1452.". Each splitter's chunks are indexed in an
+# InMemoryDocumentStore, every fact is asked for with BM25 ("Where was Person17 born?"), and a question is a hit
+# if one of the top-k chunks holds the whole fact sentence, the way an LLM would need it. "semantic" merges
+# sentences by the similarity of their hashed bag-of-words embeddings; "cached" is a second run over the same
+# texts, served from the segmentation cache.
+
+import argparse
+import os
+import random
+import statistics
+from typing import Callable, Dict, List, Tuple
+
+from haystack import Document
+from haystack.components.preprocessors import DocumentSplitter
+from haystack.components.retrievers.in_memory import InMemoryBM25Retriever
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+
+from benchmarks.common import Timer, print_table
+from benchmarks.hash_embedders import HashDocumentEmbedder
+from chunking import SentenceChunker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VOCABULARY = [f"w{i}" for i in range(5000)]
+
+
+def synthetic_text(seed: int, paragraphs: int) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    The text, and `(question, fact sentence)` pairs, one per paragraph.
+    """
+    rng = random.Random(seed)
+    blocks, facts = [], []
+    for i in range(paragraphs):
+        sentences = [" ".join(rng.choices(VOCABULARY, k=rng.randint(8, 25))).capitalize() + "." for _ in range(rng.randint(3, 8))]
+        fact = f"Person{i} was born in City{rng.randrange(500)} in {rng.randint(1400, 1600)}."
+        sentences.insert(rng.randrange(len(sentences) + 1), fact)
+        blocks.append(" ".join(sentences))
+        facts.append((f"Where was Person{i} born?", fact))
+    return "\n\n".join(blocks), facts
+
+
+def splitters() -> Dict[str, Callable[[], object]]:
+    return {
+        "DocumentSplitter() (words)": DocumentSplitter,
+        "DocumentSplitter(sentence, 10)": lambda: DocumentSplitter(split_by="sentence", split_length=10),
+        "SentenceChunker": SentenceChunker,
+        "SentenceChunker semantic": lambda: SentenceChunker(embedder=HashDocumentEmbedder(), similarity_threshold=0.2),
+    }
+
+
+def throughput(make: Callable[[], object], documents: List[Document], runs: int) -> Tuple[float, float, List[Document]]:
+    """
+    MB/s of a fresh splitter per run, MB/s of a second run on the same splitter, and the chunks.
+    """
+    megabytes = sum(len(doc.content.encode()) for doc in documents) / 2**20
+    fresh, again = [], []
+    for _ in range(runs):
+        splitter = make()
+        with Timer() as t:
+            chunks = splitter.run(documents=documents)["documents"]
+        fresh.append(t.elapsed)
+        with Timer() as t:
+            splitter.run(documents=documents)
+        again.append(t.elapsed)
+    return megabytes / statistics.median(fresh), megabytes / statistics.median(again), chunks
+
+
+def hit_rate(chunks: List[Document], facts: List[Tuple[str, str]], top_k: int) -> Tuple[float, float]:
+    """
+    Fraction of the questions with their fact sentence whole in one of the top-k chunks, and the mean words
+    of the top-k chunks (what goes into the prompt).
+    """
+    store = InMemoryDocumentStore()
+    store.write_documents(chunks)
+    retriever = InMemoryBM25Retriever(document_store=store, top_k=top_k)
+    hits, words = 0, []
+    for question, fact in facts:
+        found = retriever.run(query=question)["documents"]
+        hits += any(fact in doc.content for doc in found)
+        words.append(sum(len(doc.content.split()) for doc in found))
+    return hits / len(facts), statistics.fmean(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DocumentSplitter vs SentenceChunker: MB/s and retrieval hit rate.")
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=300)
+    parser.add_argument("--file", default=os.path.join(ROOT, "davinci.txt"))
+    args = parser.parse_args()
+
+    with open(args.file, encoding="utf-8") as file:
+        source = Document(content=file.read(), meta={"file_path": args.file})
+    text, facts = synthetic_text(0, args.paragraphs)
+    synthetic = Document(content=text, meta={"file_path": "synthetic.txt"})
+    facts = random.Random(1).sample(facts, k=min(args.questions, len(facts)))
+
+    rows = []
+    for name, make in splitters().items():
+        file_mbs, _, _ = throughput(make, [source], args.runs)
+        mbs, cached_mbs, chunks = throughput(make, [synthetic], args.runs)
+        hit_1, _ = hit_rate(chunks, facts, top_k=1)
+        hit_3, prompt_words = hit_rate(chunks, facts, top_k=3)
+        rows.append(
+            {
+                "splitter": name,
+                f"{os.path.basename(args.file)} MB/s": file_mbs,
+                "synthetic MB/s": mbs,
+                "cached MB/s": cached_mbs if name.startswith("SentenceChunker") else None,
+                "chunks": len(chunks),
+                "mean words": statistics.fmean(len(doc.content.split()) for doc in chunks),
+                "hit@1": hit_1,
+                "hit@3": hit_3,
+                "top-3 words": prompt_words,
+            }
+        )
+    print(f"{len(text) / 2**20:.1f} MB synthetic text, {len(facts)} questions")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
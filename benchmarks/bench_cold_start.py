@@ -0,0 +1,140 @@
+# Cold start, from process launch to the first answered query: building a Lesson 2 style RAG pipeline in code
+# (embedding and indexing the documents, then building the query pipeline) vs loading a saved artifact.
+#
+#   python -m benchmarks.bench_cold_start --documents 2000 --runs 5 --latency 0.05
+#
+# Each run is a fresh Python process talking to the local fake OpenAI server. The artifact is saved once,
+# up front, from a pipeline built the same way.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import latency_summary, print_table
+
+QUESTION = "What is document 42 about?"
+
+
+def documents(count: int):
+    from haystack import Document
+
+    topics = ["retrieval", "generation", "embeddings", "pipelines", "agents", "evaluation", "indexing", "prompts"]
+    return [
+        Document(
+            content=f"Document {i} is about {topics[i % len(topics)]} and {topics[(i * 7) % len(topics)]}.",
+            meta={"url": f"https://example.com/{i}"},
+        )
+        for i in range(count)
+    ]
+
+
+def build(base_url: str, count: int):
+    """
+    What a lesson does on start: index the documents, then build the query pipeline.
+    """
+    from haystack import Pipeline
+    from haystack.components.embedders import OpenAIDocumentEmbedder, OpenAITextEmbedder
+    from haystack.components.generators import OpenAIGenerator
+    from haystack.components.retrievers.in_memory import InMemoryEmbeddingRetriever
+    from haystack.components.writers import DocumentWriter
+    from haystack.document_stores.in_memory import InMemoryDocumentStore
+
+    from benchmarks.lesson_templates import LESSON_2_RAG
+    from prompt_cache import CachedPromptBuilder
+
+    document_store = InMemoryDocumentStore()
+    indexing = Pipeline()
+    indexing.add_component("embedder", OpenAIDocumentEmbedder(api_base_url=base_url, batch_size=128, progress_bar=False))
+    indexing.add_component("writer", DocumentWriter(document_store=document_store))
+    indexing.connect("embedder", "writer")
+    indexing.run({"embedder": {"documents": documents(count)}})
+
+    rag = Pipeline()
+    rag.add_component("query_embedder", OpenAITextEmbedder(api_base_url=base_url))
+    rag.add_component("retriever", InMemoryEmbeddingRetriever(document_store=document_store))
+    rag.add_component("prompt", CachedPromptBuilder(template=LESSON_2_RAG))
+    rag.add_component("generator", OpenAIGenerator(api_base_url=base_url))
+    rag.connect("query_embedder.embedding", "retriever.query_embedding")
+    rag.connect("retriever.documents", "prompt.documents")
+    rag.connect("prompt", "generator")
+    return rag
+
+
+def ask(rag) -> str:
+    result = rag.run({"query_embedder": {"text": QUESTION}, "retriever": {"top_k": 3}, "prompt": {"query": QUESTION}})
+    return result["generator"]["replies"][0]
+
+
+def child(mode: str, base_url: str, count: int, artifact: str):
+    started = time.perf_counter()
+    if mode == "build":
+        rag = build(base_url, count)
+    else:
+        from warm_start import load_pipeline
+
+        rag = load_pipeline(artifact)
+    ready = time.perf_counter()
+    answer = ask(rag)
+    print(json.dumps({"ready": time.time(), "setup": ready - started, "query": time.perf_counter() - ready, "answer": answer}))
+
+
+def launch(mode: str, base_url: str, count: int, artifact: str):
+    launched = time.time()
+    args = ["--child", mode, "--base-url", base_url, "--documents", str(count), "--artifact", artifact]
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_cold_start", *args], check=True, capture_output=True, text=True
+    ).stdout
+    report = json.loads(out.strip().splitlines()[-1])
+    report["cold_start"] = report["ready"] - launched
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start: build in code vs load a warm-start artifact.")
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--child", choices=["build", "artifact"])
+    parser.add_argument("--base-url")
+    parser.add_argument("--artifact")
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+
+    if args.child:
+        child(args.child, args.base_url, args.documents, args.artifact)
+        return
+
+    from benchmarks.fake_openai import FakeOpenAIServer
+    from warm_start import save_pipeline
+
+    rows = []
+    with FakeOpenAIServer(latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        artifact = os.path.join(tmp, "rag.pipeline")
+        sizes = save_pipeline(build(server.base_url, args.documents), artifact)
+        print(f"Artifact: {sizes['bytes'] / 1e6:.1f} MB, of which {sizes['store_bytes'] / 1e6:.1f} MB store snapshot\n")
+        answers = set()
+        for mode in ("build", "artifact"):
+            reports = [launch(mode, server.base_url, args.documents, artifact) for _ in range(args.runs)]
+            answers.update(report["answer"] for report in reports)
+            cold = latency_summary([report["cold_start"] for report in reports])
+            rows.append(
+                {
+                    "start": "build in code" if mode == "build" else "load artifact",
+                    "documents": args.documents,
+                    "setup p50 ms": latency_summary([report["setup"] for report in reports])["p50_ms"],
+                    "first query p50 ms": latency_summary([report["query"] for report in reports])["p50_ms"],
+                    "launch to answer p50 ms": cold["p50_ms"],
+                    "p95 ms": cold["p95_ms"],
+                }
+            )
+        if len(answers) != 1:
+            raise AssertionError(f"Built and loaded pipelines answered differently: {answers}")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# Memory per document, write throughput and retrieval latency of IndexedInMemoryDocumentStore (a Document per chunk)
+# against CompactDocumentStore (columns), on Lesson 1 style chunks with embeddings.
+#
+#   python -m benchmarks.bench_compact_store --docs 50000 --dimension 384 --queries 50
+#
+# Bytes per document is what the store holds after the write, measured with tracemalloc (which sees NumPy's
+# buffers too) once the written Documents are gone. "same top-10" compares the ids each store retrieves with
+# the first one's.
+
+import argparse
+import gc
+import random
+import statistics
+import tracemalloc
+from typing import Callable, Dict, Iterator, List
+
+from haystack import Document
+
+from benchmarks.common import Timer, print_table
+from compact_store import CompactDocumentStore
+from indexed_store import IndexedInMemoryDocumentStore
+
+VOCABULARY = [f"w{i}" for i in range(20000)]
+
+
+def chunks(count: int, words: int, dimension: int, batch: int = 5000, seed: int = 0) -> Iterator[List[Document]]:
+    """
+    Batches of chunks the way Lesson 1's splitter and embedder leave them.
+    """
+    rng = random.Random(seed)
+    for start in range(0, count, batch):
+        documents = []
+        for i in range(start, min(count, start + batch)):
+            file = i // 200
+            documents.append(
+                Document(
+                    content=" ".join(rng.choices(VOCABULARY, k=words)),
+                    meta={
+                        "file_path": f"data/file_{file}.txt",
+                        "source_id": f"{file:064x}",
+                        "split_id": i % 200,
+                        "split_idx_start": (i % 200) * words * 6,
+                    },
+                    embedding=[rng.gauss(0, 1) for _ in range(dimension)],
+                )
+            )
+        yield documents
+
+
+def build(make: Callable[[], IndexedInMemoryDocumentStore], args: argparse.Namespace):
+    store = make()
+    for batch in chunks(args.docs, args.words, args.dimension):
+        store.write_documents(batch)
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Document objects vs columnar storage: bytes per document.")
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--words", type=int, default=120, help="Words per chunk.")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    stores: Dict[str, Callable[[], IndexedInMemoryDocumentStore]] = {
+        "IndexedInMemoryDocumentStore": lambda: IndexedInMemoryDocumentStore(indexed_fields=["file_path"]),
+        "CompactDocumentStore": lambda: CompactDocumentStore(indexed_fields=["file_path"]),
+    }
+    rng = random.Random(1)
+    queries = [
+        (" ".join(rng.choices(VOCABULARY, k=4)), [rng.gauss(0, 1) for _ in range(args.dimension)])
+        for _ in range(args.queries)
+    ]
+    file_filter = {"field": "meta.file_path", "operator": "==", "value": "data/file_3.txt"}
+
+    rows, expected = [], None
+    for name, make in stores.items():
+        with Timer() as t:
+            store = build(make, args)
+        write_rate = args.docs / t.elapsed
+        del store
+        gc.collect()
+
+        tracemalloc.start()
+        store = build(make, args)
+        gc.collect()
+        held, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        latencies: Dict[str, List[float]] = {"embedding": [], "embedding filtered": [], "bm25": []}
+        found = []
+        for text, embedding in queries:
+            with Timer() as t:
+                top = store.embedding_retrieval(embedding, top_k=10)
+            latencies["embedding"].append(t.elapsed)
+            with Timer() as t:
+                store.embedding_retrieval(embedding, filters=file_filter, top_k=10)
+            latencies["embedding filtered"].append(t.elapsed)
+            with Timer() as t:
+                store.bm25_retrieval(text, top_k=10)
+            latencies["bm25"].append(t.elapsed)
+            found.append([doc.id for doc in top])
+        expected = expected or found
+        rows.append(
+            {
+                "store": name,
+                "bytes/doc": held / args.docs,
+                "write docs/s": write_rate,
+                **{f"{kind} p50 ms": 1000 * statistics.median(values) for kind, values in latencies.items()},
+                "same top-10": sum(a == b for a, b in zip(found, expected)) / len(found),
+            }
+        )
+        del store
+        gc.collect()
+    print(f"{args.docs} chunks of {args.words} words, {args.dimension}-dimensional embeddings")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
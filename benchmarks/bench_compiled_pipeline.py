@@ -0,0 +1,100 @@
+# Orchestration overhead per run of Pipeline.run vs a compiled pipeline, with components that do nothing.
+#
+#   python -m benchmarks.bench_compiled_pipeline --iterations 2000
+#
+# "chain" is N components in a row, like document_search (2) or rag (4); "fan-out" sends one input to N
+# components whose outputs are joined; "branch" routes to one of two components. Outputs of both are
+# checked to be identical before timing.
+
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from haystack import Document, Pipeline, component
+from haystack.components.joiners import DocumentJoiner
+from haystack.components.routers import ConditionalRouter
+
+from benchmarks.common import print_table
+from compiled_pipeline import compile_pipeline
+
+
+@component
+class NoOp:
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document], top_k: int = 3):
+        return {"documents": documents}
+
+
+def chain(length: int) -> Pipeline:
+    pipeline = Pipeline()
+    for i in range(length):
+        pipeline.add_component(f"step_{i}", NoOp())
+        if i:
+            pipeline.connect(f"step_{i - 1}.documents", f"step_{i}.documents")
+    return pipeline
+
+
+def fan_out(width: int) -> Pipeline:
+    pipeline = Pipeline()
+    pipeline.add_component("joiner", DocumentJoiner())
+    for i in range(width):
+        pipeline.add_component(f"branch_{i}", NoOp())
+        pipeline.connect(f"branch_{i}.documents", "joiner.documents")
+    return pipeline
+
+
+def branch() -> Pipeline:
+    routes = [
+        {"condition": "{{ documents|length > 1 }}", "output": "{{ documents }}", "output_name": "many", "output_type": List[Document]},
+        {"condition": "{{ documents|length <= 1 }}", "output": "{{ documents }}", "output_name": "few", "output_type": List[Document]},
+    ]
+    pipeline = Pipeline()
+    pipeline.add_component("router", ConditionalRouter(routes=routes))
+    pipeline.add_component("many", NoOp())
+    pipeline.add_component("few", NoOp())
+    pipeline.connect("router.many", "many.documents")
+    pipeline.connect("router.few", "few.documents")
+    return pipeline
+
+
+def per_run_us(fn: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orchestration cost per run, Pipeline.run vs compiled.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    documents = [Document(content="Leonardo da Vinci was born in Vinci.")]
+    cases: Dict[str, Any] = {
+        "chain 2": (chain(2), {"step_0": {"documents": documents}}),
+        "chain 4": (chain(4), {"step_0": {"documents": documents}}),
+        "chain 16": (chain(16), {"step_0": {"documents": documents}}),
+        "fan-out 8": (fan_out(8), {"documents": documents}),
+        "branch": (branch(), {"router": {"documents": documents}}),
+    }
+    rows = []
+    for name, (pipeline, data) in cases.items():
+        compiled = compile_pipeline(pipeline)
+        if compiled.run(data) != pipeline.run(data):
+            raise AssertionError(f"Compiled outputs differ from Pipeline.run for {name}")
+        run_us = per_run_us(lambda: pipeline.run(data), args.iterations)
+        compiled_us = per_run_us(lambda: compiled.run(data), args.iterations)
+        rows.append(
+            {
+                "pipeline": name,
+                "components": len(pipeline.graph.nodes),
+                "Pipeline.run us": run_us,
+                "compiled us": compiled_us,
+                "speedup": run_us / compiled_us,
+            }
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Prompt size per turn over a long chat session, with and without ConversationMemory.
+#
+#   python -m benchmarks.bench_conversation_memory --turns 150 --max-tokens 1500
+#
+# A local fake chat server answers every turn with a paragraph, and the summarizer with a short summary.
+# Prompt tokens are counted by the server on the chat requests only.
+
+import argparse
+from typing import Any, Dict, List
+
+from haystack import Pipeline
+from haystack.components.generators import OpenAIGenerator
+from haystack.components.generators.chat.openai import OpenAIChatGenerator
+from haystack.components.joiners import BranchJoiner
+from haystack.dataclasses import ChatMessage
+from haystack.utils.auth import Secret
+
+from benchmarks.common import Timer, print_table
+from benchmarks.fake_openai import FakeOpenAIServer, Reply, count_tokens, last_user_message
+from conversation_memory import ConversationMemory
+
+ANSWER = "Mark lives in Berlin, where it is mostly sunny today with a light breeze from the west. " * 4
+SUMMARY = "The user asked about where people live and the weather there; Mark lives in Berlin. " * 3
+
+
+class Recorder:
+    def __init__(self):
+        self.chat_prompt_tokens: List[int] = []
+        self.summaries = 0
+
+    def __call__(self, request: Dict[str, Any]) -> Reply:
+        if last_user_message(request).lstrip().startswith("Summarize the conversation"):
+            self.summaries += 1
+            return Reply(content=SUMMARY)
+        self.chat_prompt_tokens.append(sum(count_tokens(m.get("content") or "") for m in request["messages"]))
+        return Reply(content=ANSWER)
+
+
+def build_agent(base_url: str, memory: ConversationMemory = None) -> Pipeline:
+    agent = Pipeline()
+    agent.add_component("message_collector", BranchJoiner(List[ChatMessage]))
+    agent.add_component("generator", OpenAIChatGenerator(api_key=Secret.from_token("fake"), api_base_url=base_url))
+    agent.connect("message_collector", "generator.messages")
+    if memory is not None:
+        agent.add_component("memory", memory)
+        agent.connect("memory.messages", "message_collector")
+    return agent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens per turn with and without ConversationMemory.")
+    parser.add_argument("--turns", type=int, default=150)
+    parser.add_argument("--max-tokens", type=int, default=1500)
+    args = parser.parse_args()
+
+    checkpoints = sorted({t for t in (1, 10, 50, 100, args.turns) if t <= args.turns})
+    rows = []
+    for use_memory in (False, True):
+        recorder = Recorder()
+        with FakeOpenAIServer(responder=recorder) as server:
+            memory = None
+            if use_memory:
+                summarizer = OpenAIGenerator(api_key=Secret.from_token("fake"), api_base_url=server.base_url)
+                memory = ConversationMemory(max_tokens=args.max_tokens, summarizer=summarizer)
+            agent = build_agent(server.base_url, memory)
+            messages = [ChatMessage.from_system("You answer questions about where people live.")]
+            with Timer() as t:
+                for turn in range(args.turns):
+                    messages.append(ChatMessage.from_user(f"Turn {turn}: where does Mark live, and how is the weather?"))
+                    inputs = {"memory": {"messages": messages}} if use_memory else {"message_collector": {"value": messages}}
+                    messages.extend(agent.run(inputs)["generator"]["replies"])
+
+        row: Dict[str, Any] = {"memory": use_memory}
+        row.update({f"turn {c} tokens": recorder.chat_prompt_tokens[c - 1] for c in checkpoints})
+        row["total prompt tokens"] = sum(recorder.chat_prompt_tokens)
+        row["summarizer calls"] = recorder.summaries
+        row["s"] = t.elapsed
+        rows.append(row)
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# Embedding calls and index size with and without near-duplicate filtering, on a synthetic corpus: a Lesson 1
+# style text split into chunks and indexed twice (a re-run), and Lesson 2 style pages that share their
+# navigation and footer, some of them mirrored or lightly edited copies of others.
+#
+#   python -m benchmarks.bench_dedup --pages 400 --near-duplicates 0.2 --threshold 0.8
+#
+# Embeddings come from the local fake OpenAI server. Precision and recall compare the documents dropped with
+# the pairs whose exact shingle Jaccard similarity reaches the threshold.
+
+import argparse
+import os
+import pickle
+import random
+import tempfile
+from typing import List, Set, Tuple
+
+from haystack import Document
+from haystack.components.embedders import OpenAIDocumentEmbedder
+from haystack.components.preprocessors import DocumentSplitter
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.document_stores.types import DuplicatePolicy
+from haystack.utils.auth import Secret
+
+from benchmarks.common import Timer, print_table
+from benchmarks.fake_openai import FakeOpenAIServer
+from dedup import NearDuplicateFilter, NearDuplicateIndex, shingles
+
+VOCABULARY = [f"w{i}" for i in range(5000)]
+BOILERPLATE = (
+    "Haystack Integrations Docs Tutorials Blog Community Get started Search "
+    + " ".join(f"integration{i} overview install usage license" for i in range(40))
+    + " Copyright deepset Privacy Imprint Discord GitHub Twitter YouTube"
+)
+
+
+def text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def edit(rng: random.Random, content: str, edits: int) -> str:
+    words = content.split()
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+    return " ".join(words)
+
+
+def lesson_1_chunks(seed: int, words: int) -> List[Document]:
+    rng = random.Random(seed)
+    source = Document(content=text(rng, words), meta={"file_path": "data/davinci.txt"})
+    return DocumentSplitter(split_by="word", split_length=200, split_overlap=20).run(documents=[source])["documents"]
+
+
+def lesson_2_pages(seed: int, pages: int, near_duplicates: float) -> List[Document]:
+    rng = random.Random(seed)
+    documents: List[Document] = []
+    for i in range(pages):
+        if documents and rng.random() < near_duplicates:
+            original = rng.choice(documents).content
+            content = original if rng.random() < 0.3 else edit(rng, original, rng.randint(1, 8))
+        else:
+            content = f"{BOILERPLATE} {text(rng, 250)} {BOILERPLATE[:200]}"
+        documents.append(Document(content=content, meta={"url": f"https://haystack.deepset.ai/integrations/page-{i}"}))
+    return documents
+
+
+def true_duplicates(documents: List[Document], threshold: float) -> Tuple[Set[str], int]:
+    """
+    Ids of the documents whose exact similarity to an earlier one reaches `threshold`, and the pairs compared.
+    """
+    grams = [shingles(doc.content) for doc in documents]
+    duplicates, pairs = set(), 0
+    for i, left in enumerate(grams):
+        for j in range(i):
+            pairs += 1
+            if len(left & grams[j]) / len(left | grams[j]) >= threshold:
+                duplicates.add(documents[i].id)
+                break
+    return duplicates, pairs
+
+
+def index(batches: List[List[Document]], embedder: OpenAIDocumentEmbedder, dedup: NearDuplicateFilter = None):
+    store = InMemoryDocumentStore()
+    if dedup is not None:
+        dedup.document_store = store
+    dropped: List[Document] = []
+    filter_seconds = 0.0
+    for documents in batches:
+        if dedup is not None:
+            with Timer() as dedup_time:
+                result = dedup.run(documents=documents)
+            filter_seconds += dedup_time.elapsed
+            documents, dropped = result["documents"], dropped + result["duplicates"]
+        if documents:
+            store.write_documents(embedder.run(documents=documents)["documents"], policy=DuplicatePolicy.OVERWRITE)
+    return store, dropped, filter_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding calls and index size with near-duplicate filtering.")
+    parser.add_argument("--words", type=int, default=40_000, help="Words of the Lesson 1 text.")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--near-duplicates", type=float, default=0.2)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    chunks = lesson_1_chunks(0, args.words)
+    pages = lesson_2_pages(1, args.pages, args.near_duplicates)
+    scenarios = {
+        "Lesson 1, indexed twice": [chunks, lesson_1_chunks(0, args.words)],
+        "Lesson 2 pages": [pages[i : i + 50] for i in range(0, len(pages), 50)],
+    }
+
+    rows = []
+    with FakeOpenAIServer() as server, tempfile.TemporaryDirectory() as tmp:
+        embedder = OpenAIDocumentEmbedder(
+            api_key=Secret.from_token("fake"), api_base_url=server.base_url, batch_size=32, progress_bar=False
+        )
+        for name, batches in scenarios.items():
+            path = os.path.join(tmp, f"{name}.sqlite")
+            for dedup in (None, NearDuplicateFilter(NearDuplicateIndex(args.threshold, path=path))):
+                texts, requests = server.embedded_texts, server.embedding_requests
+                store, dropped, seconds = index(batches, embedder, dedup)
+                row = {
+                    "corpus": name,
+                    "filter": "near-duplicates" if dedup is not None else "none",
+                    "documents": sum(map(len, batches)),
+                    "embedded": server.embedded_texts - texts,
+                    "embedding calls": server.embedding_requests - requests,
+                    "indexed": store.count_documents(),
+                    "index KB": len(pickle.dumps(store.storage)) / 1024,
+                }
+                if dedup is not None:
+                    documents = [doc for batch in batches for doc in batch]
+                    expected, pairs = true_duplicates(documents, args.threshold)
+                    dropped_ids = {doc.id for doc in dropped}
+                    row.update(
+                        {
+                            "docs/s": sum(map(len, batches)) / seconds,
+                            "compared": dedup.index.stats["candidates"],
+                            "brute-force pairs": pairs,
+                            "precision": len(dropped_ids & expected) / len(dropped_ids) if dropped_ids else 1.0,
+                            "recall": len(dropped_ids & expected) / len(expected) if expected else 1.0,
+                        }
+                    )
+                rows.append(row)
+
+        # A later run of Lesson 1: a new index loads the signatures from the SQLite file.
+        path = os.path.join(tmp, "Lesson 1, indexed twice.sqlite")
+        reloaded = NearDuplicateFilter(NearDuplicateIndex(args.threshold, path=path))
+        with Timer() as load_time:
+            NearDuplicateIndex(args.threshold, path=path)
+        kept = reloaded.run(documents=chunks)["documents"]
+    print_table(rows)
+    print(
+        f"\nReloaded {len(reloaded.index)} signatures in {load_time.elapsed * 1000:.0f} ms; "
+        f"a re-run of Lesson 1 then embeds {len(kept)} of {len(chunks)} chunks."
+    )
+
+
+if __name__ == "__main__":
+    main()
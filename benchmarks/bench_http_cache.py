@@ -0,0 +1,141 @@
+# Repeated Hacker News summarizer fetches (Lesson 3) and repeated web-search fallbacks (Lesson 4), without and
+# with the shared HTTP cache, against a local stand-in for the Hacker News API, the linked articles and Serper.
+#
+#   python -m benchmarks.bench_http_cache --runs 5 --top-k 10 --latency 0.05
+#
+# Reports the network requests each run makes, wall time, the cache hit rate, and that the LRU bound holds.
+# The stand-in sends ETags for items and articles; "stale" runs use a TTL of 0 so every entry is revalidated.
+
+import argparse
+import os
+import tempfile
+from typing import List
+
+import requests
+from haystack.components.fetchers import LinkContentFetcher
+from haystack.components.websearch import serper_dev
+from haystack.components.websearch.serper_dev import SerperDevWebSearch
+from haystack.utils.auth import Secret
+
+from async_fetcher import AsyncLinkContentFetcher
+from benchmarks.common import Timer, print_table
+from benchmarks.fake_web import FakeWebServer
+from embedding_cache import normalize_text
+from http_cache import CachedWebSearch, CacheRule, HTTPCache
+
+QUERIES = [
+    "What Mistral components does Haystack have?",
+    "what mistral components does haystack have?",
+    "Who is the president of the USA?",
+    "  Who is the president   of the USA? ",
+    "How should I initialize a generator with a Mistral model with Haystack?",
+    "What is the capital of France?",
+]
+
+
+def fetch_posts(base_url: str, top_k: int, cache: HTTPCache = None) -> List[str]:
+    """
+    What Lesson 3's `HackernewsNewestFetcher` downloads: the story list, the top `top_k` posts and their articles.
+    Returns the article bodies and post texts.
+    """
+    get = (lambda url: cache.fetch(url)) if cache is not None else (lambda url: requests.get(url, timeout=10))
+    fetcher = AsyncLinkContentFetcher(cache=cache) if cache is not None else LinkContentFetcher()
+    contents = []
+    for story in get(f"{base_url}/v0/topstories.json?print=pretty").json()[:top_k]:
+        post = get(f"{base_url}/v0/item/{story}.json?print=pretty").json()
+        if "url" in post:
+            contents.append(fetcher.run(urls=[post["url"]])["streams"][0].data.decode())
+        else:
+            contents.append(post["text"])
+    return contents
+
+
+def hn_rules(base_url: str, ttl_scale: float) -> List[CacheRule]:
+    # DEFAULT_RULES, for the stand-in's address.
+    prefix = base_url.replace(".", r"\.")
+    return [
+        CacheRule(rf"^{prefix}/v0/\w+stories\.json", ttl=120 * ttl_scale, ignore_params=("print",)),
+        CacheRule(rf"^{prefix}/v0/item/", ttl=3600 * ttl_scale, ignore_params=("print",)),
+        CacheRule(r"^search:", ttl=24 * 3600 * ttl_scale),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Network requests of repeated runs, without and with the HTTP cache.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--max-bytes", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, FakeWebServer(args.latency) as server:
+        rows = []
+        expected = fetch_posts(server.base_url, args.top_k)
+        configs = [("no cache", None), ("cache, fresh", 1.0), ("cache, stale (TTL 0)", 0.0)]
+        for name, ttl_scale in configs:
+            cache = None
+            if ttl_scale is not None:
+                cache = HTTPCache(
+                    os.path.join(tmp, f"{name[:12]}.sqlite"),
+                    rules=hn_rules(server.base_url, ttl_scale),
+                    default_ttl=600 * ttl_scale,
+                )
+            requests_before, bytes_before = server.total_requests(), server.bytes_sent
+            times = []
+            for _ in range(args.runs):
+                with Timer() as run_time:
+                    if fetch_posts(server.base_url, args.top_k, cache) != expected:
+                        raise AssertionError(f"{name}: different contents")
+                times.append(run_time.elapsed)
+            requests_made = server.total_requests() - requests_before
+            rows.append(
+                {
+                    "summarizer fetch": name,
+                    "first run s": times[0],
+                    "later runs s": sum(times[1:]) / max(1, len(times) - 1),
+                    "requests": requests_made,
+                    "KB downloaded": (server.bytes_sent - bytes_before) / 1024,
+                    "hit rate": f"{cache.hit_rate():.0%}" if cache is not None else "",
+                    "304s": cache.stats["revalidated"] if cache is not None else "",
+                }
+            )
+        print(f"Lesson 3 fetcher, top {args.top_k} stories, {args.runs} runs, {args.latency * 1000:.0f} ms latency:")
+        print_table(rows)
+
+        serper_dev.SERPERDEV_BASE_URL = server.search_url
+        websearch = SerperDevWebSearch(api_key=Secret.from_token("fake"))
+        cache = HTTPCache(os.path.join(tmp, "search.sqlite"))
+        cached = CachedWebSearch(websearch, cache=cache)
+        rows = []
+        for name, component in (("SerperDevWebSearch", websearch), ("CachedWebSearch", cached)):
+            before = server.requests.get("search", 0)
+            with Timer() as search_time:
+                for _ in range(args.runs):
+                    results = [component.run(query=query)["links"] for query in QUERIES]
+            rows.append(
+                {
+                    "web search fallback": name,
+                    "searches": len(QUERIES) * args.runs,
+                    "API calls": server.requests.get("search", 0) - before,
+                    "s": search_time.elapsed,
+                    "hit rate": f"{cache.hit_rate():.0%}" if component is cached else "",
+                }
+            )
+        if results != [websearch.run(query=query)["links"] for query in QUERIES]:
+            raise AssertionError("Cached search results differ")
+        print(f"\nLesson 4 web search, {len(QUERIES)} queries ({len({normalize_text(q, lowercase=True) for q in QUERIES})} distinct) x {args.runs}:")
+        print_table(rows)
+
+        bounded = HTTPCache(os.path.join(tmp, "bounded.sqlite"), default_ttl=3600, max_bytes=args.max_bytes)
+        fetcher = AsyncLinkContentFetcher(cache=bounded)
+        fetcher.run(urls=[f"{server.base_url}/article/{i}" for i in range(1, 101)])
+        print(
+            f"\nLRU bound: 100 articles into a {args.max_bytes // 1000} KB cache -> {len(bounded)} kept, "
+            f"{bounded.size_bytes() // 1000} KB, {bounded.stats['evictions']} evicted"
+        )
+        if bounded.size_bytes() > args.max_bytes:
+            raise AssertionError("Cache exceeds its size bound")
+
+
+if __name__ == "__main__":
+    main()
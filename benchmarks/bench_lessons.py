@@ -0,0 +1,618 @@
+# End-to-end benchmark of the Lesson 1-6 pipelines with local stand-ins for every external service: the fake
+# OpenAI-compatible server for generators, hashed bag-of-words embedders for OpenAI/Cohere embeddings, and the
+# fake web server for Hacker News, Serper and the integration pages.
+#
+#   python -m benchmarks.bench_lessons --runs 20 --save benchmarks/baselines/lessons.json
+#   python -m benchmarks.bench_lessons --runs 20 --baseline benchmarks/baselines/lessons.json
+#
+# Lesson 1 indexes `davinci.txt` and a synthetic corpus with 10% near-duplicate files. Every scenario reports
+# throughput and latency percentiles of its runs, and the peak Python memory (tracemalloc) of building its
+# pipelines plus one run. Indexing runs build a fresh store each time, so their latency includes building the
+# pipeline. With `--baseline`, p50 latency and throughput are compared to a saved run and the script exits with
+# status 1 if either got worse by more than `--tolerance`. Latencies are only comparable between runs with the
+# same settings and machine; both are saved with the results, and a baseline from other settings, another machine
+# or another Python version gets a warning.
+#
+# No baseline is committed: its numbers would only hold on the machine that made it. Save one from the commit to
+# compare against, on the machine that will run the comparison, then run with `--baseline` after the change.
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from haystack import Document, Pipeline, component
+from haystack.components.converters import HTMLToDocument
+from haystack.components.converters.txt import TextFileToDocument
+from haystack.components.generators import OpenAIGenerator
+from haystack.components.generators.chat.openai import OpenAIChatGenerator
+from haystack.components.joiners import BranchJoiner
+from haystack.components.retrievers.in_memory import InMemoryBM25Retriever
+from haystack.components.routers import ConditionalRouter
+from haystack.components.websearch import serper_dev
+from haystack.components.websearch.serper_dev import SerperDevWebSearch
+from haystack.components.writers import DocumentWriter
+from haystack.dataclasses import ChatMessage
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.utils.auth import Secret
+
+from async_fetcher import AsyncLinkContentFetcher, ParallelHTMLToDocument
+from async_generators import AsyncOpenAIChatGenerator, AsyncOpenAIGenerator
+from benchmarks.common import Timer, latency_summary, print_table
+from benchmarks.fake_openai import FakeOpenAIServer, Reply, last_user_message
+from benchmarks.fake_web import WORDS, FakeWebServer
+from benchmarks.hash_embedders import HashDocumentEmbedder, HashTextEmbedder
+from benchmarks.lesson_templates import (
+    LESSON_2_RAG,
+    LESSON_3_SUMMARIZER_WITH_URL,
+    LESSON_4_RAG,
+    LESSON_4_WEBSEARCH,
+    LESSON_5_ENTITIES,
+    LESSON_6_RAG,
+)
+from chunking import SentenceChunker
+from compact_store import CompactDocumentStore
+from compiled_pipeline import compile_pipeline
+from conversation_memory import ConversationMemory
+from dedup import NearDuplicateFilter, NearDuplicateIndex
+from embedding_cache import CachedTextEmbedder
+from http_cache import CachedWebSearch, HTTPCache
+from indexed_store import IndexedInMemoryDocumentStore
+from loop_budget import LoopBudget, run_with_budget
+from parallel_tools import ParallelFunctionCaller
+from prompt_cache import CachedPromptBuilder
+from retrieval_cache import CachedEmbeddingRetriever
+from tool_rag import BM25Index, BM25IndexRetriever
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAVINCI = os.path.join(ROOT, "davinci.txt")
+
+ENTITIES = '{"Person": ["Stefano", "Geoff"], "Location": [], "Date": ["June 6th 2024"]}'
+
+LESSON_1_QUESTIONS = [
+    "How old was Davinci when he died?",
+    "Where was davinci born?",
+    "Davinci drawings",
+    "When was mona lisa made?",
+    "Did davinci die in the year 1200",
+    "Sensei Davinci",
+]
+LESSON_2_QUESTIONS = [f"How can I use {name} with Haystack?" for name in ("Cohere", "Anthropic", "Jina", "NVIDIA")]
+# Half of them aren't answered by the Lesson 4 documents, so they go to web search.
+LESSON_4_QUERIES = [
+    "What is a retriever for?",
+    "What Mistral components does Haystack have?",
+    "What do embedders do?",
+    "Does Haystack support Mistral models?",
+]
+LESSON_5_TEXT = """
+Stefano: Hey all, let's start the all hands for June 6th 2024
+Geoff: Thanks, I'll kick it off with a request. Could we please add persistent memory to the Chroma document store.
+Stefano: Easy enough, I can add that to the feature requests. What else?"""
+LESSON_6_DOCUMENTS = [
+    Document(content="My name is Jean and I live in Paris."),
+    Document(content="My name is Mark and I live in Berlin."),
+    Document(content="My name is Giorgio and I live in Rome."),
+    Document(content="My name is Marta and I live in Madrid."),
+    Document(content="My name is Harry and I live in London."),
+]
+LESSON_6_QUESTIONS = [
+    "What's the weather like where Mark lives?",
+    "Can you tell me where Giorgio lives and how warm it is there?",
+    "Who lives in London, and is it cloudy there?",
+]
+LESSON_6_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "rag_pipeline_func",
+            "description": "Get information about where people live",
+            "parameters": {"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]},
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_current_weather",
+            "description": "Get the current weather",
+            "parameters": {"type": "object", "properties": {"location": {"type": "string"}}, "required": ["location"]},
+        },
+    },
+]
+WEATHER_INFO = {
+    "Berlin": {"weather": "mostly sunny", "temperature": 7, "unit": "celsius"},
+    "Rome": {"weather": "sunny", "temperature": 14, "unit": "celsius"},
+    "London": {"weather": "cloudy", "temperature": 9, "unit": "celsius"},
+}
+
+
+def lesson_responder(reply_words: int) -> Callable[[Dict[str, Any]], Reply]:
+    """
+    Answers each lesson's prompts the way its pipeline expects: tool calls and then an answer for the Lesson 6
+    agent, DONE on the second pass of the Lesson 5 loop, `no_answer` for Lesson 4 questions about Mistral, and
+    `reply_words` words taken from the prompt otherwise.
+    """
+
+    def respond(request: Dict[str, Any]) -> Reply:
+        prompt = last_user_message(request)
+        messages = request.get("messages", [])
+        if "tools" in request:
+            if messages and messages[-1].get("role") in ("function", "tool"):
+                return Reply(content=filler(prompt, reply_words))
+            return Reply(tool_calls=[("rag_pipeline_func", {"query": prompt}), ("get_current_weather", {"location": "Berlin"})])
+        if "previously extracted" in prompt:
+            return Reply(content=f"DONE {ENTITIES}")
+        if "Extract entities" in prompt:
+            return Reply(content=ENTITIES)
+        if "reply with 'no_answer'" in prompt and "Mistral" in prompt:
+            return Reply(content="no_answer")
+        return Reply(content=filler(prompt, reply_words))
+
+    return respond
+
+
+def filler(prompt: str, words: int) -> str:
+    return " ".join(itertools.islice(itertools.cycle(prompt.split() or ["ok"]), words))
+
+
+def synthetic_corpus(directory: str, files: int, words: int, seed: int = 0) -> List[str]:
+    """
+    Writes `files` text files of about `words` words each; one in ten is a copy of an earlier file with a few
+    words changed, for the near-duplicate filter to catch.
+    """
+    rng = random.Random(seed)
+    texts: List[str] = []
+    paths = []
+    for i in range(files):
+        if texts and i % 10 == 9:
+            tokens = rng.choice(texts).split()
+            for position in rng.sample(range(len(tokens)), k=max(1, len(tokens) // 50)):
+                tokens[position] = rng.choice(WORDS)
+            text = " ".join(tokens)
+        else:
+            sentences = (" ".join(rng.choices(WORDS, k=rng.randint(8, 20))) + "." for _ in range(words // 14))
+            text = " ".join(sentences)
+        texts.append(text)
+        path = os.path.join(directory, f"synthetic_{i}.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+        paths.append(path)
+    return paths
+
+
+@dataclass
+class Stubs:
+    """
+    What the scenarios run against.
+    """
+
+    openai: FakeOpenAIServer
+    web: FakeWebServer
+    tmp: str
+    args: argparse.Namespace
+
+    def generator(self, **kwargs) -> OpenAIGenerator:
+        return OpenAIGenerator(api_key=Secret.from_token("fake"), api_base_url=self.openai.base_url, **kwargs)
+
+    def chat_generator(self, **kwargs) -> OpenAIChatGenerator:
+        return OpenAIChatGenerator(api_key=Secret.from_token("fake"), api_base_url=self.openai.base_url, **kwargs)
+
+    def async_generator(self, **kwargs) -> AsyncOpenAIGenerator:
+        return AsyncOpenAIGenerator(api_key=Secret.from_token("fake"), api_base_url=self.openai.base_url, **kwargs)
+
+    def async_chat_generator(self, **kwargs) -> AsyncOpenAIChatGenerator:
+        return AsyncOpenAIChatGenerator(api_key=Secret.from_token("fake"), api_base_url=self.openai.base_url, **kwargs)
+
+
+# A scenario builds its pipelines and returns a function doing run number `i`, which returns how many units
+# (documents, queries, turns) it processed.
+Scenario = Callable[[Stubs], Callable[[int], int]]
+
+
+def _lesson_1_indexing(stubs: Stubs, sources: List[str]) -> Callable[[int], int]:
+    def run(i: int) -> int:
+        document_store = CompactDocumentStore(indexed_fields=["file_path", "title"])
+        indexing_pipeline = Pipeline()
+        indexing_pipeline.add_component("converter", TextFileToDocument())
+        indexing_pipeline.add_component("splitter", SentenceChunker())
+        indexing_pipeline.add_component("dedup", NearDuplicateFilter(NearDuplicateIndex(threshold=0.8), document_store=document_store))
+        indexing_pipeline.add_component("embedder", HashDocumentEmbedder(stubs.args.dimensions))
+        indexing_pipeline.add_component("writer", DocumentWriter(document_store=document_store))
+        indexing_pipeline.connect("converter", "splitter")
+        indexing_pipeline.connect("splitter", "dedup")
+        indexing_pipeline.connect("dedup.documents", "embedder")
+        indexing_pipeline.connect("embedder", "writer")
+        indexing_pipeline.run({"converter": {"sources": sources}})
+        return len(sources)
+
+    return run
+
+
+def lesson_1_index_davinci(stubs: Stubs) -> Callable[[int], int]:
+    return _lesson_1_indexing(stubs, [DAVINCI])
+
+
+def lesson_1_index_synthetic(stubs: Stubs) -> Callable[[int], int]:
+    directory = os.path.join(stubs.tmp, "synthetic")
+    os.makedirs(directory, exist_ok=True)
+    return _lesson_1_indexing(stubs, synthetic_corpus(directory, stubs.args.synthetic_files, stubs.args.synthetic_words))
+
+
+def lesson_1_search(stubs: Stubs) -> Callable[[int], int]:
+    document_store = CompactDocumentStore(indexed_fields=["file_path", "title"])
+    documents = SentenceChunker().run(TextFileToDocument().run(sources=[DAVINCI])["documents"])["documents"]
+    document_store.write_documents(HashDocumentEmbedder(stubs.args.dimensions).run(documents)["documents"])
+
+    document_search = Pipeline()
+    document_search.add_component("query_embedder", CachedTextEmbedder(HashTextEmbedder(stubs.args.dimensions)))
+    document_search.add_component("retriever", CachedEmbeddingRetriever(document_store=document_store))
+    document_search.connect("query_embedder.embedding", "retriever.query_embedding")
+    document_search = compile_pipeline(document_search)
+
+    def run(i: int) -> int:
+        question = LESSON_1_QUESTIONS[i % len(LESSON_1_QUESTIONS)]
+        document_search.run({"query_embedder": {"text": question}, "retriever": {"top_k": 3}})
+        return 1
+
+    return run
+
+
+def lesson_2_index_pages(stubs: Stubs) -> Callable[[int], int]:
+    urls = stubs.web.integration_urls(stubs.args.pages)
+
+    def run(i: int) -> int:
+        document_store = IndexedInMemoryDocumentStore(indexed_fields=["url", "title"])
+        indexing = Pipeline()
+        indexing.add_component("fetcher", AsyncLinkContentFetcher(max_per_host=4))
+        indexing.add_component("converter", ParallelHTMLToDocument(backend="html.parser"))
+        indexing.add_component("dedup", NearDuplicateFilter(NearDuplicateIndex(threshold=0.8), document_store=document_store))
+        indexing.add_component("embedder", HashDocumentEmbedder(stubs.args.dimensions))
+        indexing.add_component("writer", DocumentWriter(document_store=document_store))
+        indexing.connect("fetcher.streams", "converter.sources")
+        indexing.connect("converter", "dedup")
+        indexing.connect("dedup.documents", "embedder")
+        indexing.connect("embedder", "writer")
+        indexing.run({"fetcher": {"urls": urls}})
+        return len(urls)
+
+    return run
+
+
+def lesson_2_rag(stubs: Stubs) -> Callable[[int], int]:
+    document_store = IndexedInMemoryDocumentStore(indexed_fields=["url", "title"])
+    streams = AsyncLinkContentFetcher().run(urls=stubs.web.integration_urls(stubs.args.pages))["streams"]
+    documents = ParallelHTMLToDocument(backend="html.parser").run(sources=streams)["documents"]
+    document_store.write_documents(HashDocumentEmbedder(stubs.args.dimensions).run(documents)["documents"])
+
+    rag = Pipeline()
+    rag.add_component("query_embedder", CachedTextEmbedder(HashTextEmbedder(stubs.args.dimensions)))
+    rag.add_component("retriever", CachedEmbeddingRetriever(document_store=document_store))
+    rag.add_component("prompt", CachedPromptBuilder(template=LESSON_2_RAG))
+    rag.add_component("generator", stubs.generator())
+    rag.connect("query_embedder.embedding", "retriever.query_embedding")
+    rag.connect("retriever.documents", "prompt.documents")
+    rag.connect("prompt", "generator")
+    rag = compile_pipeline(rag)
+
+    def run(i: int) -> int:
+        question = LESSON_2_QUESTIONS[i % len(LESSON_2_QUESTIONS)]
+        rag.run({"query_embedder": {"text": question}, "retriever": {"top_k": 1}, "prompt": {"query": question}})
+        return 1
+
+    return run
+
+
+@component
+class HackernewsNewestFetcher:
+    """
+    Lesson 3's fetcher, reading from `base_url` instead of hacker-news.firebaseio.com.
+    """
+
+    def __init__(self, base_url: str, http_cache: HTTPCache):
+        self.base_url = base_url
+        self.http_cache = http_cache
+        html_conversion_pipeline = Pipeline()
+        html_conversion_pipeline.add_component("fetcher", AsyncLinkContentFetcher(cache=http_cache))
+        html_conversion_pipeline.add_component("converter", HTMLToDocument())
+        html_conversion_pipeline.connect("fetcher", "converter")
+        self.html_pipeline = html_conversion_pipeline
+
+    @component.output_types(articles=List[Document])
+    def run(self, top_k: int):
+        articles = []
+        trending_list = self.http_cache.fetch(url=f"{self.base_url}/v0/topstories.json?print=pretty")
+        for id in trending_list.json()[0:top_k]:
+            post = self.http_cache.fetch(url=f"{self.base_url}/v0/item/{id}.json?print=pretty").json()
+            if "url" in post:
+                article = self.html_pipeline.run({"fetcher": {"urls": [post["url"]]}})
+                articles.append(article["converter"]["documents"][0])
+            elif "text" in post:
+                articles.append(Document(content=post["text"], meta={"title": post["title"]}))
+        return {"articles": articles}
+
+
+def lesson_3_summarize(stubs: Stubs) -> Callable[[int], int]:
+    http_cache = HTTPCache(os.path.join(stubs.tmp, "lesson_3.sqlite"), default_ttl=600)
+    summarizer_pipeline = Pipeline()
+    summarizer_pipeline.add_component("fetcher", HackernewsNewestFetcher(stubs.web.base_url, http_cache))
+    summarizer_pipeline.add_component("prompt", CachedPromptBuilder(template=LESSON_3_SUMMARIZER_WITH_URL))
+    summarizer_pipeline.add_component("llm", stubs.async_generator(priority="batch"))
+    summarizer_pipeline.connect("fetcher.articles", "prompt.articles")
+    summarizer_pipeline.connect("prompt", "llm")
+
+    def run(i: int) -> int:
+        summarizer_pipeline.run({"fetcher": {"top_k": stubs.args.top_k}})
+        return 1
+
+    return run
+
+
+def lesson_4_rag_or_websearch(stubs: Stubs) -> Callable[[int], int]:
+    serper_dev.SERPERDEV_BASE_URL = stubs.web.search_url
+    document_store = InMemoryDocumentStore()
+    document_store.write_documents(
+        [
+            Document(content="Retrievers: Retrieves relevant documents to a user query using keyword search or semantic search."),
+            Document(content="Embedders: Creates embeddings for text or documents."),
+            Document(content="Generators: Use a number of model providers to generate answers or content based on a prompt"),
+            Document(content="File Converters: Converts different file types like TXT, Markdown, PDF, etc. into a Haystack Document type"),
+        ]
+    )
+    routes = [
+        {
+            "condition": "{{'no_answer' in replies[0]|lower}}",
+            "output": "{{query}}",
+            "output_name": "go_to_websearch",
+            "output_type": str,
+        },
+        {
+            "condition": "{{'no_answer' not in replies[0]|lower}}",
+            "output": "{{replies[0]}}",
+            "output_name": "answer",
+            "output_type": str,
+        },
+    ]
+    http_cache = HTTPCache(os.path.join(stubs.tmp, "lesson_4.sqlite"))
+    websearch = CachedWebSearch(SerperDevWebSearch(api_key=Secret.from_token("fake")), cache=http_cache)
+
+    rag_or_websearch = Pipeline()
+    rag_or_websearch.add_component("retriever", InMemoryBM25Retriever(document_store=document_store))
+    rag_or_websearch.add_component("prompt_builder", CachedPromptBuilder(template=LESSON_4_RAG))
+    rag_or_websearch.add_component("llm", stubs.generator())
+    rag_or_websearch.add_component("router", ConditionalRouter(routes))
+    rag_or_websearch.add_component("websearch", websearch)
+    rag_or_websearch.add_component("prompt_builder_for_websearch", CachedPromptBuilder(template=LESSON_4_WEBSEARCH))
+    rag_or_websearch.add_component("llm_for_websearch", stubs.generator())
+    rag_or_websearch.connect("retriever", "prompt_builder.documents")
+    rag_or_websearch.connect("prompt_builder", "llm")
+    rag_or_websearch.connect("llm.replies", "router.replies")
+    rag_or_websearch.connect("router.go_to_websearch", "websearch.query")
+    rag_or_websearch.connect("router.go_to_websearch", "prompt_builder_for_websearch.query")
+    rag_or_websearch.connect("websearch.documents", "prompt_builder_for_websearch.documents")
+    rag_or_websearch.connect("prompt_builder_for_websearch", "llm_for_websearch")
+
+    def run(i: int) -> int:
+        query = LESSON_4_QUERIES[i % len(LESSON_4_QUERIES)]
+        rag_or_websearch.run({"prompt_builder": {"query": query}, "retriever": {"query": query}, "router": {"query": query}})
+        return 1
+
+    return run
+
+
+@component
+class EntitiesValidator:
+    @component.output_types(entities_to_validate=str, entities=str)
+    def run(self, replies: List[str]):
+        if "DONE" in replies[0]:
+            return {"entities": replies[0].replace("DONE", "")}
+        return {"entities_to_validate": replies[0]}
+
+
+def lesson_5_self_reflection(stubs: Stubs) -> Callable[[int], int]:
+    self_reflecting_agent = Pipeline(max_loops_allowed=10)
+    self_reflecting_agent.add_component("prompt_builder", CachedPromptBuilder(template=LESSON_5_ENTITIES))
+    self_reflecting_agent.add_component("entities_validator", EntitiesValidator())
+    self_reflecting_agent.add_component("llm", stubs.async_generator(priority="batch"))
+    self_reflecting_agent.connect("prompt_builder.prompt", "llm.prompt")
+    self_reflecting_agent.connect("llm.replies", "entities_validator.replies")
+    self_reflecting_agent.connect("entities_validator.entities_to_validate", "prompt_builder.entities_to_validate")
+    budget = LoopBudget(max_iterations=3, deadline=30, max_tokens=4000)
+
+    def run(i: int) -> int:
+        result = run_with_budget(self_reflecting_agent, {"prompt_builder": {"text": LESSON_5_TEXT}}, budget, partial_output="llm.replies")
+        if not result.completed:
+            raise RuntimeError(f"Lesson 5 loop stopped by {result.stopped_by}")
+        return 1
+
+    return run
+
+
+def lesson_6_chat_turn(stubs: Stubs) -> Callable[[int], int]:
+    knowledge_base = BM25Index()
+    knowledge_base.write_documents(LESSON_6_DOCUMENTS)
+
+    def rag_pipeline_func(query: str):
+        # A pipeline per call: the tool calls of a turn run in parallel, and a Pipeline isn't thread-safe.
+        rag_pipe = Pipeline()
+        rag_pipe.add_component("retriever", BM25IndexRetriever(index=knowledge_base, top_k=3))
+        rag_pipe.add_component("prompt_builder", CachedPromptBuilder(template=LESSON_6_RAG))
+        rag_pipe.add_component("llm", stubs.generator())
+        rag_pipe.connect("retriever", "prompt_builder.documents")
+        rag_pipe.connect("prompt_builder", "llm")
+        result = rag_pipe.run({"retriever": {"query": query}, "prompt_builder": {"question": query}})
+        return {"reply": result["llm"]["replies"][0]}
+
+    def get_current_weather(location: str):
+        return WEATHER_INFO.get(location, {"weather": "sunny", "temperature": 70, "unit": "fahrenheit"})
+
+    chat_agent = Pipeline()
+    chat_agent.add_component("memory", ConversationMemory(max_tokens=1500))
+    chat_agent.add_component("message_collector", BranchJoiner(List[ChatMessage]))
+    chat_agent.add_component(
+        "generator", stubs.async_chat_generator(generation_kwargs={"tools": LESSON_6_TOOLS}, priority="interactive")
+    )
+    chat_agent.add_component(
+        "function_caller",
+        ParallelFunctionCaller(
+            available_functions={"rag_pipeline_func": rag_pipeline_func, "get_current_weather": get_current_weather},
+            timeout=30.0,
+        ),
+    )
+    chat_agent.connect("memory.messages", "message_collector")
+    chat_agent.connect("message_collector", "generator.messages")
+    chat_agent.connect("generator", "function_caller")
+    chat_agent.connect("function_caller.function_replies", "message_collector")
+
+    def run(i: int) -> int:
+        messages = [
+            ChatMessage.from_system("Break down the user's question into simpler questions you can use with your tools."),
+            ChatMessage.from_user(LESSON_6_QUESTIONS[i % len(LESSON_6_QUESTIONS)]),
+        ]
+        chat_agent.run({"memory": {"messages": messages}})
+        return 1
+
+    return run
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "lesson_1.index_davinci": lesson_1_index_davinci,
+    "lesson_1.index_synthetic": lesson_1_index_synthetic,
+    "lesson_1.search": lesson_1_search,
+    "lesson_2.index_pages": lesson_2_index_pages,
+    "lesson_2.rag": lesson_2_rag,
+    "lesson_3.summarize": lesson_3_summarize,
+    "lesson_4.rag_or_websearch": lesson_4_rag_or_websearch,
+    "lesson_5.self_reflection": lesson_5_self_reflection,
+    "lesson_6.chat_turn": lesson_6_chat_turn,
+}
+
+UNITS = {
+    "lesson_1.index_davinci": "files",
+    "lesson_1.index_synthetic": "files",
+    "lesson_2.index_pages": "pages",
+    "lesson_6.chat_turn": "turns",
+}
+
+
+def measure(scenario: Scenario, stubs: Stubs, runs: int) -> Dict[str, float]:
+    """
+    Peak traced memory of building the scenario plus one run, then `runs` timed runs.
+    """
+    tracemalloc.start()
+    try:
+        run = scenario(stubs)
+        run(0)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies, units = [], 0
+    with Timer() as total:
+        for i in range(1, runs + 1):
+            with Timer() as t:
+                units += run(i)
+            latencies.append(t.elapsed)
+    return {
+        "runs": runs,
+        "units_per_s": units / total.elapsed if total.elapsed else float("nan"),
+        **latency_summary(latencies),
+        "peak_mib": peak / 2**20,
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Changes of p50 latency and throughput against `baseline["results"]`, by scenario, with `regressed` set
+    if either is worse by more than `tolerance` (a fraction).
+    """
+    changes = {}
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        p50 = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+        throughput = result["units_per_s"] / before["units_per_s"] - 1 if before["units_per_s"] else 0.0
+        changes[name] = {"p50": p50, "throughput": throughput, "regressed": p50 > tolerance or throughput < -tolerance}
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lesson 1-6 pipelines end to end against local stand-ins.")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds before the fake model answers.")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="Fake model generation speed.")
+    parser.add_argument("--reply-words", type=int, default=60, help="Length of the fake model's answers.")
+    parser.add_argument("--web-latency", type=float, default=0.0, help="Seconds before the fake web server answers.")
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--synthetic-files", type=int, default=200)
+    parser.add_argument("--synthetic-words", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=40, help="Integration pages indexed in Lesson 2.")
+    parser.add_argument("--top-k", type=int, default=3, help="Hacker News stories summarized in Lesson 3.")
+    parser.add_argument("--save", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare with results saved by --save.")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown before a regression is reported.")
+    args = parser.parse_args()
+
+    settings = {k: v for k, v in vars(args).items() if k not in ("scenarios", "save", "baseline", "tolerance")}
+    machine = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        if baseline.get("settings") != settings:
+            print(f"Warning: the baseline was run with other settings: {baseline.get('settings')}\n")
+        baseline_machine = {key: baseline.get(key) for key in machine}
+        if baseline_machine != machine:
+            print(f"Warning: the baseline was run on another machine: {baseline_machine}\n")
+
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp, FakeOpenAIServer(
+        latency=args.llm_latency, tokens_per_second=args.tokens_per_second, responder=lesson_responder(args.reply_words)
+    ) as openai, FakeWebServer(args.web_latency) as web:
+        stubs = Stubs(openai=openai, web=web, tmp=tmp, args=args)
+        for name in args.scenarios:
+            results[name] = measure(SCENARIOS[name], stubs, args.runs)
+            print(f"{name}: {results[name]['p50_ms']:.1f} ms p50", file=sys.stderr)
+        llm_requests = openai.requests
+
+    changes = compare(results, baseline, args.tolerance) if baseline else {}
+    rows = []
+    for name, result in results.items():
+        row: Dict[str, Optional[object]] = {
+            "scenario": name,
+            "unit": UNITS.get(name, "queries"),
+            "runs": result["runs"],
+            "units/s": result["units_per_s"],
+            "p50 ms": result["p50_ms"],
+            "p95 ms": result["p95_ms"],
+            "p99 ms": result["p99_ms"],
+            "peak MiB": result["peak_mib"],
+        }
+        if name in changes:
+            row["p50 vs baseline"] = f"{changes[name]['p50']:+.0%}"
+            row["units/s vs baseline"] = f"{changes[name]['throughput']:+.0%}"
+            row["status"] = "REGRESSION" if changes[name]["regressed"] else "ok"
+        rows.append(row)
+    print(f"Python {platform.python_version()} on {platform.platform()}, {llm_requests} fake LLM requests")
+    print_table(rows)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as file:
+            saved = {"settings": settings, **machine, "results": results}
+            json.dump(saved, file, indent=2)
+        print(f"\nSaved to {args.save}")
+    if any(change["regressed"] for change in changes.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
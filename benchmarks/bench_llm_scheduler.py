@@ -0,0 +1,135 @@
+# Many pipelines calling the LLM at once under a provider rate limit: OpenAIGenerator with a retry loop (full
+# jitter exponential backoff, the usual fix) against AsyncOpenAIGenerator on a shared LLMScheduler.
+#
+#   python -m benchmarks.bench_llm_scheduler --requests 300 --threads 32 --rpm 600 --tpm 60000
+#
+# The local fake server enforces the limits and answers `429` with a Retry-After. The workload mixes Lesson 3
+# style batch summaries (long prompts) with Lesson 6 style interactive questions, and a share of the prompts
+# are repeated, as when several pipelines summarize the same top stories at the same time.
+
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from haystack.components.generators import OpenAIGenerator
+from haystack.utils.auth import Secret
+from openai import RateLimitError
+
+from async_generators import AsyncOpenAIGenerator, LLMScheduler, RateLimits
+from benchmarks.common import Timer, latency_summary, print_table
+from benchmarks.fake_openai import FakeOpenAIServer
+from benchmarks.lesson_templates import LESSON_3_SUMMARIZER, LESSON_6_RAG
+from prompt_cache import CachedPromptBuilder
+
+VOCABULARY = [f"w{i}" for i in range(2000)]
+
+
+def workload(requests: int, interactive_share: float, repeat_share: float, seed: int = 0) -> List[Tuple[str, str]]:
+    """
+    `(priority, prompt)` pairs in arrival order.
+    """
+    rng = random.Random(seed)
+    summarize = CachedPromptBuilder(template=LESSON_3_SUMMARIZER)
+    answer = CachedPromptBuilder(template=LESSON_6_RAG)
+    items: List[Tuple[str, str]] = []
+    for i in range(requests):
+        if items and rng.random() < repeat_share:
+            items.append(rng.choice(items))
+        elif rng.random() < interactive_share:
+            documents = [{"content": f"My name is Person{rng.randrange(100)} and I live in City{i}."}]
+            items.append(
+                ("interactive", answer.run(documents=documents, question=f"Where does Person{i} live?")["prompt"])
+            )
+        else:
+            articles = [{"content": " ".join(rng.choices(VOCABULARY, k=300))} for _ in range(3)]
+            items.append(("batch", summarize.run(articles=articles)["prompt"]))
+    return items
+
+
+def naive(base_url: str, attempts: int = 8, base: float = 0.25, cap: float = 8.0) -> Callable[[str, str], bool]:
+    generator = OpenAIGenerator(api_key=Secret.from_token("fake"), api_base_url=base_url)
+    generator.client = generator.client.with_options(max_retries=0)
+
+    def call(priority: str, prompt: str) -> bool:
+        for attempt in range(attempts):
+            try:
+                generator.run(prompt=prompt)
+                return True
+            except RateLimitError:
+                time.sleep(random.uniform(0, min(cap, base * 2**attempt)))
+        return False
+
+    return call
+
+
+def scheduled(base_url: str, limits: RateLimits) -> Callable[[str, str], bool]:
+    scheduler = LLMScheduler(limits)
+    generators = {
+        priority: AsyncOpenAIGenerator(
+            api_key=Secret.from_token("fake"), api_base_url=base_url, priority=priority, scheduler=scheduler
+        )
+        for priority in ("interactive", "batch")
+    }
+
+    def call(priority: str, prompt: str) -> bool:
+        try:
+            generators[priority].run(prompt=prompt)
+            return True
+        except RateLimitError:
+            return False
+
+    return call
+
+
+def measure(call: Callable[[str, str], bool], items: List[Tuple[str, str]], threads: int) -> Dict[str, object]:
+    latencies: Dict[str, List[float]] = {"interactive": [], "batch": []}
+    completed = 0
+
+    def one(item: Tuple[str, str]):
+        nonlocal completed
+        with Timer() as t:
+            ok = call(*item)
+        latencies[item[0]].append(t.elapsed)
+        completed += ok
+
+    with Timer() as total, ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, items))
+    return {
+        "completed": completed,
+        "req/s": completed / total.elapsed,
+        "wall s": total.elapsed,
+        "interactive p50 ms": latency_summary(latencies["interactive"])["p50_ms"],
+        "interactive p95 ms": latency_summary(latencies["interactive"])["p95_ms"],
+        "batch p50 ms": latency_summary(latencies["batch"])["p50_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retry loops vs a shared rate-limit scheduler.")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=32, help="Pipelines calling the LLM at once.")
+    parser.add_argument("--rpm", type=float, default=600)
+    parser.add_argument("--tpm", type=float, default=120_000)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--interactive", type=float, default=0.2, help="Share of interactive requests.")
+    parser.add_argument("--repeats", type=float, default=0.1, help="Share of prompts repeating an earlier one.")
+    args = parser.parse_args()
+
+    items = workload(args.requests, args.interactive, args.repeats)
+    limits = RateLimits(requests_per_minute=args.rpm, tokens_per_minute=args.tpm, max_concurrency=args.threads)
+    rows = []
+    for name, make in (("OpenAIGenerator + retry loop", naive), ("AsyncOpenAIGenerator + scheduler", None)):
+        with FakeOpenAIServer(latency=args.latency, requests_per_minute=args.rpm, tokens_per_minute=args.tpm) as server:
+            call = make(server.base_url) if make else scheduled(server.base_url, limits)
+            row = {"client": name, **measure(call, items, args.threads)}
+            row["LLM calls"] = server.requests
+            row["429s"] = server.rate_limited
+            rows.append(row)
+    print(f"{len(items)} requests from {args.threads} threads, limits {args.rpm:.0f} RPM / {args.tpm:.0f} TPM")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Throughput/latency of the local CPU embedders across backends and thread counts.
+#
+#   python -m benchmarks.bench_local_embedder --backends torch onnx onnx-int8 --threads 1 2 4
+#
+# Run on a GPU-less machine. Document throughput is measured with LocalDocumentEmbedder; query latency
+# is measured with `--clients` concurrent callers of LocalTextEmbedder, with and without micro-batching.
+
+import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from haystack import Document
+
+from benchmarks.common import Timer, latency_summary, print_table
+from local_embedders import DEFAULT_MODEL, LocalDocumentEmbedder, LocalTextEmbedder
+
+DAVINCI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "davinci.txt")
+
+
+def load_sentences(n: int) -> List[str]:
+    with open(DAVINCI, encoding="utf-8") as f:
+        text = f.read()
+    sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if len(s.split()) > 3]
+    sentences = sentences or ["Leonardo da Vinci was a painter, engineer and scientist."]
+    return [sentences[i % len(sentences)] for i in range(n)]
+
+
+def split_backend(name: str):
+    if name == "onnx-int8":
+        return "onnx", True
+    return name, False
+
+
+def bench_documents(backend: str, threads: int, texts: List[str], model: str) -> float:
+    kind, quantize = split_backend(backend)
+    embedder = LocalDocumentEmbedder(model=model, backend=kind, quantize=quantize, num_threads=threads)
+    embedder.warm_up()
+    embedder.run(documents=[Document(content=t) for t in texts[:32]])
+    with Timer() as t:
+        embedder.run(documents=[Document(content=text) for text in texts])
+    return len(texts) / t.elapsed
+
+
+def bench_queries(backend: str, threads: int, texts: List[str], clients: int, max_batch_size: int, model: str):
+    kind, quantize = split_backend(backend)
+    embedder = LocalTextEmbedder(
+        model=model, backend=kind, quantize=quantize, num_threads=threads, max_batch_size=max_batch_size
+    )
+    embedder.warm_up()
+    embedder.run(text=texts[0])
+
+    def one(text: str) -> float:
+        with Timer() as t:
+            embedder.run(text=text)
+        return t.elapsed
+
+    with ThreadPoolExecutor(max_workers=clients) as pool, Timer() as wall:
+        latencies = list(pool.map(one, texts))
+    batcher = embedder._batcher
+    return len(texts) / wall.elapsed, latency_summary(latencies), batcher.items / max(batcher.batches, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local CPU embedder throughput and latency.")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--documents", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--clients", type=int, default=16)
+    args = parser.parse_args()
+
+    texts = load_sentences(max(args.documents, args.queries))
+    rows = []
+    for backend in args.backends:
+        for threads in sorted(set(args.threads)):
+            docs_per_s = bench_documents(backend, threads, texts[: args.documents], args.model)
+            for max_batch_size, label in ((1, "off"), (32, "on")):
+                qps, latency, avg_batch = bench_queries(
+                    backend, threads, texts[: args.queries], args.clients, max_batch_size, args.model
+                )
+                rows.append(
+                    {
+                        "backend": backend,
+                        "threads": threads,
+                        "docs/s": docs_per_s,
+                        "micro-batching": label,
+                        "queries/s": qps,
+                        "avg batch": avg_batch,
+                        **latency,
+                    }
+                )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# A runaway self-reflection loop (Lesson 5) with and without per-cycle budgets, against the fake chat server.
+#
+#   python -m benchmarks.bench_loop_budget --llm-latency 0.2
+#
+# The fake model never says DONE, so without a budget the loop runs until Pipeline(max_loops_allowed=10)
+# gives up. A "converging" run, where the model says DONE on its second pass, checks that budgets don't
+# change the result of loops that finish.
+
+import argparse
+from typing import Any, Dict, List
+
+from haystack import Pipeline, component
+from haystack.components.generators.openai import OpenAIGenerator
+from haystack.utils.auth import Secret
+
+from benchmarks.common import print_table
+from benchmarks.fake_openai import FakeOpenAIServer, Reply, last_user_message
+from benchmarks.lesson_templates import LESSON_5_ENTITIES
+from loop_budget import LoopBudget, run_with_budget
+from prompt_cache import CachedPromptBuilder
+
+ENTITIES = '{"Person": ["Stefano", "Geoff"], "Location": [], "Date": ["June 6th 2024"]}'
+TEXT = "Stefano: Hey all, let's start the all hands for June 6th 2024. Geoff: Thanks, I'll kick it off."
+
+
+@component
+class EntitiesValidator:
+    @component.output_types(entities_to_validate=str, entities=str)
+    def run(self, replies: List[str]):
+        if "DONE" in replies[0]:
+            return {"entities": replies[0].replace("DONE", "")}
+        return {"entities_to_validate": replies[0]}
+
+
+def responder(converge: bool):
+    def respond(request: Dict[str, Any]) -> Reply:
+        reflecting = "previously extracted" in last_user_message(request)
+        return Reply(content=f"DONE {ENTITIES}" if converge and reflecting else ENTITIES)
+
+    return respond
+
+
+def build_agent(base_url: str) -> Pipeline:
+    agent = Pipeline(max_loops_allowed=10)
+    agent.add_component("prompt_builder", CachedPromptBuilder(template=LESSON_5_ENTITIES))
+    agent.add_component("entities_validator", EntitiesValidator())
+    agent.add_component("llm", OpenAIGenerator(api_key=Secret.from_token("fake"), api_base_url=base_url))
+    agent.connect("prompt_builder.prompt", "llm.prompt")
+    agent.connect("llm.replies", "entities_validator.replies")
+    agent.connect("entities_validator.entities_to_validate", "prompt_builder.entities_to_validate")
+    return agent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runaway loop with and without budgets.")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    budgets = {
+        "none (max_loops_allowed=10)": LoopBudget(),
+        "max_iterations=3": LoopBudget(max_iterations=3),
+        "deadline=0.5s": LoopBudget(deadline=0.5),
+        "max_tokens=1500": LoopBudget(max_tokens=1500),
+    }
+    rows, timings = [], []
+    for converge in (False, True):
+        for name, budget in budgets.items():
+            with FakeOpenAIServer(latency=args.llm_latency, responder=responder(converge)) as server:
+                run = run_with_budget(
+                    build_agent(server.base_url), {"prompt_builder": {"text": TEXT}}, budget, partial_output="llm.replies"
+                )
+                llm_calls = server.requests
+            if converge and not run.completed:
+                raise AssertionError(f"A loop that converges on its second pass was stopped by {run.stopped_by}")
+            answer = run.outputs["entities_validator"]["entities"] if run.completed else run.partial[0]
+            if ENTITIES not in answer:
+                raise AssertionError(f"Unexpected answer {answer!r}")
+            rows.append(
+                {
+                    "loop": "converging" if converge else "runaway",
+                    "budget": name,
+                    "completed": run.completed,
+                    "stopped by": run.stopped_by,
+                    "llm calls": llm_calls,
+                    "tokens": run.tokens,
+                    "s": run.seconds,
+                }
+            )
+            if not converge and name == "max_iterations=3":
+                timings = [
+                    {"iteration": it.index, "ms": it.seconds * 1000, "tokens": it.tokens, **{f"{c} ms": s * 1000 for c, s in it.components.items()}}
+                    for it in run.iterations
+                ]
+    print_table(rows)
+    print("\nPer-iteration timing, runaway loop with max_iterations=3:")
+    print_table(timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Wall time of a multi-tool assistant turn in the Lesson 6 chat agent: OpenAIFunctionCaller vs ParallelFunctionCaller.
+#
+#   python -m benchmarks.bench_parallel_tools --llm-latency 0.2 --tool-latency 0.3
+#
+# A local fake chat server answers the first turn with several tool calls; `rag_pipeline_func` makes a nested
+# LLM call to the same server and `get_current_weather` sleeps to stand in for a weather API.
+
+import argparse
+import time
+from typing import Any, Dict, List
+
+from haystack import Document, Pipeline
+from haystack.components.generators import OpenAIGenerator
+from haystack.components.generators.chat.openai import OpenAIChatGenerator
+from haystack.components.joiners import BranchJoiner
+from haystack.dataclasses import ChatMessage
+from haystack.utils.auth import Secret
+from haystack_experimental.components.tools import OpenAIFunctionCaller
+
+from benchmarks.common import Timer, print_table
+from benchmarks.fake_openai import FakeOpenAIServer, Reply
+from parallel_tools import ParallelFunctionCaller
+from prompt_cache import CachedPromptBuilder
+
+CITIES = ["Berlin", "Paris", "Rome", "Madrid"]
+
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "rag_pipeline_func",
+            "description": "Get information about where people live",
+            "parameters": {"type": "object", "properties": {"query": {"type": "string"}}, "required": ["query"]},
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "get_current_weather",
+            "description": "Get the current weather",
+            "parameters": {"type": "object", "properties": {"location": {"type": "string"}}, "required": ["location"]},
+        },
+    },
+]
+
+
+def responder(request: Dict[str, Any]):
+    roles = [m.get("role") for m in request.get("messages", [])]
+    if "tools" not in request:
+        return Reply(content="Mark lives in Berlin.")
+    if "function" in roles or "tool" in roles:
+        return Reply(content="Mark lives in Berlin, where it is mostly sunny and 7 degrees.")
+    calls = [("rag_pipeline_func", {"query": "Where does Mark live?"})]
+    calls += [("get_current_weather", {"location": city}) for city in CITIES]
+    return Reply(tool_calls=calls)
+
+
+def build_agent(caller_cls, base_url: str, tool_latency: float) -> Pipeline:
+    rag_pipe = Pipeline()
+    rag_pipe.add_component("prompt_builder", CachedPromptBuilder(template="{{ documents }} {{ question }}"))
+    rag_pipe.add_component("llm", OpenAIGenerator(api_key=Secret.from_token("fake"), api_base_url=base_url))
+    rag_pipe.connect("prompt_builder", "llm")
+
+    def rag_pipeline_func(query: str):
+        documents = [Document(content="My name is Mark and I live in Berlin.")]
+        result = rag_pipe.run({"prompt_builder": {"question": query, "documents": documents}})
+        return {"reply": result["llm"]["replies"][0]}
+
+    def get_current_weather(location: str):
+        time.sleep(tool_latency)
+        return {"weather": "sunny", "temperature": 10, "unit": "celsius", "location": location}
+
+    agent = Pipeline()
+    agent.add_component("message_collector", BranchJoiner(List[ChatMessage]))
+    agent.add_component(
+        "generator",
+        OpenAIChatGenerator(api_key=Secret.from_token("fake"), api_base_url=base_url, generation_kwargs={"tools": TOOLS}),
+    )
+    agent.add_component(
+        "function_caller",
+        caller_cls(
+            available_functions={"rag_pipeline_func": rag_pipeline_func, "get_current_weather": get_current_weather}
+        ),
+    )
+    agent.connect("message_collector", "generator.messages")
+    agent.connect("generator", "function_caller")
+    agent.connect("function_caller.function_replies", "message_collector")
+    return agent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs parallel tool execution in the chat agent.")
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--tool-latency", type=float, default=0.3)
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = []
+    with FakeOpenAIServer(latency=args.llm_latency, responder=responder) as server:
+        for caller_cls in (OpenAIFunctionCaller, ParallelFunctionCaller):
+            agent = build_agent(caller_cls, server.base_url, args.tool_latency)
+            timings = []
+            for _ in range(args.turns):
+                messages = [ChatMessage.from_user("What's the weather like where Mark lives, and in Rome and Madrid?")]
+                with Timer() as t:
+                    response = agent.run({"message_collector": {"value": messages}})
+                assert response["function_caller"]["assistant_replies"][0].content
+                timings.append(t.elapsed)
+            rows.append({"function caller": caller_cls.__name__, "turn s": sum(timings) / len(timings)})
+
+    slowest_tool = max(args.llm_latency, args.tool_latency)
+    sum_tools = args.llm_latency + args.tool_latency * len(CITIES)
+    print(f"two chat calls: {2 * args.llm_latency:.2f}s, tools in sequence: {sum_tools:.2f}s, slowest tool: {slowest_tool:.2f}s")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Render microbenchmark for the lesson templates: PromptBuilder vs CachedPromptBuilder.
+#
+#   python -m benchmarks.bench_prompt_render --iterations 2000
+#
+# "build+render" constructs the builder and renders once, as when a lesson rebuilds its pipeline;
+# "render" reuses one builder, as in Lesson 5's reflection loop. Outputs are checked to be identical.
+
+import argparse
+import time
+from typing import Any, Callable, Dict
+
+from haystack import Document
+from haystack.components.builders import PromptBuilder
+
+from benchmarks.common import print_table
+from benchmarks.lesson_templates import TEMPLATES
+from prompt_cache import CachedPromptBuilder
+
+DOCUMENTS = [
+    Document(
+        content=f"Haystack integration page {i}. " * 20,
+        meta={"url": f"https://haystack.deepset.ai/integrations/{i}", "title": f"Post {i}"},
+    )
+    for i in range(5)
+]
+
+INPUTS: Dict[str, Dict[str, Any]] = {
+    "lesson_2_rag": {"documents": DOCUMENTS, "query": "How can I use Cohere with Haystack?"},
+    "lesson_2_rag_with_url": {"documents": DOCUMENTS, "query": "How can I use Cohere?", "language": "French"},
+    "lesson_3_dialogue": {"dialogue": "Hello Tuana"},
+    "lesson_3_summarizer": {"articles": DOCUMENTS},
+    "lesson_3_summarizer_with_url": {"articles": DOCUMENTS},
+    "lesson_4_rag": {"documents": DOCUMENTS, "query": "What is a retriever for?"},
+    "lesson_4_websearch": {"documents": DOCUMENTS, "query": "What Mistral components does Haystack have?"},
+    "lesson_5_entities": {"text": "Istanbul is the largest city in Turkey.", "entities_to_validate": ["{'Person': []}"]},
+    "lesson_6_rag": {"documents": DOCUMENTS, "question": "Where does Mark live?"},
+}
+
+
+def per_call_us(fn: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render microbenchmark over the lesson templates.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = []
+    for name, template in TEMPLATES.items():
+        inputs = INPUTS[name]
+        builder, cached = PromptBuilder(template=template), CachedPromptBuilder(template=template)
+        expected = builder.run(**inputs)["prompt"]
+        if cached.run(**inputs)["prompt"] != expected:
+            raise AssertionError(f"CachedPromptBuilder output differs from PromptBuilder for {name}")
+
+        rows.append(
+            {
+                "template": name,
+                "fast path": cached.template.fast is not None,
+                "build+render us": per_call_us(lambda: PromptBuilder(template=template).run(**inputs), args.iterations),
+                "cached build+render us": per_call_us(
+                    lambda: CachedPromptBuilder(template=template).run(**inputs), args.iterations
+                ),
+                "render us": per_call_us(lambda: builder.run(**inputs), args.iterations),
+                "cached render us": per_call_us(lambda: cached.run(**inputs), args.iterations),
+            }
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# Latency of Lesson 1's document search with query expansion (multi-query and HyDE) against a single embedding
+# retrieval, with the generator and the embedders replaced by local stand-ins.
+#
+#   python -m benchmarks.bench_query_expansion --llm-latency 0.3 --budget 0.5 --rounds 5
+#
+# "cold" rounds expand every question with the fake model, "warm" rounds find the expansions in the cache.
+# "over budget" runs with a model slower than `--budget`: the expander gives up waiting and retrieves with the
+# question alone. "overhead ms" is the p95 latency above the single retrieval's p95, to compare to the budget.
+
+import argparse
+import os
+from typing import Any, Callable, Dict, List
+
+from haystack import Document
+from haystack.components.converters.txt import TextFileToDocument
+from haystack.utils.auth import Secret
+
+from async_generators import AsyncOpenAIGenerator
+from benchmarks.common import Timer, latency_summary, print_table
+from benchmarks.fake_openai import FakeOpenAIServer, Reply, last_user_message
+from benchmarks.hash_embedders import HashDocumentEmbedder, HashTextEmbedder
+from chunking import SentenceChunker
+from compact_store import CompactDocumentStore
+from query_expansion import MultiQueryEmbeddingRetriever, QueryExpander
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAVINCI = os.path.join(ROOT, "davinci.txt")
+
+# Lesson 1's questions.
+QUESTIONS = [
+    "How old was Davinci when he died?",
+    "Where was davinci born?",
+    "Davinci drawings",
+    "When was mona lisa made?",
+    "Did davinci die in the year 1200",
+    "Sensei Davinci",
+]
+
+
+def expansion_responder(request: Dict[str, Any]) -> Reply:
+    """
+    Three reformulations for a multi-query prompt, a passage made of the question's words for a HyDE prompt.
+    """
+    prompt = last_user_message(request)
+    question = prompt.rsplit("Question:", 1)[-1].strip()
+    if "search queries" in prompt:
+        return Reply(content=f"1. {question} Leonardo da Vinci\n2. Leonardo {question}\n3. {question} life and works")
+    return Reply(content=" ".join([f"Leonardo da Vinci {question}."] * 3))
+
+
+class PerQueryStore:
+    """
+    The store without `embedding_retrieval_batch`, so the retriever runs one retrieval per query in its threads.
+    """
+
+    def __init__(self, store: CompactDocumentStore):
+        self.store = store
+
+    def embedding_retrieval(self, **kwargs) -> List[Document]:
+        return self.store.embedding_retrieval(**kwargs)
+
+
+def search(store: CompactDocumentStore, dimensions: int) -> Callable[[str], List]:
+    embedder = HashTextEmbedder(dimensions)
+    return lambda question: store.embedding_retrieval(embedder.run(text=question)["embedding"], top_k=3)
+
+
+def expanded_search(
+    store: CompactDocumentStore,
+    server: FakeOpenAIServer,
+    mode: str,
+    budget: float,
+    dimensions: int,
+    batched: bool = True,
+) -> Callable[[str], List]:
+    expander = QueryExpander(
+        AsyncOpenAIGenerator(api_key=Secret.from_token("fake"), api_base_url=server.base_url),
+        mode=mode,
+        latency_budget=budget,
+    )
+    retriever = MultiQueryEmbeddingRetriever(
+        document_store=store if batched else PerQueryStore(store), embedder=HashTextEmbedder(dimensions), top_k=3
+    )
+    # Opens the client's connection, so the first question doesn't pay for it.
+    expander.generator.run(prompt="Hello")
+    return lambda question: retriever.run(queries=expander.run(query=question)["queries"])["documents"]
+
+
+def measure(run: Callable[[str], List], rounds: int) -> List[float]:
+    latencies = []
+    for _ in range(rounds):
+        for question in QUESTIONS:
+            with Timer() as t:
+                run(question)
+            latencies.append(t.elapsed)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query expansion latency against a single retrieval.")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds before the fake model answers.")
+    parser.add_argument("--budget", type=float, default=0.5, help="The expander's latency budget in seconds.")
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over the questions for the warm rows.")
+    parser.add_argument("--dimensions", type=int, default=256)
+    parser.add_argument("--copies", type=int, default=10_000, help="Copies of davinci.txt's chunks in the store.")
+    args = parser.parse_args()
+
+    chunks = SentenceChunker().run(TextFileToDocument().run(sources=[DAVINCI])["documents"])["documents"]
+    store = CompactDocumentStore()
+    for copy in range(args.copies):
+        documents = [Document(content=f"{chunk.content} ({copy})") for chunk in chunks]
+        store.write_documents(HashDocumentEmbedder(args.dimensions).run(documents)["documents"])
+
+    rows = []
+    single = latency_summary(measure(search(store, args.dimensions), args.rounds))
+    rows.append({"search": "single retrieval", "queries": 1, **single, "overhead ms": 0.0})
+    for mode in ("multi_query", "hyde"):
+        with FakeOpenAIServer(latency=args.llm_latency, responder=expansion_responder) as server:
+            run = expanded_search(store, server, mode, args.budget, args.dimensions)
+            queries = 4 if mode == "multi_query" else 2
+            for name, rounds in (("cold", 1), ("warm", args.rounds)):
+                summary = latency_summary(measure(run, rounds))
+                overhead = summary["p95_ms"] - single["p95_ms"]
+                rows.append({"search": f"{mode} {name}", "queries": queries, **summary, "overhead ms": overhead})
+            if mode == "multi_query":
+                per_query = expanded_search(store, server, mode, args.budget, args.dimensions, batched=False)
+                measure(per_query, 1)
+                summary = latency_summary(measure(per_query, args.rounds))
+                overhead = summary["p95_ms"] - single["p95_ms"]
+                rows.append(
+                    {
+                        "search": f"{mode} warm, per-query retrievals",
+                        "queries": queries,
+                        **summary,
+                        "overhead ms": overhead,
+                    }
+                )
+        with FakeOpenAIServer(latency=2 * args.budget, responder=expansion_responder) as server:
+            summary = latency_summary(measure(expanded_search(store, server, mode, args.budget, args.dimensions), 1))
+            overhead = summary["p95_ms"] - single["p95_ms"]
+            rows.append({"search": f"{mode} over budget", "queries": 1, **summary, "overhead ms": overhead})
+    print(
+        f"{store.count_documents()} chunks, {len(QUESTIONS)} questions, model latency {args.llm_latency}s, "
+        f"budget {args.budget}s"
+    )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Latency and answer-context precision of the Lesson 2 retrieval with and without the cross-encoder reranker.
+#
+#   python -m benchmarks.bench_reranker --candidates 20 --top-n 2
+#   python -m benchmarks.bench_reranker --pages-dir saved_pages/   # offline, <name>.html per integration
+#
+# Context precision is the share of documents handed to the PromptBuilder that come from the page that
+# answers the question. Embeddings are computed locally, so no API keys are needed.
+
+import argparse
+import os
+from typing import Dict, List
+
+from haystack import Document
+from haystack.components.converters import HTMLToDocument
+from haystack.components.fetchers import LinkContentFetcher
+from haystack.components.preprocessors import DocumentSplitter
+from haystack.components.retrievers.in_memory import InMemoryEmbeddingRetriever
+from haystack.dataclasses import ByteStream
+
+from benchmarks.common import Timer, latency_summary, print_table
+from indexed_store import IndexedInMemoryDocumentStore
+from local_embedders import LocalDocumentEmbedder, LocalTextEmbedder
+from rerankers import CrossEncoderReranker
+
+BASE_URL = "https://haystack.deepset.ai/integrations/"
+
+QUESTIONS: Dict[str, List[str]] = {
+    "cohere": ["How can I use Cohere with Haystack?", "Which Cohere embedders and rankers are available?"],
+    "anthropic": ["How do I use Claude models with Haystack?", "Which generator should I use for Anthropic?"],
+    "jina": ["How do I use Jina embeddings in a Haystack pipeline?", "Can I rerank documents with Jina?"],
+    "nvidia": ["How do I use NVIDIA NIM models with Haystack?", "How can I embed documents with NVIDIA?"],
+    "mistral": ["How do I generate text with Mistral models?", "How can I use Mistral embeddings?"],
+    "ollama": ["How can I run a local LLM with Ollama in Haystack?", "How do I embed text with Ollama?"],
+    "qdrant": ["How do I store documents in Qdrant?", "How do I retrieve documents from a Qdrant collection?"],
+    "elasticsearch-document-store": ["How do I use Elasticsearch as a document store?"],
+}
+
+
+def load_documents(pages_dir: str) -> List[Document]:
+    if pages_dir:
+        sources = []
+        for name in QUESTIONS:
+            with open(os.path.join(pages_dir, f"{name}.html"), "rb") as f:
+                sources.append(ByteStream(data=f.read(), meta={"url": BASE_URL + name}))
+    else:
+        sources = LinkContentFetcher().run(urls=[BASE_URL + name for name in QUESTIONS])["streams"]
+    documents = HTMLToDocument().run(sources=sources)["documents"]
+    return DocumentSplitter(split_by="word", split_length=120, split_overlap=20).run(documents=documents)["documents"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reranker latency and context precision on the integrations pages.")
+    parser.add_argument("--pages-dir", default="")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--top-n", type=int, default=2)
+    parser.add_argument("--score-gap", type=float, default=4.0)
+    args = parser.parse_args()
+
+    document_store = IndexedInMemoryDocumentStore(indexed_fields=["url"])
+    document_store.write_documents(LocalDocumentEmbedder().run(documents=load_documents(args.pages_dir))["documents"])
+    print(f"Indexed {document_store.count_documents()} chunks from {len(QUESTIONS)} pages\n")
+
+    query_embedder = LocalTextEmbedder()
+    retriever = InMemoryEmbeddingRetriever(document_store=document_store)
+    questions = [(q, BASE_URL + name) for name, qs in QUESTIONS.items() for q in qs]
+    embeddings = {q: query_embedder.run(text=q)["embedding"] for q, _ in questions}
+
+    configs = [
+        ("retriever top_k=1 (Lesson 2)", None, 1),
+        (f"retriever top_k={args.top_n}", None, args.top_n),
+        (f"rerank {args.candidates} -> {args.top_n}", CrossEncoderReranker(top_k=args.top_n), args.candidates),
+        (
+            f"rerank {args.candidates} -> {args.top_n}, gap {args.score_gap}",
+            CrossEncoderReranker(top_k=args.top_n, score_gap=args.score_gap),
+            args.candidates,
+        ),
+    ]
+    rows = []
+    for label, reranker, retrieve_k in configs:
+        if reranker is not None:
+            reranker.warm_up()
+            reranker.run(query="warm up", documents=document_store.filter_documents()[:4])
+            reranker.stats = {"queries": 0, "candidates": 0, "scored": 0}
+        latencies, precisions, hits = [], [], 0
+        for question, url in questions:
+            with Timer() as t:
+                documents = retriever.run(query_embedding=embeddings[question], top_k=retrieve_k)["documents"]
+                if reranker is not None:
+                    documents = reranker.run(query=question, documents=documents)["documents"]
+            latencies.append(t.elapsed)
+            relevant = [doc.meta.get("url") == url for doc in documents]
+            precisions.append(sum(relevant) / max(len(documents), 1))
+            hits += any(relevant)
+        row = {
+            "config": label,
+            "context precision": sum(precisions) / len(precisions),
+            "hit rate": hits / len(questions),
+            **latency_summary(latencies),
+        }
+        if reranker is not None:
+            row["scored/candidates"] = reranker.stats["scored"] / max(reranker.stats["candidates"], 1)
+        rows.append(row)
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Repeated-query traffic on Lesson 1's document search and Lesson 2's rag retriever: InMemoryEmbeddingRetriever
+# against CachedEmbeddingRetriever, with a document written every `--write-every` queries.
+#
+#   python -m benchmarks.bench_retrieval_cache --docs 10000 --queries 2000 --distinct 200 --write-every 500
+#
+# Questions are drawn from `--distinct` query embeddings with Zipf weights, as popular questions come back
+# more often. Each write bumps the store's version, which empties the cache. "same results" compares each
+# query's ids and scores with the uncached retriever's.
+
+import argparse
+import random
+from typing import Any, Callable, Dict, List
+
+from haystack import Document
+from haystack.components.retrievers.in_memory import InMemoryEmbeddingRetriever
+
+from benchmarks.bench_compact_store import chunks
+from benchmarks.common import Timer, latency_summary, print_table
+from compact_store import CompactDocumentStore
+from indexed_store import IndexedInMemoryDocumentStore
+from retrieval_cache import CachedEmbeddingRetriever
+
+
+def traffic(queries: int, distinct: int, dimension: int, seed: int = 1) -> List[List[float]]:
+    rng = random.Random(seed)
+    embeddings = [[rng.gauss(0, 1) for _ in range(dimension)] for _ in range(distinct)]
+    weights = [1 / rank for rank in range(1, distinct + 1)]
+    return rng.choices(embeddings, weights=weights, k=queries)
+
+
+def measure(store: Any, retriever: Any, items: List[List[float]], write_every: int, dimension: int) -> Dict[str, Any]:
+    rng = random.Random(2)
+    latencies, results = [], []
+    for i, embedding in enumerate(items):
+        if write_every and i and i % write_every == 0:
+            store.write_documents([Document(content=f"new {i}", embedding=[rng.gauss(0, 1) for _ in range(dimension)])])
+        with Timer() as t:
+            documents = retriever.run(query_embedding=embedding, top_k=5)["documents"]
+        latencies.append(t.elapsed)
+        results.append([(doc.id, round(doc.score, 5)) for doc in documents])
+    return {"latencies": latencies, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval results cached by query embedding and store version.")
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=200, help="Distinct query embeddings in the traffic.")
+    parser.add_argument("--write-every", type=int, default=500, help="Queries between writes; 0 never writes.")
+    args = parser.parse_args()
+
+    items = traffic(args.queries, args.distinct, args.dimension)
+    stores: Dict[str, Callable[[], Any]] = {
+        "lesson_2 IndexedInMemoryDocumentStore": lambda: IndexedInMemoryDocumentStore(indexed_fields=["url", "title"]),
+        "lesson_1 CompactDocumentStore": lambda: CompactDocumentStore(indexed_fields=["file_path", "title"]),
+    }
+    retrievers: Dict[str, Callable[[Any], Any]] = {
+        "InMemoryEmbeddingRetriever": lambda store: InMemoryEmbeddingRetriever(document_store=store),
+        "CachedEmbeddingRetriever": lambda store: CachedEmbeddingRetriever(document_store=store),
+    }
+
+    rows = []
+    for store_name, make_store in stores.items():
+        expected = None
+        for retriever_name, make_retriever in retrievers.items():
+            store = make_store()
+            for batch in chunks(args.docs, 120, args.dimension):
+                store.write_documents(batch)
+            retriever = make_retriever(store)
+            with Timer() as total:
+                run = measure(store, retriever, items, args.write_every, args.dimension)
+            expected = expected or run["results"]
+            stats = getattr(retriever, "stats", {})
+            summary = latency_summary(run["latencies"])
+            rows.append(
+                {
+                    "store": store_name,
+                    "retriever": retriever_name,
+                    "queries/s": args.queries / total.elapsed,
+                    "p50 ms": summary["p50_ms"],
+                    "p95 ms": summary["p95_ms"],
+                    "mean ms": summary["mean_ms"],
+                    "hit rate": stats["hits"] / args.queries if stats else None,
+                    "invalidations": stats.get("invalidations"),
+                    "same results": sum(a == b for a, b in zip(run["results"], expected)) / args.queries,
+                }
+            )
+    print(
+        f"{args.docs} chunks, {args.queries} queries over {args.distinct} distinct embeddings, "
+        f"a write every {args.write_every} queries"
+    )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
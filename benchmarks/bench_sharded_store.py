@@ -0,0 +1,104 @@
+# BM25 and embedding query throughput of one InMemoryDocumentStore against a ShardedDocumentStore with 1, 2
+# and 4 worker processes, on a synthetic corpus.
+#
+#   python -m benchmarks.bench_sharded_store --documents 50000 --dim 384 --queries 200 --shards 1 2 4
+#
+# Each sharded store is checked against the in-memory store: the same top-k ids for embedding queries and the
+# same top-k scores for BM25, where documents with equal scores may come back in another order. Query
+# throughput grows with the shards only up to the number of cores, which is printed first.
+
+import argparse
+import os
+import random
+from typing import Callable, List
+
+import numpy as np
+from haystack import Document
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+
+from benchmarks.common import Timer, latency_summary, print_table
+from sharded_store import ShardedDocumentStore
+
+VOCABULARY = [f"w{i}" for i in range(20_000)]
+
+
+def corpus(seed: int, documents: int, words: int, dim: int) -> List[Document]:
+    rng = random.Random(seed)
+    embeddings = np.random.default_rng(seed).standard_normal((documents, dim)).tolist()
+    return [
+        Document(
+            content=" ".join(rng.choices(VOCABULARY, k=rng.randint(words // 2, words * 2))),
+            meta={"topic": rng.choice(["art", "science", "history"])},
+            embedding=embedding,
+        )
+        for embedding in embeddings
+    ]
+
+
+def measure(query: Callable[[int], List[Document]], queries: int) -> dict:
+    latencies = []
+    with Timer() as total:
+        for i in range(queries):
+            with Timer() as one:
+                query(i)
+            latencies.append(one.elapsed)
+    return {"QPS": queries / total.elapsed, **latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query throughput of a sharded document store.")
+    parser.add_argument("--documents", type=int, default=50_000)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.documents} documents, {args.dim}-dimensional embeddings")
+    documents = corpus(0, args.documents, args.words, args.dim)
+    rng = random.Random(1)
+    texts = [" ".join(rng.choices(VOCABULARY, k=4)) for _ in range(args.queries)]
+    vectors = np.random.default_rng(1).standard_normal((args.queries, args.dim)).tolist()
+    topic = {"field": "meta.topic", "operator": "==", "value": "science"}
+
+    stores = [("InMemoryDocumentStore", InMemoryDocumentStore())]
+    stores += [(f"Sharded, {n} shard{'s' * (n > 1)}", ShardedDocumentStore(num_shards=n)) for n in args.shards]
+    rows, expected = [], {}
+    for name, store in stores:
+        with Timer() as write_time:
+            store.write_documents(documents)
+        workloads = {
+            "BM25": lambda i, store=store: store.bm25_retrieval(texts[i], top_k=args.top_k),
+            "embedding": lambda i, store=store: store.embedding_retrieval(vectors[i], top_k=args.top_k),
+            "embedding, filtered": lambda i, store=store: store.embedding_retrieval(
+                vectors[i], filters=topic, top_k=args.top_k
+            ),
+        }
+        for workload, query in workloads.items():
+            results = [query(i) for i in range(min(20, args.queries))]
+            if workload == "BM25":
+                found = [[doc.score for doc in docs] for docs in results]
+                same = workload not in expected or all(
+                    len(a) == len(b) and np.allclose(a, b, rtol=1e-3) for a, b in zip(expected[workload], found)
+                )
+            else:
+                found = [[doc.id for doc in docs] for docs in results]
+                same = expected.get(workload, found) == found
+            expected.setdefault(workload, found)
+            if not same:
+                raise AssertionError(f"{name}: different {workload} results")
+            row = {"store": name, "query": workload, "write s": write_time.elapsed}
+            rows.append({**row, **measure(query, args.queries)})
+        if isinstance(store, ShardedDocumentStore):
+            with Timer() as batch_time:
+                batch = store.embedding_retrieval_batch(vectors, top_k=args.top_k)
+            if [[doc.id for doc in docs] for docs in batch[:20]] != expected["embedding"]:
+                raise AssertionError(f"{name}: different batch results")
+            rows.append({"store": name, "query": "embedding, one batch", "QPS": args.queries / batch_time.elapsed})
+            store.close()
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
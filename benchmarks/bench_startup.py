@@ -0,0 +1,261 @@
+# Time to ready for each lesson: a fresh process loads the .env, runs the lesson's imports and builds its
+# pipelines (no API calls), with the heavy optional modules imported up front ("eager", as the lessons used to)
+# or on first use ("lazy", as they do now).
+#
+#   python -m benchmarks.bench_startup --runs 5
+#
+# Optional modules that aren't installed are skipped, so both columns are the same where nothing heavy is
+# installed. The slowest imports of each lesson come from `python -X importtime` (see startup.py).
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.common import latency_summary, print_table
+from startup import import_profile, slowest_imports
+
+# Modules the lessons imported at the top before deferring them.
+EAGER: Dict[str, List[str]] = {
+    "Lesson 2": ["haystack_integrations.components.embedders.cohere", "torch", "transformers"],
+    "Lesson 6": ["gradio"],
+}
+
+COMMON = """
+from helper import load_env
+load_env()
+"""
+
+LESSONS: Dict[str, str] = {
+    "Lesson 1": """
+from haystack import Pipeline
+from haystack.components.converters.txt import TextFileToDocument
+from haystack.components.embedders import OpenAIDocumentEmbedder, OpenAITextEmbedder
+from haystack.components.retrievers.in_memory import InMemoryEmbeddingRetriever
+from haystack.components.writers import DocumentWriter
+from async_fetcher import AsyncLinkContentFetcher, ParallelHTMLToDocument
+from chunking import SentenceChunker
+from compiled_pipeline import compile_pipeline
+from dedup import NearDuplicateFilter, NearDuplicateIndex
+from embedding_cache import CachedTextEmbedder
+from indexed_store import IndexedInMemoryDocumentStore
+
+document_store = IndexedInMemoryDocumentStore(indexed_fields=["file_path", "title"])
+indexing_pipeline = Pipeline()
+indexing_pipeline.add_component("converter", TextFileToDocument())
+indexing_pipeline.add_component("splitter", SentenceChunker())
+indexing_pipeline.add_component("dedup", NearDuplicateFilter(NearDuplicateIndex(), document_store=document_store))
+indexing_pipeline.add_component("embedder", OpenAIDocumentEmbedder())
+indexing_pipeline.add_component("writer", DocumentWriter(document_store=document_store))
+indexing_pipeline.connect("converter", "splitter")
+indexing_pipeline.connect("splitter", "dedup")
+indexing_pipeline.connect("dedup.documents", "embedder")
+indexing_pipeline.connect("embedder", "writer")
+document_search = Pipeline()
+document_search.add_component("query_embedder", CachedTextEmbedder(OpenAITextEmbedder()))
+document_search.add_component("retriever", InMemoryEmbeddingRetriever(document_store=document_store))
+document_search.connect("query_embedder.embedding", "retriever.query_embedding")
+document_search = compile_pipeline(document_search)
+""",
+    "Lesson 2": """
+from haystack import Pipeline
+from haystack.components.embedders import OpenAIDocumentEmbedder, OpenAITextEmbedder
+from haystack.components.generators import OpenAIGenerator
+from haystack.components.retrievers.in_memory import InMemoryEmbeddingRetriever
+from haystack.components.writers import DocumentWriter
+from async_fetcher import AsyncLinkContentFetcher, ParallelHTMLToDocument
+from compiled_pipeline import compile_pipeline
+from dedup import NearDuplicateFilter, NearDuplicateIndex
+from embedding_cache import CachedTextEmbedder
+from indexed_store import IndexedInMemoryDocumentStore
+from prompt_cache import CachedPromptBuilder
+from rerankers import CrossEncoderReranker
+from startup import lazy_import
+from benchmarks.lesson_templates import LESSON_2_RAG
+
+cohere = lazy_import("haystack_integrations.components.embedders.cohere")
+try:
+    document_embedder, text_embedder = cohere.CohereDocumentEmbedder(), cohere.CohereTextEmbedder()
+except ImportError:
+    document_embedder, text_embedder = OpenAIDocumentEmbedder(), OpenAITextEmbedder()
+
+document_store = IndexedInMemoryDocumentStore(indexed_fields=["url", "title"])
+indexing = Pipeline()
+indexing.add_component("fetcher", AsyncLinkContentFetcher(max_per_host=4))
+indexing.add_component("converter", ParallelHTMLToDocument())
+indexing.add_component("dedup", NearDuplicateFilter(NearDuplicateIndex(), document_store=document_store))
+indexing.add_component("embedder", document_embedder)
+indexing.add_component("writer", DocumentWriter(document_store=document_store))
+indexing.connect("fetcher.streams", "converter.sources")
+indexing.connect("converter", "dedup")
+indexing.connect("dedup.documents", "embedder")
+indexing.connect("embedder", "writer")
+rag = Pipeline()
+rag.add_component("query_embedder", CachedTextEmbedder(text_embedder))
+rag.add_component("retriever", InMemoryEmbeddingRetriever(document_store=document_store, top_k=20))
+rag.add_component("reranker", CrossEncoderReranker(top_k=2))
+rag.add_component("prompt", CachedPromptBuilder(template=LESSON_2_RAG))
+rag.add_component("generator", OpenAIGenerator())
+rag.connect("query_embedder.embedding", "retriever.query_embedding")
+rag.connect("retriever.documents", "reranker.documents")
+rag.connect("reranker.documents", "prompt.documents")
+rag.connect("prompt", "generator")
+""",
+    "Lesson 3": """
+import requests
+from haystack import Pipeline
+from haystack.components.converters import HTMLToDocument
+from haystack.components.generators.openai import OpenAIGenerator
+from async_fetcher import AsyncLinkContentFetcher
+from http_cache import HTTPCache
+from prompt_cache import CachedPromptBuilder
+from benchmarks.lesson_templates import LESSON_3_SUMMARIZER
+
+http_cache = HTTPCache(":memory:")
+html_pipeline = Pipeline()
+html_pipeline.add_component("fetcher", AsyncLinkContentFetcher(cache=http_cache))
+html_pipeline.add_component("converter", HTMLToDocument())
+html_pipeline.connect("fetcher", "converter")
+summarizer = Pipeline()
+summarizer.add_component("prompt", CachedPromptBuilder(template=LESSON_3_SUMMARIZER))
+summarizer.add_component("llm", OpenAIGenerator())
+summarizer.connect("prompt", "llm")
+""",
+    "Lesson 4": """
+from typing import List
+from haystack import Pipeline
+from haystack.components.generators import OpenAIGenerator
+from haystack.components.retrievers.in_memory import InMemoryBM25Retriever
+from haystack.components.routers import ConditionalRouter
+from haystack.components.websearch.serper_dev import SerperDevWebSearch
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from http_cache import CachedWebSearch, HTTPCache
+from prompt_cache import CachedPromptBuilder
+from benchmarks.lesson_templates import LESSON_4_RAG, LESSON_4_WEBSEARCH
+
+routes = [
+    {"condition": "{{'no_answer' in replies[0]}}", "output": "{{query}}", "output_name": "go_to_websearch", "output_type": str},
+    {"condition": "{{'no_answer' not in replies[0]}}", "output": "{{replies[0]}}", "output_name": "answer", "output_type": str},
+]
+document_store = InMemoryDocumentStore()
+rag_or_websearch = Pipeline()
+rag_or_websearch.add_component("retriever", InMemoryBM25Retriever(document_store=document_store))
+rag_or_websearch.add_component("prompt_builder", CachedPromptBuilder(template=LESSON_4_RAG))
+rag_or_websearch.add_component("llm", OpenAIGenerator())
+rag_or_websearch.add_component("router", ConditionalRouter(routes))
+rag_or_websearch.add_component("websearch", CachedWebSearch(SerperDevWebSearch(), cache=HTTPCache(":memory:")))
+rag_or_websearch.add_component("prompt_builder_for_websearch", CachedPromptBuilder(template=LESSON_4_WEBSEARCH))
+rag_or_websearch.add_component("llm_for_websearch", OpenAIGenerator())
+rag_or_websearch.connect("retriever", "prompt_builder.documents")
+rag_or_websearch.connect("prompt_builder", "llm")
+rag_or_websearch.connect("llm.replies", "router.replies")
+rag_or_websearch.connect("router.go_to_websearch", "websearch.query")
+rag_or_websearch.connect("router.go_to_websearch", "prompt_builder_for_websearch.query")
+rag_or_websearch.connect("websearch.documents", "prompt_builder_for_websearch.documents")
+rag_or_websearch.connect("prompt_builder_for_websearch", "llm_for_websearch")
+""",
+    "Lesson 5": """
+from colorama import Fore
+from haystack import Pipeline
+from haystack.components.generators.openai import OpenAIGenerator
+from loop_budget import LoopBudget, run_with_budget
+from prompt_cache import CachedPromptBuilder
+from benchmarks.bench_loop_budget import EntitiesValidator
+from benchmarks.lesson_templates import LESSON_5_ENTITIES
+
+agent = Pipeline(max_loops_allowed=10)
+agent.add_component("prompt_builder", CachedPromptBuilder(template=LESSON_5_ENTITIES))
+agent.add_component("entities_validator", EntitiesValidator())
+agent.add_component("llm", OpenAIGenerator())
+agent.connect("prompt_builder.prompt", "llm.prompt")
+agent.connect("llm.replies", "entities_validator.replies")
+agent.connect("entities_validator.entities_to_validate", "prompt_builder.entities_to_validate")
+""",
+    "Lesson 6": """
+from typing import List
+from haystack import Pipeline
+from haystack.components.generators.chat.openai import OpenAIChatGenerator
+from haystack.components.joiners import BranchJoiner
+from haystack.dataclasses import ChatMessage
+from haystack_experimental.components.tools import OpenAIFunctionCaller
+from chat_service import ChatService
+from conversation_memory import ConversationMemory, SummaryStore
+from parallel_tools import ParallelFunctionCaller
+from startup import lazy_import
+from tool_rag import BM25Index
+
+gr = lazy_import("gradio")
+summary_store = SummaryStore()
+knowledge_base = BM25Index()
+
+def build_chat_agent():
+    agent = Pipeline()
+    agent.add_component("memory", ConversationMemory(store=summary_store))
+    agent.add_component("message_collector", BranchJoiner(List[ChatMessage]))
+    agent.add_component("generator", OpenAIChatGenerator())
+    agent.add_component("function_caller", ParallelFunctionCaller(available_functions={"len": len}))
+    agent.connect("memory.messages", "message_collector")
+    agent.connect("message_collector", "generator.messages")
+    agent.connect("generator", "function_caller")
+    agent.connect("function_caller.function_replies", "message_collector")
+    return agent
+
+chat_service = ChatService(build_chat_agent, max_workers=8)
+""",
+}
+
+
+def eager_imports(lesson: str) -> str:
+    return "".join(
+        f"try:\n    import {module}\nexcept ImportError:\n    pass\n" for module in EAGER.get(lesson, [])
+    )
+
+
+def time_to_ready(code: str, env: Dict[str, str]) -> float:
+    launched = time.time()
+    script = code + "\nimport time\nprint(time.time())\n"
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env)
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.strip().splitlines()[-1]) - launched
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to ready of each lesson, eager vs lazy optional imports.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=3)
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")])))
+    for key in ("OPENAI_API_KEY", "SERPERDEV_API_KEY", "COHERE_API_KEY"):
+        env.setdefault(key, "fake")
+
+    rows = []
+    for lesson, code in LESSONS.items():
+        lazy = COMMON + code
+        eager = COMMON + eager_imports(lesson) + code
+        try:
+            eager_p50 = latency_summary([time_to_ready(eager, env) for _ in range(args.runs)])["p50_ms"]
+            lazy_p50 = latency_summary([time_to_ready(lazy, env) for _ in range(args.runs)])["p50_ms"]
+        except RuntimeError as error:
+            rows.append({"lesson": lesson, "slowest imports": f"can't build here: {error}"})
+            continue
+        profile = import_profile(lazy, env=env)
+        top = slowest_imports(profile, args.top, max_depth=0)
+        rows.append(
+            {
+                "lesson": lesson,
+                "modules": len(profile),
+                "eager ready p50 ms": eager_p50,
+                "lazy ready p50 ms": lazy_p50,
+                "slowest imports": ", ".join(f"{row.module} {row.cumulative_ms:.0f}ms" for row in top),
+            }
+        )
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
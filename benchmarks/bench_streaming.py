@@ -0,0 +1,138 @@
+# Time to first token with and without streaming, against the local fake chat server's SSE responses.
+#
+#   python -m benchmarks.bench_streaming --latency 0.3 --tokens-per-second 50 --runs 10
+#
+# "rag" is a Lesson 2 style prompt -> OpenAIGenerator pipeline; "chat agent" is the Lesson 6 agent served by
+# ChatService, where the model first calls a tool and then answers. Without streaming the first token
+# arrives with the last one.
+
+import argparse
+from typing import Any, Dict, List
+
+from haystack import Pipeline
+from haystack.components.generators import OpenAIGenerator
+from haystack.components.generators.chat.openai import OpenAIChatGenerator
+from haystack.components.joiners import BranchJoiner
+from haystack.dataclasses import ChatMessage
+from haystack.utils.auth import Secret
+
+from benchmarks.common import Timer, latency_summary, print_table
+from benchmarks.fake_openai import FakeOpenAIServer, Reply
+from chat_service import ChatService
+from conversation_memory import ConversationMemory, SummaryStore
+from parallel_tools import ParallelFunctionCaller
+from prompt_cache import CachedPromptBuilder
+from streaming import stream_pipeline
+
+ANSWER = " ".join(["Mark lives in Berlin, where the weather is mild and mostly sunny today."] * 8)
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "get_current_weather",
+            "description": "Get the current weather",
+            "parameters": {"type": "object", "properties": {"location": {"type": "string"}}, "required": ["location"]},
+        },
+    }
+]
+
+
+def responder(request: Dict[str, Any]) -> Reply:
+    roles = [m.get("role") for m in request.get("messages", [])]
+    if "tools" in request and "function" not in roles:
+        return Reply(tool_calls=[("get_current_weather", {"location": "Berlin"})])
+    return Reply(content=ANSWER)
+
+
+def get_current_weather(location: str):
+    return {"weather": "sunny", "temperature": 10, "unit": "celsius", "location": location}
+
+
+def build_rag(base_url: str) -> Pipeline:
+    rag = Pipeline()
+    rag.add_component("prompt", CachedPromptBuilder(template="Answer the question: {{ query }}"))
+    rag.add_component("generator", OpenAIGenerator(api_key=Secret.from_token("fake"), api_base_url=base_url))
+    rag.connect("prompt", "generator")
+    return rag
+
+
+def agent_factory(base_url: str):
+    summary_store = SummaryStore()
+
+    def build_chat_agent() -> Pipeline:
+        agent = Pipeline()
+        agent.add_component("memory", ConversationMemory(store=summary_store))
+        agent.add_component("message_collector", BranchJoiner(List[ChatMessage]))
+        agent.add_component(
+            "generator",
+            OpenAIChatGenerator(
+                api_key=Secret.from_token("fake"), api_base_url=base_url, generation_kwargs={"tools": TOOLS}
+            ),
+        )
+        agent.add_component(
+            "function_caller", ParallelFunctionCaller(available_functions={"get_current_weather": get_current_weather})
+        )
+        agent.connect("memory.messages", "message_collector")
+        agent.connect("message_collector", "generator.messages")
+        agent.connect("generator", "function_caller")
+        agent.connect("function_caller.function_replies", "message_collector")
+        return agent
+
+    return build_chat_agent
+
+
+def summarize(name: str, ttft: List[float], total: List[float]) -> Dict[str, Any]:
+    first, last = latency_summary(ttft), latency_summary(total)
+    return {
+        "pipeline": name,
+        "ttft p50 ms": first["p50_ms"],
+        "ttft p99 ms": first["p99_ms"],
+        "total p50 ms": last["p50_ms"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first token, blocking vs streaming.")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = []
+    with FakeOpenAIServer(latency=args.latency, tokens_per_second=args.tokens_per_second, responder=responder) as server:
+        rag = build_rag(server.base_url)
+        blocking, streamed, streamed_total = [], [], []
+        for _ in range(args.runs):
+            with Timer() as t:
+                result = rag.run({"prompt": {"query": "Where does Mark live?"}})
+            assert result["generator"]["replies"][0] == ANSWER
+            blocking.append(t.elapsed)
+            with Timer() as t:
+                stream = stream_pipeline(rag, {"prompt": {"query": "Where does Mark live?"}}, ["generator"])
+                text = "".join(stream)
+            assert text == ANSWER == stream.result["generator"]["replies"][0]
+            streamed.append(stream.time_to_first_token)
+            streamed_total.append(t.elapsed)
+        rows.append(summarize("rag, run()", blocking, blocking))
+        rows.append(summarize("rag, stream_pipeline()", streamed, streamed_total))
+
+        service = ChatService(agent_factory(server.base_url), system_prompt="You are helpful.", max_workers=2)
+        blocking, streamed, streamed_total = [], [], []
+        for i in range(args.runs):
+            with Timer() as t:
+                assert service.chat(f"blocking-{i}", "What's the weather where Mark lives?") == ANSWER
+            blocking.append(t.elapsed)
+            with Timer() as t:
+                stream = service.stream(f"streaming-{i}", "What's the weather where Mark lives?")
+                text = "".join(stream)
+            assert text == ANSWER
+            streamed.append(stream.time_to_first_token)
+            streamed_total.append(t.elapsed)
+        service.close()
+        rows.append(summarize("chat agent, chat()", blocking, blocking))
+        rows.append(summarize("chat agent, stream()", streamed, streamed_total))
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
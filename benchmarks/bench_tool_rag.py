@@ -0,0 +1,130 @@
+# Latency and prompt size of Lesson 6's rag_pipeline_func as the knowledge base grows.
+#
+#   python -m benchmarks.bench_tool_rag --sizes 5 1000 10000 100000 --queries 200
+#
+# The knowledge base is synthetic "My name is Person<i> and I live in City<j>." facts, and the LLM is the
+# local fake chat server, so the numbers are retrieval + prompt building + one HTTP round trip. For
+# comparison, "all docs tokens" is the prompt the original function (every fact in the prompt) would send,
+# and "InMemoryBM25Retriever" is the retrieval latency of Haystack's built-in BM25 over the same facts.
+
+import argparse
+import random
+import threading
+
+from haystack import Document, Pipeline
+from haystack.components.generators import OpenAIGenerator
+from haystack.components.retrievers.in_memory import InMemoryBM25Retriever
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.utils.auth import Secret
+
+from benchmarks.common import Timer, latency_summary, print_table
+from benchmarks.fake_openai import FakeOpenAIServer, count_tokens
+from prompt_cache import CachedPromptBuilder
+from tool_rag import BM25Index, BM25IndexRetriever, cache_tool_results
+
+TEMPLATE = """
+Answer the questions based on the given context.
+
+Context:
+{% for document in documents %}
+    {{ document.content }}
+{% endfor %}
+Question: {{ question }}
+Answer:
+"""
+
+
+def make_documents(size: int):
+    return [Document(content=f"My name is Person{i} and I live in City{i % 5000}.") for i in range(size)]
+
+
+def make_tool(index: BM25Index, base_url: str):
+    pipes = threading.local()
+
+    def build_rag_pipe():
+        rag_pipe = Pipeline()
+        rag_pipe.add_component("retriever", BM25IndexRetriever(index=index, top_k=3))
+        rag_pipe.add_component("prompt_builder", CachedPromptBuilder(template=TEMPLATE))
+        rag_pipe.add_component("llm", OpenAIGenerator(api_key=Secret.from_token("fake"), api_base_url=base_url))
+        rag_pipe.connect("retriever", "prompt_builder.documents")
+        rag_pipe.connect("prompt_builder", "llm")
+        return rag_pipe
+
+    @cache_tool_results(max_entries=1024)
+    def rag_pipeline_func(query: str):
+        if not hasattr(pipes, "pipe"):
+            pipes.pipe = build_rag_pipe()
+        result = pipes.pipe.run({"retriever": {"query": query}, "prompt_builder": {"question": query}})
+        return {"reply": result["llm"]["replies"][0]}
+
+    return rag_pipeline_func
+
+
+def main():
+    parser = argparse.ArgumentParser(description="rag_pipeline_func latency and prompt size vs knowledge base size.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--baseline-max-size", type=int, default=10000, help="Largest size to run InMemoryBM25Retriever on.")
+    args = parser.parse_args()
+
+    rows = []
+    rng = random.Random(0)
+    with FakeOpenAIServer() as server:
+        for size in args.sizes:
+            documents = make_documents(size)
+            index = BM25Index()
+            with Timer() as build:
+                index.write_documents(documents)
+            targets = [rng.randrange(size) for _ in range(args.queries)]
+            queries = [f"Where does Person{i} live?" for i in targets]
+
+            retrieval, hits = [], 0
+            for target, query in zip(targets, queries):
+                with Timer() as t:
+                    found = index.search(query, top_k=3)
+                retrieval.append(t.elapsed)
+                hits += found[0].content == documents[target].content
+
+            tool = make_tool(index, server.base_url)
+            calls, cached = [], []
+            prompt_tokens_before, requests_before = server.prompt_tokens, server.requests
+            for query in queries:
+                with Timer() as t:
+                    tool(query=query)
+                calls.append(t.elapsed)
+            distinct = server.requests - requests_before
+            prompt_tokens = (server.prompt_tokens - prompt_tokens_before) / max(1, distinct)
+            for query in queries:
+                with Timer() as t:
+                    tool(query=query)
+                cached.append(t.elapsed)
+
+            all_docs_prompt = CachedPromptBuilder(template=TEMPLATE).run(documents=documents, question=queries[0])
+            row = {
+                "docs": size,
+                "index s": build.elapsed,
+                "hit@1": hits / len(queries),
+                "retrieve p50 ms": latency_summary(retrieval)["p50_ms"],
+                "retrieve p99 ms": latency_summary(retrieval)["p99_ms"],
+                "tool p50 ms": latency_summary(calls)["p50_ms"],
+                "tool p99 ms": latency_summary(calls)["p99_ms"],
+                "cached p50 ms": latency_summary(cached)["p50_ms"],
+                "prompt tokens": prompt_tokens,
+                "all docs tokens": count_tokens(all_docs_prompt["prompt"]),
+            }
+            if size <= args.baseline_max_size:
+                store = InMemoryDocumentStore()
+                store.write_documents(documents)
+                retriever = InMemoryBM25Retriever(document_store=store, top_k=3)
+                baseline = []
+                for query in queries[:50]:
+                    with Timer() as t:
+                        retriever.run(query=query)
+                    baseline.append(t.elapsed)
+                row["InMemoryBM25Retriever p50 ms"] = latency_summary(baseline)["p50_ms"]
+            rows.append(row)
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+# A local OpenAI-compatible chat completions server with injected latency, for benchmarks.
+# Requests with `"stream": true` are answered with server-sent events, one chunk per word.
+# `POST /v1/embeddings` returns hashed bag-of-words vectors, so similar texts get similar embeddings.
+# With `requests_per_minute` or `tokens_per_minute`, chat requests over the limits get a `429` with a Retry-After.
+# `/v1/files` and `/v1/batches` implement the Batch API for chat completions: a batch waits `batch_delay` seconds,
+# then its requests run `batch_concurrency` at a time, outside the rate limits, as the provider's batch queue does.
+#
+#   with FakeOpenAIServer(latency=0.3) as server:
+#       generator = OpenAIChatGenerator(api_key=Secret.from_token("fake"), api_base_url=server.base_url)
+
+import hashlib
+import itertools
+import json
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from email import policy
+from email.parser import BytesParser
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+_WORDS = re.compile(r"\S+\s*|\s+")
+
+
+@dataclass
+class Reply:
+    """
+    What the fake model answers: either text `content` or a list of `(function_name, arguments)` tool calls.
+    """
+
+    content: Optional[str] = None
+    tool_calls: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+
+
+def count_tokens(text: str) -> int:
+    # Close enough to tiktoken for English prose.
+    return max(1, len(text) // 4)
+
+
+def last_user_message(request: Dict[str, Any]) -> str:
+    for message in reversed(request.get("messages", [])):
+        if message.get("role") == "user":
+            return message.get("content") or ""
+    return ""
+
+
+def hash_embedding(text: str, dimensions: int = 256) -> List[float]:
+    """
+    A deterministic, normalized bag-of-words vector for `text`.
+    """
+    vector = [0.0] * dimensions
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+        vector[int.from_bytes(digest[:4], "little") % dimensions] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def echo_responder(request: Dict[str, Any]) -> Reply:
+    return Reply(content=f"You asked: {last_user_message(request)[:200]}")
+
+
+class FakeOpenAIServer:
+    """
+    Serves `POST /v1/chat/completions`, `POST /v1/embeddings` and the Batch API from a background thread.
+
+    Each response takes `latency` seconds plus the completion tokens divided by `tokens_per_second`.
+    Streamed responses send their first chunk after `latency` seconds and the rest at `tokens_per_second`.
+    `responder` decides what the model says for a request. Embedding requests take `latency` seconds.
+    Rate limits are token buckets holding one second of the per-minute rate, like the provider's; a chat
+    request that doesn't fit is answered `429` with the seconds until it would in `Retry-After`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        tokens_per_second: Optional[float] = None,
+        responder: Callable[[Dict[str, Any]], Reply] = echo_responder,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        batch_delay: float = 0.0,
+        batch_concurrency: int = 64,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.responder = responder
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.embedding_requests = 0
+        self.embedded_texts = 0
+        self.rate_limited = 0
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        limits = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self._rates = {name: per_minute / 60 for name, per_minute in limits.items() if per_minute}
+        self._buckets = dict(self._rates)
+        self._refilled = time.monotonic()
+        self.batch_delay = batch_delay
+        self.batch_concurrency = batch_concurrency
+        self.batch_requests = 0
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def generation_time(self, completion_tokens: int) -> float:
+        if not self.tokens_per_second:
+            return self.latency
+        return self.latency + completion_tokens / self.tokens_per_second
+
+    def admit(self, request: Dict[str, Any]) -> float:
+        """
+        Takes one request and the prompt's tokens from the buckets, or returns the seconds to wait if they
+        don't fit (nothing is taken then). Completion tokens are taken when the reply is made.
+        """
+        prompt_tokens = sum(count_tokens(m.get("content") or "") for m in request.get("messages", []))
+        needed = {"requests": 1.0, "tokens": float(prompt_tokens)}
+        with self._lock:
+            now = time.monotonic()
+            elapsed, self._refilled = now - self._refilled, now
+            wait = 0.0
+            for name, per_second in self._rates.items():
+                self._buckets[name] = min(per_second, self._buckets[name] + elapsed * per_second)
+                wait = max(wait, (min(needed[name], per_second) - self._buckets[name]) / per_second)
+            if wait > 0:
+                self.rate_limited += 1
+                return wait
+            for name in self._rates:
+                self._buckets[name] -= needed[name]
+            return 0.0
+
+    def _reply(self, request: Dict[str, Any], batch: bool = False) -> Tuple[int, Reply, int, int]:
+        reply = self.responder(request)
+        prompt_tokens = sum(count_tokens(m.get("content") or "") for m in request.get("messages", []))
+        completion_text = reply.content or json.dumps([list(call) for call in reply.tool_calls])
+        completion_tokens = count_tokens(completion_text)
+        with self._lock:
+            if batch:
+                self.batch_requests += 1
+            else:
+                self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            if "tokens" in self._buckets and not batch:
+                self._buckets["tokens"] -= completion_tokens
+            n = next(self._ids)
+        return n, reply, prompt_tokens, completion_tokens
+
+    @staticmethod
+    def _tool_calls(n: int, reply: Reply) -> List[Dict[str, Any]]:
+        return [
+            {"id": f"call_{n}_{i}", "type": "function", "function": {"name": name, "arguments": json.dumps(args)}}
+            for i, (name, args) in enumerate(reply.tool_calls)
+        ]
+
+    def chat_completion(self, request: Dict[str, Any], batch: bool = False) -> Tuple[int, Dict[str, Any]]:
+        n, reply, prompt_tokens, completion_tokens = self._reply(request, batch)
+        time.sleep(self.generation_time(completion_tokens))
+
+        message: Dict[str, Any] = {"role": "assistant", "content": reply.content}
+        finish_reason = "stop"
+        if reply.tool_calls:
+            finish_reason = "tool_calls"
+            message["tool_calls"] = self._tool_calls(n, reply)
+        return 200, {
+            "id": f"chatcmpl-{n}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def chat_completion_chunks(self, request: Dict[str, Any]) -> Iterator[Tuple[float, Dict[str, Any]]]:
+        """
+        Yields `(delay, chunk)` pairs: how long to wait before sending each `chat.completion.chunk`.
+        """
+        n, reply, _, completion_tokens = self._reply(request)
+        words = _WORDS.findall(reply.content or "")
+        # Spread the generation time over the words, so a streamed response takes as long as a blocking one.
+        word_time = (self.generation_time(completion_tokens) - self.latency) / max(1, len(words))
+        created = int(time.time())
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+            return {
+                "id": f"chatcmpl-{n}",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": request.get("model", "fake"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        if reply.tool_calls:
+            calls = [{"index": i, **call} for i, call in enumerate(self._tool_calls(n, reply))]
+            yield self.latency, chunk({"role": "assistant", "content": None, "tool_calls": calls})
+            yield 0.0, chunk({}, "tool_calls")
+            return
+        delay = self.latency
+        for word in words:
+            yield delay, chunk({"role": "assistant", "content": word})
+            delay = word_time
+        yield delay, chunk({}, "stop")
+
+    def upload_file(self, filename: str, purpose: str, data: bytes) -> Tuple[int, Dict[str, Any]]:
+        with self._lock:
+            file_id = f"file-{next(self._ids)}"
+            self.files[file_id] = {
+                "id": file_id,
+                "object": "file",
+                "bytes": len(data),
+                "created_at": int(time.time()),
+                "filename": filename,
+                "purpose": purpose,
+                "status": "processed",
+                "data": data,
+            }
+        return 200, self._public(self.files[file_id])
+
+    def create_batch(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if request.get("input_file_id") not in self.files:
+            return 404, {"error": {"message": "No such file", "type": "invalid_request_error"}}
+        now = int(time.time())
+        with self._lock:
+            batch_id = f"batch_{next(self._ids)}"
+            batch = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": request.get("endpoint", "/v1/chat/completions"),
+                "errors": None,
+                "input_file_id": request["input_file_id"],
+                "completion_window": request.get("completion_window", "24h"),
+                "status": "validating",
+                "output_file_id": None,
+                "error_file_id": None,
+                "created_at": now,
+                "in_progress_at": None,
+                "expires_at": now + 24 * 3600,
+                "completed_at": None,
+                "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                "metadata": request.get("metadata") or {},
+            }
+            self.batches[batch_id] = batch
+        threading.Thread(target=self._run_batch, args=(batch,), name=f"fake-{batch_id}", daemon=True).start()
+        return 200, dict(batch)
+
+    def _run_batch(self, batch: Dict[str, Any]):
+        lines = [json.loads(line) for line in self.files[batch["input_file_id"]]["data"].splitlines() if line.strip()]
+        time.sleep(self.batch_delay)
+        with self._lock:
+            batch.update(status="in_progress", in_progress_at=int(time.time()))
+            batch["request_counts"]["total"] = len(lines)
+
+        def one(line: Dict[str, Any]) -> Dict[str, Any]:
+            status, body = self.chat_completion(line["body"], batch=True)
+            with self._lock:
+                batch["request_counts"]["completed"] += 1
+            response = {"status_code": status, "request_id": f"req_{next(self._ids)}", "body": body}
+            return {"id": f"batch_req_{next(self._ids)}", "custom_id": line["custom_id"], "response": response}
+
+        with ThreadPoolExecutor(max_workers=self.batch_concurrency) as pool:
+            results = list(pool.map(one, lines))
+        output = "".join(json.dumps(result) + "\n" for result in results).encode()
+        _, file = self.upload_file(f"{batch['id']}_output.jsonl", "batch_output", output)
+        with self._lock:
+            batch.update(status="completed", output_file_id=file["id"], completed_at=int(time.time()))
+
+    @staticmethod
+    def _public(file: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in file.items() if key != "data"}
+
+    def embeddings(self, request: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        texts = request.get("input", [])
+        texts = [texts] if isinstance(texts, str) else texts
+        with self._lock:
+            self.embedding_requests += 1
+            self.embedded_texts += len(texts)
+        time.sleep(self.latency)
+        tokens = sum(count_tokens(text) for text in texts)
+        return 200, {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": hash_embedding(text, request.get("dimensions") or 256)}
+                for i, text in enumerate(texts)
+            ],
+            "model": request.get("model", "fake"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        fake: FakeOpenAIServer = self.server.fake  # type: ignore[attr-defined]
+        parts = self.path.split("?")[0].rstrip("/").split("/")
+        with fake._lock:
+            if parts[-1] == "content" and parts[-2] in fake.files:
+                data = fake.files[parts[-2]]["data"]
+            elif parts[-2] == "files" and parts[-1] in fake.files:
+                data = json.dumps(fake._public(fake.files[parts[-1]])).encode()
+            elif parts[-2] == "batches" and parts[-1] in fake.batches:
+                data = json.dumps(fake.batches[parts[-1]]).encode()
+            elif parts[-1] == "batches":
+                batches = sorted(fake.batches.values(), key=lambda batch: batch["created_at"], reverse=True)
+                data = json.dumps({"object": "list", "data": batches, "has_more": False}).encode()
+            else:
+                data = None
+        if data is None:
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+        else:
+            self.send_bytes(data, "application/octet-stream" if parts[-1] == "content" else "application/json")
+
+    def do_POST(self):
+        fake: FakeOpenAIServer = self.server.fake  # type: ignore[attr-defined]
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path.rstrip("/").endswith("/files"):
+            # multipart/form-data with `purpose` and `file` fields
+            form = BytesParser(policy=policy.HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + raw
+            )
+            fields = {part.get_param("name", header="content-disposition"): part for part in form.iter_parts()}
+            file = fields["file"]
+            self.send_json(
+                *fake.upload_file(file.get_filename(), fields["purpose"].get_content(), file.get_payload(decode=True))
+            )
+            return
+        body = json.loads(raw or b"{}")
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            wait = fake.admit(body)
+            if wait > 0:
+                error = {"message": "Rate limit reached.", "type": "requests", "code": "rate_limit_exceeded"}
+                self.send_json(
+                    429, {"error": error}, {"Retry-After": f"{wait:.3f}", "retry-after-ms": f"{wait * 1000:.0f}"}
+                )
+                return
+        if self.path.rstrip("/").endswith("/chat/completions") and body.get("stream"):
+            self.send_events(fake.chat_completion_chunks(body))
+            return
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            status, payload = fake.chat_completion(body)
+        elif self.path.rstrip("/").endswith("/embeddings"):
+            status, payload = fake.embeddings(body)
+        elif self.path.rstrip("/").endswith("/batches"):
+            status, payload = fake.create_batch(body)
+        else:
+            status, payload = 404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}}
+        self.send_json(status, payload)
+
+    def send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        self.send_bytes(json.dumps(payload).encode(), "application/json", status, headers)
+
+    def send_bytes(self, data: bytes, content_type: str, status: int = 200, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_events(self, chunks: Iterator[Tuple[float, Dict[str, Any]]]):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for delay, chunk in chunks:
+            if delay:
+                time.sleep(delay)
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
@@ -0,0 +1,133 @@
+# A local stand-in for the sites the lessons call: the Hacker News API and the articles it links to (Lesson 3),
+# Serper's search API (Lesson 4) and integration pages like haystack.deepset.ai's (Lesson 2).
+#
+#   with FakeWebServer(latency=0.05) as server:
+#       requests.get(f"{server.base_url}/v0/topstories.json")
+#
+# Everything served is derived from the path, so runs are repeatable. Items, articles and pages carry ETags.
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+WORDS = "haystack pipeline retriever embedder document store prompt generator agent router cohere ranking".split()
+
+
+def integration_page(name: str, paragraphs: int = 40) -> str:
+    """
+    An HTML page with a navigation bar, a footer and `paragraphs` paragraphs of text seeded by `name`.
+    """
+    rng = random.Random(name)
+    body = "".join(
+        f"<p>{' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 60)))}.</p>\n" for _ in range(paragraphs)
+    )
+    return (
+        f"<html><head><title>{name}</title><script>var page = '{name}';</script></head>"
+        f"<body><nav><a href='/'>Home</a> <a href='/integrations'>Integrations</a></nav>"
+        f"<article><h1>{name.title()} integration</h1>\n{body}</article><footer>Footer</footer></body></html>"
+    )
+
+
+class FakeWebServer:
+    """
+    Serves `/v0/topstories.json`, `/v0/item/<id>.json`, `/article/<id>`, `/integrations/<name>` and a
+    Serper-like `POST /search`, each after `latency` seconds, counting requests by route.
+    """
+
+    def __init__(self, latency: float = 0.0, stories: int = 100):
+        self.latency = latency
+        self.stories = stories
+        self.requests: Dict[str, int] = {}
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.request_queue_size = 1024
+        self.httpd.web = self  # type: ignore[attr-defined]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def search_url(self) -> str:
+        # What `haystack.components.websearch.serper_dev.SERPERDEV_BASE_URL` should be set to.
+        return f"{self.base_url}/search"
+
+    def integration_urls(self, count: int) -> List[str]:
+        return [f"{self.base_url}/integrations/integration-{i}" for i in range(count)]
+
+    def total_requests(self) -> int:
+        with self.lock:
+            return sum(self.requests.values())
+
+    def __enter__(self) -> "FakeWebServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, route: str, body: bytes, content_type: str, etag: bool):
+        web: FakeWebServer = self.server.web  # type: ignore[attr-defined]
+        with web.lock:
+            web.requests[route] = web.requests.get(route, 0) + 1
+        time.sleep(web.latency)
+        tag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if etag and self.headers.get("If-None-Match") == tag:
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with web.lock:
+            web.bytes_sent += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", tag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        web: FakeWebServer = self.server.web  # type: ignore[attr-defined]
+        path = self.path.split("?")[0]
+        if path == "/v0/topstories.json":
+            self._send("topstories", json.dumps(list(range(1, web.stories + 1))).encode(), "application/json", False)
+        elif path.startswith("/v0/item/"):
+            item = int(path[len("/v0/item/") : -len(".json")])
+            post = {"id": item, "title": f"Story {item}", "url": f"{web.base_url}/article/{item}"}
+            if item % 5 == 0:
+                post = {"id": item, "title": f"Ask HN {item}", "text": f"Question {item} " * 50}
+            self._send("item", json.dumps(post).encode(), "application/json", True)
+        elif path.startswith("/article/"):
+            item = path[len("/article/") :]
+            body = f"<html><body><h1>Article {item}</h1>{'<p>Lorem ipsum dolor sit amet.</p>' * 400}</body></html>"
+            self._send("article", body.encode(), "text/html", True)
+        elif path.startswith("/integrations/"):
+            self._send("integration", integration_page(path[len("/integrations/") :]).encode(), "text/html", True)
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["q"]
+        organic = [
+            {"title": f"{query} result {i}", "link": f"https://example.com/{i}", "snippet": f"About {query} ({i})."}
+            for i in range(10)
+        ]
+        self._send("search", json.dumps({"organic": organic}).encode(), "application/json", False)
@@ -0,0 +1,42 @@
+# In-process stand-ins for the lessons' embedders (Cohere in Lesson 2, OpenAI in Lesson 1): the same hashed
+# bag-of-words vectors as the fake server's `/v1/embeddings`, without a network round trip or a model.
+
+from dataclasses import replace
+from typing import List
+
+from haystack import Document, component
+
+from benchmarks.fake_openai import hash_embedding
+
+
+@component
+class HashTextEmbedder:
+    """
+    Embeds a query as `hash_embedding(text, dimensions)`.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.embedded_texts = 0
+
+    @component.output_types(embedding=List[float], meta=dict)
+    def run(self, text: str):
+        self.embedded_texts += 1
+        return {"embedding": hash_embedding(text, self.dimensions), "meta": {"model": "hash"}}
+
+
+@component
+class HashDocumentEmbedder:
+    """
+    Embeds the content of each document as `hash_embedding(content, dimensions)`.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+        self.embedded_texts = 0
+
+    @component.output_types(documents=List[Document], meta=dict)
+    def run(self, documents: List[Document]):
+        self.embedded_texts += len(documents)
+        embedded = [replace(doc, embedding=hash_embedding(doc.content or "", self.dimensions)) for doc in documents]
+        return {"documents": embedded, "meta": {"model": "hash"}}
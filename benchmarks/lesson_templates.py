@@ -0,0 +1,127 @@
+# The PromptBuilder templates used in the lessons, verbatim, for benchmarks that render them without the lessons' API calls.
+
+LESSON_2_RAG = """
+Answer the question based on the provided context.
+Context:
+{% for doc in documents %}
+   {{ doc.content }} 
+{% endfor %}
+Question: {{ query }}
+"""
+
+LESSON_2_RAG_WITH_URL = """
+You will be provided some context, followed by the URL that this context comes from.
+Answer the question based on the context, and reference the URL from which your answer is generated.
+Your answer should be in {{ language }}.
+Context:
+{% for doc in documents %}
+   {{ doc.content }} 
+   URL: {{ doc.meta['url']}}
+{% endfor %}
+Question: {{ query }}
+Answer:
+"""
+
+LESSON_3_DIALOGUE = """ You will be given the beginning of a dialogue. 
+Create a short play script using this as the start of the play.
+Start of dialogue: {{ dialogue }}
+Full script: 
+"""
+
+LESSON_3_SUMMARIZER = """  
+You will be provided a few of the top posts in HackerNews.  
+For each post, provide a brief summary if possible.
+  
+Posts:  
+{% for article in articles %}
+  Post:\n
+  {{ article.content}}
+{% endfor %}  
+"""
+
+LESSON_3_SUMMARIZER_WITH_URL = """  
+You will be provided a few of the top posts in HackerNews, followed by their URL.  
+For each post, provide a brief summary followed by the URL the full post can be found at.  
+  
+Posts:  
+{% for article in articles %}  
+  {{ article.content }}
+  URL: {{ article.meta["url"] }}
+{% endfor %}  
+"""
+
+LESSON_4_RAG = """
+Answer the following query given the documents.
+If the answer is not contained within the documents, reply with 'no_answer'
+Query: {{query}}
+Documents:
+{% for document in documents %}
+  {{document.content}}
+{% endfor %}
+"""
+
+LESSON_4_WEBSEARCH = """
+Answer the following query given the documents retrieved from the web.
+Your answer should indicate that your answer was generated from websearch.
+You can also reference the URLs that the answer was generated from
+
+Query: {{query}}
+Documents:
+{% for document in documents %}
+  {{document.content}}
+{% endfor %}
+"""
+
+LESSON_5_ENTITIES = """"
+{% if entities_to_validate %}
+    Here was the text you were provided:
+    {{ text }}
+    Here are the entities you previously extracted: 
+    {{ entities_to_validate[0] }}
+    Are these the correct entities? 
+    Things to check for:
+    - Entity categories should exactly be "Person", "Location" and "Date"
+    - There should be no extra categories
+    - There should be no duplicate entities
+    - If there are no appropriate entities for a category, the category should have an empty list
+    If you are done say 'DONE' and return your new entities in the next line
+    If not, simply return the best entities you can come up with.
+    Entities:
+{% else %}
+    Extract entities from the following text
+    Text: {{ text }} 
+    The entities should be presented as key-value pairs in a JSON object.
+    Example: 
+    {
+        "Person": ["value1", "value2"], 
+        "Location": ["value3", "value4"],
+        "Date": ["value5", "value6"]
+    }
+    If there are no possibilities for a particular category, return an empty list for this
+    category
+    Entities:
+{% endif %}
+"""
+
+LESSON_6_RAG = """
+Answer the questions based on the given context.
+
+Context:
+{% for document in documents %}
+    {{ document.content }}
+{% endfor %}
+Question: {{ question }}
+Answer:
+"""
+
+TEMPLATES = {
+    "lesson_2_rag": LESSON_2_RAG,
+    "lesson_2_rag_with_url": LESSON_2_RAG_WITH_URL,
+    "lesson_3_dialogue": LESSON_3_DIALOGUE,
+    "lesson_3_summarizer": LESSON_3_SUMMARIZER,
+    "lesson_3_summarizer_with_url": LESSON_3_SUMMARIZER_WITH_URL,
+    "lesson_4_rag": LESSON_4_RAG,
+    "lesson_4_websearch": LESSON_4_WEBSEARCH,
+    "lesson_5_entities": LESSON_5_ENTITIES,
+    "lesson_6_rag": LESSON_6_RAG,
+}
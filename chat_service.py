@@ -0,0 +1,250 @@
+# Serves a chat agent pipeline to many concurrent users, with one history per session.
+
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, List, Optional, Tuple
+
+from haystack import Pipeline
+from haystack.dataclasses import ChatMessage, StreamingChunk
+
+from streaming import TokenStream
+
+StreamingCallback = Callable[[StreamingChunk], None]
+Turn = Tuple[str, Future, Optional[StreamingCallback]]
+
+
+class Session:
+    """
+    The history of one conversation and the user messages waiting to be answered, oldest first.
+    """
+
+    def __init__(self, session_id: str, messages: List[ChatMessage]):
+        self.session_id = session_id
+        self.messages = messages
+        self.last_used = time.monotonic()
+        self.pending: Deque[Turn] = deque()
+        self.running = False
+        self.lock = threading.Lock()
+
+
+class SessionStore:
+    """
+    LRU of sessions with idle expiry.
+
+    Sessions unused for `idle_ttl` seconds are dropped on the next access, and the least recently used
+    session is dropped when there are more than `max_sessions`. A session with a turn running or queued is
+    never dropped, so there can be more than `max_sessions` while all of them are busy.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: Optional[float] = 30 * 60):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.expired = 0
+        self.evicted = 0
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str, new_messages: Callable[[], List[ChatMessage]]) -> Session:
+        """
+        Returns the session for `session_id`, starting it with `new_messages()` if it doesn't exist.
+        """
+        with self._lock:
+            return self._get(session_id, new_messages)
+
+    def get_for_turn(
+        self, session_id: str, new_messages: Callable[[], List[ChatMessage]], turn: Turn
+    ) -> Tuple[Session, bool]:
+        """
+        Queues `turn` on the session for `session_id`, as `get` would return it.
+
+        The turn is queued before the store's lock is released, so the session is busy, and kept, from the
+        moment it's returned.
+
+        :returns: The session, and whether the caller must start draining it: False if its turns already run.
+        """
+        with self._lock:
+            session = self._get(session_id, new_messages)
+            with session.lock:
+                session.pending.append(turn)
+                start = not session.running
+                session.running = True
+            return session, start
+
+    def drop(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _get(self, session_id: str, new_messages: Callable[[], List[ChatMessage]]) -> Session:
+        now = time.monotonic()
+        self._expire(now)
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = Session(session_id, new_messages())
+            if len(self._sessions) > self.max_sessions:
+                self._evict(len(self._sessions) - self.max_sessions, keep=session_id)
+        else:
+            self._sessions.move_to_end(session_id)
+        session.last_used = now
+        return session
+
+    def _evict(self, count: int, keep: str):
+        # Least recently used first, skipping busy sessions: dropping one would lose the history its turns write.
+        idle = (
+            session_id
+            for session_id, session in self._sessions.items()
+            if session_id != keep and not _busy(session)
+        )
+        for session_id in list(itertools.islice(idle, count)):
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def _expire(self, now: float):
+        if self.idle_ttl is None:
+            return
+        # Sessions are kept in order of last use, so expired ones are at the front. Busy ones are kept, like in
+        # _evict, without holding back the expired sessions behind them.
+        expired = []
+        for session_id, session in self._sessions.items():
+            if now - session.last_used < self.idle_ttl:
+                break
+            if not _busy(session):
+                expired.append(session_id)
+        for session_id in expired:
+            del self._sessions[session_id]
+            self.expired += 1
+
+
+def _busy(session: Session) -> bool:
+    return session.running or bool(session.pending)
+
+
+class ChatService:
+    """
+    Runs turns of a chat agent for many sessions at once.
+
+    Each session keeps its own history in a `SessionStore`. Turns run on a pool of `max_workers` threads,
+    and every worker thread builds its own agent with `agent_factory`, since a `Pipeline` can't run twice
+    at the same time. Messages of one session are answered one at a time and in the order they arrived;
+    different sessions run in parallel.
+
+    Usage example:
+    ```python
+    service = ChatService(build_chat_agent, system_prompt="You are a helpful assistant.")
+    reply = service.chat(session_id="alice", message="Where does Mark live?")
+    ```
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[], Pipeline],
+        system_prompt: Optional[str] = None,
+        input_socket: str = "memory.messages",
+        output_socket: str = "function_caller.assistant_replies",
+        streaming_component: Optional[str] = "generator",
+        max_workers: int = 8,
+        max_sessions: int = 1000,
+        idle_ttl: Optional[float] = 30 * 60,
+    ):
+        """
+        :param agent_factory: Builds a new chat agent pipeline; called once per worker thread.
+        :param system_prompt: System message every new session starts with.
+        :param input_socket: `component.input` the history is sent to.
+        :param output_socket: `component.output` the assistant replies come out of.
+        :param streaming_component: The chat generator to stream tokens from in `stream()`.
+        :param max_workers: Number of turns running at once.
+        :param max_sessions: Maximum number of sessions kept.
+        :param idle_ttl: Seconds after which an unused session is dropped, or None to keep sessions.
+        """
+        self.agent_factory = agent_factory
+        self.system_prompt = system_prompt
+        self.input_component, self.input_name = input_socket.split(".", 1)
+        self.output_component, self.output_name = output_socket.split(".", 1)
+        self.streaming_component = streaming_component
+        self.sessions = SessionStore(max_sessions=max_sessions, idle_ttl=idle_ttl)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-worker")
+        self._agents = threading.local()
+
+    def submit(
+        self, session_id: str, message: str, streaming_callback: Optional[StreamingCallback] = None
+    ) -> "Future[str]":
+        """
+        Queues `message` for the session and returns a future with the assistant's answer.
+
+        :param streaming_callback: Called with each chunk `streaming_component` generates for this turn.
+        """
+        future: "Future[str]" = Future()
+        turn = (message, future, streaming_callback)
+        session, start = self.sessions.get_for_turn(session_id, self._new_history, turn)
+        if start:
+            self._executor.submit(self._drain, session)
+        return future
+
+    def chat(self, session_id: str, message: str, timeout: Optional[float] = None) -> str:
+        """
+        Answers `message` in the session and waits for the reply.
+        """
+        return self.submit(session_id, message).result(timeout=timeout)
+
+    def stream(self, session_id: str, message: str) -> TokenStream:
+        """
+        Answers `message` in the session and returns the answer's tokens as they are generated.
+
+        Tokens of every generation in the turn are streamed, so text the model writes before calling a
+        tool comes through too. Iterating re-raises the turn's error, if it fails.
+        """
+        if self.streaming_component is None:
+            raise ValueError("ChatService was created without a streaming_component.")
+        stream = TokenStream()
+        future = self.submit(session_id, message, streaming_callback=stream)
+        future.add_done_callback(lambda done: stream.close(None if done.cancelled() else done.exception()))
+        return stream
+
+    def history(self, session_id: str) -> List[ChatMessage]:
+        return list(self.sessions.get(session_id, self._new_history).messages)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def _new_history(self) -> List[ChatMessage]:
+        return [ChatMessage.from_system(self.system_prompt)] if self.system_prompt else []
+
+    def _drain(self, session: Session):
+        # Runs the queued messages of one session in order; only one _drain per session runs at a time.
+        while True:
+            with session.lock:
+                if not session.pending:
+                    session.running = False
+                    session.last_used = time.monotonic()
+                    return
+                message, future, streaming_callback = session.pending.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._turn(session, message, streaming_callback))
+            except Exception as error:
+                future.set_exception(error)
+
+    def _turn(self, session: Session, message: str, streaming_callback: Optional[StreamingCallback]) -> str:
+        agent = getattr(self._agents, "agent", None)
+        if agent is None:
+            agent = self._agents.agent = self.agent_factory()
+        messages = session.messages + [ChatMessage.from_user(message)]
+        generator, previous = None, None
+        if streaming_callback is not None and self.streaming_component is not None:
+            generator = agent.get_component(self.streaming_component)
+            previous, generator.streaming_callback = generator.streaming_callback, streaming_callback
+        try:
+            response = agent.run({self.input_component: {self.input_name: messages}})
+        finally:
+            if generator is not None:
+                generator.streaming_callback = previous
+        replies = response[self.output_component][self.output_name]
+        # Only keep the turn once it succeeded, so a failed turn can be retried.
+        session.messages = messages + list(replies)
+        return replies[0].content
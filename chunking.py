@@ -0,0 +1,327 @@
+# Sentence- and paragraph-aware splitting: a compiled-regex sentence segmenter, an optional merge of adjacent
+# sentences by embedding similarity, and a cache of segmentations keyed on a fingerprint of the text.
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from haystack import Document, component, default_to_dict
+from haystack.core.serialization import component_to_dict
+
+from helper import deserialize_component
+
+Span = Tuple[int, int]
+
+_PARAGRAPH = re.compile(r"\S[^\n]*(?:\n[ \t]*\S[^\n]*)*")
+# A run of sentence-ending punctuation, closing quotes or brackets, then whitespace before something that can
+# start a sentence. The pattern starts with a character set, so the regex engine skips ahead to candidates.
+_BOUNDARY = re.compile(r"(?P<end>[.!?…]+[\"'”’)\]]*)(?P<space>\s+)(?=[\"'“‘(\[]?[A-Z0-9À-Ý])")
+_WORD = re.compile(r"\S+")
+
+ABBREVIATIONS = frozenset(
+    "mr mrs ms dr prof st sr jr vs etc e.g i.e cf ca c approx no vol fig p pp ed eds ch sec jan feb mar apr jun jul "
+    "aug sep sept oct nov dec mt ft inc ltd co corp".split()
+)
+_ABBREVIATION_ENDINGS = frozenset(abbreviation[-2:] for abbreviation in ABBREVIATIONS)
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def paragraphs(text: str) -> List[Span]:
+    """
+    Spans of the paragraphs of `text`: runs of non-blank lines.
+    """
+    return [match.span() for match in _PARAGRAPH.finditer(text)]
+
+
+def sentences(text: str, start: int = 0, end: Optional[int] = None) -> List[Span]:
+    """
+    Spans of the sentences of `text[start:end]`, without the whitespace between them.
+
+    A sentence ends at `.`, `!`, `?` or `…` (with any closing quotes or brackets) followed by whitespace and an
+    uppercase letter, a digit or an opening quote. A period after a known abbreviation or a single letter, like
+    "Mr.", "e.g." or the "W." of "Maurice W. Brockwell", doesn't end a sentence.
+    """
+    end = len(text) if end is None else end
+    spans = []
+    sentence_start = start
+    for match in _BOUNDARY.finditer(text, start, end):
+        if match.group("end") == "." and _is_abbreviation(text, sentence_start, match.start()):
+            continue
+        spans.append((sentence_start, match.end("end")))
+        sentence_start = match.end("space")
+    rest = text[sentence_start:end].rstrip()
+    if rest:
+        spans.append((sentence_start, sentence_start + len(rest)))
+    return spans
+
+
+def _is_abbreviation(text: str, start: int, dot: int) -> bool:
+    # The word before the period: "Mr", a single initial, or the last letter of "e.g" or "U.S".
+    tail = text[dot - 2 : dot]
+    if dot - 2 >= start and tail.isascii() and tail.isalnum() and tail.lower() not in _ABBREVIATION_ENDINGS:
+        # Most sentences end in a word of two letters or more that no abbreviation ends with.
+        return False
+    # Whitespace is looked for in the last few characters first: most sentences don't contain a newline or a tab,
+    # and looking for one back to the start of the sentence made every check linear in the length of the sentence.
+    low = max(start, dot - 16)
+    space = _last_space(text, low, dot)
+    if space < 0 and low > start:
+        space = _last_space(text, start, low)
+    word = text[max(start, space + 1) : dot].lstrip("\"'“‘([")
+    last = word.rsplit(".", 1)[-1]
+    return len(last) == 1 and last.isalpha() or word.lower() in ABBREVIATIONS
+
+
+def _last_space(text: str, start: int, end: int) -> int:
+    return max(text.rfind(" ", start, end), text.rfind("\n", start, end), text.rfind("\t", start, end))
+
+
+class SegmentationCache:
+    """
+    LRU cache of segmentations by key, optionally persisted in a SQLite file.
+
+    Keys are fingerprints of a text plus the settings it was split with, so an unchanged file is never
+    segmented (or embedded) twice, whatever its path.
+    """
+
+    def __init__(self, max_entries: int = 4096, path: Optional[str] = None):
+        """
+        :param max_entries: Maximum number of segmentations kept in memory.
+        :param path: Path of a SQLite file to keep segmentations in across runs.
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.stats = {"hits": 0, "misses": 0}
+        self._entries: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS segmentations (key TEXT PRIMARY KEY, spans TEXT)")
+
+    def get(self, key: str) -> Optional[List[Span]]:
+        with self._lock:
+            spans = self._entries.get(key)
+            if spans is not None:
+                self._entries.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute("SELECT spans FROM segmentations WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    spans = [tuple(span) for span in json.loads(row[0])]
+                    self._remember(key, spans)
+            self.stats["hits" if spans is not None else "misses"] += 1
+            return spans
+
+    def put(self, key: str, spans: List[Span]):
+        with self._lock:
+            self._remember(key, spans)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO segmentations VALUES (?, ?)", (key, json.dumps(spans)))
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM segmentations")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, spans: List[Span]):
+        self._entries[key] = spans
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+@component
+class SentenceChunker:
+    """
+    A drop-in `DocumentSplitter` that cuts documents between sentences, never inside one.
+
+    Sentences are packed into chunks of at most `max_words` words, and a chunk ends at a paragraph break once it
+    has `min_words` words, so chunks follow the structure of the text. A single sentence longer than `max_words`
+    is split by words. With an `embedder` (a document embedder such as `OpenAIDocumentEmbedder`), a chunk also
+    ends where the next sentence's similarity to the chunk so far drops below `similarity_threshold`, so a chunk
+    holds one topic. Segmentations are cached by a fingerprint of the text, so re-indexing an unchanged file
+    costs neither segmentation nor sentence embeddings.
+
+    Usage example:
+    ```python
+    indexing_pipeline.add_component("splitter", SentenceChunker(max_words=120))
+    indexing_pipeline.connect("converter", "splitter")
+    ```
+    """
+
+    def __init__(
+        self,
+        max_words: int = 200,
+        min_words: int = 40,
+        overlap_sentences: int = 0,
+        embedder: Optional[Any] = None,
+        similarity_threshold: float = 0.4,
+        cache: Optional[SegmentationCache] = None,
+    ):
+        """
+        :param max_words: Maximum number of words per chunk.
+        :param min_words: Words a chunk needs before it may end at a paragraph or topic break.
+        :param overlap_sentences: Sentences each chunk repeats from the end of the previous one.
+        :param embedder: A document embedder to find topic breaks with, or None to split on structure only.
+        :param similarity_threshold: Cosine similarity to the chunk below which a sentence starts a new chunk.
+        :param cache: The cache to use. Defaults to an in-memory cache private to this component.
+        """
+        if min_words > max_words:
+            raise ValueError(f"min_words ({min_words}) must not be greater than max_words ({max_words})")
+        if overlap_sentences < 0:
+            raise ValueError(f"overlap_sentences must not be negative, got {overlap_sentences}")
+        self.max_words = max_words
+        self.min_words = min_words
+        self.overlap_sentences = overlap_sentences
+        self.embedder = embedder
+        self.similarity_threshold = similarity_threshold
+        self.cache = cache if cache is not None else SegmentationCache()
+        # Keys include everything that changes the chunks of a given text.
+        settings = [max_words, min_words, overlap_sentences]
+        if embedder is not None:
+            settings += [type(embedder).__name__, getattr(embedder, "model", ""), similarity_threshold]
+        self._settings = ":".join(map(str, settings))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            max_words=self.max_words,
+            min_words=self.min_words,
+            overlap_sentences=self.overlap_sentences,
+            embedder=component_to_dict(self.embedder) if self.embedder is not None else None,
+            similarity_threshold=self.similarity_threshold,
+            cache={"max_entries": self.cache.max_entries, "path": self.cache.path},
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SentenceChunker":
+        """
+        Deserializes the component from a dictionary.
+        """
+        params = dict(data["init_parameters"])
+        if params.get("embedder") is not None:
+            params["embedder"] = deserialize_component(params["embedder"])
+        params["cache"] = SegmentationCache(**params.get("cache", {}))
+        return cls(**params)
+
+    def warm_up(self):
+        if hasattr(self.embedder, "warm_up"):
+            self.embedder.warm_up()
+
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]):
+        """
+        Splits each document into chunks.
+
+        :param documents: Documents to split.
+        :returns: `documents`, the chunks in order, with the meta of their source plus `source_id`, `split_id`
+            and `split_idx_start`, like `DocumentSplitter`'s.
+        :raises TypeError: If a document has no text content.
+        """
+        chunks = []
+        for doc in documents:
+            if doc.content is None:
+                raise TypeError(f"SentenceChunker only works with text documents but document {doc.id} has no content.")
+            for i, (start, end) in enumerate(self.chunk_spans(doc.content)):
+                meta = {**doc.meta, "source_id": doc.id, "split_id": i, "split_idx_start": start}
+                chunks.append(Document(content=doc.content[start:end], meta=meta))
+        return {"documents": chunks}
+
+    def chunk_spans(self, text: str) -> List[Span]:
+        """
+        Spans of the chunks of `text`, from the cache when possible.
+        """
+        key = f"chunks:{self._settings}:{fingerprint(text)}"
+        spans = self.cache.get(key)
+        if spans is None:
+            spans = self._chunk(text, self.sentence_spans(text))
+            self.cache.put(key, spans)
+        return spans
+
+    def sentence_spans(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        `(start, end, paragraph)` of each sentence of `text`, from the cache when possible.
+        """
+        key = f"sentences:{fingerprint(text)}"
+        spans = self.cache.get(key)
+        if spans is None:
+            spans = [
+                (start, end, paragraph)
+                for paragraph, (p_start, p_end) in enumerate(paragraphs(text))
+                for start, end in sentences(text, p_start, p_end)
+            ]
+            self.cache.put(key, spans)
+        return spans  # type: ignore[return-value]
+
+    def _chunk(self, text: str, spans: List[Tuple[int, int, int]]) -> List[Span]:
+        units = []
+        for start, end, paragraph in spans:
+            # Same count as _WORD: str.split() and \s split on the same whitespace, without a match object per word.
+            count = len(text[start:end].split())
+            if count <= self.max_words:
+                units.append((start, end, paragraph, count))
+                continue
+            # A sentence longer than a chunk is cut into chunk-sized runs of words.
+            words = [match.span() for match in _WORD.finditer(text, start, end)]
+            for i in range(0, len(words), self.max_words):
+                piece = words[i : i + self.max_words]
+                units.append((piece[0][0], piece[-1][1], paragraph, len(piece)))
+        if not units:
+            return []
+        embeddings = self._embed(text, units) if self.embedder is not None else None
+
+        chunks: List[Span] = []
+        current = [0]
+        count = units[0][3]
+        centroid = embeddings[0].copy() if embeddings is not None else None
+        for i in range(1, len(units)):
+            words = units[i][3]
+            new_paragraph = units[i][2] != units[i - 1][2]
+            topic_break = embeddings is not None and _cosine(centroid, embeddings[i]) < self.similarity_threshold
+            if count + words > self.max_words or count >= self.min_words and (new_paragraph or topic_break):
+                chunks.append((units[current[0]][0], units[current[-1]][1]))
+                if self.overlap_sentences:
+                    current = current[-self.overlap_sentences :]
+                    count = sum(units[j][3] for j in current)
+                    if count + words > self.max_words:
+                        current, count = [], 0
+                else:
+                    current, count = [], 0
+                if embeddings is not None:
+                    centroid = embeddings[current].sum(axis=0) if current else np.zeros_like(embeddings[i])
+            current.append(i)
+            count += words
+            if embeddings is not None:
+                centroid = centroid + embeddings[i]
+        chunks.append((units[current[0]][0], units[current[-1]][1]))
+        return chunks
+
+    def _embed(self, text: str, units: List[Tuple[int, int, int, int]]) -> np.ndarray:
+        documents = [Document(content=text[start:end]) for start, end, _, _ in units]
+        embedded = self.embedder.run(documents=documents)["documents"]
+        return np.array([doc.embedding for doc in embedded], dtype=np.float32)
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / norm if norm else 0.0
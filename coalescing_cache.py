@@ -0,0 +1,124 @@
+# An in-process LRU + TTL cache that coalesces concurrent misses, shared by the query-embedding, tool-result and
+# query-expansion caches.
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class CoalescingCache:
+    """
+    Thread-safe LRU cache of values that expire `ttl` seconds after they're stored.
+
+    Concurrent misses on the same key are coalesced: only the first caller computes the value, the others wait
+    for it. A failed computation isn't cached; its error goes to every caller waiting for it.
+    """
+
+    def __init__(self, max_entries: int, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        :param max_entries: Maximum number of values kept.
+        :param ttl: Seconds a value stays valid, or None to never expire.
+        :param clock: The time expiries are measured on. `time.time` for expiries shared with other processes.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Any],
+        load: Optional[Callable[[], Optional[Tuple[float, Any]]]] = None,
+    ) -> Any:
+        """
+        Returns the cached value for `key`, calling `compute` on a miss.
+
+        :param key: The key of the value.
+        :param compute: Computes the value.
+        :param load: Looks the value up in a slower tier before computing it. Returns the time on `clock` the
+            value expires at and the value, or None if the tier doesn't have it. A loaded value isn't a miss.
+        """
+        value, future, owner = self._lookup(key)
+        if future is None:
+            return value
+        if owner:
+            self._resolve(key, future, compute, load)
+        return future.result()
+
+    def submit(self, key: Hashable, compute: Callable[[], Any], executor: Executor) -> Future:
+        """
+        Like `get_or_compute`, but returns a future at once and computes a miss on `executor`. The value is
+        cached when it's ready, whether or not anyone still waits for it.
+        """
+        value, future, owner = self._lookup(key)
+        if future is None:
+            future = Future()
+            future.set_result(value)
+        elif owner:
+            try:
+                executor.submit(self._resolve, key, future, compute)
+            except BaseException as error:
+                self._fail(key, future, error)
+                raise
+        return future
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: Hashable) -> Tuple[Any, Optional[Future], bool]:
+        # The cached value, or else the future of the value and whether the caller has to compute it.
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at >= self.clock():
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value, None, False
+                del self._entries[key]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                return None, future, False
+            future = self._inflight[key] = Future()
+            return None, future, True
+
+    def _resolve(
+        self,
+        key: Hashable,
+        future: Future,
+        compute: Callable[[], Any],
+        load: Optional[Callable[[], Optional[Tuple[float, Any]]]] = None,
+    ):
+        try:
+            loaded = load() if load is not None else None
+            if loaded is not None:
+                # Kept until its expiry in the slower tier: promoting a value doesn't extend its TTL.
+                expires_at, value = loaded
+            else:
+                with self._lock:
+                    self.stats["misses"] += 1
+                value = compute()
+                expires_at = self.clock() + self.ttl if self.ttl is not None else float("inf")
+        except BaseException as error:
+            self._fail(key, future, error)
+            return
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(value)
+
+    def _fail(self, key: Hashable, future: Future, error: BaseException):
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_exception(error)
@@ -0,0 +1,573 @@
+# Columnar storage for the in-memory document store: one UTF-8 arena for the content, dictionary-encoded metadata
+# columns, one embedding matrix and packed BM25 term frequencies, instead of a Document with its own dicts, lists
+# and strings per chunk. Documents are built only for what a query returns.
+
+import heapq
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from haystack import default_to_dict, logging
+from haystack.dataclasses import Document
+from haystack.document_stores.errors import DocumentStoreError
+from haystack.document_stores.in_memory.document_store import (
+    BM25_SCALING_FACTOR,
+    DOT_PRODUCT_SCALING_FACTOR,
+    BM25DocumentStats,
+)
+from haystack.document_stores.types import DuplicatePolicy
+from haystack.utils import expit
+from haystack.utils.filters import convert, document_matches_filter
+
+from indexed_store import IndexedInMemoryDocumentStore
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_NO_CONTENT = 0xFFFFFFFF
+# Fields of a Document that are rarely set; kept in a dict for the rows that have them.
+_EXTRAS = ("dataframe", "blob", "score", "sparse_embedding")
+
+
+class _Column:
+    """
+    The values of one metadata key, dictionary-encoded: a code per row, 0 for rows without the key.
+
+    Hashable values are stored once however many rows share them; lists and dicts once per row.
+    """
+
+    __slots__ = ("values", "codes", "_lookup")
+
+    def __init__(self, rows: int = 0):
+        self.values: List[Any] = [_MISSING]
+        self.codes = array("I", bytes(4 * rows))
+        # By type too, so that 1, 1.0 and True stay apart.
+        self._lookup: Dict[Tuple[type, Any], int] = {}
+
+    def append(self, value: Any):
+        if value is _MISSING:
+            self.codes.append(0)
+            return
+        try:
+            code = self._lookup.get((type(value), value))
+            if code is None:
+                code = self._lookup[(type(value), value)] = len(self.values)
+                self.values.append(value)
+        except TypeError:
+            code = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+
+class _ColumnarStorage(MutableMapping):
+    """
+    `InMemoryDocumentStore.storage`, by id, with the documents kept in columns and rebuilt on access.
+
+    Rows are appended; deleting one leaves a hole that is reclaimed once holes outnumber the live rows.
+    """
+
+    def __init__(self, dtype: str = "float32"):
+        # The id strings are shared between the dict and the list, so each is stored once.
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._text = bytearray()
+        self._text_start = array("Q")
+        self._text_len = array("I")
+        self._columns: Dict[str, _Column] = {}
+        self._extras: Dict[int, Dict[str, Any]] = {}
+        self._dtype = np.dtype(dtype)
+        self._matrix: Optional[np.ndarray] = None
+        self._norms = np.zeros(0, dtype=self._dtype)
+        self._embedded = np.zeros(0, dtype=bool)
+        self._deleted = 0
+        # While not None, the `id()` of the object last stored under each id.
+        self.written: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return (doc_id for doc_id in self._ids if doc_id is not None)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._rows
+
+    def __getitem__(self, doc_id: str) -> Document:
+        return self.document(self._rows[doc_id])
+
+    def __setitem__(self, doc_id: str, document: Document):
+        embedding = None
+        if document.embedding is not None:
+            embedding = np.asarray(document.embedding, dtype=self._dtype)
+            if self._matrix is not None and embedding.shape != self._matrix.shape[1:]:
+                raise DocumentStoreError(
+                    "The embedding size of all Documents should be the same. "
+                    "Please make sure that the Documents have been embedded with the same model."
+                )
+        if doc_id in self._rows:
+            del self[doc_id]
+        if self.written is not None:
+            self.written[doc_id] = id(document)
+
+        row = len(self._ids)
+        self._grow(row + 1, None if embedding is None else len(embedding))
+        self._ids.append(doc_id)
+        self._rows[doc_id] = row
+        if document.content is None:
+            self._text_start.append(0)
+            self._text_len.append(_NO_CONTENT)
+        else:
+            data = document.content.encode("utf-8")
+            self._text_start.append(len(self._text))
+            self._text_len.append(len(data))
+            self._text.extend(data)
+        meta = document.meta
+        for key, column in self._columns.items():
+            column.append(meta.get(key, _MISSING))
+        for key in meta.keys() - self._columns.keys():
+            self._columns[key] = _Column(row)
+            self._columns[key].append(meta[key])
+        if embedding is not None:
+            self._matrix[row] = embedding
+            self._norms[row] = np.linalg.norm(embedding)
+            self._embedded[row] = True
+        extras = {name: getattr(document, name) for name in _EXTRAS if getattr(document, name) is not None}
+        if extras:
+            self._extras[row] = extras
+
+    def __delitem__(self, doc_id: str):
+        row = self._rows.pop(doc_id)
+        self._ids[row] = None
+        self._embedded[row] = False
+        self._extras.pop(row, None)
+        self._deleted += 1
+        if self._deleted > 1024 and self._deleted > len(self._rows):
+            self._compact()
+
+    def document(self, row: int, score: Optional[float] = None, embedding: bool = True) -> Document:
+        """
+        A new Document for `row`.
+        """
+        length = self._text_len[row]
+        content = None
+        if length != _NO_CONTENT:
+            start = self._text_start[row]
+            content = self._text[start : start + length].decode("utf-8")
+        meta = {}
+        for key, column in self._columns.items():
+            code = column.codes[row]
+            if code:
+                meta[key] = column.values[code]
+        fields: Dict[str, Any] = dict(self._extras.get(row, {}))
+        if score is not None:
+            fields["score"] = score
+        if embedding and self._embedded[row]:
+            fields["embedding"] = self._matrix[row].tolist()
+        return Document(id=self._ids[row], content=content, meta=meta, **fields)
+
+    def row(self, doc_id: str) -> int:
+        return self._rows[doc_id]
+
+    def doc_id(self, row: int) -> str:
+        return self._ids[row]
+
+    def rows(self) -> np.ndarray:
+        """
+        The live rows, in insertion order.
+        """
+        if not self._deleted:
+            return np.arange(len(self._ids))
+        return np.fromiter(self._rows.values(), dtype=np.int64, count=len(self._rows))
+
+    def has_content(self, row: int) -> bool:
+        return self._text_len[row] != _NO_CONTENT or "dataframe" in self._extras.get(row, {})
+
+    def embedded(self, rows: np.ndarray) -> np.ndarray:
+        return rows[self._embedded[rows]]
+
+    def scores(self, queries: np.ndarray, rows: np.ndarray, cosine: bool) -> np.ndarray:
+        """
+        The dot products (or cosine similarities) of `queries`, one per row, with the embeddings of `rows`.
+        """
+        if self._matrix is None:
+            return np.zeros((len(queries), 0), dtype=self._dtype)
+        if queries.shape[1:] != self._matrix.shape[1:]:
+            raise DocumentStoreError(
+                "The embedding size of the query should be the same as the embedding size of the Documents. "
+                "Please make sure that the query has been embedded with the same model as the Documents."
+            )
+        # Multiplying the whole matrix is as fast as a gather of most of it, and copies nothing.
+        if len(rows) * 4 > len(self._ids):
+            scores = (queries @ self._matrix[: len(self._ids)].T)[:, rows]
+        else:
+            scores = queries @ self._matrix[rows].T
+        if cosine:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scores = scores / (self._norms[rows] * np.linalg.norm(queries, axis=1, keepdims=True))
+        return scores
+
+    def nbytes(self) -> int:
+        """
+        Bytes held by the columns' buffers, without the id strings and metadata values.
+        """
+        total = len(self._text) + self._text_start.itemsize * len(self._text_start) + 4 * len(self._text_len)
+        total += sum(4 * len(column.codes) for column in self._columns.values())
+        if self._matrix is not None:
+            total += self._matrix.nbytes
+        return total + self._norms.nbytes + self._embedded.nbytes
+
+    def _grow(self, rows: int, dimension: Optional[int]):
+        capacity = len(self._embedded)
+        if rows > capacity:
+            capacity = max(1024, 2 * capacity, rows)
+            self._embedded = np.resize(self._embedded, capacity)
+            self._embedded[len(self._ids) :] = False
+            self._norms = np.resize(self._norms, capacity)
+            if self._matrix is not None:
+                matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=self._dtype)
+                matrix[: len(self._ids)] = self._matrix[: len(self._ids)]
+                self._matrix = matrix
+        if self._matrix is None and dimension is not None:
+            self._matrix = np.zeros((capacity, dimension), dtype=self._dtype)
+
+    def _compact(self):
+        live = self.rows()
+        self._ids = [self._ids[row] for row in live]
+        self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        text, starts, lengths = bytearray(), array("Q"), array("I")
+        for row in live:
+            start, length = self._text_start[row], self._text_len[row]
+            starts.append(len(text))
+            lengths.append(length)
+            if length != _NO_CONTENT:
+                text.extend(self._text[start : start + length])
+        self._text, self._text_start, self._text_len = text, starts, lengths
+        for key, column in list(self._columns.items()):
+            compacted = _Column()
+            for row in live:
+                compacted.append(column.values[column.codes[row]])
+            if any(compacted.codes):
+                self._columns[key] = compacted
+            else:
+                del self._columns[key]
+        positions = {int(row): i for i, row in enumerate(live)}
+        self._extras = {positions[row]: extras for row, extras in self._extras.items() if row in positions}
+        self._embedded = self._embedded[live]
+        self._norms = self._norms[live]
+        if self._matrix is not None:
+            self._matrix = self._matrix[live]
+        self._deleted = 0
+
+
+class _TermFreqs:
+    """
+    The `freq_token` of one document's `BM25DocumentStats`, read from the packed arrays.
+    """
+
+    __slots__ = ("_stats", "_start", "_end")
+
+    def __init__(self, stats: "_PackedBM25Stats", start: int, end: int):
+        self._stats = stats
+        self._start = start
+        self._end = end
+
+    def get(self, token: str, default: Any = None) -> Any:
+        term = self._stats.vocabulary.get(token)
+        if term is None:
+            return default
+        i = bisect_left(self._stats.terms, term, self._start, self._end)
+        if i < self._end and self._stats.terms[i] == term:
+            return self._stats.counts[i]
+        return default
+
+    def keys(self) -> List[str]:
+        return [self._stats.tokens[term] for term in self._stats.terms[self._start : self._end]]
+
+    def items(self) -> List[Tuple[str, int]]:
+        return list(zip(self.keys(), self._stats.counts[self._start : self._end]))
+
+
+class _PackedBM25Stats(MutableMapping):
+    """
+    `InMemoryDocumentStore._bm25_attr`, by id, with each document's term frequencies as a run of sorted term
+    ids and counts in two shared arrays.
+    """
+
+    def __init__(self):
+        self.vocabulary: Dict[str, int] = {}
+        self.tokens: List[str] = []
+        self.terms = array("I")
+        self.counts = array("I")
+        self._spans: Dict[str, Tuple[int, int, int]] = {}
+        self._garbage = 0
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._spans)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._spans
+
+    def __getitem__(self, doc_id: str) -> BM25DocumentStats:
+        start, end, doc_len = self._spans[doc_id]
+        return BM25DocumentStats(_TermFreqs(self, start, end), doc_len)  # type: ignore[arg-type]
+
+    def __setitem__(self, doc_id: str, stats: BM25DocumentStats):
+        if doc_id in self._spans:
+            del self[doc_id]
+        pairs = sorted((self._term(token), count) for token, count in stats.freq_token.items())
+        start = len(self.terms)
+        self.terms.extend(term for term, _ in pairs)
+        self.counts.extend(count for _, count in pairs)
+        self._spans[doc_id] = (start, len(self.terms), stats.doc_len)
+
+    def __delitem__(self, doc_id: str):
+        start, end, _ = self._spans.pop(doc_id)
+        self._garbage += end - start
+        if self._garbage > 1 << 16 and self._garbage > len(self.terms) // 2:
+            self._compact()
+
+    def pop(self, doc_id: str, *default: Any) -> Any:
+        # Copied out: deleting may compact the arrays the stats would read from.
+        if doc_id not in self._spans:
+            if default:
+                return default[0]
+            raise KeyError(doc_id)
+        stats = self[doc_id]
+        stats = BM25DocumentStats(dict(stats.freq_token.items()), stats.doc_len)  # type: ignore[attr-defined]
+        del self[doc_id]
+        return stats
+
+    def nbytes(self) -> int:
+        return 4 * (len(self.terms) + len(self.counts))
+
+    def _term(self, token: str) -> int:
+        term = self.vocabulary.get(token)
+        if term is None:
+            term = self.vocabulary[token] = len(self.tokens)
+            self.tokens.append(token)
+        return term
+
+    def _compact(self):
+        terms, counts = array("I"), array("I")
+        for doc_id, (start, end, doc_len) in self._spans.items():
+            self._spans[doc_id] = (len(terms), len(terms) + end - start, doc_len)
+            terms.extend(self.terms[start:end])
+            counts.extend(self.counts[start:end])
+        self.terms, self.counts = terms, counts
+        self._garbage = 0
+
+
+class _Candidate:
+    # What the BM25 scoring functions need of a document: its id.
+    __slots__ = ("id", "row")
+
+    def __init__(self, doc_id: str, row: int):
+        self.id = doc_id
+        self.row = row
+
+
+class CompactDocumentStore(IndexedInMemoryDocumentStore):
+    """
+    An IndexedInMemoryDocumentStore that keeps its documents in columns instead of Document objects.
+
+    Content is one UTF-8 arena with offsets, metadata one dictionary-encoded column per key, embeddings one
+    NumPy matrix (float32 by default) and BM25 term frequencies two arrays of term ids and counts. Writing,
+    filtering and both retrievals work as in `InMemoryDocumentStore`; `embedding_retrieval` scores with one
+    matrix product, and only the top_k documents are turned back into `Document`s. Each access to `storage`
+    builds a new Document, so changing a returned document doesn't change the store.
+
+    Usage example:
+    ```python
+    document_store = CompactDocumentStore(indexed_fields=["file_path", "title"])
+    retriever = InMemoryEmbeddingRetriever(document_store=document_store)
+    ```
+    """
+
+    def __init__(self, indexed_fields: Optional[List[str]] = None, embedding_dtype: str = "float32", **kwargs):
+        """
+        Initializes the DocumentStore.
+
+        :param indexed_fields: Metadata fields to index, with or without the `meta.` prefix.
+        :param embedding_dtype: NumPy dtype of the embedding matrix. "float64" keeps the scores of
+            `InMemoryDocumentStore` to the last digit, at twice the memory.
+        :param kwargs: Passed on to `InMemoryDocumentStore`.
+        """
+        super().__init__(indexed_fields=indexed_fields, **kwargs)
+        self.embedding_dtype = embedding_dtype
+        self.storage: _ColumnarStorage = _ColumnarStorage(embedding_dtype)  # type: ignore[assignment]
+        self._bm25_attr: _PackedBM25Stats = _PackedBM25Stats()  # type: ignore[assignment]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+
+        :returns:
+            Dictionary with serialized data.
+        """
+        return default_to_dict(
+            self,
+            indexed_fields=self.indexed_fields,
+            embedding_dtype=self.embedding_dtype,
+            bm25_tokenization_regex=self.bm25_tokenization_regex,
+            bm25_algorithm=self.bm25_algorithm,
+            bm25_parameters=self.bm25_parameters,
+            embedding_similarity_function=self.embedding_similarity_function,
+        )
+
+    def write_documents(self, documents: List[Document], policy: DuplicatePolicy = DuplicatePolicy.NONE) -> int:
+        """
+        Refer to the DocumentStore.write_documents() protocol documentation.
+
+        If `policy` is set to `DuplicatePolicy.NONE` defaults to `DuplicatePolicy.FAIL`.
+        """
+        # Stored documents are rebuilt on access, so the indexes learn from the storage which object it got.
+        self.storage.written = {}
+        try:
+            return super().write_documents(documents=documents, policy=policy)
+        finally:
+            self.storage.written = None
+
+    def bm25_retrieval(
+        self, query: str, filters: Optional[Dict[str, Any]] = None, top_k: int = 10, scale_score: bool = False
+    ) -> List[Document]:
+        """
+        Retrieves documents that are most relevant to the query using BM25 algorithm.
+
+        :param query: The query string.
+        :param filters: A dictionary with filters to narrow down the search space.
+        :param top_k: The number of top documents to retrieve. Default is 10.
+        :param scale_score: Whether to scale the scores of the retrieved documents. Default is False.
+        :returns: A list of the top_k documents most relevant to the query.
+        """
+        if not query:
+            raise ValueError("Query should be a non-empty string")
+        candidates = [
+            _Candidate(self.storage.doc_id(row), row)
+            for row in self._matching_rows(filters)
+            if self.storage.has_content(row)
+        ]
+        if not candidates:
+            logger.info("No documents found for BM25 retrieval. Returning empty list.")
+            return []
+        scored = self.bm25_algorithm_inst(query, candidates)
+        # nlargest is stable like the sort in InMemoryDocumentStore: ties keep insertion order.
+        results = heapq.nlargest(top_k, scored, key=lambda pair: pair[1])
+
+        negatives_are_valid = self.bm25_algorithm == "BM25Okapi" and not scale_score
+        documents = []
+        for candidate, score in results:
+            if scale_score:
+                score = expit(score / BM25_SCALING_FACTOR)
+            if not negatives_are_valid and score <= 0.0:
+                continue
+            documents.append(self.storage.document(candidate.row, score=score))
+        return documents
+
+    def embedding_retrieval(
+        self,
+        query_embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        scale_score: bool = False,
+        return_embedding: bool = False,
+    ) -> List[Document]:
+        """
+        Retrieves documents that are most similar to the query embedding using a vector similarity metric.
+
+        :param query_embedding: Embedding of the query.
+        :param filters: A dictionary with filters to narrow down the search space.
+        :param top_k: The number of top documents to retrieve. Default is 10.
+        :param scale_score: Whether to scale the scores of the retrieved Documents. Default is False.
+        :param return_embedding: Whether to return the embedding of the retrieved Documents. Default is False.
+        :returns: A list of the top_k documents most relevant to the query.
+        """
+        if len(query_embedding) == 0 or not isinstance(query_embedding[0], float):
+            raise ValueError("query_embedding should be a non-empty list of floats.")
+        return self._embedding_retrieval([query_embedding], filters, top_k, scale_score, return_embedding)[0]
+
+    def embedding_retrieval_batch(
+        self,
+        query_embeddings: List[List[float]],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        scale_score: bool = False,
+        return_embedding: bool = False,
+    ) -> List[List[Document]]:
+        """
+        `embedding_retrieval` for many queries at once. The filters are evaluated once, and all the queries are
+        scored with one matrix product, which reads the embedding matrix once instead of once per query.
+
+        :returns: The top_k documents of each query, in the order of `query_embeddings`.
+        """
+        if not query_embeddings:
+            return []
+        return self._embedding_retrieval(query_embeddings, filters, top_k, scale_score, return_embedding)
+
+    def _embedding_retrieval(
+        self,
+        query_embeddings: List[List[float]],
+        filters: Optional[Dict[str, Any]],
+        top_k: int,
+        scale_score: bool,
+        return_embedding: bool,
+    ) -> List[List[Document]]:
+        rows = self.storage.rows() if not filters else np.asarray(self._matching_rows(filters), dtype=np.int64)
+        embedded = self.storage.embedded(rows)
+        if len(embedded) == 0:
+            logger.warning(
+                "No Documents found with embeddings. Returning empty list. "
+                "To generate embeddings, use a DocumentEmbedder."
+            )
+            return [[] for _ in query_embeddings]
+        if len(embedded) < len(rows):
+            logger.info(
+                "Skipping some Documents that don't have an embedding. "
+                "To generate embeddings, use a DocumentEmbedder."
+            )
+
+        cosine = self.embedding_similarity_function == "cosine"
+        queries = np.asarray(query_embeddings, dtype=self.embedding_dtype)
+        batches = []
+        for scores in self.storage.scores(queries, embedded, cosine):
+            if top_k < len(scores):
+                top = np.argpartition(-scores, top_k - 1)[:top_k]
+                top = top[np.lexsort((top, -scores[top]))]
+            else:
+                top = np.lexsort((np.arange(len(scores)), -scores))
+
+            documents = []
+            for i in top:
+                score = float(scores[i])
+                if scale_score:
+                    score = (score + 1) / 2 if cosine else expit(score / DOT_PRODUCT_SCALING_FACTOR)
+                documents.append(self.storage.document(int(embedded[i]), score=score, embedding=return_embedding))
+            batches.append(documents)
+        return batches
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Bytes in the columns' buffers: `documents` for content, metadata codes and embeddings, `bm25` for the
+        term frequencies.
+        """
+        return {"documents": self.storage.nbytes(), "bm25": self._bm25_attr.nbytes()}
+
+    def _matching_rows(self, filters: Optional[Dict[str, Any]]) -> List[int]:
+        # Filters are evaluated on Documents without their embedding, the expensive part to rebuild.
+        if not filters:
+            return self.storage.rows().tolist()
+        if "operator" not in filters and "conditions" not in filters:
+            filters = convert(filters)
+        rows = (self.storage.row(doc_id) for doc_id in self._candidate_ids(filters))
+        return [
+            row
+            for row in rows
+            if document_matches_filter(filters=filters, document=self.storage.document(row, embedding=False))
+        ]
+
+    def _is_stored(self, document: Document) -> bool:
+        return (self.storage.written or {}).get(document.id) == id(document)
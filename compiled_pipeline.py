@@ -0,0 +1,241 @@
+# Freezes an acyclic Pipeline into a precomputed execution plan for cheap repeated runs.
+
+import typing
+from collections.abc import Mapping
+from copy import copy, deepcopy
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+import networkx as nx
+from haystack import Pipeline
+from haystack.core.errors import PipelineRuntimeError
+
+
+class _Socket(NamedTuple):
+    name: str
+    type: Any
+    mandatory: bool
+    variadic: bool
+    connected: bool
+
+
+class _Edge(NamedTuple):
+    output: str
+    receiver: int
+    input: str
+    variadic: bool
+
+
+class _Step(NamedTuple):
+    name: str
+    instance: Any
+    sockets: Dict[str, _Socket]
+    mandatory: FrozenSet[str]
+    connected: bool
+    edges: Tuple[_Edge, ...]
+    sent_outputs: FrozenSet[str]
+
+
+def _accepts(expected: Any, value: Any) -> bool:
+    """
+    Loose runtime check of `value` against a socket type: only the outer type is checked, so `List[Document]`
+    accepts any list. Types that can't be checked this way (TypeVars, Literal, ...) accept anything.
+    """
+    if expected is Any or isinstance(expected, typing.TypeVar):
+        return True
+    origin = typing.get_origin(expected)
+    if origin is typing.Union:
+        return any(_accepts(arg, value) for arg in typing.get_args(expected))
+    if origin is typing.Annotated:
+        return _accepts(typing.get_args(expected)[0], value)
+    if expected is None or expected is type(None):
+        return value is None
+    check = origin or expected
+    if not isinstance(check, type):
+        return True
+    return isinstance(value, check)
+
+
+class CompiledPipeline:
+    """
+    An acyclic `Pipeline` frozen into a fixed schedule, for pipelines that run once per request.
+
+    `Pipeline.run` warms up every component, re-validates the inputs, rebuilds its run queues and walks all
+    the graph edges after each component, on every run. `compile_pipeline` does that work once: components
+    are put in the order `Pipeline.run` would run them, each with its input sockets and the receivers of its
+    outputs resolved to positions in the plan, and inputs are validated once per shape (which components and
+    sockets are given) and type-checked once per value type. A run is then a single pass over the plan.
+
+    Components run in the plan's order, when all their mandatory inputs have arrived; components whose
+    connected inputs never arrive (a branch that wasn't taken) are skipped. Outputs are the same as
+    `Pipeline.run`'s. The pipeline must not be changed after compiling; other attributes, like `show()`,
+    are forwarded to it.
+
+    Usage example:
+    ```python
+    document_search = compile_pipeline(document_search)
+    results = document_search.run({"query_embedder": {"text": question}, "retriever": {"top_k": 3}})
+    ```
+    """
+
+    def __init__(self, pipeline: Pipeline, type_check: bool = True):
+        """
+        :param pipeline: A connected pipeline without cycles.
+        :param type_check: Check the type of each input value against its socket type.
+        :raises ValueError: If the pipeline has cycles.
+        """
+        graph = pipeline.graph
+        if not nx.is_directed_acyclic_graph(graph):
+            raise ValueError("Only pipelines without cycles can be compiled; run pipelines with loops with Pipeline.run.")
+        self.pipeline = pipeline
+        self.type_check = type_check
+
+        # Breadth-first, like Pipeline.run's queue: sources in insertion order, then each component once its
+        # last sender has run. Variadic inputs then arrive in the same order as with Pipeline.run.
+        waiting = {name: graph.in_degree(name) for name in graph.nodes}
+        order = [name for name in graph.nodes if not waiting[name]]
+        for name in order:
+            for _, receiver in graph.out_edges(name):
+                waiting[receiver] -= 1
+                if not waiting[receiver]:
+                    order.append(receiver)
+        position = {name: i for i, name in enumerate(order)}
+
+        steps = []
+        for name in order:
+            instance = graph.nodes[name]["instance"]
+            sockets = {
+                socket_name: _Socket(
+                    socket_name, socket.type, socket.is_mandatory, socket.is_variadic, bool(socket.senders)
+                )
+                for socket_name, socket in instance.__haystack_input__._sockets_dict.items()  # type: ignore
+            }
+            edges = tuple(
+                _Edge(data["from_socket"].name, position[receiver], data["to_socket"].name, data["to_socket"].is_variadic)
+                for _, receiver, data in graph.out_edges(name, data=True)
+            )
+            steps.append(
+                _Step(
+                    name=name,
+                    instance=instance,
+                    sockets=sockets,
+                    mandatory=frozenset(s.name for s in sockets.values() if s.mandatory),
+                    connected=any(s.connected for s in sockets.values()),
+                    edges=edges,
+                    sent_outputs=frozenset(edge.output for edge in edges),
+                )
+            )
+        self._steps: List[_Step] = steps
+        self._positions = position
+        # Flat inputs: input name -> components with an unconnected socket of that name, as Pipeline.inputs() does.
+        self._flat_inputs: Dict[str, List[str]] = {}
+        for step in steps:
+            for socket in step.sockets.values():
+                if not socket.connected or socket.variadic:
+                    self._flat_inputs.setdefault(socket.name, []).append(step.name)
+        self._valid_shapes: Set[Tuple] = set()
+        self._valid_types: Set[Tuple[str, str, type]] = set()
+        self.warm_up()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__dict__["pipeline"], name)
+
+    def warm_up(self):
+        self.pipeline.warm_up()
+
+    def run(self, data: Dict[str, Any], include_outputs_from: Optional[Set[str]] = None) -> Dict[str, Any]:
+        """
+        Runs the plan; takes and returns the same data as `Pipeline.run`.
+
+        :param data: Inputs by component name, or flat inputs by input name.
+        :param include_outputs_from: Components whose full outputs should be returned, even if sent on.
+        :returns: The outputs of the pipeline that weren't sent to another component.
+        :raises ValueError: If the inputs don't match the pipeline.
+        :raises TypeError: If `type_check` is on and an input has the wrong type.
+        """
+        data = self._nest(data)
+        self._validate(data)
+
+        steps = self._steps
+        inputs: List[Dict[str, Any]] = [{} for _ in steps]
+        for component_name, component_inputs in data.items():
+            step = steps[self._positions[component_name]]
+            received = inputs[self._positions[component_name]]
+            for socket_name, value in component_inputs.items():
+                received[socket_name] = [value] if step.sockets[socket_name].variadic else copy(value)
+
+        outputs: Dict[str, Any] = {}
+        for step, received in zip(steps, inputs):
+            if not step.mandatory <= received.keys() or (step.connected and not received):
+                continue
+            result = step.instance.run(**received)
+            if not isinstance(result, Mapping):
+                raise PipelineRuntimeError(
+                    f"Component '{step.name}' didn't return a dictionary. "
+                    "Components must always return dictionaries: check the the documentation."
+                )
+            for edge in step.edges:
+                if edge.output in result:
+                    if edge.variadic:
+                        inputs[edge.receiver].setdefault(edge.input, []).append(result[edge.output])
+                    else:
+                        inputs[edge.receiver][edge.input] = result[edge.output]
+            if include_outputs_from and step.name in include_outputs_from:
+                outputs[step.name] = deepcopy(result)
+                continue
+            left = {key: value for key, value in result.items() if key not in step.sent_outputs}
+            if left:
+                outputs[step.name] = left
+        return outputs
+
+    def _nest(self, data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        if all(isinstance(value, dict) for value in data.values()):
+            return data
+        nested: Dict[str, Dict[str, Any]] = {}
+        for input_name, value in data.items():
+            for component_name in self._flat_inputs.get(input_name, []):
+                nested.setdefault(component_name, {})[input_name] = value
+        return nested
+
+    def _validate(self, data: Dict[str, Dict[str, Any]]):
+        shape = tuple(sorted((name, tuple(sorted(inputs))) for name, inputs in data.items()))
+        if shape not in self._valid_shapes:
+            self._validate_shape(data)
+            self._valid_shapes.add(shape)
+        if not self.type_check:
+            return
+        for component_name, component_inputs in data.items():
+            sockets = self._steps[self._positions[component_name]].sockets
+            for socket_name, value in component_inputs.items():
+                key = (component_name, socket_name, type(value))
+                if key in self._valid_types:
+                    continue
+                if not _accepts(sockets[socket_name].type, value):
+                    raise TypeError(
+                        f"Input {socket_name} of component {component_name} expects {sockets[socket_name].type}, "
+                        f"got {type(value).__name__}."
+                    )
+                self._valid_types.add(key)
+
+    def _validate_shape(self, data: Dict[str, Dict[str, Any]]):
+        # Same rules as Pipeline._validate_input.
+        for component_name, component_inputs in data.items():
+            if component_name not in self._positions:
+                raise ValueError(f"Component named {component_name} not found in the pipeline.")
+            sockets = self._steps[self._positions[component_name]].sockets
+            for input_name in component_inputs:
+                if input_name not in sockets:
+                    raise ValueError(f"Input {input_name} not found in component {component_name}.")
+        for step in self._steps:
+            component_inputs = data.get(step.name, {})
+            for socket in step.sockets.values():
+                if not socket.connected and socket.mandatory and socket.name not in component_inputs:
+                    raise ValueError(f"Missing input for component {step.name}: {socket.name}")
+                if socket.connected and socket.name in component_inputs and not socket.variadic:
+                    raise ValueError(f"Input {socket.name} for component {step.name} is already sent by another component.")
+
+
+def compile_pipeline(pipeline: Pipeline, type_check: bool = True) -> CompiledPipeline:
+    """
+    Compiles `pipeline` into a `CompiledPipeline`. See `CompiledPipeline` for what changes.
+    """
+    return CompiledPipeline(pipeline, type_check=type_check)
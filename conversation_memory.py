@@ -0,0 +1,243 @@
+# Token-bounded chat history with compacted function replies and a running summary of older turns.
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from haystack import component, default_to_dict
+from haystack.core.serialization import component_to_dict
+from haystack.dataclasses import ChatMessage, ChatRole
+
+from helper import deserialize_component
+from prompt_cache import get_compiled_template
+
+SUMMARY_TEMPLATE = """
+Summarize the conversation below between a user and an assistant in at most {{ max_words }} words.
+Keep names, places, numbers and anything the user asked the assistant to remember.
+{% if summary %}
+Summary of the conversation so far:
+{{ summary }}
+{% endif %}
+New messages:
+{% for message in messages %}
+{{ message.role.value }}: {{ message.content }}
+{% endfor %}
+Summary:
+"""
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+def count_tokens(text: str) -> int:
+    # About 4 characters per token for English text, which is all the window needs.
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: ChatMessage) -> int:
+    # Each message costs a few tokens of framing on top of its content.
+    return count_tokens(message.content or "") + 4
+
+
+def _fingerprint(previous: str, message: ChatMessage) -> str:
+    data = f"{previous}\x00{message.role.value}\x00{message.name or ''}\x00{message.content}"
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+class SummaryStore:
+    """
+    LRU of running summaries, keyed by a fingerprint of the messages they cover.
+
+    Keys are chained hashes of the conversation prefix, so a summary is found again whichever component
+    instance or session the next turn goes through, and two conversations only share a summary if they
+    share the summarized messages. Several `ConversationMemory` instances can share one store.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._entries.get(key)
+            if summary is not None:
+                self._entries.move_to_end(key)
+            return summary
+
+    def put(self, key: str, summary: str):
+        with self._lock:
+            self._entries[key] = summary
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+@component
+class ConversationMemory:
+    """
+    Keeps the chat history sent to the LLM within a token budget.
+
+    Takes the full history and returns the system messages, a summary of older turns and as many recent
+    turns as fit in `max_tokens`. Function replies of earlier turns are cut to `max_function_reply_chars`;
+    the ones of the current turn are kept whole. When the history overflows, the oldest turns are dropped
+    down to `summarize_at` of the budget and folded into the running summary with one `summarizer` call,
+    so the summarizer runs every few turns rather than on every turn. Without a summarizer, old turns are
+    just dropped.
+
+    Usage example:
+    ```python
+    memory = ConversationMemory(max_tokens=1500, summarizer=OpenAIGenerator(model="gpt-3.5-turbo"))
+    chat_agent.add_component("memory", memory)
+    chat_agent.connect("memory.messages", "message_collector")
+    chat_agent.run({"memory": {"messages": messages}})
+    ```
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 2000,
+        summarizer: Optional[Any] = None,
+        summarize_at: float = 0.5,
+        summary_max_words: int = 150,
+        max_function_reply_chars: int = 500,
+        store: Optional[SummaryStore] = None,
+    ):
+        """
+        :param max_tokens: Budget for the messages returned, including the summary.
+        :param summarizer: A generator component, like `OpenAIGenerator`, used to write the summary.
+        :param summarize_at: Fraction of `max_tokens` the history is cut down to when it overflows.
+        :param summary_max_words: Length the summarizer is asked to keep the summary under.
+        :param max_function_reply_chars: Characters kept from function replies of earlier turns.
+        :param store: Where running summaries are kept; pass the same store to share summaries between
+            instances, e.g. one per worker thread.
+        """
+        if not 0 < summarize_at <= 1:
+            raise ValueError(f"summarize_at must be in (0, 1], got {summarize_at}")
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.summarize_at = summarize_at
+        self.summary_max_words = summary_max_words
+        self.max_function_reply_chars = max_function_reply_chars
+        self.store = store or SummaryStore()
+        self.stats = {"turns": 0, "summaries": 0, "messages_summarized": 0}
+        self._template = get_compiled_template(SUMMARY_TEMPLATE)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            max_tokens=self.max_tokens,
+            summarizer=component_to_dict(self.summarizer) if self.summarizer is not None else None,
+            summarize_at=self.summarize_at,
+            summary_max_words=self.summary_max_words,
+            max_function_reply_chars=self.max_function_reply_chars,
+            store={"max_entries": self.store.max_entries},
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ConversationMemory":
+        """
+        Deserializes the component from a dictionary.
+        """
+        params = dict(data["init_parameters"])
+        if params.get("summarizer") is not None:
+            params["summarizer"] = deserialize_component(params["summarizer"])
+        params["store"] = SummaryStore(**params.get("store", {}))
+        return cls(**params)
+
+    def warm_up(self):
+        if hasattr(self.summarizer, "warm_up"):
+            self.summarizer.warm_up()
+
+    @component.output_types(messages=List[ChatMessage], summary=Optional[str])
+    def run(self, messages: List[ChatMessage]):
+        """
+        Returns the part of `messages` to send to the LLM.
+
+        :param messages: The full conversation, oldest message first.
+        :returns: A dictionary with the following keys:
+            - `messages`: System messages, the summary as a system message if there is one, and recent turns.
+            - `summary`: The running summary of the turns that were left out, or None.
+        """
+        self.stats["turns"] += 1
+        system = [m for m in messages if m.is_from(ChatRole.SYSTEM)]
+        history = [m for m in messages if not m.is_from(ChatRole.SYSTEM)]
+
+        start, summary, fingerprints = self._resume(history)
+        recent = self._compact(history[start:])
+        budget = self.max_tokens - sum(message_tokens(m) for m in system)
+
+        if self._tokens(recent, summary) > budget:
+            dropped = self._drop_oldest_turns(recent, summary, int(budget * self.summarize_at))
+            if dropped:
+                summary = self._summarize(summary, recent[:dropped])
+                recent = recent[dropped:]
+                start += dropped
+                self.store.put(fingerprints[start - 1], summary or "")
+
+        window = list(system)
+        if summary:
+            window.append(ChatMessage.from_system(SUMMARY_PREFIX + summary))
+        window.extend(recent)
+        return {"messages": window, "summary": summary or None}
+
+    def _resume(self, history: List[ChatMessage]) -> Tuple[int, Optional[str], List[str]]:
+        """
+        Finds the longest prefix of `history` that already has a summary.
+        """
+        fingerprints = []
+        previous = ""
+        for message in history:
+            previous = _fingerprint(previous, message)
+            fingerprints.append(previous)
+        for end in range(len(fingerprints), 0, -1):
+            summary = self.store.get(fingerprints[end - 1])
+            if summary is not None:
+                return end, summary, fingerprints
+        return 0, None, fingerprints
+
+    def _compact(self, messages: List[ChatMessage]) -> List[ChatMessage]:
+        last_user = max((i for i, m in enumerate(messages) if m.is_from(ChatRole.USER)), default=-1)
+        limit = self.max_function_reply_chars
+        compacted = []
+        for i, message in enumerate(messages):
+            if i < last_user and message.is_from(ChatRole.FUNCTION) and len(message.content) > limit:
+                message = replace(message, content=message.content[:limit] + " ...")
+            compacted.append(message)
+        return compacted
+
+    def _tokens(self, messages: List[ChatMessage], summary: Optional[str]) -> int:
+        tokens = sum(message_tokens(m) for m in messages)
+        if summary:
+            tokens += count_tokens(SUMMARY_PREFIX + summary) + 4
+        return tokens
+
+    def _drop_oldest_turns(self, messages: List[ChatMessage], summary: Optional[str], target: int) -> int:
+        """
+        Returns how many leading messages to drop to get under `target` tokens, cutting only before a user
+        message and always keeping the last one.
+        """
+        # The summary grows by at most `summary_max_words` words once the dropped turns are folded in.
+        tokens = self._tokens(messages, summary) + (self.summary_max_words * 4 // 3 if self.summarizer else 0)
+        dropped = 0
+        for i, message in enumerate(messages):
+            if i > 0 and message.is_from(ChatRole.USER):
+                dropped = i
+                if tokens <= target:
+                    break
+            tokens -= message_tokens(message)
+        return dropped
+
+    def _summarize(self, summary: Optional[str], messages: List[ChatMessage]) -> Optional[str]:
+        self.stats["messages_summarized"] += len(messages)
+        if self.summarizer is None:
+            return None
+        prompt = self._template.render(
+            {"summary": summary, "messages": messages, "max_words": self.summary_max_words}
+        )
+        self.stats["summaries"] += 1
+        return self.summarizer.run(prompt=prompt)["replies"][0].strip()
@@ -0,0 +1,341 @@
+# Near-duplicate detection at indexing time: MinHash signatures, an LSH index and a filter component that
+# drops (or merges) near-duplicate documents before they reach the embedder.
+
+import importlib
+import json
+import re
+import sqlite3
+import threading
+import zlib
+from collections import defaultdict
+from collections.abc import Mapping
+from dataclasses import replace
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple
+
+import numpy as np
+from haystack import DeserializationError, Document, component, default_from_dict, default_to_dict
+
+from embedding_cache import normalize_text
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD = re.compile(r"\w+")
+# np.trapz is deprecated since NumPy 2.0, which renamed it np.trapezoid.
+_trapezoid = np.trapezoid if hasattr(np, "trapezoid") else np.trapz  # type: ignore[attr-defined]
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """
+    The word `size`-grams of `text`, lowercased and with whitespace normalized.
+    """
+    words = _WORD.findall(normalize_text(text, lowercase=True))
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: str, b: str, size: int = 3) -> float:
+    """
+    Exact Jaccard similarity of the shingles of two texts; what MinHash signatures estimate.
+    """
+    left, right = shingles(a, size), shingles(b, size)
+    return len(left & right) / len(left | right) if left or right else 1.0
+
+
+def _false_rates(threshold: float, bands: int, rows: int) -> float:
+    # Probability mass of pairs wrongly kept apart (above the threshold) or paired up (below it) by the banding.
+    # Candidates are verified against the threshold, so a false positive only costs a comparison while a false
+    # negative is a missed duplicate; the latter weighs more.
+    low = np.linspace(0.0, threshold, 64)
+    high = np.linspace(threshold, 1.0, 64)
+    false_positive = _trapezoid(1 - (1 - low**rows) ** bands, low)
+    false_negative = _trapezoid((1 - high**rows) ** bands, high)
+    return float(0.2 * false_positive + 0.8 * false_negative)
+
+
+def lsh_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    The `(bands, rows)` split of `num_perm` hashes that best separates pairs above and below `threshold`.
+    """
+    splits = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(splits, key=lambda split: _false_rates(threshold, *split))
+
+
+class MinHasher:
+    """
+    MinHash signatures of texts over word shingles, `num_perm` 32-bit values per text.
+
+    The fraction of equal values in two signatures estimates the Jaccard similarity of the texts' shingles.
+    Hashes are CRC32 and the permutations come from a fixed seed, so signatures are stable across processes
+    and can be stored.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        grams = shingles(text, self.shingle_size)
+        hashes = np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+        # a, b and the hashes are below 2**32, so a * h + b doesn't overflow 64 bits.
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures by document id with an LSH index over them, optionally persisted in a SQLite file.
+
+    Signatures are cut into `bands` of `rows` values; documents that share a band are candidates, and only
+    candidates are compared, so a lookup costs about the same with 1,000 or 1,000,000 documents indexed.
+    Candidates whose estimated similarity is below `threshold` are discarded.
+    """
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 3, path: Optional[str] = None):
+        """
+        :param threshold: Estimated Jaccard similarity from which two documents are near-duplicates.
+        :param num_perm: Values per signature; more is more accurate and slower.
+        :param shingle_size: Words per shingle.
+        :param path: Path of a SQLite file to keep the signatures in across runs.
+        """
+        self.threshold = threshold
+        self.path = path
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self.stats = {"lookups": 0, "candidates": 0}
+
+        self._lock = threading.Lock()
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._pending: Dict[str, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, List[str]]] = [defaultdict(list) for _ in range(self.bands)]
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._open(path)
+
+    @property
+    def num_perm(self) -> int:
+        return self.hasher.num_perm
+
+    @property
+    def shingle_size(self) -> int:
+        return self.hasher.shingle_size
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.hasher.signature(text)
+
+    def query(self, signature: np.ndarray) -> List[Tuple[str, float]]:
+        """
+        The indexed documents whose estimated similarity to `signature` reaches the threshold, most similar first.
+        """
+        with self._lock:
+            candidates = {doc_id for band, key in self._band_keys(signature) for doc_id in self._buckets[band].get(key, ())}
+            self.stats["lookups"] += 1
+            self.stats["candidates"] += len(candidates)
+            scored = [(doc_id, float(np.mean(self._signatures[doc_id] == signature))) for doc_id in candidates]
+        return sorted((item for item in scored if item[1] >= self.threshold), key=lambda item: -item[1])
+
+    def add(self, doc_id: str, signature: np.ndarray):
+        """
+        Indexes the signature of a new document. It is written to the SQLite file on the next `flush()`.
+        """
+        with self._lock:
+            if self._insert(doc_id, signature) and self._db is not None:
+                self._pending[doc_id] = signature
+
+    def flush(self):
+        with self._lock:
+            if self._db is not None and self._pending:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO signatures VALUES (?, ?)",
+                    [(doc_id, signature.tobytes()) for doc_id, signature in self._pending.items()],
+                )
+            self._pending.clear()
+
+    def remove(self, doc_ids: List[str]):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._pending.pop(doc_id, None)
+                signature = self._signatures.pop(doc_id, None)
+                if signature is None:
+                    continue
+                for band, key in self._band_keys(signature):
+                    bucket = self._buckets[band][key]
+                    bucket.remove(doc_id)
+                    if not bucket:
+                        del self._buckets[band][key]
+            if self._db is not None:
+                self._db.executemany("DELETE FROM signatures WHERE id = ?", [(doc_id,) for doc_id in doc_ids])
+
+    def clear(self):
+        with self._lock:
+            self._signatures.clear()
+            self._pending.clear()
+            self._buckets = [defaultdict(list) for _ in range(self.bands)]
+            if self._db is not None:
+                self._db.execute("DELETE FROM signatures")
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._signatures
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows : (band + 1) * self.rows].tobytes()
+
+    def _insert(self, doc_id: str, signature: np.ndarray) -> bool:
+        if doc_id in self._signatures:
+            return False
+        self._signatures[doc_id] = signature
+        for band, key in self._band_keys(signature):
+            self._buckets[band][key].append(doc_id)
+        return True
+
+    def _open(self, path: str):
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS signatures (id TEXT PRIMARY KEY, signature BLOB)")
+        # Signatures made with other hash settings can't be compared with these ones.
+        settings = json.dumps({"num_perm": self.num_perm, "shingle_size": self.shingle_size, "seed": self.hasher.seed})
+        row = self._db.execute("SELECT value FROM settings WHERE key = 'minhash'").fetchone()
+        if row is None or row[0] != settings:
+            self._db.execute("DELETE FROM signatures")
+            self._db.execute("INSERT OR REPLACE INTO settings VALUES ('minhash', ?)", (settings,))
+        for doc_id, blob in self._db.execute("SELECT id, signature FROM signatures"):
+            self._insert(doc_id, np.frombuffer(blob, dtype=np.uint32))
+
+
+@component
+class NearDuplicateFilter:
+    """
+    Drops documents that are near-duplicates of one already indexed or earlier in the same batch.
+
+    Put it before the embedder, so near-duplicates cost no embedding call and don't end up in prompts twice.
+    With `policy="merge"`, a near-duplicate of a document in the same batch is dropped and its id is added to
+    that document's `meta["near_duplicates"]`. Documents from earlier runs only count if they are still in
+    `document_store`, so a persisted index doesn't drop documents from a fresh in-memory store.
+
+    Usage example:
+    ```python
+    dedup = NearDuplicateFilter(NearDuplicateIndex(threshold=0.8, path="signatures.sqlite"), document_store=document_store)
+    indexing_pipeline.add_component("dedup", dedup)
+    indexing_pipeline.connect("splitter", "dedup")
+    indexing_pipeline.connect("dedup.documents", "embedder")
+    ```
+    """
+
+    def __init__(
+        self,
+        index: Optional[NearDuplicateIndex] = None,
+        policy: Literal["drop", "merge"] = "drop",
+        document_store: Any = None,
+    ):
+        """
+        :param index: The index to check against and add to. Defaults to an in-memory index private to this component.
+        :param policy: `"drop"` or `"merge"` near-duplicates.
+        :param document_store: The store the documents are written to, to check that earlier matches still exist.
+        """
+        if policy not in ("drop", "merge"):
+            raise ValueError(f"Unknown policy '{policy}', expected 'drop' or 'merge'")
+        self.index = index if index is not None else NearDuplicateIndex()
+        self.policy = policy
+        self.document_store = document_store
+        self.stats = {"documents": 0, "dropped": 0, "merged": 0}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            index={
+                "threshold": self.index.threshold,
+                "num_perm": self.index.num_perm,
+                "shingle_size": self.index.shingle_size,
+                "path": self.index.path,
+            },
+            policy=self.policy,
+            document_store=self.document_store.to_dict() if self.document_store is not None else None,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NearDuplicateFilter":
+        """
+        Deserializes the component from a dictionary.
+        """
+        params = data["init_parameters"]
+        params["index"] = NearDuplicateIndex(**params["index"])
+        store = params.get("document_store")
+        if store is not None:
+            try:
+                module_name, type_ = store["type"].rsplit(".", 1)
+                store_class = getattr(importlib.import_module(module_name), type_)
+            except (ImportError, AttributeError) as error:
+                raise DeserializationError(f"DocumentStore of type '{store['type']}' not correctly imported") from error
+            params["document_store"] = store_class.from_dict(store)
+        return default_from_dict(cls, data)
+
+    @component.output_types(documents=List[Document], duplicates=List[Document])
+    def run(self, documents: List[Document]):
+        """
+        Filters out near-duplicates.
+
+        :param documents: Documents to deduplicate, e.g. the splitter's output.
+        :returns:
+            - `documents`: The documents to embed and write, in input order.
+            - `duplicates`: The near-duplicates left out, with `meta["duplicate_of"]` and `meta["similarity"]`.
+        """
+        kept: List[Document] = []
+        duplicates: List[Document] = []
+        # Ids of the documents kept from this batch, with their position in `kept`.
+        batch: Dict[str, int] = {}
+        for doc in documents:
+            if not doc.content:
+                kept.append(doc)
+                continue
+            signature = None
+            if doc.id in batch:
+                match: Optional[Tuple[str, float]] = (doc.id, 1.0)
+            else:
+                signature = self.index.signature(doc.content)
+                match = self._match(self.index.query(signature), batch)
+            if match is None:
+                batch[doc.id] = len(kept)
+                kept.append(doc)
+                self.index.add(doc.id, signature)
+                continue
+            original_id, similarity = match
+            duplicates.append(replace(doc, meta={**doc.meta, "duplicate_of": original_id, "similarity": similarity}))
+            if self.policy == "merge" and original_id in batch and original_id != doc.id:
+                # Annotate a copy: the caller's document is left as it was.
+                original = kept[batch[original_id]]
+                near_duplicates = [*original.meta.get("near_duplicates", []), doc.id]
+                kept[batch[original_id]] = replace(original, meta={**original.meta, "near_duplicates": near_duplicates})
+                self.stats["merged"] += 1
+            else:
+                self.stats["dropped"] += 1
+        self.index.flush()
+        self.stats["documents"] += len(documents)
+        return {"documents": kept, "duplicates": duplicates}
+
+    def _match(self, indexed: List[Tuple[str, float]], batch: Dict[str, int]) -> Optional[Tuple[str, float]]:
+        # Matches from this batch always count; earlier ones only if they're still in the document store.
+        earlier = [doc_id for doc_id, _ in indexed if doc_id not in batch]
+        if self.document_store is None or not earlier:
+            stored = set(earlier)
+        elif isinstance(getattr(self.document_store, "storage", None), Mapping):
+            # InMemoryDocumentStore and its subclasses: a lookup by id instead of a filter over every document.
+            stored = {doc_id for doc_id in earlier if doc_id in self.document_store.storage}
+        else:
+            filters = {"field": "id", "operator": "in", "value": earlier}
+            stored = {doc.id for doc in self.document_store.filter_documents(filters)}
+        gone = [doc_id for doc_id in earlier if doc_id not in stored]
+        if gone:
+            self.index.remove(gone)
+        return next((item for item in indexed if item[0] in batch or item[0] in stored), None)
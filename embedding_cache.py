@@ -0,0 +1,207 @@
+# Query-embedding cache for remote text embedders (OpenAITextEmbedder, CohereTextEmbedder, ...).
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from haystack import component, default_to_dict
+from haystack.core.serialization import component_to_dict
+
+from coalescing_cache import CoalescingCache
+from helper import deserialize_component
+
+_WHITESPACE = re.compile(r"\s+")
+
+Entry = Tuple[List[float], Dict[str, Any]]
+
+
+def normalize_text(text: str, lowercase: bool = False) -> str:
+    """
+    Normalizes a query for cache lookups: NFKC, trimmed, with runs of whitespace collapsed.
+    """
+    text = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+    return text.lower() if lowercase else text
+
+
+class QueryEmbeddingCache:
+    """
+    LRU + TTL cache of query embeddings with an optional shared on-disk tier.
+
+    The in-process tier is an LRU bounded by `max_entries`. The on-disk tier is a SQLite file that several
+    worker processes can share, so a query embedded by one worker is a hit for the others.
+    Concurrent misses on the same key are coalesced: only the first caller computes, the rest wait for it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl: Optional[float] = 24 * 3600,
+        disk_path: Optional[str] = None,
+        max_disk_entries: int = 1_000_000,
+        lowercase: bool = False,
+    ):
+        """
+        :param max_entries: Maximum number of embeddings kept in memory.
+        :param ttl: Seconds an embedding stays valid, or None to never expire.
+        :param disk_path: Path of a SQLite file to use as a shared second tier.
+        :param max_disk_entries: Maximum number of embeddings kept on disk.
+        :param lowercase: Also lowercase texts when building keys.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        self.lowercase = lowercase
+
+        # Expiries are wall-clock times, as on disk, where other processes read them.
+        self._memory = CoalescingCache(max_entries, ttl=ttl, clock=time.time)
+        self._disk_hits = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._db_writes = 0
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, expires_at REAL, embedding BLOB, meta TEXT)"
+            )
+
+    def key(self, model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{normalize_text(text, self.lowercase)}".encode()).hexdigest()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Memory hits, disk hits, misses (calls of `compute`) and callers coalesced onto another's miss.
+        """
+        return {**self._memory.stats, "disk_hits": self._disk_hits}
+
+    def get_or_compute(self, model: str, text: str, compute: Callable[[], Entry]) -> Entry:
+        """
+        Returns the cached `(embedding, meta)` for `text` under `model`, calling `compute` on a miss.
+        """
+        key = self.key(model, text)
+
+        def compute_and_save() -> Entry:
+            entry = compute()
+            self._put_disk(key, entry, time.time() + self.ttl if self.ttl is not None else float("inf"))
+            return entry
+
+        return self._memory.get_or_compute(key, compute_and_save, load=lambda: self._get_disk(key))
+
+    def clear(self):
+        self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM embeddings")
+
+    def _get_disk(self, key: str) -> Optional[Tuple[float, Entry]]:
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT expires_at, embedding, meta FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[0] < time.time():
+                return None
+            self._disk_hits += 1
+        return row[0], (array("d", row[1]).tolist(), json.loads(row[2]))
+
+    def _put_disk(self, key: str, entry: Entry, expires_at: float):
+        if self._db is None:
+            return
+        embedding, meta = entry
+        expires_at = min(expires_at, 1e300)
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                (key, expires_at, array("d", embedding).tobytes(), json.dumps(meta)),
+            )
+            self._db_writes += 1
+            if self._db_writes % 256 == 0:
+                self._db.execute("DELETE FROM embeddings WHERE expires_at < ?", (time.time(),))
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE rowid NOT IN "
+                    "(SELECT rowid FROM embeddings ORDER BY rowid DESC LIMIT ?)",
+                    (self.max_disk_entries,),
+                )
+
+
+@component
+class CachedTextEmbedder:
+    """
+    Wraps a text embedder with a `QueryEmbeddingCache`.
+
+    Has the same inputs and outputs as the wrapped embedder, so it replaces it in a pipeline as is.
+
+    Usage example:
+    ```python
+    query_embedder = CachedTextEmbedder(OpenAITextEmbedder(), cache=QueryEmbeddingCache(disk_path="embeddings.db"))
+    document_search.add_component("query_embedder", query_embedder)
+    ```
+    """
+
+    def __init__(self, embedder: Any, cache: Optional[QueryEmbeddingCache] = None):
+        """
+        :param embedder: The text embedder to wrap, e.g. `OpenAITextEmbedder` or `CohereTextEmbedder`.
+        :param cache: The cache to use. Defaults to an in-memory cache private to this component.
+        """
+        self.embedder = embedder
+        self.cache = cache or QueryEmbeddingCache()
+        # Keys include everything that changes the vector for a given text.
+        settings = (getattr(embedder, attr, "") for attr in ("model", "prefix", "suffix", "input_type", "dimensions"))
+        self._namespace = ":".join([type(embedder).__name__, *map(str, settings)])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            embedder=component_to_dict(self.embedder),
+            cache={
+                "max_entries": self.cache.max_entries,
+                "ttl": self.cache.ttl,
+                "disk_path": self.cache.disk_path,
+                "max_disk_entries": self.cache.max_disk_entries,
+                "lowercase": self.cache.lowercase,
+            },
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CachedTextEmbedder":
+        """
+        Deserializes the component from a dictionary.
+        """
+        params = data["init_parameters"]
+        return cls(embedder=deserialize_component(params["embedder"]), cache=QueryEmbeddingCache(**params["cache"]))
+
+    def warm_up(self):
+        if hasattr(self.embedder, "warm_up"):
+            self.embedder.warm_up()
+
+    @component.output_types(embedding=List[float], meta=Dict[str, Any])
+    def run(self, text: str):
+        """
+        Embeds a single string, from the cache when possible.
+
+        :param text: Text to embed.
+        :returns: The wrapped embedder's `embedding` and `meta`; `meta["cache_hit"]` tells whether the call was saved.
+        """
+        computed = False
+
+        def compute() -> Entry:
+            nonlocal computed
+            computed = True
+            result = self.embedder.run(text=text)
+            return result["embedding"], result.get("meta", {})
+
+        embedding, meta = self.cache.get_or_compute(self._namespace, text, compute)
+        return {"embedding": list(embedding), "meta": {**meta, "cache_hit": not computed}}
@@ -1,8 +1,36 @@
 # Add your utilities or helper functions to this file.
 
+import functools
 import os
 from dotenv import load_dotenv, find_dotenv
 
 # these expect to find a .env file at the directory above the lesson.                                                                                                                     # the format for that file is (without the comment)                                                                                                                                       #API_KEYNAME=AStringThatIsTheLongAPIKeyFromSomeService                                                                                                                                     
+@functools.lru_cache(maxsize=None)
+def _find_env_file(cwd):
+    # find_dotenv stats every directory up to the root; the answer only changes with the working directory
+    # (notebooks search from it, scripts from this file's directory).
+    return find_dotenv()
+
+
+_loaded_env_files = set()
+
+
 def load_env():
-    _ = load_dotenv(find_dotenv())
+    path = _find_env_file(os.getcwd())
+    if path and path not in _loaded_env_files:
+        load_dotenv(path)
+        _loaded_env_files.add(path)
+
+
+def deserialize_component(data):
+    """
+    Rebuilds a component from its `to_dict()` output, importing its module if needed.
+    Used by components that wrap another component, e.g. CachedTextEmbedder.
+    """
+    import importlib
+    from haystack import component
+    from haystack.core.serialization import component_from_dict
+
+    if data["type"] not in component.registry:
+        importlib.import_module(data["type"].rsplit(".", 1)[0])
+    return component_from_dict(component.registry[data["type"]], data, data["type"])
@@ -0,0 +1,372 @@
+# Shared on-disk cache of HTTP responses and search results: per-endpoint TTLs, conditional requests
+# (ETag / Last-Modified), normalized keys and a size bound with LRU eviction.
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from haystack import Document, component, default_to_dict
+from haystack.core.serialization import component_to_dict
+
+from embedding_cache import normalize_text
+from helper import deserialize_component
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Columns in storage order: the small ones first, so summing sizes doesn't read the bodies.
+_COLUMNS = "key, size, stored_at, expires_at, last_used, content_type, etag, last_modified, body"
+
+
+@dataclass
+class CacheRule:
+    """
+    How long responses for the keys matching `pattern` stay fresh, and which query parameters don't change them.
+    """
+
+    pattern: str
+    ttl: float
+    ignore_params: Sequence[str] = ()
+
+    def matches(self, key: str) -> bool:
+        return re.search(self.pattern, key) is not None
+
+
+# Hacker News lists change every few minutes, items rarely after the first hour; search results are kept a day.
+DEFAULT_RULES: List[CacheRule] = [
+    CacheRule(r"^https://hacker-news\.firebaseio\.com/v0/\w+stories\.json", ttl=120, ignore_params=("print",)),
+    CacheRule(r"^https://hacker-news\.firebaseio\.com/v0/item/", ttl=3600, ignore_params=("print",)),
+    CacheRule(r"^search:", ttl=24 * 3600),
+]
+
+
+@dataclass
+class CachedResponse:
+    """
+    A response body with what is needed to revalidate it.
+    """
+
+    url: str
+    body: bytes
+    content_type: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+    expires_at: float = 0.0
+
+    @property
+    def fresh(self) -> bool:
+        """
+        Whether the response can be used without asking the server.
+        """
+        return time.time() < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """
+        The conditional request headers that ask the server whether this copy is still current.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+def normalize_url(url: str, ignore_params: Sequence[str] = ()) -> str:
+    """
+    The cache key of a URL: lowercase scheme and host, no default port or fragment, query parameters sorted.
+
+    :param ignore_params: Query parameters to drop, e.g. ones that only change formatting.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in ignore_params)
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def search_key(engine: str, query: str, **params: Any) -> str:
+    """
+    The cache key of a web search: the engine, the query normalized (NFKC, whitespace collapsed, lowercased)
+    and the other parameters that change the results.
+    """
+    settings = json.dumps(params, sort_keys=True, default=str)
+    return f"search:{engine}:{normalize_text(query, lowercase=True)}:{settings}"
+
+
+class HTTPCache:
+    """
+    Responses and search results by normalized key in a SQLite file that several worker processes can share.
+
+    Each key gets the TTL of the first `CacheRule` it matches, or `default_ttl`. Within the TTL an entry is
+    served without any network I/O. Past it, a response with an `ETag` or `Last-Modified` header is revalidated
+    with a conditional request, and a `304 Not Modified` answer reuses the cached body; without validators it is
+    fetched again. The file is kept under `max_bytes` by evicting the least recently used entries.
+
+    Usage example:
+    ```python
+    cache = HTTPCache("http_cache.sqlite")
+    top_stories = cache.fetch("https://hacker-news.firebaseio.com/v0/topstories.json").json()
+    print(cache.hit_rate())
+    ```
+    """
+
+    def __init__(
+        self,
+        path: str = "http_cache.sqlite",
+        rules: Optional[List[CacheRule]] = None,
+        default_ttl: float = 0.0,
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        :param path: Path of the SQLite file.
+        :param rules: TTL rules by key pattern, first match wins. Defaults to `DEFAULT_RULES`.
+        :param default_ttl: Seconds a response matching no rule stays fresh; 0 revalidates it on every fetch.
+        :param max_bytes: Bound on the total size of the cached bodies.
+        """
+        self.path = path
+        self.rules = DEFAULT_RULES if rules is None else rules
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # Every lookup writes its `last_used`; in WAL mode NORMAL skips the fsync per commit and is still safe.
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(responses)")]
+        if columns and ", ".join(columns) != _COLUMNS:
+            # Written by an older version of this module; it's only a cache.
+            self._db.execute("DROP TABLE responses")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, size INTEGER, stored_at REAL, "
+            "expires_at REAL, last_used REAL, content_type TEXT, etag TEXT, last_modified TEXT, body BLOB)"
+        )
+
+    def rule_for(self, key: str) -> Optional[CacheRule]:
+        return next((rule for rule in self.rules if rule.matches(key)), None)
+
+    def key(self, url: str) -> str:
+        """
+        The normalized cache key of `url`; keys that aren't URLs, like `search_key`s, are returned as is.
+        """
+        if urlsplit(url).scheme not in _DEFAULT_PORTS:
+            return url
+        rule = self.rule_for(normalize_url(url))
+        return normalize_url(url, rule.ignore_params if rule is not None else ())
+
+    def ttl_for(self, key: str) -> float:
+        rule = self.rule_for(key)
+        return rule.ttl if rule is not None else self.default_ttl
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """
+        The cached response for `url` or key, fresh or not, marked as just used.
+        """
+        key = self.key(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, content_type, etag, last_modified, stored_at, expires_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return CachedResponse(key, *row) if row is not None else None
+
+    def put(self, response: CachedResponse):
+        """
+        Stores `response` under the key of its URL, unless it could be neither served fresh nor revalidated.
+        """
+        key = self.key(response.url)
+        ttl = self.ttl_for(key)
+        if ttl <= 0 and not (response.etag or response.last_modified):
+            return
+        now = time.time()
+        stored_at = response.stored_at or now
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO responses ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    len(response.body),
+                    stored_at,
+                    stored_at + ttl,
+                    now,
+                    response.content_type,
+                    response.etag,
+                    response.last_modified,
+                    response.body,
+                ),
+            )
+            self._evict()
+
+    def touch(self, url: str):
+        """
+        Records that the cached response for `url` was just revalidated: it is fresh for another TTL.
+        """
+        key = self.key(url)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET stored_at = ?, expires_at = ?, last_used = ? WHERE key = ?",
+                (now, now + self.ttl_for(key), now, key),
+            )
+
+    def record(self, outcome: str):
+        """
+        Counts a lookup as one of `hits` (served fresh), `revalidated` (304) or `misses` (downloaded).
+        """
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def hit_rate(self) -> float:
+        """
+        The share of lookups answered without downloading a body, revalidations included.
+        """
+        with self._lock:
+            served = self.stats["hits"] + self.stats["revalidated"]
+            total = served + self.stats["misses"]
+        return served / total if total else 0.0
+
+    def fetch(
+        self,
+        url: str,
+        session: Any = None,
+        timeout: float = 10.0,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> CachedResponse:
+        """
+        GETs `url` through the cache with `requests`: fresh entries are returned without a request, stale ones
+        are revalidated.
+
+        :param session: A `requests.Session` to reuse connections across calls; defaults to `requests` itself.
+        :raises requests.HTTPError: If the server answers with an error status.
+        """
+        session = session or requests
+        cached = self.get(url)
+        if cached is not None and cached.fresh:
+            self.record("hits")
+            return cached
+        request_headers = {**(headers or {}), **(cached.validators() if cached is not None else {})}
+        response = session.get(url, headers=request_headers, timeout=timeout)
+        if response.status_code == 304 and cached is not None:
+            self.touch(url)
+            self.record("revalidated")
+            return cached
+        response.raise_for_status()
+        self.record("misses")
+        result = CachedResponse(
+            url=url,
+            body=response.content,
+            content_type=response.headers.get("Content-Type", "application/octet-stream").split(";")[0],
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            stored_at=time.time(),
+        )
+        self.put(result)
+        return result
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _evict(self):
+        # Called with the lock held. Evicts down to 90% of the bound so that it doesn't run on every put.
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * 0.9)
+        evicted: List[Tuple[str]] = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if excess <= 0:
+                break
+            evicted.append((key,))
+            excess -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.stats["evictions"] += len(evicted)
+
+
+@component
+class CachedWebSearch:
+    """
+    Wraps a web search component, like `SerperDevWebSearch`, with an `HTTPCache`.
+
+    Queries are normalized before lookup, so "What is Haystack?" and "what is  haystack?" share an entry.
+    Has the same inputs and outputs as the wrapped component, so it replaces it in a pipeline as is.
+
+    Usage example:
+    ```python
+    websearch = CachedWebSearch(SerperDevWebSearch(), cache=HTTPCache("http_cache.sqlite"))
+    rag_or_websearch.add_component("websearch", websearch)
+    ```
+    """
+
+    def __init__(self, websearch: Any, cache: Optional[HTTPCache] = None):
+        """
+        :param websearch: The web search component to wrap.
+        :param cache: The cache to use. Defaults to `http_cache.sqlite` in the working directory.
+        """
+        self.websearch = websearch
+        self.cache = cache if cache is not None else HTTPCache()
+        # Keys include everything that changes the results for a given query.
+        settings = {attr: getattr(websearch, attr, None) for attr in ("top_k", "allowed_domains", "search_params")}
+        self._engine = type(websearch).__name__
+        self._settings = settings
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            websearch=component_to_dict(self.websearch),
+            cache={"path": self.cache.path, "default_ttl": self.cache.default_ttl, "max_bytes": self.cache.max_bytes},
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CachedWebSearch":
+        """
+        Deserializes the component from a dictionary.
+        """
+        params = data["init_parameters"]
+        return cls(websearch=deserialize_component(params["websearch"]), cache=HTTPCache(**params["cache"]))
+
+    @component.output_types(documents=List[Document], links=List[str])
+    def run(self, query: str):
+        """
+        Searches the web for `query`, from the cache when possible.
+
+        :param query: Search query.
+        :returns: The wrapped component's `documents` and `links`.
+        """
+        key = search_key(self._engine, query, **self._settings)
+        cached = self.cache.get(key)
+        if cached is not None and cached.fresh:
+            self.cache.record("hits")
+            result = cached.json()
+            return {"documents": [Document.from_dict(doc) for doc in result["documents"]], "links": result["links"]}
+
+        self.cache.record("misses")
+        result = self.websearch.run(query=query)
+        body = json.dumps({"documents": [doc.to_dict() for doc in result["documents"]], "links": result["links"]})
+        self.cache.put(CachedResponse(url=key, body=body.encode(), content_type="application/json"))
+        return result
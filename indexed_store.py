@@ -0,0 +1,342 @@
+# Secondary metadata indexes for the in-memory document store.
+
+import math
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from haystack import default_to_dict
+from haystack.dataclasses import Document
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.document_stores.types import DuplicatePolicy
+from haystack.utils.filters import COMPARISON_OPERATORS, LOGICAL_OPERATORS, convert, document_matches_filter
+
+_MISSING = object()
+
+
+def _normalize_field(field: str) -> str:
+    return field[len("meta.") :] if field.startswith("meta.") else field
+
+
+def _meta_value(meta: Dict[str, Any], field: str) -> Any:
+    # Same lookup rules as haystack.utils.filters for "meta.a.b" style fields.
+    value: Any = meta
+    for part in field.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not (isinstance(value, float) and math.isnan(value))
+
+
+class MetadataIndex:
+    """
+    Secondary index over one metadata field.
+
+    Equality lookups go through a hash index, range lookups through a sorted array of the numeric values.
+    Lookups return a superset of the matching ids: values the index can't order or hash are always returned
+    as candidates, so callers must still evaluate the filter on the candidates.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self._values: Dict[str, Any] = {}
+        self._hash: Dict[Hashable, Set[str]] = defaultdict(set)
+        self._unhashable: Set[str] = set()
+        self._unordered: Set[str] = set()
+        # Values `>` and `<` raise on: anything but numbers, NaN included.
+        self._incomparable: Set[str] = set()
+        self._sorted_keys: List[float] = []
+        self._sorted_ids: List[str] = []
+        self._sorted_dirty = False
+
+    def add(self, doc_id: str, meta: Dict[str, Any]):
+        value = _meta_value(meta, self.field)
+        if value is _MISSING or value is None:
+            return
+        self._values[doc_id] = value
+        try:
+            self._hash[value].add(doc_id)
+        except TypeError:
+            self._unhashable.add(doc_id)
+        if _is_number(value):
+            self._sorted_dirty = True
+        else:
+            self._unordered.add(doc_id)
+            if not isinstance(value, (int, float)):
+                self._incomparable.add(doc_id)
+
+    def remove(self, doc_id: str):
+        value = self._values.pop(doc_id, _MISSING)
+        if value is _MISSING:
+            return
+        try:
+            ids = self._hash[value]
+            ids.discard(doc_id)
+            if not ids:
+                del self._hash[value]
+        except TypeError:
+            self._unhashable.discard(doc_id)
+        if _is_number(value):
+            self._sorted_dirty = True
+        else:
+            self._unordered.discard(doc_id)
+            self._incomparable.discard(doc_id)
+
+    def comparable(self, value: Any) -> bool:
+        """
+        Whether comparing `value` with every indexed value by `>`, `>=`, `<` or `<=` is safe from raising.
+        """
+        return value is None or isinstance(value, (int, float)) and not self._incomparable
+
+    def equal(self, value: Any) -> Optional[Set[str]]:
+        # Documents without the field match `== None`, and those aren't indexed.
+        if value is None:
+            return None
+        try:
+            ids = self._hash.get(value, set())
+        except TypeError:
+            return None
+        return ids | self._unhashable
+
+    def one_of(self, values: Any) -> Optional[Set[str]]:
+        if not isinstance(values, list):
+            return None
+        candidates: Set[str] = set()
+        for value in values:
+            ids = self.equal(value)
+            if ids is None:
+                return None
+            candidates |= ids
+        return candidates
+
+    def range(self, operator: str, value: Any) -> Optional[Set[str]]:
+        if not _is_number(value):
+            return None
+        keys, ids = self._sorted()
+        if operator == ">":
+            lo, hi = bisect_right(keys, value), len(keys)
+        elif operator == ">=":
+            lo, hi = bisect_left(keys, value), len(keys)
+        elif operator == "<":
+            lo, hi = 0, bisect_left(keys, value)
+        else:
+            lo, hi = 0, bisect_right(keys, value)
+        return set(ids[lo:hi]) | self._unordered
+
+    def _sorted(self) -> Tuple[List[float], List[str]]:
+        # Rebuilt lazily so that bulk writes don't pay for one insort per document.
+        if self._sorted_dirty:
+            pairs = sorted((v, i) for i, v in self._values.items() if _is_number(v))
+            self._sorted_keys = [v for v, _ in pairs]
+            self._sorted_ids = [i for _, i in pairs]
+            self._sorted_dirty = False
+        return self._sorted_keys, self._sorted_ids
+
+
+class IndexedInMemoryDocumentStore(InMemoryDocumentStore):
+    """
+    An InMemoryDocumentStore with secondary indexes on selected metadata fields.
+
+    `filter_documents()` plans the filter against the indexes first and only evaluates it on the
+    intersected candidate ids, so filtered queries cost time proportional to the matches instead of
+    the corpus size. BM25 and embedding retrieval both go through `filter_documents()`, so
+    `InMemoryBM25Retriever` and `InMemoryEmbeddingRetriever` get the same pre-filtering before scoring.
+
+    Usage example:
+    ```python
+    document_store = IndexedInMemoryDocumentStore(indexed_fields=["url", "file_path", "title"])
+    retriever = InMemoryEmbeddingRetriever(document_store=document_store,
+                                           filters={"field": "meta.url", "operator": "==", "value": url})
+    ```
+    """
+
+    def __init__(self, indexed_fields: Optional[List[str]] = None, **kwargs):
+        """
+        Initializes the DocumentStore.
+
+        :param indexed_fields: Metadata fields to index, with or without the `meta.` prefix.
+        :param kwargs: Passed on to `InMemoryDocumentStore`.
+        """
+        super().__init__(**kwargs)
+        self.indexed_fields = [_normalize_field(f) for f in indexed_fields or []]
+        self._indexes: Dict[str, MetadataIndex] = {f: MetadataIndex(f) for f in self.indexed_fields}
+        # Insertion order, so that filtered results come back in the same order as a full scan.
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+        self._version = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+
+        :returns:
+            Dictionary with serialized data.
+        """
+        return default_to_dict(
+            self,
+            indexed_fields=self.indexed_fields,
+            bm25_tokenization_regex=self.bm25_tokenization_regex,
+            bm25_algorithm=self.bm25_algorithm,
+            bm25_parameters=self.bm25_parameters,
+            embedding_similarity_function=self.embedding_similarity_function,
+        )
+
+    @property
+    def version(self) -> int:
+        """
+        A counter that goes up with every write and delete that changes the stored documents, for caches of query
+        results to tell they're stale.
+        """
+        return self._version
+
+    def write_documents(self, documents: List[Document], policy: DuplicatePolicy = DuplicatePolicy.NONE) -> int:
+        """
+        Refer to the DocumentStore.write_documents() protocol documentation.
+
+        If `policy` is set to `DuplicatePolicy.NONE` defaults to `DuplicatePolicy.FAIL`.
+        """
+        try:
+            return super().write_documents(documents=documents, policy=policy)
+        finally:
+            # Index whatever made it into storage, even if a duplicate aborted the write halfway.
+            if isinstance(documents, Iterable) and not isinstance(documents, str):
+                if self._index_documents(documents):
+                    self._version += 1
+
+    def delete_documents(self, document_ids: List[str]) -> None:
+        """
+        Deletes all documents with matching document_ids from the DocumentStore.
+
+        :param document_ids: The object_ids to delete.
+        """
+        deleted = False
+        for doc_id in document_ids:
+            deleted = deleted or doc_id in self.storage
+            if self._seq.pop(doc_id, None) is not None:
+                for index in self._indexes.values():
+                    index.remove(doc_id)
+        super().delete_documents(document_ids)
+        if deleted:
+            self._version += 1
+
+    def filter_documents(self, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Returns the documents that match the filters provided.
+
+        For a detailed specification of the filters, refer to the DocumentStore.filter_documents() protocol documentation.
+
+        :param filters: The filters to apply to the document list.
+        :returns: A list of Documents that match the given filters.
+        """
+        if not filters:
+            return list(self.storage.values())
+        if "operator" not in filters and "conditions" not in filters:
+            filters = convert(filters)
+
+        documents = (self.storage[i] for i in self._candidate_ids(filters))
+        return [doc for doc in documents if document_matches_filter(filters=filters, document=doc)]
+
+    def _candidate_ids(self, filters: Dict[str, Any]) -> Iterable[str]:
+        """
+        The ids the indexes can't rule out for `filters`, in insertion order.
+        """
+        # InMemoryDocumentStore evaluates the filter on every document and raises on the first that can't be
+        # compared. The ids the indexes rule out are never evaluated, so they're only ruled out when no document
+        # can raise: then the filter gives the same results, and the same errors, as a full scan.
+        candidates = self._plan(filters) if self._cannot_raise(filters) else None
+        if candidates is None:
+            return self.storage.keys()
+        return sorted((i for i in candidates if i in self.storage), key=self._seq.__getitem__)
+
+    def _index_documents(self, documents: Iterable[Document]) -> int:
+        indexed = 0
+        for document in documents:
+            if not isinstance(document, Document) or document.id in self._seq:
+                continue
+            if not self._is_stored(document):
+                continue
+            self._seq[document.id] = self._next_seq
+            self._next_seq += 1
+            indexed += 1
+            for index in self._indexes.values():
+                index.add(document.id, document.meta)
+        return indexed
+
+    def _is_stored(self, document: Document) -> bool:
+        # False for a document a duplicate policy skipped, or one a later document with its id replaced.
+        return self.storage.get(document.id) is document
+
+    def _cannot_raise(self, filters: Dict[str, Any]) -> bool:
+        """
+        Whether `document_matches_filter` evaluates `filters` on any stored document without raising.
+        """
+        if "field" not in filters:
+            conditions = filters.get("conditions")
+            if filters.get("operator") not in LOGICAL_OPERATORS or not isinstance(conditions, list):
+                return False
+            return all(isinstance(cond, dict) and self._cannot_raise(cond) for cond in conditions)
+
+        operator, value = filters.get("operator"), filters.get("value")
+        if operator not in COMPARISON_OPERATORS or "value" not in filters:
+            return False
+        if operator in ("in", "not in"):
+            return isinstance(value, list)
+        if operator in ("==", "!="):
+            return True
+        # Ordering comparisons raise on strings that aren't ISO dates and on values that can't be ordered.
+        index = self._indexes.get(_normalize_field(filters["field"]))
+        return value is None or index is not None and index.comparable(value)
+
+    def _plan(self, filters: Dict[str, Any]) -> Optional[Set[str]]:
+        """
+        Returns a superset of the ids matching `filters`, or None if the indexes can't narrow it down.
+        """
+        if "field" in filters:
+            return self._plan_comparison(filters)
+
+        operator = filters.get("operator")
+        conditions = filters.get("conditions", [])
+        if operator == "AND":
+            narrowed = [c for c in (self._plan(cond) for cond in conditions) if c is not None]
+            if not narrowed:
+                return None
+            narrowed.sort(key=len)
+            result = set(narrowed[0])
+            for ids in narrowed[1:]:
+                if not result:
+                    break
+                result &= ids
+            return result
+        if operator == "OR":
+            result = set()
+            for cond in conditions:
+                ids = self._plan(cond)
+                if ids is None:
+                    return None
+                result |= ids
+            return result
+        return None
+
+    def _plan_comparison(self, condition: Dict[str, Any]) -> Optional[Set[str]]:
+        field, operator, value = condition["field"], condition.get("operator"), condition.get("value")
+        if field == "id":
+            if operator == "==":
+                return {value} if isinstance(value, str) else None
+            if operator == "in" and isinstance(value, list):
+                return {v for v in value if isinstance(v, str)}
+            return None
+
+        index = self._indexes.get(_normalize_field(field))
+        if index is None:
+            return None
+        if operator == "==":
+            return index.equal(value)
+        if operator == "in":
+            return index.one_of(value)
+        if operator in (">", ">=", "<", "<="):
+            return index.range(operator, value)
+        return None
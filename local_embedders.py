@@ -0,0 +1,422 @@
+# Offline CPU embedders: sentence-transformers or ONNX Runtime (optionally int8) behind a dynamic micro-batcher.
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Literal, Optional, Tuple
+
+import numpy as np
+
+from haystack import Document, component, default_from_dict, default_to_dict
+from haystack.lazy_imports import LazyImport
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+# The model libraries are imported when a backend is first loaded, not with this module: sentence-transformers,
+# onnxruntime and transformers take seconds to import, which every lesson would pay even without using them.
+def _import_sentence_transformers():
+    with LazyImport(message="Run 'pip install \"sentence-transformers>=3.0.0\"'") as sentence_transformers_import:
+        from sentence_transformers import SentenceTransformer
+    sentence_transformers_import.check()
+    return SentenceTransformer
+
+
+def _import_onnx():
+    with LazyImport(message="Run 'pip install onnxruntime transformers'") as onnx_import:
+        import onnxruntime
+        from transformers import AutoTokenizer
+    onnx_import.check()
+    return onnxruntime, AutoTokenizer
+
+
+def export_onnx(model: str = DEFAULT_MODEL, output_dir: str = "onnx_models", quantize: bool = False) -> str:
+    """
+    Exports a sentence-transformers model to ONNX, optionally with dynamic int8 quantization.
+
+    The exported graph returns the token embeddings; pooling and normalization happen at inference time.
+
+    :param model: Local path or ID of the model on HuggingFace Hub.
+    :param output_dir: Directory to write `model.onnx` (and `model.int8.onnx`) and the tokenizer files to.
+    :param quantize: Whether to also write a dynamically quantized int8 copy of the model.
+    :returns: Path of the ONNX file to load.
+    """
+    _, AutoTokenizer = _import_onnx()
+    import torch
+    from transformers import AutoModel
+
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, "model.onnx")
+    if not os.path.exists(path):
+        tokenizer = AutoTokenizer.from_pretrained(model)
+        hf_model = AutoModel.from_pretrained(model).eval()
+        dummy = tokenizer(["Haystack is an open source AI framework"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in dummy]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+        with torch.no_grad():
+            torch.onnx.export(
+                hf_model,
+                tuple(dummy[name] for name in input_names),
+                path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14,
+            )
+        tokenizer.save_pretrained(output_dir)
+
+    if not quantize:
+        return path
+    quantized_path = os.path.join(output_dir, "model.int8.onnx")
+    if not os.path.exists(quantized_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+class _TorchBackend:
+    def __init__(self, model: str, num_threads: Optional[int]):
+        SentenceTransformer = _import_sentence_transformers()
+        if num_threads:
+            import torch
+
+            torch.set_num_threads(num_threads)
+        self.model = SentenceTransformer(model, device="cpu")
+
+    def embed(self, texts: List[str], batch_size: int, normalize: bool) -> np.ndarray:
+        return self.model.encode(
+            texts, batch_size=batch_size, normalize_embeddings=normalize, convert_to_numpy=True, show_progress_bar=False
+        )
+
+
+class _OnnxBackend:
+    def __init__(self, model: str, num_threads: Optional[int], quantize: bool, onnx_dir: Optional[str]):
+        onnxruntime, AutoTokenizer = _import_onnx()
+        onnx_dir = onnx_dir or os.path.join("onnx_models", model.replace("/", "__"))
+        path = export_onnx(model, onnx_dir, quantize=quantize)
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+
+    def embed(self, texts: List[str], batch_size: int, normalize: bool) -> np.ndarray:
+        # Sort by length so each batch pads to a similar size.
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out: List[np.ndarray] = [None] * len(texts)  # type: ignore
+        for start in range(0, len(order), batch_size):
+            idx = order[start : start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in idx], padding=True, truncation=True, max_length=256, return_tensors="np"
+            )
+            feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+            token_embeddings = self.session.run(None, feeds)[0]
+            # Mean pooling over non-padding tokens, as in the sentence-transformers pooling layer.
+            mask = encoded["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for i, vector in zip(idx, pooled):
+                out[i] = vector
+        return np.stack(out) if out else np.zeros((0, 0), dtype=np.float32)
+
+
+_BACKENDS: Dict[Tuple, Any] = {}
+_BACKENDS_LOCK = threading.Lock()
+
+
+def _get_backend(model: str, backend: str, quantize: bool, onnx_dir: Optional[str], num_threads: Optional[int]):
+    # Text and document embedders with the same settings share one loaded model per process.
+    key = (model, backend, quantize, onnx_dir, num_threads)
+    with _BACKENDS_LOCK:
+        if key not in _BACKENDS:
+            if backend == "onnx":
+                _BACKENDS[key] = _OnnxBackend(model, num_threads, quantize, onnx_dir)
+            elif backend == "torch":
+                _BACKENDS[key] = _TorchBackend(model, num_threads)
+            else:
+                raise ValueError(f"Unknown backend '{backend}'. Use 'torch' or 'onnx'.")
+        return _BACKENDS[key]
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into one batched call.
+
+    The first request opens a batch; the batch is flushed when it reaches `max_batch_size` items or
+    `max_wait_ms` after it was opened, whichever comes first.
+    """
+
+    def __init__(self, fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.items = 0
+        self._queue: "queue.Queue[Optional[Tuple[Any, Future]]]" = queue.Queue()
+        self._worker = threading.Thread(target=self._loop, name="embedding-microbatcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item: Any) -> Future:
+        future: Future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    nxt = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._queue.put(None)
+                    break
+                batch.append(nxt)
+
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                results = self.fn([item for item, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as error:
+                for _, future in batch:
+                    future.set_exception(error)
+
+
+@component
+class LocalTextEmbedder:
+    """
+    Embeds a string on the local CPU. Drop-in for `OpenAITextEmbedder` / `CohereTextEmbedder`.
+
+    Concurrent `run()` calls, e.g. from several request threads, are coalesced by a `MicroBatcher`
+    into a single forward pass.
+
+    Usage example:
+    ```python
+    query_embedder = LocalTextEmbedder(backend="onnx", quantize=True)
+    query_embedder.warm_up()
+    query_embedder.run(text="How old was Davinci when he died?")
+    ```
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        backend: Literal["torch", "onnx"] = "torch",
+        quantize: bool = False,
+        onnx_dir: Optional[str] = None,
+        num_threads: Optional[int] = None,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        prefix: str = "",
+        suffix: str = "",
+        normalize_embeddings: bool = True,
+    ):
+        """
+        Creates a LocalTextEmbedder component.
+
+        :param model: Local path or ID of the sentence-transformers model on HuggingFace Hub.
+        :param backend: `"torch"` runs sentence-transformers, `"onnx"` runs an exported graph with ONNX Runtime.
+        :param quantize: With the ONNX backend, use a dynamically quantized int8 model.
+        :param onnx_dir: Where the exported ONNX model is cached.
+        :param num_threads: Intra-op CPU threads. Defaults to the runtime's choice.
+        :param max_batch_size: Maximum number of queries coalesced into one forward pass.
+        :param max_wait_ms: How long the first query of a batch waits for others to join it.
+        :param prefix: A string to add at the beginning of each text.
+        :param suffix: A string to add at the end of each text.
+        :param normalize_embeddings: If True returned vectors will have length 1.
+        """
+        self.model = model
+        self.backend = backend
+        self.quantize = quantize
+        self.onnx_dir = onnx_dir
+        self.num_threads = num_threads
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.prefix = prefix
+        self.suffix = suffix
+        self.normalize_embeddings = normalize_embeddings
+        self._batcher: Optional[MicroBatcher] = None
+        self._warm_up_lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            model=self.model,
+            backend=self.backend,
+            quantize=self.quantize,
+            onnx_dir=self.onnx_dir,
+            num_threads=self.num_threads,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.max_wait_ms,
+            prefix=self.prefix,
+            suffix=self.suffix,
+            normalize_embeddings=self.normalize_embeddings,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LocalTextEmbedder":
+        """
+        Deserializes the component from a dictionary.
+        """
+        return default_from_dict(cls, data)
+
+    def warm_up(self):
+        """
+        Loads the model and starts the micro-batcher.
+        """
+        # Locked: the first queries can come from several threads at once, and each would start its own batcher.
+        with self._warm_up_lock:
+            if self._batcher is None:
+                backend = _get_backend(self.model, self.backend, self.quantize, self.onnx_dir, self.num_threads)
+                self._batcher = MicroBatcher(
+                    lambda texts: list(backend.embed(texts, len(texts), self.normalize_embeddings)),
+                    max_batch_size=self.max_batch_size,
+                    max_wait_ms=self.max_wait_ms,
+                )
+
+    @component.output_types(embedding=List[float], meta=Dict[str, Any])
+    def run(self, text: str):
+        """
+        Embeds a single string.
+
+        :param text: Text to embed.
+        :returns: A dictionary with the `embedding` and `meta` about the model used.
+        """
+        if not isinstance(text, str):
+            raise TypeError(
+                "LocalTextEmbedder expects a string as input. "
+                "In case you want to embed a list of Documents, please use the LocalDocumentEmbedder."
+            )
+        if self._batcher is None:
+            self.warm_up()
+        embedding = self._batcher.submit(self.prefix + text + self.suffix).result()  # type: ignore[union-attr]
+        return {"embedding": embedding.tolist(), "meta": {"model": self.model, "backend": self.backend}}
+
+
+@component
+class LocalDocumentEmbedder:
+    """
+    Embeds Documents on the local CPU. Drop-in for `OpenAIDocumentEmbedder` / `CohereDocumentEmbedder`.
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        backend: Literal["torch", "onnx"] = "torch",
+        quantize: bool = False,
+        onnx_dir: Optional[str] = None,
+        num_threads: Optional[int] = None,
+        batch_size: int = 32,
+        prefix: str = "",
+        suffix: str = "",
+        meta_fields_to_embed: Optional[List[str]] = None,
+        embedding_separator: str = "\n",
+        normalize_embeddings: bool = True,
+    ):
+        """
+        Creates a LocalDocumentEmbedder component.
+
+        :param model: Local path or ID of the sentence-transformers model on HuggingFace Hub.
+        :param backend: `"torch"` runs sentence-transformers, `"onnx"` runs an exported graph with ONNX Runtime.
+        :param quantize: With the ONNX backend, use a dynamically quantized int8 model.
+        :param onnx_dir: Where the exported ONNX model is cached.
+        :param num_threads: Intra-op CPU threads. Defaults to the runtime's choice.
+        :param batch_size: Number of Documents to encode at once.
+        :param prefix: A string to add at the beginning of each Document text.
+        :param suffix: A string to add at the end of each Document text.
+        :param meta_fields_to_embed: List of meta fields that should be embedded along with the Document text.
+        :param embedding_separator: Separator used to concatenate the meta fields to the Document text.
+        :param normalize_embeddings: If True returned vectors will have length 1.
+        """
+        self.model = model
+        self.backend = backend
+        self.quantize = quantize
+        self.onnx_dir = onnx_dir
+        self.num_threads = num_threads
+        self.batch_size = batch_size
+        self.prefix = prefix
+        self.suffix = suffix
+        self.meta_fields_to_embed = meta_fields_to_embed or []
+        self.embedding_separator = embedding_separator
+        self.normalize_embeddings = normalize_embeddings
+        self._backend: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            model=self.model,
+            backend=self.backend,
+            quantize=self.quantize,
+            onnx_dir=self.onnx_dir,
+            num_threads=self.num_threads,
+            batch_size=self.batch_size,
+            prefix=self.prefix,
+            suffix=self.suffix,
+            meta_fields_to_embed=self.meta_fields_to_embed,
+            embedding_separator=self.embedding_separator,
+            normalize_embeddings=self.normalize_embeddings,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LocalDocumentEmbedder":
+        """
+        Deserializes the component from a dictionary.
+        """
+        return default_from_dict(cls, data)
+
+    def warm_up(self):
+        """
+        Loads the model.
+        """
+        if self._backend is None:
+            self._backend = _get_backend(self.model, self.backend, self.quantize, self.onnx_dir, self.num_threads)
+
+    @component.output_types(documents=List[Document], meta=Dict[str, Any])
+    def run(self, documents: List[Document]):
+        """
+        Embeds a list of Documents.
+
+        :param documents: Documents to embed.
+        :returns: A dictionary with the embedded `documents` and `meta` about the model used.
+        """
+        if not isinstance(documents, list) or documents and not isinstance(documents[0], Document):
+            raise TypeError(
+                "LocalDocumentEmbedder expects a list of Documents as input."
+                "In case you want to embed a string, please use the LocalTextEmbedder."
+            )
+        if self._backend is None:
+            self.warm_up()
+
+        texts = []
+        for doc in documents:
+            meta_values = [str(doc.meta[key]) for key in self.meta_fields_to_embed if doc.meta.get(key) is not None]
+            texts.append(self.prefix + self.embedding_separator.join(meta_values + [doc.content or ""]) + self.suffix)
+
+        embeddings = self._backend.embed(texts, self.batch_size, self.normalize_embeddings) if texts else []
+        for doc, embedding in zip(documents, embeddings):
+            doc.embedding = embedding.tolist()
+        return {"documents": documents, "meta": {"model": self.model, "backend": self.backend}}
@@ -0,0 +1,214 @@
+# Per-cycle budgets for pipelines with loops: iterations, wall-clock deadline and LLM tokens.
+
+import copy
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+import networkx as nx
+from haystack import Pipeline
+from haystack.core.errors import PipelineMaxLoops
+from haystack.dataclasses import ChatMessage
+
+
+@dataclass
+class LoopBudget:
+    """
+    Limits for one run of a cyclic pipeline. None means no limit.
+
+    :param max_iterations: Times the loop may start, counting the first pass.
+    :param deadline: Seconds the run may take.
+    :param max_tokens: LLM tokens (prompt + completion) the run may use, as reported in the generators' `usage`.
+    """
+
+    max_iterations: Optional[int] = None
+    deadline: Optional[float] = None
+    max_tokens: Optional[int] = None
+
+
+@dataclass
+class Iteration:
+    """
+    Timing of one pass through the loop.
+    """
+
+    index: int
+    seconds: float = 0.0
+    tokens: int = 0
+    components: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class LoopRun:
+    """
+    The result of `run_with_budget`.
+
+    :param outputs: The pipeline outputs if the run finished, else an empty dictionary.
+    :param completed: Whether the run finished within the budget.
+    :param stopped_by: "max_iterations", "deadline", "max_tokens" or "max_loops" if the run was stopped.
+    :param partial: The last value of `partial_output`, the best answer the loop had got to.
+    :param iterations: Timing and token use of each pass through the loop.
+    """
+
+    outputs: Dict[str, Any]
+    completed: bool
+    stopped_by: Optional[str]
+    partial: Any
+    iterations: List[Iteration]
+
+    @property
+    def seconds(self) -> float:
+        return sum(iteration.seconds for iteration in self.iterations)
+
+    @property
+    def tokens(self) -> int:
+        return sum(iteration.tokens for iteration in self.iterations)
+
+
+class _BudgetExceeded(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _tokens_used(result: Dict[str, Any]) -> int:
+    # OpenAIGenerator reports usage in `meta`, OpenAIChatGenerator in each reply's meta.
+    tokens = 0
+    for value in result.values():
+        if not isinstance(value, list):
+            continue
+        for item in value:
+            meta = item.meta if isinstance(item, ChatMessage) else item if isinstance(item, dict) else None
+            if meta:
+                tokens += (meta.get("usage") or {}).get("total_tokens", 0) or 0
+    return tokens
+
+
+def _loop_components(pipeline: Pipeline) -> Set[str]:
+    return {name for cycle in nx.simple_cycles(pipeline.graph) for name in cycle}
+
+
+class _BudgetedComponent:
+    """
+    A component with its `run` replaced, for one budgeted run. Everything else is the component's own.
+    """
+
+    def __init__(self, instance: Any, run: Any):
+        self._instance = instance
+        self.run = run
+
+    @property  # type: ignore[misc]
+    def __class__(self):
+        # Pipeline.run reports the component's type in its traces.
+        return type(self._instance)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._instance, name)
+
+
+def _with_runs(pipeline: Pipeline, wrap: Any) -> Pipeline:
+    # A copy of the pipeline over a copy of its graph, so the components and the caller's pipeline are left as
+    # they are: runs in other threads, of this pipeline or of others sharing its components, aren't budgeted.
+    budgeted = copy.copy(pipeline)
+    budgeted.graph = pipeline.graph.copy()
+    for name, node in budgeted.graph.nodes(data=True):
+        node["instance"] = _BudgetedComponent(node["instance"], wrap(name, node["instance"].run))
+    return budgeted
+
+
+def run_with_budget(
+    pipeline: Pipeline,
+    data: Dict[str, Any],
+    budget: LoopBudget,
+    partial_output: str,
+    loop_start: Optional[str] = None,
+    include_outputs_from: Optional[Set[str]] = None,
+) -> LoopRun:
+    """
+    Runs a cyclic pipeline, stopping it cleanly when a pass through its loop would exceed `budget`.
+
+    The budget is checked before each component of the loop runs, so a run is stopped between components,
+    never in the middle of an LLM call, and no call is made once the budget is spent. A new pass through the
+    loop only starts if it would fit in what is left of the deadline and token budget, assuming it costs as
+    much as the previous pass. A stopped run returns
+    the last value of `partial_output` (`component.output`), such as the latest draft of a self-reflecting
+    agent. The pipeline's own `max_loops_allowed` still applies; hitting it counts as being stopped too.
+    Neither the pipeline nor its components are changed, so other threads can run them at the same time, with
+    a budget of their own or without one.
+
+    Usage example:
+    ```python
+    run = run_with_budget(
+        self_reflecting_agent,
+        {"prompt_builder": {"text": text}},
+        LoopBudget(max_iterations=3, deadline=30, max_tokens=4000),
+        partial_output="llm.replies",
+    )
+    entities = run.outputs["entities_validator"]["entities"] if run.completed else run.partial[0]
+    ```
+
+    :param pipeline: A pipeline with a loop.
+    :param data: The pipeline inputs, as for `Pipeline.run`.
+    :param budget: The limits for this run.
+    :param partial_output: The `component.output` to keep the latest value of.
+    :param loop_start: The component that starts each pass through the loop. Defaults to the first
+        component of the loop that was added to the pipeline.
+    :param include_outputs_from: As for `Pipeline.run`.
+    :raises ValueError: If the pipeline has no loop or `partial_output` isn't an output of the pipeline.
+    """
+    in_loop = _loop_components(pipeline)
+    if not in_loop:
+        raise ValueError("The pipeline has no loop; use Pipeline.run.")
+    partial_component, partial_name = partial_output.split(".", 1)
+    if partial_name not in pipeline.get_component(partial_component).__haystack_output__._sockets_dict:  # type: ignore
+        raise ValueError(f"{partial_output} is not an output of the pipeline.")
+    if loop_start is None:
+        loop_start = next(name for name in pipeline.graph.nodes if name in in_loop)
+
+    started = time.monotonic()
+    iterations: List[Iteration] = []
+    state: Dict[str, Any] = {"partial": None, "tokens": 0}
+
+    def check(name: str):
+        elapsed = time.monotonic() - started
+        if name == loop_start:
+            if budget.max_iterations is not None and len(iterations) >= budget.max_iterations:
+                raise _BudgetExceeded("max_iterations")
+            # Don't start a pass that would overrun if it cost as much as the previous one.
+            last = iterations[-1] if iterations else Iteration(index=-1)
+            if budget.deadline is not None and elapsed + last.seconds > budget.deadline:
+                raise _BudgetExceeded("deadline")
+            if budget.max_tokens is not None and state["tokens"] + last.tokens > budget.max_tokens:
+                raise _BudgetExceeded("max_tokens")
+            iterations.append(Iteration(index=len(iterations)))
+        if budget.deadline is not None and elapsed >= budget.deadline:
+            raise _BudgetExceeded("deadline")
+        if budget.max_tokens is not None and state["tokens"] >= budget.max_tokens:
+            raise _BudgetExceeded("max_tokens")
+
+    def wrap(name: str, run):
+        def budgeted_run(**kwargs):
+            if name in in_loop:
+                check(name)
+            component_started = time.monotonic()
+            result = run(**kwargs)
+            elapsed = time.monotonic() - component_started
+            tokens = _tokens_used(result) if isinstance(result, dict) else 0
+            state["tokens"] += tokens
+            if iterations:
+                iterations[-1].components[name] = iterations[-1].components.get(name, 0.0) + elapsed
+                iterations[-1].seconds += elapsed
+                iterations[-1].tokens += tokens
+            if name == partial_component and isinstance(result, dict) and partial_name in result:
+                state["partial"] = result[partial_name]
+            return result
+
+        return budgeted_run
+
+    try:
+        outputs = _with_runs(pipeline, wrap).run(data, include_outputs_from=include_outputs_from)
+        return LoopRun(outputs, True, None, state["partial"], iterations)
+    except _BudgetExceeded as exceeded:
+        return LoopRun({}, False, exceeded.reason, state["partial"], iterations)
+    except PipelineMaxLoops:
+        return LoopRun({}, False, "max_loops", state["partial"], iterations)
@@ -0,0 +1,127 @@
+# Runs the tool calls of one assistant turn concurrently.
+
+import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional
+
+from haystack import component, default_from_dict, default_to_dict
+from haystack.dataclasses import ChatMessage
+from haystack.utils import deserialize_callable, serialize_callable
+
+_FUNCTION_NAME_FAILURE = (
+    "I'm sorry, I tried to run a function that did not exist. Would you like me to correct it and try again?"
+)
+_FUNCTION_RUN_FAILURE = "Seems there was an error while running the function: {error}"
+_FUNCTION_TIMEOUT = "The function {name} did not answer within {timeout} seconds."
+
+
+@component
+class ParallelFunctionCaller:
+    """
+    A drop-in for `OpenAIFunctionCaller` that runs all tool calls of an assistant turn at the same time.
+
+    Each call runs in a thread pool with its own timeout, so a turn takes as long as its slowest tool
+    instead of the sum of all of them. Function replies keep the order of the `tool_calls`, so they line up
+    with the tool call ids. A call that times out is answered with an assistant message saying so; its
+    thread is left to finish in the background, since Python threads can't be cancelled.
+
+    The functions may run at the same time, so they must be thread-safe. A Haystack `Pipeline` is not: it keeps
+    per-run state on its graph, so a function that runs a pipeline should use one pipeline per thread.
+    """
+
+    def __init__(
+        self,
+        available_functions: Dict[str, Callable],
+        max_workers: int = 8,
+        timeout: Optional[float] = 30.0,
+        timeouts: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Initialize the ParallelFunctionCaller component.
+
+        :param available_functions:
+            A dictionary of available functions, e.g. `{"weather_function": weather_function}`.
+        :param max_workers: Maximum number of tool calls running at once.
+        :param timeout: Seconds to wait for a tool call, or None to wait forever.
+        :param timeouts: Per-function overrides of `timeout`, by function name.
+        """
+        self.available_functions = available_functions
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.timeouts = timeouts or {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            available_functions={name: serialize_callable(fn) for name, fn in self.available_functions.items()},
+            max_workers=self.max_workers,
+            timeout=self.timeout,
+            timeouts=self.timeouts,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ParallelFunctionCaller":
+        """
+        Deserializes the component from a dictionary.
+        """
+        paths = data["init_parameters"]["available_functions"]
+        data["init_parameters"]["available_functions"] = {name: deserialize_callable(p) for name, p in paths.items()}
+        return default_from_dict(cls, data)
+
+    def warm_up(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool-call")
+
+    @component.output_types(function_replies=List[ChatMessage], assistant_replies=List[ChatMessage])
+    def run(self, messages: List[ChatMessage]):
+        """
+        Evaluates `messages` and invokes available functions concurrently if the messages contain tool_calls.
+
+        :param messages: A list of messages generated from the `OpenAIChatGenerator`
+        :returns: This component returns a list of messages in one of two outputs
+            - `function_replies`: The messages followed by one reply per tool call, in tool call order.
+            - `assistant_replies`: The messages, if there were no tool_calls in them.
+        """
+        if messages[0].meta["finish_reason"] != "tool_calls":
+            return {"assistant_replies": messages}
+        if self._executor is None:
+            self.warm_up()
+
+        function_calls = json.loads(messages[0].content)
+        started = time.monotonic()
+        pending = [(call["function"]["name"], self._submit(call)) for call in function_calls]
+        for name, future in pending:
+            messages.append(self._reply(name, future, started))
+        return {"function_replies": messages}
+
+    def _submit(self, function_call: Dict[str, Any]) -> Optional[Future]:
+        function = self.available_functions.get(function_call["function"]["name"])
+        if function is None:
+            return None
+        try:
+            arguments = json.loads(function_call["function"]["arguments"])
+        except json.JSONDecodeError as error:
+            future: Future = Future()
+            future.set_exception(error)
+            return future
+        return self._executor.submit(function, **arguments)  # type: ignore[union-attr]
+
+    def _reply(self, name: str, future: Optional[Future], started: float) -> ChatMessage:
+        if future is None:
+            return ChatMessage.from_assistant(_FUNCTION_NAME_FAILURE)
+        timeout = self.timeouts.get(name, self.timeout)
+        remaining = None if timeout is None else max(0.0, started + timeout - time.monotonic())
+        try:
+            response = future.result(timeout=remaining)
+        except FutureTimeoutError:
+            future.cancel()
+            return ChatMessage.from_assistant(_FUNCTION_TIMEOUT.format(name=name, timeout=timeout))
+        except Exception as error:
+            return ChatMessage.from_assistant(_FUNCTION_RUN_FAILURE.format(error=error))
+        return ChatMessage.from_function(content=json.dumps(response), name=name)
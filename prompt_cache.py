@@ -0,0 +1,303 @@
+# PromptBuilder with a process-wide cache of compiled templates and a fast path for simple templates.
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
+
+from haystack import component, default_to_dict
+from jinja2 import Environment, meta, nodes
+
+_ENVIRONMENT = Environment()
+_UNDEFINED = object()
+
+Renderer = Callable[[Dict[str, Any], List[str]], None]
+
+
+class _Fallback(Exception):
+    """
+    Raised by the fast path when Jinja would behave in a way it doesn't replicate.
+    """
+
+
+class CompiledTemplate:
+    """
+    A template parsed and compiled once, with its variables resolved at compile time.
+
+    Templates made only of text, `{{ variable }}` substitutions (with `.attr` and `['key']` lookups) and
+    `{% for %}` loops are rendered by a small closure-based renderer instead of going through Jinja. Anything
+    else (filters, `if`, `set`, `loop.*`, ...) is rendered by Jinja.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        ast = _ENVIRONMENT.parse(source)
+        self.variables: FrozenSet[str] = frozenset(meta.find_undeclared_variables(ast))
+        self.jinja = _ENVIRONMENT.from_string(source)
+        self.fast: Optional[Renderer] = _compile_body(ast.body)
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        if self.fast is not None:
+            out: List[str] = []
+            try:
+                self.fast(dict(variables), out)
+                return "".join(out)
+            except _Fallback:
+                pass
+        return self.jinja.render(variables)
+
+
+_CACHE: "OrderedDict[str, CompiledTemplate]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_CACHE_SIZE = 1024
+
+
+def get_compiled_template(source: str) -> CompiledTemplate:
+    """
+    Returns the process-wide compiled template for `source`, compiling it on first use.
+    """
+    key = hashlib.sha256(source.encode()).hexdigest()
+    with _CACHE_LOCK:
+        compiled = _CACHE.get(key)
+        if compiled is not None:
+            _CACHE.move_to_end(key)
+            return compiled
+    compiled = CompiledTemplate(source)
+    with _CACHE_LOCK:
+        _CACHE[key] = compiled
+        while len(_CACHE) > _CACHE_SIZE:
+            _CACHE.popitem(last=False)
+    return compiled
+
+
+def _compile_body(body: List[nodes.Node]) -> Optional[Renderer]:
+    parts = []
+    for node in body:
+        part = _compile_statement(node)
+        if part is None:
+            return None
+        parts.append(part)
+
+    def render(scope: Dict[str, Any], out: List[str]):
+        for part in parts:
+            part(scope, out)
+
+    return render
+
+
+def _compile_statement(node: nodes.Node) -> Optional[Renderer]:
+    if isinstance(node, nodes.Output):
+        return _compile_output(node)
+    if isinstance(node, nodes.For):
+        return _compile_for(node)
+    return None
+
+
+def _compile_output(node: nodes.Output) -> Optional[Renderer]:
+    parts = []
+    for child in node.nodes:
+        if isinstance(child, nodes.TemplateData):
+            parts.append(child.data)
+            continue
+        getter = _compile_expr(child)
+        if getter is None:
+            return None
+        parts.append(getter)
+
+    def render(scope: Dict[str, Any], out: List[str]):
+        for part in parts:
+            if part.__class__ is str:
+                out.append(part)
+                continue
+            value = part(scope)
+            if value is not _UNDEFINED:
+                out.append(value if value.__class__ is str else str(value))
+
+    return render
+
+
+def _compile_for(node: nodes.For) -> Optional[Renderer]:
+    if node.else_ or node.test is not None or node.recursive or not isinstance(node.target, nodes.Name):
+        return None
+    # `loop.index` and friends need Jinja's LoopContext.
+    if any(name.name == "loop" for name in node.find_all(nodes.Name)):
+        return None
+    iterable = _compile_expr(node.iter)
+    body = _compile_body(node.body)
+    if iterable is None or body is None:
+        return None
+    target = node.target.name
+
+    def render(scope: Dict[str, Any], out: List[str]):
+        items = iterable(scope)
+        if items is _UNDEFINED:
+            return
+        try:
+            iterator = iter(items)
+        except TypeError as error:
+            raise _Fallback() from error
+        previous = scope.get(target, _UNDEFINED)
+        for item in iterator:
+            scope[target] = item
+            body(scope, out)
+        if previous is _UNDEFINED:
+            scope.pop(target, None)
+        else:
+            scope[target] = previous
+
+    return render
+
+
+def _compile_expr(node: nodes.Node) -> Optional[Callable[[Dict[str, Any]], Any]]:
+    if isinstance(node, nodes.Const):
+        value = node.value
+        return lambda scope: value
+
+    if isinstance(node, nodes.Name) and node.ctx == "load":
+        name = node.name
+        default = _ENVIRONMENT.globals.get(name, _UNDEFINED)
+        return lambda scope: scope.get(name, default)
+
+    if isinstance(node, nodes.Getattr):
+        obj_getter = _compile_expr(node.node)
+        if obj_getter is None:
+            return None
+        attr = node.attr
+
+        def get_attr(scope: Dict[str, Any]) -> Any:
+            # Same lookup order as jinja2.Environment.getattr.
+            obj = obj_getter(scope)
+            if obj is _UNDEFINED:
+                raise _Fallback()
+            try:
+                return getattr(obj, attr)
+            except AttributeError:
+                pass
+            try:
+                return obj[attr]
+            except (TypeError, LookupError, AttributeError):
+                return _UNDEFINED
+
+        return get_attr
+
+    if isinstance(node, nodes.Getitem) and isinstance(node.arg, nodes.Const) and node.ctx == "load":
+        obj_getter = _compile_expr(node.node)
+        if obj_getter is None:
+            return None
+        key = node.arg.value
+
+        def get_item(scope: Dict[str, Any]) -> Any:
+            # Same lookup order as jinja2.Environment.getitem.
+            obj = obj_getter(scope)
+            if obj is _UNDEFINED:
+                raise _Fallback()
+            try:
+                return obj[key]
+            except (AttributeError, TypeError, LookupError):
+                if isinstance(key, str):
+                    try:
+                        return getattr(obj, key)
+                    except AttributeError:
+                        pass
+                return _UNDEFINED
+
+        return get_item
+
+    return None
+
+
+@component
+class CachedPromptBuilder:
+    """
+    Drop-in replacement for `PromptBuilder` that shares compiled templates across the process.
+
+    Templates are compiled once per process and keyed by their hash, so rebuilding a pipeline or rendering
+    the same template in a loop doesn't re-parse it. The template variables are worked out at compile time
+    and the required-variable check is a set difference per render. With `strict=True` every variable used
+    in the template is required.
+
+    Usage example:
+    ```python
+    prompt_builder = CachedPromptBuilder(template="Question: {{ query }}")
+    prompt_builder.run(query="Who lives in Paris?")
+    ```
+    """
+
+    def __init__(
+        self,
+        template: str,
+        required_variables: Optional[List[str]] = None,
+        variables: Optional[List[str]] = None,
+        strict: bool = False,
+    ):
+        """
+        Constructs a CachedPromptBuilder component.
+
+        :param template:
+            A Jinja2 template string that is used to render the prompt.
+        :param required_variables: An optional list of input variables that must be provided at runtime.
+            If a required variable is not provided at runtime, an exception will be raised.
+        :param variables:
+            An optional list of input variables to be used in prompt templates instead of the ones inferred from `template`.
+        :param strict: Require every variable the template uses, as with Jinja's StrictUndefined.
+        """
+        self._template_string = template
+        self._variables = variables
+        self._required_variables = required_variables
+        self.strict = strict
+        self.template = get_compiled_template(template)
+
+        variables = variables or sorted(self.template.variables)
+        self.required_variables = set(required_variables or [])
+        if strict:
+            self.required_variables |= self.template.variables
+
+        component.set_input_types(self, template=Optional[str], template_variables=Optional[Dict[str, Any]])
+        for var in variables:
+            if var in self.required_variables:
+                component.set_input_type(self, var, Any)
+            else:
+                component.set_input_type(self, var, Any, "")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns a dictionary representation of the component.
+        """
+        return default_to_dict(
+            self,
+            template=self._template_string,
+            variables=self._variables,
+            required_variables=self._required_variables,
+            strict=self.strict,
+        )
+
+    @component.output_types(prompt=str)
+    def run(self, template: Optional[str] = None, template_variables: Optional[Dict[str, Any]] = None, **kwargs):
+        """
+        Renders the prompt template with the provided variables.
+
+        :param template:
+            An optional string template to overwrite the default template.
+        :param template_variables:
+            An optional dictionary of template variables to overwrite the pipeline variables.
+        :param kwargs:
+            Pipeline variables used for rendering the prompt.
+        :returns: A dictionary with the following keys:
+            - `prompt`: The updated prompt text after rendering the prompt template.
+        :raises ValueError:
+            If any of the required template variables is not provided.
+        """
+        variables = {**kwargs, **(template_variables or {})}
+        compiled = self.template if template is None else get_compiled_template(template)
+        required = self.required_variables | compiled.variables if self.strict else self.required_variables
+        self._validate_variables(required, set(variables))
+        return {"prompt": compiled.render(variables)}
+
+    @staticmethod
+    def _validate_variables(required: Set[str], provided: Set[str]):
+        missing = required - provided
+        if missing:
+            raise ValueError(
+                f"Missing required input variables in CachedPromptBuilder: {', '.join(sorted(missing))}. "
+                f"Required variables: {sorted(required)}. Provided variables: {provided}."
+            )
@@ -0,0 +1,324 @@
+# Query expansion for embedding retrieval. An LLM rewrites the question several ways (multi-query) or writes a
+# passage that would answer it (HyDE, Hypothetical Document Embeddings). The variants are embedded in one call,
+# retrieved concurrently and merged with reciprocal rank fusion.
+
+import inspect
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from haystack import Document, component, default_from_dict, default_to_dict, logging
+from haystack.core.serialization import component_to_dict
+from haystack.utils import deserialize_callable
+
+from coalescing_cache import CoalescingCache
+from embedding_cache import normalize_text
+from helper import deserialize_component
+
+logger = logging.getLogger(__name__)
+
+MULTI_QUERY_PROMPT = """
+Write {num_queries} different search queries that would find the passages answering the question below.
+Spell out names and dates in full and fix misspellings. Write one query per line, with no numbering.
+
+Question: {query}
+"""
+
+HYDE_PROMPT = """
+Write a short passage, of two or three sentences, from an encyclopedia article that answers the question below.
+If you don't know the answer, write the passage the way the article would.
+
+Question: {query}
+"""
+
+PROMPTS = {"multi_query": MULTI_QUERY_PROMPT, "hyde": HYDE_PROMPT}
+
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60, top_k: Optional[int] = None) -> List[Document]:
+    """
+    Merges several rankings of documents into one: a document scores `1 / (k + rank)` in each ranking it's in.
+
+    Only ranks count, not scores, so rankings whose scores aren't comparable merge as well.
+
+    :param rankings: The rankings, best first. The first ranking wins ties.
+    :param k: Damps the weight of the first ranks; 60 is the value from the original paper.
+    :param top_k: The maximum number of documents to return.
+    :returns: The documents, best first, with the fused score as `score`.
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(doc.id, doc)
+    # sorted() is stable, so ties keep the order in which the documents first came up.
+    best = sorted(scores, key=scores.__getitem__, reverse=True)[:top_k]
+    return [replace(documents[doc_id], score=scores[doc_id]) for doc_id in best]
+
+
+@component
+class QueryExpander:
+    """
+    Turns a query into the list of queries to retrieve with: the query itself, then the variants a generator
+    writes for it.
+
+    With `mode="multi_query"` the generator writes `num_queries` reformulations. With `mode="hyde"` it writes a
+    hypothetical answer passage, which lies closer to the chunks that answer the question than the question
+    does. Expansions are cached by query. The generator call is the only slow part of the expansion, so it
+    gets `latency_budget` seconds. A query whose expansion takes longer is retrieved alone. Its expansion
+    keeps running in the background and lands in the cache for the next time the query is asked.
+
+    Usage example:
+    ```python
+    expander = QueryExpander(OpenAIGenerator(), mode="hyde", latency_budget=1.5)
+    document_search.add_component("expander", expander)
+    document_search.connect("expander.queries", "retriever.queries")
+    ```
+    """
+
+    def __init__(
+        self,
+        generator: Any,
+        mode: str = "multi_query",
+        num_queries: int = 3,
+        latency_budget: Optional[float] = 2.0,
+        cache_size: int = 1024,
+        prompt: Optional[str] = None,
+        max_workers: int = 4,
+    ):
+        """
+        :param generator: A text generator taking a `prompt`, e.g. `OpenAIGenerator` or `AsyncOpenAIGenerator`.
+        :param mode: "multi_query" for reformulations of the query, "hyde" for a hypothetical answer.
+        :param num_queries: Maximum number of variants added to the query.
+        :param latency_budget: Seconds to wait for the generator before going on with the query alone, or None
+            to always wait.
+        :param cache_size: Number of expanded queries kept in memory.
+        :param prompt: A template with `{query}` and `{num_queries}` placeholders, replacing the default for `mode`.
+        :param max_workers: Maximum number of expansions running at once.
+        """
+        if mode not in PROMPTS:
+            raise ValueError(f"mode must be one of {sorted(PROMPTS)}. Currently, mode is {mode!r}")
+        self.generator = generator
+        self.mode = mode
+        self.num_queries = num_queries
+        self.latency_budget = latency_budget
+        self.cache_size = cache_size
+        self.prompt = prompt
+        self.max_workers = max_workers
+        self._cache = CoalescingCache(cache_size)
+        self._over_budget = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            generator=component_to_dict(self.generator),
+            mode=self.mode,
+            num_queries=self.num_queries,
+            latency_budget=self.latency_budget,
+            cache_size=self.cache_size,
+            prompt=self.prompt,
+            max_workers=self.max_workers,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QueryExpander":
+        """
+        Deserializes the component from a dictionary.
+        """
+        data["init_parameters"]["generator"] = deserialize_component(data["init_parameters"]["generator"])
+        return default_from_dict(cls, data)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Cache hits, misses, queries coalesced onto another's expansion, and expansions that ran over the budget.
+        """
+        return {**self._cache.stats, "over_budget": self._over_budget}
+
+    def warm_up(self):
+        if hasattr(self.generator, "warm_up"):
+            self.generator.warm_up()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="query-expansion")
+
+    @component.output_types(queries=List[str])
+    def run(self, query: str):
+        """
+        Expands a query.
+
+        :param query: The user's query.
+        :returns: `queries`, the query followed by its variants, or the query alone if the expansion ran over
+            the latency budget or failed.
+        """
+        if self._executor is None:
+            self.warm_up()
+        future = self._cache.submit(normalize_text(query), lambda: self._expand(query), self._executor)
+        try:
+            variants = future.result(timeout=self.latency_budget)
+        except FutureTimeoutError:
+            with self._lock:
+                self._over_budget += 1
+            return {"queries": [query]}
+        except Exception as error:
+            logger.warning("Query expansion failed, retrieving with the query alone: {error}", error=error)
+            return {"queries": [query]}
+        return {"queries": [query, *variants]}
+
+    def _expand(self, query: str) -> List[str]:
+        template = self.prompt or PROMPTS[self.mode]
+        replies = self.generator.run(prompt=template.format(query=query, num_queries=self.num_queries))["replies"]
+        if self.mode == "hyde":
+            candidates = [reply.strip() for reply in replies]
+        else:
+            candidates = [
+                _LIST_MARKER.sub("", line).strip().strip('"') for reply in replies for line in reply.splitlines()
+            ]
+        seen = {normalize_text(query, lowercase=True)}
+        variants = []
+        for candidate in candidates:
+            normalized = normalize_text(candidate, lowercase=True)
+            if candidate and normalized not in seen:
+                seen.add(normalized)
+                variants.append(candidate)
+        return variants[: self.num_queries]
+
+
+@component
+class MultiQueryEmbeddingRetriever:
+    """
+    Retrieves the documents for several queries at once and merges them with reciprocal rank fusion.
+
+    The queries are embedded by a text embedder, as queries: asymmetric models such as Cohere's
+    `embed-english-v3.0` embed a search query differently from a document. The queries are embedded
+    concurrently, so their calls overlap; `LocalTextEmbedder` batches them into one forward pass, and
+    `CachedTextEmbedder` answers the variants of a repeated question from its cache. Each query embedding is
+    then retrieved in its own thread, so the retrievals overlap wherever the store releases the GIL (NumPy's
+    matrix products do). A store with `embedding_retrieval_batch`, like `ShardedDocumentStore`, gets all the
+    embeddings in a single call instead.
+
+    Usage example:
+    ```python
+    document_search.add_component("expander", QueryExpander(OpenAIGenerator()))
+    document_search.add_component(
+        "retriever", MultiQueryEmbeddingRetriever(document_store=document_store, embedder=OpenAITextEmbedder())
+    )
+    document_search.connect("expander.queries", "retriever.queries")
+    results = document_search.run({"expander": {"query": "Sensei Davinci"}})
+    ```
+    """
+
+    def __init__(
+        self,
+        document_store: Any,
+        embedder: Any,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        candidates_per_query: Optional[int] = None,
+        fusion_k: int = 60,
+        max_workers: int = 4,
+    ):
+        """
+        :param document_store: The document store to retrieve from, e.g. `CompactDocumentStore`.
+        :param embedder: A text embedder, e.g. `OpenAITextEmbedder`, `CohereTextEmbedder` or `CachedTextEmbedder`.
+            Use the same model as for the documents.
+        :param filters: Filters applied to every retrieval.
+        :param top_k: The maximum number of documents to return.
+        :param candidates_per_query: Documents retrieved per query before fusion. Defaults to `2 * top_k`.
+        :param fusion_k: The `k` of reciprocal rank fusion.
+        :param max_workers: Maximum number of retrievals running at once.
+        """
+        if top_k <= 0:
+            raise ValueError(f"top_k must be greater than 0. Currently, top_k is {top_k}")
+        if "text" not in inspect.signature(embedder.run).parameters:
+            raise ValueError(
+                f"embedder must be a text embedder, which embeds its input as a query, such as OpenAITextEmbedder. "
+                f"Currently, embedder is a {type(embedder).__name__}"
+            )
+        self.document_store = document_store
+        self.embedder = embedder
+        self.filters = filters
+        self.top_k = top_k
+        self.candidates_per_query = candidates_per_query
+        self.fusion_k = fusion_k
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            document_store=self.document_store.to_dict(),
+            embedder=component_to_dict(self.embedder),
+            filters=self.filters,
+            top_k=self.top_k,
+            candidates_per_query=self.candidates_per_query,
+            fusion_k=self.fusion_k,
+            max_workers=self.max_workers,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "MultiQueryEmbeddingRetriever":
+        """
+        Deserializes the component from a dictionary.
+        """
+        params = data["init_parameters"]
+        store_class = deserialize_callable(params["document_store"]["type"])
+        params["document_store"] = store_class.from_dict(params["document_store"])
+        params["embedder"] = deserialize_component(params["embedder"])
+        return default_from_dict(cls, data)
+
+    def warm_up(self):
+        if hasattr(self.embedder, "warm_up"):
+            self.embedder.warm_up()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="multi-query")
+
+    @component.output_types(documents=List[Document])
+    def run(self, queries: List[str], filters: Optional[Dict[str, Any]] = None, top_k: Optional[int] = None):
+        """
+        Retrieves the documents for all the queries and fuses the rankings.
+
+        :param queries: The queries, the original first, e.g. from `QueryExpander`.
+        :param filters: Filters applied to every retrieval. Overrides the value set at initialization.
+        :param top_k: The maximum number of documents to return. Overrides the value set at initialization.
+        :returns: `documents`, the top_k documents by fused score.
+        """
+        if not queries:
+            return {"documents": []}
+        if self._executor is None:
+            self.warm_up()
+        filters = filters or self.filters
+        top_k = top_k or self.top_k
+        candidates = self.candidates_per_query or 2 * top_k
+
+        embeddings = list(
+            self._executor.map(  # type: ignore[union-attr]
+                lambda query: self.embedder.run(text=query)["embedding"], queries
+            )
+        )
+        if hasattr(self.document_store, "embedding_retrieval_batch"):
+            rankings = self.document_store.embedding_retrieval_batch(embeddings, filters=filters, top_k=candidates)
+        else:
+            rankings = list(
+                self._executor.map(  # type: ignore[union-attr]
+                    lambda embedding: self.document_store.embedding_retrieval(
+                        query_embedding=embedding, filters=filters, top_k=candidates
+                    ),
+                    embeddings,
+                )
+            )
+        if len(rankings) == 1:
+            return {"documents": rankings[0][:top_k]}
+        return {"documents": reciprocal_rank_fusion(rankings, k=self.fusion_k, top_k=top_k)}
@@ -0,0 +1,179 @@
+# Local cross-encoder reranking between a retriever and the PromptBuilder.
+
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from haystack import Document, component, default_from_dict, default_to_dict
+from haystack.lazy_imports import LazyImport
+
+DEFAULT_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+@component
+class CrossEncoderReranker:
+    """
+    Reranks a retriever's candidates with a cross-encoder on CPU and keeps the best `top_k`.
+
+    Candidates are scored in retriever order, in batches. Document token ids are cached by content, so a
+    document that comes back for many queries is only tokenized once. With `score_gap` set, scoring stops
+    as soon as a whole batch scores at least `score_gap` below the current `top_k`-th best: the retriever
+    ranked the rest even lower, so easy queries skip most of the candidate set.
+
+    Usage example:
+    ```python
+    rag.add_component("retriever", InMemoryEmbeddingRetriever(document_store=document_store, top_k=20))
+    rag.add_component("reranker", CrossEncoderReranker(top_k=2, score_gap=4.0))
+    rag.connect("retriever.documents", "reranker.documents")
+    rag.connect("reranker.documents", "prompt.documents")
+    ```
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        top_k: int = 3,
+        batch_size: int = 8,
+        score_gap: Optional[float] = None,
+        max_length: int = 512,
+        num_threads: Optional[int] = None,
+        tokenization_cache_size: int = 10_000,
+    ):
+        """
+        Creates a CrossEncoderReranker component.
+
+        :param model: Local path or ID of the cross-encoder model on HuggingFace Hub.
+        :param top_k: The maximum number of documents to return.
+        :param batch_size: Number of (query, document) pairs scored per forward pass.
+        :param score_gap: Stop scoring once a batch scores this far below the `top_k`-th best. None scores every candidate.
+        :param max_length: Maximum length in tokens of a (query, document) pair; documents are truncated to fit.
+        :param num_threads: Intra-op CPU threads for torch.
+        :param tokenization_cache_size: Number of tokenized documents kept in memory.
+        """
+        if top_k <= 0:
+            raise ValueError(f"top_k must be greater than 0. Currently, top_k is {top_k}")
+        self.model = model
+        self.top_k = top_k
+        self.batch_size = batch_size
+        self.score_gap = score_gap
+        self.max_length = max_length
+        self.num_threads = num_threads
+        self.tokenization_cache_size = tokenization_cache_size
+        self.stats = {"queries": 0, "candidates": 0, "scored": 0}
+        self._model: Any = None
+        self._tokenizer: Any = None
+        self._token_cache: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._token_cache_lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            model=self.model,
+            top_k=self.top_k,
+            batch_size=self.batch_size,
+            score_gap=self.score_gap,
+            max_length=self.max_length,
+            num_threads=self.num_threads,
+            tokenization_cache_size=self.tokenization_cache_size,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CrossEncoderReranker":
+        """
+        Deserializes the component from a dictionary.
+        """
+        return default_from_dict(cls, data)
+
+    def warm_up(self):
+        """
+        Loads the model and tokenizer.
+        """
+        if self._model is None:
+            # Imported here rather than at the top: torch and transformers take seconds to import.
+            with LazyImport(message="Run 'pip install transformers torch'") as transformers_import:
+                import torch
+                from transformers import AutoModelForSequenceClassification, AutoTokenizer
+            transformers_import.check()
+            if self.num_threads:
+                torch.set_num_threads(self.num_threads)
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model)
+            self._model = AutoModelForSequenceClassification.from_pretrained(self.model).eval()
+
+    @component.output_types(documents=List[Document])
+    def run(self, query: str, documents: List[Document], top_k: Optional[int] = None):
+        """
+        Returns the `top_k` documents that best match the query, best first, with the cross-encoder score.
+
+        :param query: The query the documents were retrieved for.
+        :param documents: Candidate documents, in retriever order.
+        :param top_k: The maximum number of documents to return. Overrides the value set at initialization.
+        :returns: A dictionary with the reranked `documents`.
+        """
+        top_k = top_k or self.top_k
+        if not documents:
+            return {"documents": []}
+        if self._model is None:
+            self.warm_up()
+
+        query_ids = self._tokenize(query)
+        scored: List[tuple] = []
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start : start + self.batch_size]
+            scores = self._score(query_ids, batch)
+            scored.extend(zip(scores, range(start, start + len(batch))))
+            if self.score_gap is not None and len(scored) >= top_k and start + len(batch) < len(documents):
+                kth_best = sorted((s for s, _ in scored), reverse=True)[top_k - 1]
+                if kth_best - max(scores) >= self.score_gap:
+                    break
+
+        self.stats["queries"] += 1
+        self.stats["candidates"] += len(documents)
+        self.stats["scored"] += len(scored)
+
+        # Ties keep retriever order.
+        best = sorted(scored, key=lambda x: (-x[0], x[1]))[:top_k]
+        return {"documents": [replace(documents[i], score=score) for score, i in best]}
+
+    def _tokenize(self, text: str) -> List[int]:
+        with self._token_cache_lock:
+            ids = self._token_cache.get(text)
+            if ids is not None:
+                self._token_cache.move_to_end(text)
+                return ids
+        ids = self._tokenizer(text, add_special_tokens=False, truncation=False, verbose=False)["input_ids"]
+        with self._token_cache_lock:
+            self._token_cache[text] = ids
+            if len(self._token_cache) > self.tokenization_cache_size:
+                self._token_cache.popitem(last=False)
+        return ids
+
+    def _score(self, query_ids: List[int], documents: List[Document]) -> List[float]:
+        import torch
+
+        tokenizer = self._tokenizer
+        # Room left for the document once the query and the special tokens are in.
+        query_ids = query_ids[: self.max_length // 2]
+        budget = self.max_length - len(query_ids) - tokenizer.num_special_tokens_to_add(pair=True)
+
+        input_ids, token_type_ids = [], []
+        for doc in documents:
+            doc_ids = self._tokenize(doc.content or "")[:budget]
+            input_ids.append(tokenizer.build_inputs_with_special_tokens(query_ids, doc_ids))
+            token_type_ids.append(tokenizer.create_token_type_ids_from_sequences(query_ids, doc_ids))
+
+        width = max(len(ids) for ids in input_ids)
+        pad = tokenizer.pad_token_id or 0
+        features = {
+            "input_ids": torch.tensor([ids + [pad] * (width - len(ids)) for ids in input_ids]),
+            "attention_mask": torch.tensor([[1] * len(ids) + [0] * (width - len(ids)) for ids in input_ids]),
+        }
+        if "token_type_ids" in tokenizer.model_input_names:
+            features["token_type_ids"] = torch.tensor([t + [0] * (width - len(t)) for t in token_type_ids])
+
+        with torch.inference_mode():
+            logits = self._model(**features).logits
+        return logits[:, 0].tolist()
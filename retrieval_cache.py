@@ -0,0 +1,163 @@
+# Result cache for embedding retrieval, invalidated by the document store's version counter.
+
+import hashlib
+import json
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from haystack import Document, component, default_from_dict, default_to_dict
+from haystack.utils import deserialize_callable
+
+Key = Tuple[bytes, int, str, bool, bool]
+
+
+@component
+class CachedEmbeddingRetriever:
+    """
+    `InMemoryEmbeddingRetriever` with a cache of its results: same parameters, inputs and outputs, plus
+    `cache_size`.
+
+    Results are cached by a hash of the query embedding, `top_k`, the filters and the scoring options, in an
+    LRU. The store's `version` goes up with every write and delete. A lookup that finds a new version drops
+    the whole cache, so a query never gets results from before a write. Repeated questions skip the scoring
+    and cost a hash and a dictionary lookup.
+
+    Results are cached for stores that have a `version`: `IndexedInMemoryDocumentStore`, `CompactDocumentStore`
+    and `ShardedDocumentStore`. With another store every query is retrieved.
+
+    Usage example:
+    ```python
+    rag.add_component("query_embedder", CachedTextEmbedder(OpenAITextEmbedder()))
+    rag.add_component("retriever", CachedEmbeddingRetriever(document_store=document_store))
+    rag.connect("query_embedder.embedding", "retriever.query_embedding")
+    ```
+    """
+
+    def __init__(
+        self,
+        document_store: Any,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        scale_score: bool = False,
+        return_embedding: bool = False,
+        cache_size: int = 1024,
+    ):
+        """
+        :param document_store: The document store to retrieve from.
+        :param filters: Filters applied to the retrieved documents.
+        :param top_k: The maximum number of documents to return.
+        :param scale_score: Whether to scale the scores to the [0, 1] range.
+        :param return_embedding: Whether to return the documents' embeddings.
+        :param cache_size: Number of results kept in memory.
+        """
+        if top_k <= 0:
+            raise ValueError(f"top_k must be greater than 0. Currently, top_k is {top_k}")
+        self.document_store = document_store
+        self.filters = filters
+        self.top_k = top_k
+        self.scale_score = scale_score
+        self.return_embedding = return_embedding
+        self.cache_size = cache_size
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Key, List[Document]]" = OrderedDict()
+        # The store and its version the cached results are from.
+        self._version: Optional[Tuple[int, int]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            document_store=self.document_store.to_dict(),
+            filters=self.filters,
+            top_k=self.top_k,
+            scale_score=self.scale_score,
+            return_embedding=self.return_embedding,
+            cache_size=self.cache_size,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CachedEmbeddingRetriever":
+        """
+        Deserializes the component from a dictionary.
+        """
+        params = data["init_parameters"]
+        store_class = deserialize_callable(params["document_store"]["type"])
+        params["document_store"] = store_class.from_dict(params["document_store"])
+        return default_from_dict(cls, data)
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query_embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        scale_score: Optional[bool] = None,
+        return_embedding: Optional[bool] = None,
+    ):
+        """
+        Retrieves the documents most similar to `query_embedding`, from the cache when the store hasn't changed.
+
+        :returns: `documents`, the top_k documents by similarity.
+        """
+        filters = filters or self.filters
+        top_k = top_k or self.top_k
+        scale_score = self.scale_score if scale_score is None else scale_score
+        return_embedding = self.return_embedding if return_embedding is None else return_embedding
+        key = (
+            hashlib.blake2b(array("d", query_embedding).tobytes(), digest_size=16).digest(),
+            top_k,
+            json.dumps(filters, sort_keys=True, default=str) if filters else "",
+            scale_score,
+            return_embedding,
+        )
+
+        # Read on every run: the store can be swapped after init, as `load_pipeline` does.
+        store = self.document_store
+        if getattr(store, "version", None) is None:
+            return {"documents": self._retrieve(query_embedding, filters, top_k, scale_score, return_embedding)}
+        version = (id(store), store.version)
+        with self._lock:
+            if version != self._version:
+                if self._cache:
+                    self.stats["invalidations"] += 1
+                self._cache.clear()
+                self._version = version
+            documents = self._cache.get(key)
+            if documents is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+
+        if documents is None:
+            documents = self._retrieve(query_embedding, filters, top_k, scale_score, return_embedding)
+            with self._lock:
+                # Not cached if the store changed while scoring: the results may predate the write.
+                if self._version == version == (id(self.document_store), self.document_store.version):
+                    self._cache[key] = documents
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        # Copies, so a component changing a document's score or meta doesn't change the cached one.
+        return {"documents": [replace(doc, meta=dict(doc.meta)) for doc in documents]}
+
+    def _retrieve(
+        self,
+        query_embedding: List[float],
+        filters: Optional[Dict[str, Any]],
+        top_k: int,
+        scale_score: bool,
+        return_embedding: bool,
+    ) -> List[Document]:
+        return self.document_store.embedding_retrieval(
+            query_embedding=query_embedding,
+            filters=filters,
+            top_k=top_k,
+            scale_score=scale_score,
+            return_embedding=return_embedding,
+        )
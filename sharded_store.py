@@ -0,0 +1,658 @@
+# A document store split into shards held by local worker processes, queried scatter-gather, so BM25 and
+# embedding retrieval use all cores instead of one.
+
+import multiprocessing
+import os
+import threading
+import weakref
+import zlib
+from dataclasses import replace
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple
+
+import numpy as np
+from haystack import Document, component, default_from_dict, default_to_dict
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.document_stores.in_memory.document_store import BM25_SCALING_FACTOR, DOT_PRODUCT_SCALING_FACTOR
+from haystack.document_stores.types import DuplicatePolicy
+from haystack.utils import expit
+from haystack.utils.filters import convert
+
+# A document, its score and its insertion sequence, which breaks ties between equal scores.
+Scored = List[Tuple[Document, float, int]]
+
+# What InMemoryDocumentStore.bm25_retrieval scores: documents with text or a dataframe.
+_HAS_CONTENT = {
+    "operator": "OR",
+    "conditions": [
+        {"field": "content", "operator": "!=", "value": None},
+        {"field": "dataframe", "operator": "!=", "value": None},
+    ],
+}
+
+
+def _to_shared(array: np.ndarray) -> shared_memory.SharedMemory:
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block
+
+
+def _from_shared(name: str, shape: Tuple[int, ...]) -> np.ndarray:
+    # Copies the array out of a block the parent created and unlinks once the shards have replied.
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype=np.float64, buffer=block.buf).copy()
+    finally:
+        block.close()
+
+
+class _CorpusStats:
+    """
+    Stands in for a shard's `InMemoryDocumentStore` in its BM25 scoring methods, with the statistics of the
+    whole corpus (document count, average length, document frequencies) instead of the shard's, so that scores
+    from different shards are comparable and equal to those of a single store.
+    """
+
+    class _Sized:
+        def __init__(self, attrs: Dict[str, Any], size: int):
+            self._attrs = attrs
+            self._size = size
+
+        def __getitem__(self, doc_id: str):
+            return self._attrs[doc_id]
+
+        def __len__(self) -> int:
+            return self._size
+
+    def __init__(self, store: InMemoryDocumentStore, n_docs: int, avg_doc_len: float, freq_vocab: Dict[str, int]):
+        self.bm25_parameters = store.bm25_parameters
+        self._tokenize_bm25 = store._tokenize_bm25
+        self._bm25_attr = self._Sized(store._bm25_attr, n_docs)
+        self._avg_doc_len = avg_doc_len
+        self._freq_vocab_for_idf = freq_vocab
+
+
+class _Shard:
+    """
+    One shard, in a worker process: an `InMemoryDocumentStore` of the documents without their embeddings, and
+    the embeddings as rows of a matrix (normalized for cosine similarity) that is rebuilt on the first query
+    after a write. Both are kept in insertion order, and `seqs` has each document's place in that order across
+    all shards.
+    """
+
+    def __init__(self, store_params: Dict[str, Any]):
+        self.store = InMemoryDocumentStore(**store_params)
+        self.embeddings: Dict[str, np.ndarray] = {}
+        self.seqs: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._total_len: Optional[int] = None
+
+    def write(
+        self,
+        documents: List[Document],
+        rows: List[Optional[int]],
+        seqs: List[int],
+        policy: DuplicatePolicy,
+        block: Optional[Tuple[str, Tuple[int, int]]],
+    ) -> int:
+        # `rows[i]` is the row of document i's embedding in the shared block, None if it has none.
+        vectors = _from_shared(*block) if block is not None else None
+        try:
+            return self.store.write_documents(documents, policy)
+        finally:
+            # Also after a DuplicateDocumentError, for the documents written before it. A document the policy
+            # skipped, or that a later one with its id replaced, isn't the one stored.
+            for doc, row, seq in zip(documents, rows, seqs):
+                if self.store.storage.get(doc.id) is not doc:
+                    continue
+                # Overwritten documents move to the end, as they do in the store.
+                self.embeddings.pop(doc.id, None)
+                if row is not None and vectors is not None:
+                    self.embeddings[doc.id] = vectors[row]
+                self.seqs[doc.id] = seq
+            self._matrix = None
+            self._total_len = None
+
+    def delete(self, doc_ids: List[str]):
+        self.store.delete_documents(doc_ids)
+        for doc_id in doc_ids:
+            self.embeddings.pop(doc_id, None)
+            self.seqs.pop(doc_id, None)
+        self._matrix = None
+        self._total_len = None
+
+    def count(self) -> int:
+        return self.store.count_documents()
+
+    def filter(self, filters: Optional[Dict[str, Any]]) -> List[Tuple[Document, int]]:
+        return [(self._with_embedding(doc), self.seqs[doc.id]) for doc in self.store.filter_documents(filters)]
+
+    def bm25_stats(self, tokens: Optional[List[str]]) -> Tuple[int, float, Dict[str, int]]:
+        # The exact total length: the store's running average drifts with the order documents are written in.
+        if self._total_len is None:
+            self._total_len = sum(stats.doc_len for stats in self.store._bm25_attr.values())
+        vocab = self.store._freq_vocab_for_idf
+        freq = dict(vocab) if tokens is None else {token: vocab.get(token, 0) for token in tokens}
+        return len(self.store._bm25_attr), self._total_len, freq
+
+    def bm25(self, query: str, filters: Optional[Dict[str, Any]], top_k: int, stats: Tuple[int, float, Dict[str, int]]):
+        filters = {"operator": "AND", "conditions": [_HAS_CONTENT, filters]} if filters else _HAS_CONTENT
+        documents = self.store.filter_documents(filters)
+        if not documents:
+            return []
+        score = getattr(InMemoryDocumentStore, f"_score_{self.store.bm25_algorithm.lower()}")
+        scored = score(_CorpusStats(self.store, *stats), query, documents)
+        # Stable, so documents with equal scores stay in insertion order.
+        top = sorted(scored, key=lambda item: item[1], reverse=True)[:top_k]
+        return [(doc, score, self.seqs[doc.id]) for doc, score in top]
+
+    def embedding(
+        self, queries: Any, filters: Optional[Dict[str, Any]], top_k: int, return_embedding: bool
+    ) -> List[Scored]:
+        queries = _from_shared(*queries) if isinstance(queries, tuple) else np.asarray(queries, dtype=np.float64)
+        matrix, ids = self._candidates(filters)
+        if not ids:
+            return [[] for _ in queries]
+        if self.store.embedding_similarity_function == "cosine":
+            queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        scores = queries @ matrix.T
+        k = min(top_k, len(ids))
+        results = []
+        for row in scores:
+            # Every row scoring at least the k-th best, in insertion order, sorted stably: ties at the cut are
+            # decided by insertion order rather than by where argpartition happens to put them.
+            kth = row[np.argpartition(-row, k - 1)[k - 1]]
+            top = np.flatnonzero(row >= kth)
+            top = top[np.argsort(-row[top], kind="stable")][:k]
+            documents = [self.store.storage[ids[i]] for i in top]
+            if return_embedding:
+                documents = [self._with_embedding(doc) for doc in documents]
+            results.append([(doc, float(row[i]), self.seqs[doc.id]) for doc, i in zip(documents, top)])
+        return results
+
+    def _candidates(self, filters: Optional[Dict[str, Any]]) -> Tuple[np.ndarray, List[str]]:
+        if self._matrix is None:
+            self._matrix_ids = list(self.embeddings)
+            self._rows = {doc_id: i for i, doc_id in enumerate(self._matrix_ids)}
+            self._matrix = np.stack(list(self.embeddings.values())) if self.embeddings else np.empty((0, 0))
+            if self.embeddings and self.store.embedding_similarity_function == "cosine":
+                self._matrix /= np.linalg.norm(self._matrix, axis=1, keepdims=True)
+        if not filters:
+            return self._matrix, self._matrix_ids
+        ids = [doc.id for doc in self.store.filter_documents(filters) if doc.id in self._rows]
+        return self._matrix[[self._rows[doc_id] for doc_id in ids]], ids
+
+    def _with_embedding(self, doc: Document) -> Document:
+        embedding = self.embeddings.get(doc.id)
+        return replace(doc, embedding=embedding.tolist()) if embedding is not None else doc
+
+
+def _serve(connection, store_params: Dict[str, Any]):
+    shard = _Shard(store_params)
+    while True:
+        try:
+            operation, args = connection.recv()
+        except EOFError:
+            return
+        if operation == "close":
+            connection.send(("ok", None))
+            return
+        try:
+            connection.send(("ok", getattr(shard, operation)(*args)))
+        except Exception as error:
+            connection.send(("error", error))
+
+
+class _Worker:
+    def __init__(self, context, store_params: Dict[str, Any]):
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, store_params), daemon=True)
+        self.process.start()
+        child.close()
+        self.lock = threading.Lock()
+
+
+def _stop(workers: List[_Worker]):
+    for worker in workers:
+        try:
+            with worker.lock:
+                worker.connection.send(("close", ()))
+                worker.connection.recv()
+        except (OSError, EOFError):
+            pass
+        worker.process.join(timeout=5)
+
+
+def _seq(item: Tuple[Document, int]) -> int:
+    return item[1]
+
+
+def _rank(item: Tuple[Document, float, int]) -> Tuple[float, int]:
+    # Best score first, then insertion order.
+    return -item[1], item[2]
+
+
+class ShardedDocumentStore:
+    """
+    A document store hash-partitioned across `num_shards` worker processes, each holding one shard.
+
+    Writes go to the shard of each document id; `bm25_retrieval` and `embedding_retrieval` send the query to
+    every shard at once and merge the shards' top-k, so a query uses as many cores as there are shards.
+    Document embeddings, and the queries of `embedding_retrieval_batch`, travel through shared memory instead
+    of being pickled. BM25 scores use the statistics of the whole corpus, gathered from the shards per query,
+    and documents with equal scores are ranked in the order they were written, as `InMemoryDocumentStore`
+    ranks them. So results are the same as with one `InMemoryDocumentStore`, except that BM25 scores differ
+    slightly: that store keeps a running average of document lengths that drifts from the true one, which is
+    used here, so documents it scores nearly equal can swap places.
+
+    Use it with `ShardedEmbeddingRetriever` and `ShardedBM25Retriever`; the in-memory retrievers only accept
+    an `InMemoryDocumentStore`.
+
+    Usage example:
+    ```python
+    document_store = ShardedDocumentStore(num_shards=4)
+    retriever = ShardedBM25Retriever(document_store=document_store)
+    ```
+    """
+
+    def __init__(
+        self,
+        num_shards: Optional[int] = None,
+        bm25_tokenization_regex: str = r"(?u)\b\w\w+\b",
+        bm25_algorithm: Literal["BM25Okapi", "BM25L", "BM25Plus"] = "BM25L",
+        bm25_parameters: Optional[Dict] = None,
+        embedding_similarity_function: Literal["dot_product", "cosine"] = "dot_product",
+    ):
+        """
+        :param num_shards: Worker processes; defaults to the number of CPUs.
+        :param bm25_tokenization_regex: See `InMemoryDocumentStore`.
+        :param bm25_algorithm: See `InMemoryDocumentStore`.
+        :param bm25_parameters: See `InMemoryDocumentStore`.
+        :param embedding_similarity_function: See `InMemoryDocumentStore`.
+        """
+        self.num_shards = num_shards or os.cpu_count() or 1
+        self.bm25_tokenization_regex = bm25_tokenization_regex
+        self.bm25_algorithm = bm25_algorithm
+        self.bm25_parameters = bm25_parameters or {}
+        self.embedding_similarity_function = embedding_similarity_function
+        self._tokenizer = InMemoryDocumentStore(bm25_tokenization_regex=bm25_tokenization_regex)
+        store_params = {
+            "bm25_tokenization_regex": bm25_tokenization_regex,
+            "bm25_algorithm": bm25_algorithm,
+            "bm25_parameters": bm25_parameters,
+            "embedding_similarity_function": embedding_similarity_function,
+        }
+        # Forked where the platform can, like the converter pool in async_fetcher: spawned workers re-run the
+        # script that created the store, so there it must create it under `if __name__ == "__main__":`.
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        # Started before the workers so they share it: a block they attach to is then tracked once, by name,
+        # and released when the parent unlinks it.
+        resource_tracker.ensure_running()
+        self._workers = [_Worker(context, store_params) for _ in range(self.num_shards)]
+        self._vocab: Optional[Tuple[int, Tuple[int, float, Dict[str, int]]]] = None
+        self._version = 0
+        self._next_seq = 0
+        self._finalizer = weakref.finalize(self, _stop, self._workers)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            num_shards=self.num_shards,
+            bm25_tokenization_regex=self.bm25_tokenization_regex,
+            bm25_algorithm=self.bm25_algorithm,
+            bm25_parameters=self.bm25_parameters,
+            embedding_similarity_function=self.embedding_similarity_function,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ShardedDocumentStore":
+        """
+        Deserializes the component from a dictionary.
+        """
+        return default_from_dict(cls, data)
+
+    @property
+    def version(self) -> int:
+        """
+        A counter that goes up with every write and delete, for caches of query results to tell they're stale.
+        """
+        return self._version
+
+    def shard_of(self, doc_id: str) -> int:
+        return zlib.crc32(doc_id.encode()) % self.num_shards
+
+    def count_documents(self) -> int:
+        return sum(self._scatter({shard: ("count", ()) for shard in range(self.num_shards)}).values())
+
+    def filter_documents(self, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        if filters and "operator" not in filters and "conditions" not in filters:
+            filters = convert(filters)
+        results = self._scatter({shard: ("filter", (filters,)) for shard in range(self.num_shards)})
+        return [doc for doc, _ in sorted((item for found in results.values() for item in found), key=_seq)]
+
+    def write_documents(self, documents: List[Document], policy: DuplicatePolicy = DuplicatePolicy.NONE) -> int:
+        """
+        Refer to the DocumentStore.write_documents() protocol documentation.
+
+        If `policy` is set to `DuplicatePolicy.NONE` defaults to `DuplicatePolicy.FAIL`.
+        """
+        if not isinstance(documents, Iterable) or isinstance(documents, str) or any(
+            not isinstance(doc, Document) for doc in documents
+        ):
+            raise ValueError("Please provide a list of Documents.")
+        if policy == DuplicatePolicy.NONE:
+            policy = DuplicatePolicy.FAIL
+
+        by_shard: Dict[int, List[Document]] = {}
+        seqs: Dict[int, List[int]] = {}
+        for doc in documents:
+            by_shard.setdefault(self.shard_of(doc.id), []).append(doc)
+            seqs.setdefault(self.shard_of(doc.id), []).append(self._next_seq)
+            self._next_seq += 1
+        requests, blocks = {}, []
+        for shard, docs in by_shard.items():
+            vectors = [doc.embedding for doc in docs if doc.embedding is not None]
+            block = None
+            if vectors:
+                shared = _to_shared(np.asarray(vectors, dtype=np.float64))
+                blocks.append(shared)
+                block = (shared.name, (len(vectors), len(vectors[0])))
+            counter = iter(range(len(vectors)))
+            rows = [next(counter) if doc.embedding is not None else None for doc in docs]
+            stripped = [replace(doc, embedding=None) if doc.embedding is not None else doc for doc in docs]
+            requests[shard] = ("write", (stripped, rows, seqs[shard], policy, block))
+        try:
+            written = sum(self._scatter(requests).values())
+        finally:
+            for shared in blocks:
+                shared.close()
+                shared.unlink()
+            self._version += 1
+        return written
+
+    def delete_documents(self, document_ids: List[str]) -> None:
+        by_shard: Dict[int, List[str]] = {}
+        for doc_id in document_ids:
+            by_shard.setdefault(self.shard_of(doc_id), []).append(doc_id)
+        self._scatter({shard: ("delete", (ids,)) for shard, ids in by_shard.items()})
+        self._version += 1
+
+    def bm25_retrieval(
+        self, query: str, filters: Optional[Dict[str, Any]] = None, top_k: int = 10, scale_score: bool = False
+    ) -> List[Document]:
+        """
+        Retrieves documents that are most relevant to the query using BM25 algorithm.
+
+        :param query: The query string.
+        :param filters: A dictionary with filters to narrow down the search space.
+        :param top_k: The number of top documents to retrieve. Default is 10.
+        :param scale_score: Whether to scale the scores of the retrieved documents. Default is False.
+        :returns: A list of the top_k documents most relevant to the query.
+        """
+        if not query:
+            raise ValueError("Query should be a non-empty string")
+        if filters and "operator" not in filters:
+            filters = convert(filters)
+
+        stats = self._corpus_stats(query)
+        results = self._scatter({shard: ("bm25", (query, filters, top_k, stats)) for shard in range(self.num_shards)})
+        merged = sorted((item for scored in results.values() for item in scored), key=_rank)
+
+        negatives_are_valid = self.bm25_algorithm == "BM25Okapi" and not scale_score
+        documents = []
+        for doc, score, _ in merged[:top_k]:
+            if scale_score:
+                score = expit(score / BM25_SCALING_FACTOR)
+            if not negatives_are_valid and score <= 0.0:
+                continue
+            documents.append(replace(doc, score=score))
+        return documents
+
+    def embedding_retrieval(
+        self,
+        query_embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        scale_score: bool = False,
+        return_embedding: bool = False,
+    ) -> List[Document]:
+        """
+        Retrieves documents that are most similar to the query embedding using a vector similarity metric.
+
+        :param query_embedding: Embedding of the query.
+        :param filters: A dictionary with filters to narrow down the search space.
+        :param top_k: The number of top documents to retrieve. Default is 10.
+        :param scale_score: Whether to scale the scores of the retrieved Documents. Default is False.
+        :param return_embedding: Whether to return the embedding of the retrieved Documents. Default is False.
+        :returns: A list of the top_k documents most relevant to the query.
+        """
+        if len(query_embedding) == 0 or not isinstance(query_embedding[0], float):
+            raise ValueError("query_embedding should be a non-empty list of floats.")
+        return self._embedding_retrieval([query_embedding], filters, top_k, scale_score, return_embedding)[0]
+
+    def embedding_retrieval_batch(
+        self,
+        query_embeddings: List[List[float]],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        scale_score: bool = False,
+        return_embedding: bool = False,
+    ) -> List[List[Document]]:
+        """
+        `embedding_retrieval` for many queries at once: the queries go to the shards through shared memory and
+        each shard scores them with one matrix product.
+        """
+        if not query_embeddings:
+            return []
+        shared = _to_shared(np.asarray(query_embeddings, dtype=np.float64))
+        try:
+            queries = (shared.name, (len(query_embeddings), len(query_embeddings[0])))
+            return self._embedding_retrieval(queries, filters, top_k, scale_score, return_embedding)
+        finally:
+            shared.close()
+            shared.unlink()
+
+    def close(self):
+        """
+        Stops the worker processes; the documents are lost.
+        """
+        self._finalizer()
+
+    def _embedding_retrieval(
+        self, queries: Any, filters: Optional[Dict[str, Any]], top_k: int, scale_score: bool, return_embedding: bool
+    ) -> List[List[Document]]:
+        if filters and "operator" not in filters and "conditions" not in filters:
+            filters = convert(filters)
+        request = ("embedding", (queries, filters, top_k, return_embedding))
+        results = self._scatter({shard: request for shard in range(self.num_shards)})
+        batches = []
+        for per_query in zip(*(results[shard] for shard in range(self.num_shards))):
+            merged = sorted((item for scored in per_query for item in scored), key=_rank)
+            batches.append(
+                [replace(doc, score=self._scale(score) if scale_score else score) for doc, score, _ in merged[:top_k]]
+            )
+        return batches
+
+    def _scale(self, score: float) -> float:
+        if self.embedding_similarity_function == "dot_product":
+            return expit(float(score / DOT_PRODUCT_SCALING_FACTOR))
+        return (score + 1) / 2
+
+    def _corpus_stats(self, query: str) -> Tuple[int, float, Dict[str, int]]:
+        # BM25Okapi needs the frequencies of the whole vocabulary; they are cached until the next write.
+        if self.bm25_algorithm == "BM25Okapi":
+            if self._vocab is None or self._vocab[0] != self._version:
+                self._vocab = (self._version, self._gather_stats(None))
+            return self._vocab[1]
+        return self._gather_stats(self._tokenizer._tokenize_bm25(query))
+
+    def _gather_stats(self, tokens: Optional[List[str]]) -> Tuple[int, float, Dict[str, int]]:
+        results = self._scatter({shard: ("bm25_stats", (tokens,)) for shard in range(self.num_shards)})
+        n_docs = sum(n for n, _, _ in results.values())
+        total_len = sum(length for _, length, _ in results.values())
+        freq: Dict[str, int] = {}
+        for _, _, shard_freq in results.values():
+            for token, count in shard_freq.items():
+                freq[token] = freq.get(token, 0) + count
+        return n_docs, total_len / n_docs if n_docs else 0.0, freq
+
+    def _scatter(self, requests: Dict[int, Tuple[str, tuple]]) -> Dict[int, Any]:
+        # Sends every request before reading any reply, so the shards work in parallel. Locks are taken in shard
+        # order, so concurrent callers can't deadlock.
+        shards = sorted(requests)
+        for shard in shards:
+            self._workers[shard].lock.acquire()
+        try:
+            for shard in shards:
+                self._workers[shard].connection.send(requests[shard])
+            replies = {shard: self._workers[shard].connection.recv() for shard in shards}
+        finally:
+            for shard in shards:
+                self._workers[shard].lock.release()
+        for status, value in replies.values():
+            if status == "error":
+                raise value
+        return {shard: value for shard, (_, value) in replies.items()}
+
+
+@component
+class ShardedEmbeddingRetriever:
+    """
+    `InMemoryEmbeddingRetriever` for a `ShardedDocumentStore`: same parameters, inputs and outputs.
+    """
+
+    def __init__(
+        self,
+        document_store: ShardedDocumentStore,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        scale_score: bool = False,
+        return_embedding: bool = False,
+    ):
+        if not isinstance(document_store, ShardedDocumentStore):
+            raise ValueError("document_store must be an instance of ShardedDocumentStore")
+        if top_k <= 0:
+            raise ValueError(f"top_k must be greater than 0. Currently, top_k is {top_k}")
+        self.document_store = document_store
+        self.filters = filters
+        self.top_k = top_k
+        self.scale_score = scale_score
+        self.return_embedding = return_embedding
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            document_store=self.document_store.to_dict(),
+            filters=self.filters,
+            top_k=self.top_k,
+            scale_score=self.scale_score,
+            return_embedding=self.return_embedding,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ShardedEmbeddingRetriever":
+        """
+        Deserializes the component from a dictionary.
+        """
+        data["init_parameters"]["document_store"] = ShardedDocumentStore.from_dict(
+            data["init_parameters"]["document_store"]
+        )
+        return default_from_dict(cls, data)
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query_embedding: List[float],
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        scale_score: Optional[bool] = None,
+        return_embedding: Optional[bool] = None,
+    ):
+        """
+        Retrieves the documents most similar to `query_embedding` from all shards.
+
+        :returns: `documents`, the top_k documents by similarity.
+        """
+        documents = self.document_store.embedding_retrieval(
+            query_embedding=query_embedding,
+            filters=filters or self.filters,
+            top_k=top_k or self.top_k,
+            scale_score=self.scale_score if scale_score is None else scale_score,
+            return_embedding=self.return_embedding if return_embedding is None else return_embedding,
+        )
+        return {"documents": documents}
+
+
+@component
+class ShardedBM25Retriever:
+    """
+    `InMemoryBM25Retriever` for a `ShardedDocumentStore`: same parameters, inputs and outputs.
+    """
+
+    def __init__(
+        self,
+        document_store: ShardedDocumentStore,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: int = 10,
+        scale_score: bool = False,
+    ):
+        if not isinstance(document_store, ShardedDocumentStore):
+            raise ValueError("document_store must be an instance of ShardedDocumentStore")
+        if top_k <= 0:
+            raise ValueError(f"top_k must be greater than 0. Currently, top_k is {top_k}")
+        self.document_store = document_store
+        self.filters = filters
+        self.top_k = top_k
+        self.scale_score = scale_score
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serializes the component to a dictionary.
+        """
+        return default_to_dict(
+            self,
+            document_store=self.document_store.to_dict(),
+            filters=self.filters,
+            top_k=self.top_k,
+            scale_score=self.scale_score,
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ShardedBM25Retriever":
+        """
+        Deserializes the component from a dictionary.
+        """
+        data["init_parameters"]["document_store"] = ShardedDocumentStore.from_dict(
+            data["init_parameters"]["document_store"]
+        )
+        return default_from_dict(cls, data)
+
+    @component.output_types(documents=List[Document])
+    def run(
+        self,
+        query: str,
+        filters: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        scale_score: Optional[bool] = None,
+    ):
+        """
+        Retrieves the documents most relevant to `query` from all shards.
+
+        :returns: `documents`, the top_k documents by BM25 score.
+        """
+        documents = self.document_store.bm25_retrieval(
+            query=query,
+            filters=filters or self.filters,
+            top_k=top_k or self.top_k,
+            scale_score=self.scale_score if scale_score is None else scale_score,
+        )
+        return {"documents": documents}
@@ -0,0 +1,128 @@
+# Startup helpers for the lesson entry points: deferred imports and an import-time profile.
+#
+#   python -m startup gradio haystack_integrations.components.embedders.cohere --top 15
+
+import importlib.util
+import sys
+import types
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+class _MissingModule(types.ModuleType):
+    """
+    Stands in for a module that isn't installed; using it raises the ImportError `lazy_import` held back.
+    """
+
+    def __init__(self, name: str, message: Optional[str]):
+        super().__init__(name)
+        self.__dict__["_message"] = message
+
+    def __getattr__(self, attr: str):
+        hint = f" {self._message}" if self._message else ""
+        raise ImportError(f"Module '{self.__name__}' is not installed.{hint}")
+
+
+def lazy_import(name: str, message: Optional[str] = None) -> types.ModuleType:
+    """
+    Returns the module `name`, executed on first attribute access instead of now.
+
+    Only finding the module happens now, which is cheap; for a dotted name the parent packages are imported.
+    A module that is already imported is returned as is. A module that isn't installed is returned as a
+    stand-in that raises `ImportError` with `message` when used, so lessons that never use it don't fail.
+    Packages that replace themselves in `sys.modules` while importing, like transformers, can't be deferred
+    this way; import those in the function that needs them.
+
+    Usage example:
+    ```python
+    gr = lazy_import("gradio")   # gradio is imported by the first `gr.` below, in the UI cell
+    ```
+
+    :param name: Absolute module name.
+    :param message: Installation hint for the ImportError.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        spec = importlib.util.find_spec(name)
+    except ModuleNotFoundError:
+        spec = None
+    if spec is None or spec.loader is None:
+        return _MissingModule(name, message)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+@dataclass
+class ImportTime:
+    """
+    One line of `python -X importtime`: the module, its own import time and the time including its imports.
+    """
+
+    module: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+def import_profile(code: str, env: Optional[Dict[str, str]] = None) -> List[ImportTime]:
+    """
+    Runs `code` in a fresh interpreter under `-X importtime` and returns the imports it made, in import order.
+
+    :param code: Python source to run, e.g. a lesson's import cell.
+    :param env: Environment for the interpreter; defaults to this one's.
+    :raises subprocess.CalledProcessError: If `code` fails.
+    """
+    import subprocess
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env, check=True
+    )
+    profile = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        profile.append(
+            ImportTime(
+                module=name.strip(),
+                self_ms=int(self_us) / 1000,
+                cumulative_ms=int(cumulative_us) / 1000,
+                depth=(len(name) - len(name.lstrip()) - 1) // 2,
+            )
+        )
+    return profile
+
+
+def slowest_imports(profile: List[ImportTime], top: int = 15, max_depth: Optional[int] = None) -> List[ImportTime]:
+    """
+    The `top` imports with the highest cumulative time, optionally only down to `max_depth` (0 is what the
+    code imported itself).
+    """
+    rows = [row for row in profile if max_depth is None or row.depth <= max_depth]
+    return sorted(rows, key=lambda row: row.cumulative_ms, reverse=True)[:top]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import-time profile of a set of modules, in a fresh interpreter.")
+    parser.add_argument("modules", nargs="+")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--max-depth", type=int, default=None)
+    args = parser.parse_args()
+
+    profile = import_profile("\n".join(f"import {module}" for module in args.modules))
+    total = sum(row.cumulative_ms for row in profile if row.depth == 0)
+    print(f"{len(profile)} modules imported in {total:.0f} ms\n")
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for row in slowest_imports(profile, args.top, args.max_depth):
+        print(f"{row.cumulative_ms:>14.1f}  {row.self_ms:>8.1f}  {'  ' * row.depth}{row.module}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# Token streaming out of Pipeline.run: the generators' streaming_callback feeds an iterator.
+
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from haystack import Pipeline
+from haystack.dataclasses import StreamingChunk
+
+_DONE = object()
+
+
+class TokenStream:
+    """
+    An iterator over the text of `StreamingChunk`s, to pass as a generator's `streaming_callback`.
+
+    The callback side runs in the generator's thread and the iterating side in the consumer's. Chunks
+    without text, like the ones carrying tool calls, are skipped. Iteration ends when `close()` is called,
+    and re-raises the error `close()` was given, if any.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.chunks: List[str] = []
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+
+    def __call__(self, chunk: StreamingChunk):
+        if not chunk.content:
+            return
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+        self.chunks.append(chunk.content)
+        self._queue.put(chunk.content)
+
+    def close(self, error: Optional[BaseException] = None):
+        self._queue.put(error if error is not None else _DONE)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        """
+        Seconds from creating the stream to its first chunk of text, or None if there was none.
+        """
+        return None if self.first_token_at is None else self.first_token_at - self.started
+
+
+class PipelineStream(TokenStream):
+    """
+    The tokens of a pipeline run as they are generated, followed by the run's outputs in `result`.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._result: Optional[Dict[str, Any]] = None
+        self._error: Optional[BaseException] = None
+        self._finished = threading.Event()
+
+    @property
+    def result(self) -> Dict[str, Any]:
+        """
+        The outputs of `Pipeline.run`; waits for the run to finish.
+        """
+        self._finished.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result  # type: ignore[return-value]
+
+    def finish(self, result: Optional[Dict[str, Any]], error: Optional[BaseException]):
+        self._result, self._error = result, error
+        self._finished.set()
+        self.close(error)
+
+
+def stream_pipeline(
+    pipeline: Pipeline, data: Dict[str, Any], streaming_components: List[str], **run_kwargs
+) -> PipelineStream:
+    """
+    Runs `pipeline` in a background thread and returns its tokens as an iterator.
+
+    The generators named in `streaming_components` (`OpenAIGenerator`, `OpenAIChatGenerator`, ...) stream
+    into the returned `PipelineStream` for this run only; their own `streaming_callback` is restored after.
+    Like `Pipeline.run`, don't run the same pipeline from two threads at once.
+
+    Usage example:
+    ```python
+    stream = stream_pipeline(rag, {"prompt": {"query": query}}, streaming_components=["llm"])
+    for token in stream:
+        print(token, end="", flush=True)
+    print(stream.result["llm"]["meta"])
+    ```
+    """
+    generators = []
+    for name in streaming_components:
+        generator = pipeline.get_component(name)
+        if not hasattr(generator, "streaming_callback"):
+            raise ValueError(f"Component '{name}' has no streaming_callback and can't be streamed.")
+        generators.append(generator)
+
+    stream = PipelineStream()
+
+    def run():
+        previous = [generator.streaming_callback for generator in generators]
+        for generator in generators:
+            generator.streaming_callback = stream
+        try:
+            result = pipeline.run(data, **run_kwargs)
+        except Exception as error:
+            stream.finish(None, error)
+            return
+        finally:
+            for generator, callback in zip(generators, previous):
+                generator.streaming_callback = callback
+        stream.finish(result, None)
+
+    threading.Thread(target=run, name="pipeline-stream", daemon=True).start()
+    return stream
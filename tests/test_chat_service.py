@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import Future
+from typing import List
+
+from haystack import Pipeline, component
+from haystack.dataclasses import ChatMessage
+
+from chat_service import ChatService, SessionStore
+
+
+@component
+class Echo:
+    """
+    Replies with the number of user messages so far, after waiting for `release` if it's set.
+    """
+
+    def __init__(self, release: threading.Event = None):
+        self.release = release
+
+    @component.output_types(replies=List[ChatMessage])
+    def run(self, messages: List[ChatMessage]):
+        if self.release is not None:
+            self.release.wait(5)
+        turns = sum(1 for message in messages if message.role.value == "user")
+        return {"replies": [ChatMessage.from_assistant(str(turns))]}
+
+
+def echo_agent(release: threading.Event = None) -> Pipeline:
+    agent = Pipeline()
+    agent.add_component("echo", Echo(release))
+    return agent
+
+
+def turn():
+    return ("hello", Future(), None)
+
+
+def test_queued_session_is_not_evicted():
+    store = SessionStore(max_sessions=1, idle_ttl=None)
+    session, start = store.get_for_turn("a", list, turn())
+    assert start
+    store.get("b", list)
+    assert store.get("a", list) is session
+    assert store.evicted == 0
+
+
+def test_idle_sessions_are_evicted_least_recently_used_first():
+    store = SessionStore(max_sessions=2, idle_ttl=None)
+    for session_id in "abc":
+        store.get(session_id, list)
+    assert len(store) == 2
+    assert store.evicted == 1
+    assert store.get("b", list).messages == [] and len(store) == 2
+
+
+def test_second_turn_of_a_session_doesnt_start_a_second_drain():
+    store = SessionStore()
+    _, first = store.get_for_turn("a", list, turn())
+    _, second = store.get_for_turn("a", list, turn())
+    assert first and not second
+
+
+def test_expiry_skips_busy_sessions_without_stopping():
+    store = SessionStore(idle_ttl=0.01)
+    busy, _ = store.get_for_turn("busy", list, turn())
+    idle = store.get("idle", list)
+    busy.last_used = idle.last_used = 0.0
+    store.get("new", list)
+    assert store.get("busy", list) is busy
+    assert store.expired == 1
+
+
+def test_turns_keep_their_history_when_other_sessions_arrive():
+    release = threading.Event()
+    service = ChatService(
+        lambda: echo_agent(release), input_socket="echo.messages", output_socket="echo.replies", max_sessions=1
+    )
+    try:
+        first = service.submit("a", "one")
+        service.submit("b", "hello")
+        release.set()
+        assert first.result(5) == "1"
+        assert service.chat("a", "two", timeout=5) == "2"
+    finally:
+        service.close()
+
+
+def test_turns_of_one_session_run_in_order():
+    service = ChatService(echo_agent, input_socket="echo.messages", output_socket="echo.replies", max_workers=4)
+    try:
+        futures = [service.submit("a", str(i)) for i in range(10)]
+        assert [future.result(5) for future in futures] == [str(i) for i in range(1, 11)]
+    finally:
+        service.close()
@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from coalescing_cache import CoalescingCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_evicts_least_recently_used():
+    cache = CoalescingCache(max_entries=2)
+    for key in "ab":
+        cache.get_or_compute(key, lambda key=key: key.upper())
+    cache.get_or_compute("a", lambda: "unused")
+    cache.get_or_compute("c", lambda: "C")
+    assert cache.get_or_compute("a", lambda: "recomputed") == "A"
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+
+
+def test_values_expire_after_ttl():
+    clock = Clock()
+    cache = CoalescingCache(max_entries=10, ttl=5, clock=clock)
+    cache.get_or_compute("a", lambda: 1)
+    clock.now = 5
+    assert cache.get_or_compute("a", lambda: 2) == 1
+    clock.now = 5.1
+    assert cache.get_or_compute("a", lambda: 2) == 2
+    assert cache.stats == {"hits": 1, "misses": 2, "coalesced": 0}
+
+
+def test_loaded_values_keep_their_expiry():
+    clock = Clock()
+    cache = CoalescingCache(max_entries=10, ttl=100, clock=clock)
+    assert cache.get_or_compute("a", lambda: "computed", load=lambda: (3.0, "loaded")) == "loaded"
+    clock.now = 4
+    assert cache.get_or_compute("a", lambda: "computed", load=lambda: None) == "computed"
+    assert cache.stats["misses"] == 1
+
+
+def test_concurrent_misses_compute_once():
+    cache = CoalescingCache(max_entries=10)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        first = pool.submit(cache.get_or_compute, "a", compute)
+        started.wait(5)
+        others = [pool.submit(cache.get_or_compute, "a", compute) for _ in range(3)]
+        while cache.stats["coalesced"] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        assert [future.result() for future in [first, *others]] == ["value"] * 4
+    assert len(calls) == 1
+
+
+def test_errors_reach_every_caller_and_arent_cached():
+    cache = CoalescingCache(max_entries=10)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("a", fail)
+    assert cache.get_or_compute("a", lambda: "retried") == "retried"
+
+
+def test_submit_caches_the_value_when_nobody_waits():
+    cache = CoalescingCache(max_entries=10)
+    release = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        future = cache.submit("a", lambda: release.wait(5) and "late", pool)
+        assert not future.done()
+        assert cache.submit("a", lambda: "other", pool) is future
+        release.set()
+        assert future.result(5) == "late"
+    assert cache.get_or_compute("a", lambda: "recomputed") == "late"
+    assert cache.stats == {"hits": 1, "misses": 1, "coalesced": 1}
@@ -0,0 +1,96 @@
+import random
+
+import pytest
+from haystack import Document
+from haystack.document_stores.types import DuplicatePolicy
+
+from compact_store import CompactDocumentStore
+from indexed_store import IndexedInMemoryDocumentStore
+
+WORDS = [f"w{i}" for i in range(300)]
+FILE_FILTER = {"field": "meta.file_path", "operator": "==", "value": "f1.txt"}
+
+
+def make_documents(rng: random.Random, count: int) -> list:
+    documents = []
+    for i in range(count):
+        content = " ".join(rng.choices(WORDS, k=30)) if i % 17 else None
+        meta = {"file_path": f"f{i % 5}.txt", "split_id": i, "tags": [i % 3]} if i % 4 else {"title": "t", "n": i}
+        embedding = [rng.random() for _ in range(8)] if i % 5 else None
+        documents.append(Document(content=content, meta=meta, embedding=embedding))
+    return documents
+
+
+def fill(store, documents: list):
+    store.write_documents(documents)
+    store.delete_documents([doc.id for doc in documents[:500:2]])
+    extra = Document(content="w1 w2 w3 new", meta={"file_path": "f1.txt"})
+    store.write_documents(documents[:10] + [extra], policy=DuplicatePolicy.OVERWRITE)
+    store.write_documents(documents[100:120], policy=DuplicatePolicy.SKIP)
+
+
+def scored(documents: list) -> list:
+    return [(doc.id, round(doc.score, 9)) for doc in documents]
+
+
+@pytest.fixture(scope="module")
+def documents():
+    return make_documents(random.Random(0), 600)
+
+
+@pytest.mark.parametrize("bm25_algorithm", ["BM25L", "BM25Okapi", "BM25Plus"])
+@pytest.mark.parametrize("similarity", ["cosine", "dot_product"])
+def test_retrieval_matches_indexed_store(documents, bm25_algorithm, similarity):
+    kwargs = {"indexed_fields": ["file_path"], "bm25_algorithm": bm25_algorithm}
+    expected = IndexedInMemoryDocumentStore(embedding_similarity_function=similarity, **kwargs)
+    store = CompactDocumentStore(embedding_similarity_function=similarity, embedding_dtype="float64", **kwargs)
+    for target in (expected, store):
+        fill(target, documents)
+
+    assert store.count_documents() == expected.count_documents()
+    assert store.filter_documents() == expected.filter_documents()
+    assert store.filter_documents(FILE_FILTER) == expected.filter_documents(FILE_FILTER)
+    for query in ["w1 w2", "w5 w7 w200", "zzz"]:
+        for filters in (None, FILE_FILTER):
+            for scale_score in (False, True):
+                args = {"filters": filters, "top_k": 7, "scale_score": scale_score}
+                assert scored(store.bm25_retrieval(query, **args)) == scored(expected.bm25_retrieval(query, **args))
+
+    query_embedding = [random.Random(1).random() for _ in range(8)]
+    for filters in (None, FILE_FILTER):
+        assert scored(store.embedding_retrieval(query_embedding, filters=filters, top_k=5)) == scored(
+            expected.embedding_retrieval(query_embedding, filters=filters, top_k=5)
+        )
+    pairs = zip(
+        store.embedding_retrieval(query_embedding, top_k=3, return_embedding=True),
+        expected.embedding_retrieval(query_embedding, top_k=3, return_embedding=True),
+    )
+    for got, want in pairs:
+        assert (got.id, got.content, got.meta, got.embedding) == (want.id, want.content, want.meta, want.embedding)
+
+
+def test_compaction_keeps_results():
+    # Rows are compacted once more than 1024 are deleted and those outnumber the live ones.
+    documents = make_documents(random.Random(2), 2400)
+    expected = IndexedInMemoryDocumentStore(indexed_fields=["file_path"])
+    store = CompactDocumentStore(indexed_fields=["file_path"], embedding_dtype="float64")
+    for target in (expected, store):
+        target.write_documents(documents)
+        target.delete_documents([doc.id for i, doc in enumerate(documents) if i % 3])
+        target.write_documents([Document(content="fresh w9", meta={"k": 1}, embedding=[0.5] * 8)])
+
+    assert len(store.storage._ids) < len(documents)
+    assert store.filter_documents() == expected.filter_documents()
+    assert [d.id for d in store.bm25_retrieval("w9 w10", top_k=20)] == [
+        d.id for d in expected.bm25_retrieval("w9 w10", top_k=20)
+    ]
+    query_embedding = [0.3] * 8
+    assert [d.id for d in store.embedding_retrieval(query_embedding, top_k=20)] == [
+        d.id for d in expected.embedding_retrieval(query_embedding, top_k=20)
+    ]
+
+
+def test_to_dict_round_trip_keeps_embedding_dtype():
+    store = CompactDocumentStore(indexed_fields=["file_path"], embedding_dtype="float16")
+    restored = CompactDocumentStore.from_dict(store.to_dict())
+    assert restored.embedding_dtype == "float16"
@@ -0,0 +1,117 @@
+from typing import List
+
+import pytest
+from haystack import Document, Pipeline, component
+from haystack.components.joiners import DocumentJoiner
+from haystack.components.routers import ConditionalRouter
+
+from compiled_pipeline import compile_pipeline
+
+
+@component
+class Add:
+    def __init__(self, amount: int = 1):
+        self.amount = amount
+
+    @component.output_types(value=int, note=str)
+    def run(self, value: int, extra: int = 0):
+        return {"value": value + self.amount + extra, "note": f"added {self.amount}"}
+
+
+@component
+class ToDocuments:
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+
+    @component.output_types(documents=List[Document])
+    def run(self, value: int):
+        return {"documents": [Document(id=f"{self.prefix}{i}", content=f"{self.prefix}{i}") for i in range(value)]}
+
+
+def chain() -> Pipeline:
+    pipeline = Pipeline()
+    pipeline.add_component("first", Add(1))
+    pipeline.add_component("second", Add(10))
+    pipeline.connect("first.value", "second.value")
+    return pipeline
+
+
+def branches() -> Pipeline:
+    routes = [
+        {"condition": "{{value > 2}}", "output": "{{value}}", "output_name": "big", "output_type": int},
+        {"condition": "{{value <= 2}}", "output": "{{value}}", "output_name": "small", "output_type": int},
+    ]
+    pipeline = Pipeline()
+    pipeline.add_component("router", ConditionalRouter(routes))
+    pipeline.add_component("big", ToDocuments("big"))
+    pipeline.add_component("small", ToDocuments("small"))
+    pipeline.add_component("also", ToDocuments("also"))
+    pipeline.add_component("joiner", DocumentJoiner())
+    pipeline.connect("router.big", "big.value")
+    pipeline.connect("router.small", "small.value")
+    pipeline.connect("big.documents", "joiner.documents")
+    pipeline.connect("small.documents", "joiner.documents")
+    pipeline.connect("also.documents", "joiner.documents")
+    return pipeline
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"first": {"value": 1}},
+        {"first": {"value": 1, "extra": 5}, "second": {"extra": 2}},
+        {"value": 3, "extra": 1},
+    ],
+)
+def test_chain_matches_pipeline(data):
+    assert compile_pipeline(chain()).run(data) == chain().run(data)
+
+
+def test_include_outputs_from_matches_pipeline():
+    data = {"first": {"value": 1}}
+    expected = chain().run(data, include_outputs_from={"first"})
+    assert compile_pipeline(chain()).run(data, include_outputs_from={"first"}) == expected
+    assert expected["first"] == {"value": 2, "note": "added 1"}
+
+
+@pytest.mark.parametrize("value", [1, 4])
+def test_untaken_branches_are_skipped_and_variadic_inputs_joined(value):
+    data = {"router": {"value": value}, "also": {"value": 1}}
+    compiled = compile_pipeline(branches()).run(data)
+    assert compiled == branches().run(data)
+    assert {doc.id for doc in compiled["joiner"]["documents"]} == {
+        "also0",
+        *(f"{'big' if value > 2 else 'small'}{i}" for i in range(value)),
+    }
+
+
+def test_repeated_runs_dont_share_state():
+    compiled = compile_pipeline(chain())
+    assert compiled.run({"first": {"value": 1}}) == {
+        "second": {"value": 12, "note": "added 10"},
+        "first": {"note": "added 1"},
+    }
+    assert compiled.run({"first": {"value": 5}})["second"]["value"] == 16
+
+
+def test_invalid_inputs_raise_like_pipeline():
+    compiled = compile_pipeline(chain())
+    with pytest.raises(ValueError, match="Missing input"):
+        compiled.run({"second": {"extra": 1}})
+    with pytest.raises(ValueError, match="not found"):
+        compiled.run({"third": {"value": 1}})
+    with pytest.raises(ValueError, match="already sent"):
+        compiled.run({"first": {"value": 1}, "second": {"value": 1}})
+    with pytest.raises(TypeError):
+        compiled.run({"first": {"value": "1"}})
+    assert compile_pipeline(chain(), type_check=False).run({"first": {"value": 1.5}})["second"]["value"] == 12.5
+
+
+def test_pipelines_with_cycles_are_rejected():
+    pipeline = Pipeline()
+    pipeline.add_component("a", Add())
+    pipeline.add_component("b", Add())
+    pipeline.connect("a.value", "b.value")
+    pipeline.connect("b.value", "a.extra")
+    with pytest.raises(ValueError, match="cycles"):
+        compile_pipeline(pipeline)
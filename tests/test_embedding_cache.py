@@ -0,0 +1,75 @@
+import time
+from typing import List
+
+from haystack import component
+
+from embedding_cache import CachedTextEmbedder, QueryEmbeddingCache
+
+
+@component
+class CountingEmbedder:
+    """
+    Embeds a text as its length, counting the calls.
+    """
+
+    def __init__(self, model: str = "counting"):
+        self.model = model
+        self.calls = 0
+
+    @component.output_types(embedding=List[float], meta=dict)
+    def run(self, text: str):
+        self.calls += 1
+        return {"embedding": [float(len(text))], "meta": {"model": self.model}}
+
+
+def test_cached_text_embedder_hits_for_normalized_texts():
+    embedder = CountingEmbedder()
+    cached = CachedTextEmbedder(embedder)
+    first = cached.run(text="Who is  Sensei Davinci?")
+    second = cached.run(text=" Who is Sensei Davinci? ")
+    assert first["embedding"] == second["embedding"]
+    assert (first["meta"]["cache_hit"], second["meta"]["cache_hit"]) == (False, True)
+    assert embedder.calls == 1
+
+
+def test_models_dont_share_entries():
+    cache = QueryEmbeddingCache()
+    small, large = CountingEmbedder("small"), CountingEmbedder("large")
+    CachedTextEmbedder(small, cache=cache).run(text="query")
+    result = CachedTextEmbedder(large, cache=cache).run(text="query")
+    assert result["meta"] == {"model": "large", "cache_hit": False}
+    assert (small.calls, large.calls) == (1, 1)
+
+
+def test_disk_tier_is_shared_between_caches(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    embedder = CountingEmbedder()
+    CachedTextEmbedder(embedder, cache=QueryEmbeddingCache(disk_path=path)).run(text="query")
+    other = QueryEmbeddingCache(disk_path=path)
+    result = CachedTextEmbedder(embedder, cache=other).run(text="query")
+    assert result["meta"]["cache_hit"]
+    assert embedder.calls == 1
+    assert other.stats == {"hits": 0, "misses": 0, "coalesced": 0, "disk_hits": 1}
+
+
+def test_disk_hit_expires_with_the_disk_entry(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    embedder = CountingEmbedder()
+    CachedTextEmbedder(embedder, cache=QueryEmbeddingCache(ttl=1, disk_path=path)).run(text="query")
+    time.sleep(0.6)
+    # Promoted to memory with the 0.4 s the disk entry has left, not a fresh second.
+    promoted = CachedTextEmbedder(embedder, cache=QueryEmbeddingCache(ttl=1, disk_path=path))
+    assert promoted.run(text="query")["meta"]["cache_hit"]
+    time.sleep(0.6)
+    assert not promoted.run(text="query")["meta"]["cache_hit"]
+    assert embedder.calls == 2
+
+
+def test_clear_empties_both_tiers(tmp_path):
+    cache = QueryEmbeddingCache(disk_path=str(tmp_path / "embeddings.db"))
+    embedder = CountingEmbedder()
+    cached = CachedTextEmbedder(embedder, cache=cache)
+    cached.run(text="query")
+    cache.clear()
+    assert not cached.run(text="query")["meta"]["cache_hit"]
+    assert embedder.calls == 2
@@ -0,0 +1,126 @@
+from typing import Dict, List, Optional
+
+import pytest
+from haystack import Document, component
+
+from http_cache import CacheRule, CachedWebSearch, HTTPCache, normalize_url
+
+URL = "https://example.com/stories.json"
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, content: bytes = b"", headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeSession:
+    """
+    Answers with the queued responses, recording the headers of each request.
+    """
+
+    def __init__(self, *responses: FakeResponse):
+        self.responses = list(responses)
+        self.requests: List[Dict[str, str]] = []
+
+    def get(self, url: str, headers: Dict[str, str], timeout: float) -> FakeResponse:
+        self.requests.append(headers)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "http_cache.sqlite")
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.COM:443/a?b=2&a=1&print=pretty#top", ("print",)) == (
+        "https://example.com/a?a=1&b=2"
+    )
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
+
+
+def test_fresh_responses_are_served_without_a_request(path):
+    cache = HTTPCache(path, rules=[CacheRule(r"^https://example\.com/", ttl=60, ignore_params=("print",))])
+    session = FakeSession(FakeResponse(200, b"[1, 2]"))
+    assert cache.fetch(URL, session=session).json() == [1, 2]
+    assert cache.fetch(URL + "?print=pretty", session=session).json() == [1, 2]
+    assert len(session.requests) == 1
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_stale_responses_are_revalidated(path):
+    cache = HTTPCache(path, rules=[CacheRule(r"^https://example\.com/", ttl=0)])
+    session = FakeSession(
+        FakeResponse(200, b"[1]", {"ETag": '"v1"', "Content-Type": "application/json; charset=utf-8"}),
+        FakeResponse(304),
+        FakeResponse(200, b"[1, 2]", {"ETag": '"v2"'}),
+    )
+    assert cache.fetch(URL, session=session).json() == [1]
+    revalidated = cache.fetch(URL, session=session)
+    assert revalidated.json() == [1] and revalidated.content_type == "application/json"
+    assert cache.fetch(URL, session=session).json() == [1, 2]
+    assert [headers.get("If-None-Match") for headers in session.requests] == [None, '"v1"', '"v1"']
+    assert cache.get(URL).etag == '"v2"'
+    assert cache.hit_rate() == pytest.approx(1 / 3)
+
+
+def test_responses_without_ttl_or_validators_arent_stored(path):
+    cache = HTTPCache(path, rules=[])
+    cache.fetch(URL, session=FakeSession(FakeResponse(200, b"[]")))
+    assert len(cache) == 0
+
+
+def test_errors_arent_cached(path):
+    cache = HTTPCache(path, default_ttl=60)
+    with pytest.raises(RuntimeError):
+        cache.fetch(URL, session=FakeSession(FakeResponse(500)))
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted(path):
+    cache = HTTPCache(path, default_ttl=60, max_bytes=250)
+    session = FakeSession(*(FakeResponse(200, b"x" * 100) for _ in range(3)))
+    cache.fetch(URL + "?page=1", session=session)
+    cache.fetch(URL + "?page=2", session=session)
+    cache.get(URL + "?page=1")
+    cache.fetch(URL + "?page=3", session=session)
+    assert cache.get(URL + "?page=2") is None
+    assert cache.get(URL + "?page=1") is not None and cache.get(URL + "?page=3") is not None
+    assert cache.size_bytes() <= 250 and cache.stats["evictions"] == 1
+
+
+def test_processes_share_the_file(path):
+    HTTPCache(path, default_ttl=60).fetch(URL, session=FakeSession(FakeResponse(200, b"[3]")))
+    other = HTTPCache(path, default_ttl=60)
+    assert other.fetch(URL, session=FakeSession()).json() == [3]
+
+
+@component
+class FakeWebSearch:
+    def __init__(self, top_k: int = 10):
+        self.top_k = top_k
+        self.queries: List[str] = []
+
+    @component.output_types(documents=List[Document], links=List[str])
+    def run(self, query: str):
+        self.queries.append(query)
+        return {"documents": [Document(content=f"about {query}")], "links": ["https://example.com/"]}
+
+
+def test_web_search_results_are_cached_by_normalized_query(path):
+    cache = HTTPCache(path)
+    websearch = FakeWebSearch()
+    cached = CachedWebSearch(websearch, cache=cache)
+    first = cached.run(query="What is Haystack?")
+    second = cached.run(query="what is  haystack?")
+    assert second["documents"][0].content == first["documents"][0].content == "about What is Haystack?"
+    assert second["links"] == ["https://example.com/"]
+    assert websearch.queries == ["What is Haystack?"]
+    CachedWebSearch(FakeWebSearch(top_k=3), cache=cache).run(query="What is Haystack?")
+    assert cache.stats == {"hits": 1, "revalidated": 0, "misses": 2, "evictions": 0}
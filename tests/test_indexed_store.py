@@ -0,0 +1,85 @@
+import random
+
+import pytest
+from haystack import Document
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.document_stores.types import DuplicatePolicy
+from haystack.errors import FilterError
+
+from indexed_store import IndexedInMemoryDocumentStore
+
+VALUES = [1, 2, 3.5, "a", "b", None, [1], True, float("nan")]
+
+
+def random_document(rng: random.Random) -> Document:
+    meta = {field: rng.choice(VALUES) for field in "xyz" if rng.random() < 0.8}
+    return Document(id=str(rng.randint(0, 29)), content=f"content {rng.randint(0, 100)}", meta=meta)
+
+
+def random_condition(rng: random.Random) -> dict:
+    operator = rng.choice(["==", "!=", ">", ">=", "<", "<=", "in", "not in", "in", "bogus"])
+    if operator in ("in", "not in") and rng.random() < 0.9:
+        value = rng.sample([1, 2, "a", 3.5, "3"], 2)
+    else:
+        value = rng.choice(VALUES)
+    condition = {"field": rng.choice(["meta.x", "meta.y", "x", "meta.z", "id"]), "operator": operator, "value": value}
+    if rng.random() < 0.03:
+        del condition["value"]
+    return condition
+
+
+def random_filter(rng: random.Random, depth: int = 0) -> dict:
+    if depth < 2 and rng.random() < 0.4:
+        conditions = [random_filter(rng, depth + 1) for _ in range(rng.randint(1, 3))]
+        return {"operator": rng.choice(["AND", "OR", "NOT"]), "conditions": conditions}
+    return random_condition(rng)
+
+
+def outcome(store: InMemoryDocumentStore, filters: dict):
+    try:
+        return [doc.id for doc in store.filter_documents(filters)]
+    except Exception as error:  # the error type is part of the behaviour under test
+        return type(error).__name__
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_filters_match_in_memory_store_results_and_errors(seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        expected = InMemoryDocumentStore()
+        store = IndexedInMemoryDocumentStore(indexed_fields=["x", "meta.y"])
+        for _ in range(5):
+            documents = [random_document(rng) for _ in range(8)]
+            policy = rng.choice([DuplicatePolicy.OVERWRITE, DuplicatePolicy.SKIP])
+            for target in (expected, store):
+                target.write_documents(documents, policy=policy)
+            if rng.random() < 0.3:
+                ids = [str(rng.randint(0, 30)) for _ in range(3)]
+                expected.delete_documents(ids)
+                store.delete_documents(ids)
+        for _ in range(10):
+            filters = random_filter(rng)
+            assert outcome(store, filters) == outcome(expected, filters), filters
+
+
+def test_range_filter_raises_on_documents_the_index_would_rule_out():
+    store = IndexedInMemoryDocumentStore(indexed_fields=["year"])
+    store.write_documents([Document(id="1", content="a", meta={"year": 2020}), Document(id="2", content="b")])
+    store.write_documents([Document(id="3", content="c", meta={"year": "unknown"})])
+    with pytest.raises(FilterError):
+        store.filter_documents({"field": "meta.year", "operator": ">", "value": 2021})
+
+
+def test_range_filter_on_numbers_uses_index():
+    store = IndexedInMemoryDocumentStore(indexed_fields=["year"])
+    store.write_documents([Document(id=str(year), content="a", meta={"year": year}) for year in range(2000, 2010)])
+    filters = {"field": "meta.year", "operator": ">=", "value": 2007}
+    assert store._cannot_raise(filters)
+    assert [doc.id for doc in store.filter_documents(filters)] == ["2007", "2008", "2009"]
+
+
+def test_in_filter_without_a_list_raises():
+    store = IndexedInMemoryDocumentStore(indexed_fields=["year"])
+    store.write_documents([Document(id="1", content="a", meta={"year": 2020})])
+    with pytest.raises(FilterError):
+        store.filter_documents({"field": "meta.year", "operator": "in", "value": 2020})
@@ -0,0 +1,144 @@
+import threading
+from typing import List
+
+import pytest
+from haystack import Document, component
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+
+from query_expansion import MultiQueryEmbeddingRetriever, QueryExpander, reciprocal_rank_fusion
+
+# Each word of a query adds 1 to its axis.
+AXES = {"cat": 0, "dog": 1, "bird": 2}
+
+
+@component
+class ScriptedGenerator:
+    """
+    Replies with `reply`, after waiting for `release` if it's set.
+    """
+
+    def __init__(self, reply: str, release: threading.Event = None):
+        self.reply = reply
+        self.release = release
+        self.prompts: List[str] = []
+
+    @component.output_types(replies=List[str])
+    def run(self, prompt: str):
+        self.prompts.append(prompt)
+        if self.release is not None:
+            self.release.wait(5)
+        return {"replies": [self.reply]}
+
+
+@component
+class AxisTextEmbedder:
+    """
+    Embeds a query on the axes of its words, recording the texts it embedded.
+    """
+
+    def __init__(self):
+        self.texts: List[str] = []
+
+    @component.output_types(embedding=List[float])
+    def run(self, text: str):
+        self.texts.append(text)
+        embedding = [0.0] * len(AXES)
+        for word in text.split():
+            embedding[AXES[word]] += 1.0
+        return {"embedding": embedding}
+
+
+@component
+class AxisDocumentEmbedder:
+    @component.output_types(documents=List[Document])
+    def run(self, documents: List[Document]):
+        return {"documents": documents}
+
+
+class BatchStore(InMemoryDocumentStore):
+    def __init__(self):
+        super().__init__()
+        self.batches: List[int] = []
+
+    def embedding_retrieval_batch(self, query_embeddings, filters=None, top_k=10):
+        self.batches.append(len(query_embeddings))
+        return [self.embedding_retrieval(embedding, filters=filters, top_k=top_k) for embedding in query_embeddings]
+
+
+def animals(store: InMemoryDocumentStore) -> InMemoryDocumentStore:
+    store.write_documents(
+        [
+            Document(id="cat", content="cat", embedding=[1.0, 0.0, 0.0]),
+            Document(id="dog", content="dog", embedding=[0.0, 1.0, 0.0]),
+            Document(id="bird", content="bird", embedding=[0.0, 0.0, 1.0]),
+        ]
+    )
+    return store
+
+
+def test_retriever_embeds_every_query_as_text_and_fuses_the_rankings():
+    embedder = AxisTextEmbedder()
+    retriever = MultiQueryEmbeddingRetriever(document_store=animals(InMemoryDocumentStore()), embedder=embedder)
+    documents = retriever.run(queries=["cat", "dog", "dog bird"], top_k=2)["documents"]
+    assert sorted(embedder.texts) == ["cat", "dog", "dog bird"]
+    assert [doc.id for doc in documents] == ["dog", "cat"]
+
+
+def test_retriever_sends_all_embeddings_to_a_batch_store_at_once():
+    store = animals(BatchStore())
+    retriever = MultiQueryEmbeddingRetriever(document_store=store, embedder=AxisTextEmbedder(), top_k=1)
+    assert [doc.id for doc in retriever.run(queries=["bird", "bird dog"])["documents"]] == ["bird"]
+    assert store.batches == [2]
+
+
+def test_retriever_rejects_document_embedders():
+    with pytest.raises(ValueError, match="text embedder"):
+        MultiQueryEmbeddingRetriever(document_store=InMemoryDocumentStore(), embedder=AxisDocumentEmbedder())
+
+
+def test_multi_query_variants_are_cleaned_and_deduplicated():
+    generator = ScriptedGenerator("1. Who is Sensei Davinci?\n- who is  SENSEI davinci?\n* Davinci's teachings\n")
+    expander = QueryExpander(generator, num_queries=3, latency_budget=None)
+    queries = expander.run(query="Who is Sensei Davinci?")["queries"]
+    assert queries == ["Who is Sensei Davinci?", "Davinci's teachings"]
+
+
+def test_expansions_are_cached_by_normalized_query():
+    generator = ScriptedGenerator("A passage.")
+    expander = QueryExpander(generator, mode="hyde", latency_budget=None)
+    assert expander.run(query="Who?")["queries"] == ["Who?", "A passage."]
+    assert expander.run(query="  Who? ")["queries"] == ["  Who? ", "A passage."]
+    assert len(generator.prompts) == 1
+    assert expander.stats == {"hits": 1, "misses": 1, "coalesced": 0, "over_budget": 0}
+
+
+def test_slow_expansion_falls_back_to_the_query_and_lands_in_the_cache():
+    release = threading.Event()
+    generator = ScriptedGenerator("A passage.", release=release)
+    expander = QueryExpander(generator, mode="hyde", latency_budget=0.05)
+    assert expander.run(query="Who?")["queries"] == ["Who?"]
+    release.set()
+    expander._executor.shutdown(wait=True)
+    expander._executor = None
+    assert expander.run(query="Who?")["queries"] == ["Who?", "A passage."]
+    assert expander.stats["over_budget"] == 1 and len(generator.prompts) == 1
+
+
+def test_failed_expansion_isnt_cached():
+    @component
+    class Failing:
+        @component.output_types(replies=List[str])
+        def run(self, prompt: str):
+            raise RuntimeError("down")
+
+    expander = QueryExpander(Failing(), latency_budget=None)
+    assert expander.run(query="Who?")["queries"] == ["Who?"]
+    assert expander.run(query="Who?")["queries"] == ["Who?"]
+    assert expander.stats["misses"] == 2
+
+
+def test_reciprocal_rank_fusion_favours_documents_ranked_high_everywhere():
+    a, b, c = (Document(id=name, content=name) for name in "abc")
+    fused = reciprocal_rank_fusion([[a, b, c], [b, c], [c, b]], k=1)
+    assert [doc.id for doc in fused] == ["b", "c", "a"]
+    assert fused[0].score == 1 / 3 + 1 / 2 + 1 / 3
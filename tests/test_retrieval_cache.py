@@ -0,0 +1,89 @@
+import pytest
+from haystack import Document
+from haystack.document_stores.errors import DuplicateDocumentError
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.document_stores.types import DuplicatePolicy
+
+from compact_store import CompactDocumentStore
+from indexed_store import IndexedInMemoryDocumentStore
+from retrieval_cache import CachedEmbeddingRetriever
+
+QUERY = [1.0, 0.0]
+
+
+def documents():
+    return [
+        Document(id="a", content="a", embedding=[1.0, 0.0], meta={"group": 1}),
+        Document(id="b", content="b", embedding=[0.5, 0.5], meta={"group": 2}),
+    ]
+
+
+@pytest.fixture(params=[IndexedInMemoryDocumentStore, CompactDocumentStore])
+def store(request):
+    store = request.param(indexed_fields=["group"])
+    store.write_documents(documents())
+    return store
+
+
+def ids(result):
+    return [doc.id for doc in result["documents"]]
+
+
+def test_repeated_queries_are_hits(store):
+    retriever = CachedEmbeddingRetriever(document_store=store, top_k=2)
+    assert ids(retriever.run(query_embedding=QUERY)) == ids(retriever.run(query_embedding=QUERY)) == ["a", "b"]
+    assert retriever.stats == {"hits": 1, "misses": 1, "invalidations": 0}
+
+
+def test_options_and_filters_are_part_of_the_key(store):
+    retriever = CachedEmbeddingRetriever(document_store=store, top_k=2)
+    retriever.run(query_embedding=QUERY)
+    assert ids(retriever.run(query_embedding=QUERY, top_k=1)) == ["a"]
+    assert ids(retriever.run(query_embedding=QUERY, filters={"field": "meta.group", "operator": "==", "value": 2}))
+    assert retriever.stats["misses"] == 3
+
+
+def test_writes_and_deletes_invalidate(store):
+    retriever = CachedEmbeddingRetriever(document_store=store, top_k=3)
+    retriever.run(query_embedding=QUERY)
+    store.write_documents([Document(id="c", content="c", embedding=[2.0, 0.0])])
+    assert ids(retriever.run(query_embedding=QUERY)) == ["c", "a", "b"]
+    store.delete_documents(["c"])
+    assert ids(retriever.run(query_embedding=QUERY)) == ["a", "b"]
+    assert retriever.stats == {"hits": 0, "misses": 3, "invalidations": 2}
+
+
+def test_writes_and_deletes_that_change_nothing_keep_the_cache(store):
+    retriever = CachedEmbeddingRetriever(document_store=store, top_k=2)
+    retriever.run(query_embedding=QUERY)
+    version = store.version
+    store.write_documents(documents(), policy=DuplicatePolicy.SKIP)
+    store.write_documents([])
+    store.delete_documents(["missing"])
+    with pytest.raises(DuplicateDocumentError):
+        store.write_documents(documents(), policy=DuplicatePolicy.FAIL)
+    assert store.version == version
+    retriever.run(query_embedding=QUERY)
+    assert retriever.stats == {"hits": 1, "misses": 1, "invalidations": 0}
+
+
+def test_overwrite_invalidates(store):
+    retriever = CachedEmbeddingRetriever(document_store=store, top_k=1)
+    retriever.run(query_embedding=QUERY)
+    store.write_documents([Document(id="a", content="a", embedding=[0.0, 1.0])], policy=DuplicatePolicy.OVERWRITE)
+    assert ids(retriever.run(query_embedding=QUERY)) == ["b"]
+
+
+def test_cached_results_are_copies(store):
+    retriever = CachedEmbeddingRetriever(document_store=store, top_k=1)
+    retriever.run(query_embedding=QUERY)["documents"][0].meta["group"] = "changed"
+    assert retriever.run(query_embedding=QUERY)["documents"][0].meta["group"] == 1
+
+
+def test_stores_without_a_version_arent_cached():
+    store = InMemoryDocumentStore()
+    store.write_documents(documents())
+    retriever = CachedEmbeddingRetriever(document_store=store, top_k=1)
+    retriever.run(query_embedding=QUERY)
+    retriever.run(query_embedding=QUERY)
+    assert retriever.stats == {"hits": 0, "misses": 0, "invalidations": 0}
@@ -0,0 +1,94 @@
+import random
+
+import pytest
+from haystack import Document
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.document_stores.types import DuplicatePolicy
+
+from sharded_store import ShardedDocumentStore
+
+WORDS = ["apple", "banana", "cherry", "grape", "lemon", "mango", "peach", "plum"]
+
+
+def make_documents(rng: random.Random, count: int) -> list:
+    # Few distinct texts and embeddings, so many documents tie on score across shards. The texts are all as long,
+    # so the drift of InMemoryDocumentStore's average document length changes every score alike.
+    documents = []
+    for i in range(count):
+        content = " ".join(rng.choices(WORDS, k=4))
+        embedding = [float(rng.randint(0, 2)) for _ in range(4)] if i % 3 else None
+        documents.append(Document(content=content, meta={"i": i, "half": i % 2}, embedding=embedding))
+    return documents
+
+
+def ranked(documents: list) -> list:
+    return [(doc.id, round(doc.score, 6)) for doc in documents]
+
+
+@pytest.fixture(params=["BM25L", "BM25Okapi", "BM25Plus"])
+def stores(request):
+    expected = InMemoryDocumentStore(bm25_algorithm=request.param)
+    store = ShardedDocumentStore(num_shards=3, bm25_algorithm=request.param)
+    rng = random.Random(0)
+    documents = make_documents(rng, 120)
+    for target in (expected, store):
+        target.write_documents(documents[:80])
+        # Overwritten documents move to the end of the insertion order, skipped ones keep their place.
+        target.write_documents(documents[70:100], policy=DuplicatePolicy.OVERWRITE)
+        target.write_documents(documents[:20] + documents[100:], policy=DuplicatePolicy.SKIP)
+    yield expected, store
+    store.close()
+
+
+def test_filter_documents_in_insertion_order(stores):
+    expected, store = stores
+    assert store.count_documents() == expected.count_documents()
+    assert store.filter_documents() == expected.filter_documents()
+    filters = {"field": "meta.half", "operator": "==", "value": 1}
+    assert store.filter_documents(filters) == expected.filter_documents(filters)
+
+
+def assert_same_bm25(found: list, expected: list):
+    # InMemoryDocumentStore's running average of document lengths drifts on overwrites, so its scores are a
+    # little off from the exact ones, but not its ranking.
+    assert [doc.id for doc in found] == [doc.id for doc in expected]
+    assert [doc.score for doc in found] == pytest.approx([doc.score for doc in expected], rel=0.01)
+
+
+@pytest.mark.parametrize("query", ["apple", "banana cherry", "plum peach lemon"])
+@pytest.mark.parametrize("top_k", [1, 5, 40])
+def test_bm25_retrieval_breaks_ties_by_insertion_order(stores, query, top_k):
+    expected, store = stores
+    assert_same_bm25(store.bm25_retrieval(query, top_k=top_k), expected.bm25_retrieval(query, top_k=top_k))
+    filters = {"field": "meta.half", "operator": "==", "value": 0}
+    assert_same_bm25(
+        store.bm25_retrieval(query, filters=filters, top_k=top_k),
+        expected.bm25_retrieval(query, filters=filters, top_k=top_k),
+    )
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 40])
+def test_embedding_retrieval_breaks_ties_by_insertion_order(stores, top_k):
+    expected, store = stores
+    for query_embedding in ([1.0, 0.0, 0.0, 0.0], [0.5, 1.0, 0.0, 2.0]):
+        assert ranked(store.embedding_retrieval(query_embedding, top_k=top_k)) == ranked(
+            expected.embedding_retrieval(query_embedding, top_k=top_k)
+        )
+    batch = store.embedding_retrieval_batch([[1.0, 0.0, 0.0, 0.0], [0.0, 0.0, 1.0, 1.0]], top_k=top_k)
+    assert [ranked(found) for found in batch] == [
+        ranked(expected.embedding_retrieval([1.0, 0.0, 0.0, 0.0], top_k=top_k)),
+        ranked(expected.embedding_retrieval([0.0, 0.0, 1.0, 1.0], top_k=top_k)),
+    ]
+
+
+def test_deletes_and_version():
+    store = ShardedDocumentStore(num_shards=2)
+    try:
+        documents = [Document(content=f"text {i}") for i in range(10)]
+        store.write_documents(documents)
+        version = store.version
+        store.delete_documents([doc.id for doc in documents[:4]])
+        assert store.version > version
+        assert store.filter_documents() == documents[4:]
+    finally:
+        store.close()
@@ -0,0 +1,67 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from haystack import Document
+
+from tool_rag import BM25Index, BM25IndexRetriever, cache_tool_results
+
+FACTS = [
+    "My name is Mark and I live in Berlin",
+    "My name is Giorgio and I live in Rome",
+    "My name is Jean and I live in Paris",
+    "Berlin is the capital of Germany",
+]
+
+
+def test_search_ranks_matching_documents_first():
+    index = BM25Index(max_df=0.5)
+    assert index.write_documents([Document(content=fact) for fact in FACTS] + [Document(content=None)]) == 4
+    found = index.search("Who lives in Berlin?", top_k=2)
+    assert {doc.content for doc in found} == {FACTS[0], FACTS[3]}
+    assert found[0].score >= found[1].score
+
+
+def test_search_falls_back_to_common_terms():
+    # Every term of the query is in more than max_df of the documents.
+    index = BM25Index(max_df=0.25)
+    index.write_documents([Document(content=fact) for fact in FACTS])
+    assert len(index.search("my name live", top_k=5)) == 3
+
+
+def test_retriever_round_trip_keeps_settings():
+    retriever = BM25IndexRetriever(index=BM25Index(k1=1.2, max_df=0.4), top_k=2, scale_score=True)
+    restored = BM25IndexRetriever.from_dict(retriever.to_dict())
+    assert (restored.index.k1, restored.index.max_df, restored.top_k, restored.scale_score) == (1.2, 0.4, 2, True)
+
+
+def test_cached_tool_runs_once_per_arguments():
+    calls = []
+
+    @cache_tool_results(max_entries=8)
+    def tool(query: str, top_k: int = 3):
+        calls.append((query, top_k))
+        return f"{query}:{top_k}"
+
+    assert tool("berlin") == tool(query="berlin", top_k=3) == "berlin:3"
+    assert tool("berlin", top_k=1) == "berlin:1"
+    assert calls == [("berlin", 3), ("berlin", 1)]
+    assert tool.cache.stats == {"hits": 1, "misses": 2, "coalesced": 0}
+
+
+def test_concurrent_calls_with_the_same_arguments_are_coalesced():
+    release = threading.Event()
+    calls = []
+
+    @cache_tool_results()
+    def tool(query: str):
+        calls.append(query)
+        release.wait(5)
+        return query.upper()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(tool, "rome") for _ in range(4)]
+        while tool.cache.stats["coalesced"] < 3:
+            threading.Event().wait(0.01)
+        release.set()
+        assert [future.result() for future in futures] == ["ROME"] * 4
+    assert calls == ["rome"]
@@ -0,0 +1,237 @@
+# Saves a built pipeline to a single artifact that workers load lazily, to cut cold-start time.
+
+import copy
+import importlib
+import pickle
+import threading
+from typing import Any, Dict, List, Optional, Union
+
+from haystack import Pipeline, component
+from haystack.core.component.sockets import Sockets
+from haystack.core.component.types import InputSocket, OutputSocket
+from haystack.core.serialization import component_from_dict, component_to_dict
+from haystack.document_stores.in_memory import InMemoryDocumentStore
+from haystack.version import __version__
+
+FORMAT_VERSION = 1
+
+
+def _snapshot_stores(instance: Any) -> Dict[str, Any]:
+    # In-memory stores a component holds, by attribute name: the ones whose contents live only in this process.
+    return {name: value for name, value in vars(instance).items() if isinstance(value, InMemoryDocumentStore)}
+
+
+def _socket_specs(sockets: Dict[str, Any]) -> Dict[str, Any]:
+    # Pickled as is (not rebuilt) so variadic types stay unwrapped; senders and receivers are reset and
+    # re-created by Pipeline.connect on load.
+    specs = {}
+    for name, socket in sockets.items():
+        spec = copy.copy(socket)
+        if isinstance(spec, InputSocket):
+            spec.senders = []
+        else:
+            spec.receivers = []
+        specs[name] = spec
+    return specs
+
+
+def save_pipeline(pipeline: Pipeline, path: str) -> Dict[str, int]:
+    """
+    Saves a built pipeline and everything it needs to serve queries to a single file.
+
+    The artifact holds each component's `to_dict()` config, its input and output sockets, the connections,
+    and a snapshot of every `InMemoryDocumentStore` the components hold, so the documents, embeddings and
+    BM25 statistics don't have to be rebuilt. A store shared by several components is saved once and is
+    shared again after loading. Prompt templates and router routes are part of the component configs.
+
+    :param pipeline: The pipeline to save. Every component must support `to_dict()`, and stores other than
+        in-memory ones must be reachable from their config alone (like remote databases are).
+    :param path: File to write.
+    :returns: The size of the artifact in `bytes`, and how much of it is store snapshots, in `store_bytes`.
+    """
+    stores: Dict[int, bytes] = {}
+    components: Dict[str, Dict[str, Any]] = {}
+    for name, instance in pipeline.graph.nodes(data="instance"):
+        if isinstance(instance, _LazyComponent) and instance._instance is None:
+            spec = dict(instance._spec)
+            spec["stores"] = {}
+            for param, key in instance._spec["stores"].items():
+                blob = instance._artifact.store_blob(key)
+                stores.setdefault(id(blob), blob)
+                spec["stores"][param] = id(blob)
+            components[name] = spec
+            continue
+        real = instance._instance if isinstance(instance, _LazyComponent) else instance
+        data = component_to_dict(real)
+        held = _snapshot_stores(real)
+        for store in held.values():
+            if id(store) not in stores:
+                stores[id(store)] = pickle.dumps(store, protocol=pickle.HIGHEST_PROTOCOL)
+        components[name] = {
+            "data": data,
+            "inputs": _socket_specs(instance.__haystack_input__._sockets_dict),  # type: ignore[attr-defined]
+            "outputs": _socket_specs(instance.__haystack_output__._sockets_dict),  # type: ignore[attr-defined]
+            "is_greedy": getattr(instance, "__haystack_is_greedy__", False),
+            "stores": {param: id(store) for param, store in held.items() if param in data.get("init_parameters", {})},
+        }
+
+    artifact = {
+        "format": FORMAT_VERSION,
+        "haystack_version": __version__,
+        "metadata": pipeline.metadata,
+        "max_loops_allowed": pipeline.max_loops_allowed,
+        "components": components,
+        "connections": [
+            (f"{sender}.{data['from_socket'].name}", f"{receiver}.{data['to_socket'].name}")
+            for sender, receiver, data in pipeline.graph.edges(data=True)
+        ],
+        "stores": stores,
+    }
+    data = pickle.dumps(artifact, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(path, "wb") as f:
+        f.write(data)
+    return {"bytes": len(data), "store_bytes": sum(len(blob) for blob in stores.values())}
+
+
+class _Artifact:
+    """
+    The store snapshots of a loaded artifact, unpickled on first use and shared by the components using them.
+    """
+
+    def __init__(self, stores: Dict[int, bytes]):
+        self._blobs = stores
+        self._stores: Dict[int, Any] = {}
+        self.lock = threading.RLock()
+
+    def store_blob(self, key: int) -> bytes:
+        return self._blobs[key]
+
+    def store(self, key: int) -> Any:
+        with self.lock:
+            if key not in self._stores:
+                self._stores[key] = pickle.loads(self._blobs[key])
+            return self._stores[key]
+
+
+class _LazyComponent:
+    """
+    Stands in for a component in a loaded pipeline until it first runs.
+
+    It carries the component's sockets, so the pipeline can be connected, validated and compiled without
+    importing the component's module. The first `run()` (or any attribute that isn't a socket) builds the
+    component from its config, attaches the restored stores, warms it up and from then on delegates to it.
+    """
+
+    def __init__(self, spec: Dict[str, Any], artifact: _Artifact):
+        self.__dict__["_spec"] = spec
+        self.__dict__["_artifact"] = artifact
+        self.__dict__["_instance"] = None
+        self.__dict__["__haystack_input__"] = Sockets(self, _socket_specs(spec["inputs"]), InputSocket)
+        self.__dict__["__haystack_output__"] = Sockets(self, _socket_specs(spec["outputs"]), OutputSocket)
+        self.__dict__["__haystack_is_greedy__"] = spec["is_greedy"]
+
+    @property
+    def materialized(self) -> bool:
+        return self._instance is not None
+
+    def materialize(self) -> Any:
+        """
+        Builds, warms up and returns the real component, once.
+        """
+        if self._instance is not None:
+            return self._instance
+        with self._artifact.lock:
+            if self._instance is None:
+                data = copy.deepcopy(self._spec["data"])
+                # Build with empty stores and attach the restored ones, which may be shared with other components.
+                for param in self._spec["stores"]:
+                    data["init_parameters"][param] = InMemoryDocumentStore().to_dict()
+                if data["type"] not in component.registry:
+                    importlib.import_module(data["type"].rsplit(".", 1)[0])
+                instance = component_from_dict(component.registry[data["type"]], data, data["type"])
+                for param, key in self._spec["stores"].items():
+                    setattr(instance, param, self._artifact.store(key))
+                if hasattr(instance, "warm_up"):
+                    instance.warm_up()
+                self.__dict__["_instance"] = instance
+        return self._instance
+
+    def warm_up(self):
+        # Pipeline.run and CompiledPipeline call this on every component; loading waits for the first run.
+        pass
+
+    def run(self, **kwargs):
+        return self.materialize().run(**kwargs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return component_to_dict(self._instance) if self._instance is not None else self._spec["data"]
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.materialize(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        if name.startswith("__haystack"):
+            self.__dict__[name] = value
+        else:
+            setattr(self.materialize(), name, value)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._instance is not None else "not loaded"
+        return f"<lazy {self._spec['data']['type']} ({state})>"
+
+
+def load_pipeline(path: str, lazy: bool = True, check_version: bool = True) -> Pipeline:
+    """
+    Loads a pipeline saved with `save_pipeline`.
+
+    With `lazy=True` no component is built when loading: each one is built, gets its stores and is warmed up
+    (loading its model, if any) the first time it runs, so a worker that never reaches a component never pays
+    for it. Components are built from their configs, so their modules must be importable where the artifact is
+    loaded; components defined in a notebook must be defined before loading.
+
+    The artifact is a pickle file: only load artifacts you made.
+
+    Usage example:
+    ```python
+    save_pipeline(rag, "rag.pipeline")         # once, after building and indexing
+    rag = load_pipeline("rag.pipeline")       # in each worker
+    ```
+
+    :param path: File written by `save_pipeline`.
+    :param lazy: Build components on first use instead of now.
+    :param check_version: Refuse artifacts saved with another Haystack version.
+    :raises ValueError: If the artifact has another format or Haystack version.
+    """
+    with open(path, "rb") as f:
+        artifact = pickle.load(f)
+    if artifact.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a pipeline artifact of format {FORMAT_VERSION}.")
+    if check_version and artifact["haystack_version"] != __version__:
+        raise ValueError(
+            f"{path} was saved with Haystack {artifact['haystack_version']}, this is {__version__}; "
+            "save it again or pass check_version=False."
+        )
+
+    stores = _Artifact(artifact["stores"])
+    pipeline = Pipeline(metadata=artifact["metadata"], max_loops_allowed=artifact["max_loops_allowed"])
+    for name, spec in artifact["components"].items():
+        pipeline.add_component(name, _LazyComponent(spec, stores))
+    for sender, receiver in artifact["connections"]:
+        pipeline.connect(sender, receiver)
+    if not lazy:
+        materialize(pipeline)
+    return pipeline
+
+
+def materialize(pipeline: Union[Pipeline, Any], names: Optional[List[str]] = None):
+    """
+    Builds the lazy components of a loaded pipeline now, e.g. to load models before taking traffic.
+
+    :param pipeline: A pipeline from `load_pipeline` (or a `CompiledPipeline` of one).
+    :param names: Components to build; all of them by default.
+    """
+    for name, instance in pipeline.graph.nodes(data="instance"):
+        if isinstance(instance, _LazyComponent) and (names is None or name in names):
+            instance.materialize()